@@ -5,3 +5,10 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
     verbose_name = 'Gestión de Usuarios'
+
+    def ready(self):
+        from django.db.models.signals import post_save, post_delete
+        from .authentication import invalidate_cached_user
+        from .models import User
+        post_save.connect(invalidate_cached_user, sender=User, dispatch_uid='accounts_user_cache')
+        post_delete.connect(invalidate_cached_user, sender=User, dispatch_uid='accounts_user_cache')
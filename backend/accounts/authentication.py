@@ -0,0 +1,127 @@
+"""
+Autenticación JWT con los usuarios resueltos desde un cache del proceso.
+
+JWTAuthentication lee la fila del usuario en cada request. Acá se guardan
+sus campos por USER_CACHE_SECONDS, indexados por id. Cada entrada recuerda
+la marca del usuario en la caché de Django (`auth:user:<id>`), que se
+renueva al guardar o borrar el usuario: con una caché compartida los demás
+workers descartan su entrada en el request siguiente. Con la caché local
+(LocMemCache) la marca no sale del proceso y los demás workers aceptan al
+usuario viejo hasta que vence el TTL, por eso ahí es de pocos segundos.
+
+Cada token lleva la versión de token del usuario (claim `ver`):
+User.revoke_tokens() la incrementa y los tokens anteriores dejan de aceptarse.
+"""
+import threading
+import time
+import uuid
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+def _stamp_key(pk):
+    return f'auth:user:{pk}'
+
+
+class UserCache:
+    """
+    Valores de los campos concretos de cada usuario con vencimiento y la
+    marca compartida con la que se leyeron. Cada get arma una instancia
+    nueva para que los requests no compartan objetos.
+    """
+    max_entries = 5000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, model, pk):
+        entry = self._entries.get(pk)
+        if entry is None:
+            return None
+        expires, stamp, db, names, values = entry
+        if expires < time.monotonic() or cache.get(_stamp_key(pk)) != stamp:
+            self._discard(pk)
+            return None
+        return model.from_db(db, names, values)
+
+    def set(self, user, stamp):
+        """`stamp` es la marca leída antes de consultar al usuario (ver stamp())"""
+        names = [field.attname for field in user._meta.concrete_fields]
+        values = [getattr(user, name) for name in names]
+        expires = time.monotonic() + getattr(settings, 'USER_CACHE_SECONDS', 5)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[user.pk] = (expires, stamp, user._state.db, names, values)
+
+    def stamp(self, pk):
+        return cache.get(_stamp_key(pk))
+
+    def invalidate(self, pk):
+        """Renueva la marca compartida; las entradas con la marca anterior dejan de valer"""
+        self._discard(pk)
+        # Dura lo mismo que una entrada: si la marca vence, la entrada tampoco coincide
+        cache.set(_stamp_key(pk), uuid.uuid4().hex, getattr(settings, 'USER_CACHE_SECONDS', 5))
+
+    def _discard(self, pk):
+        with self._lock:
+            self._entries.pop(pk, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache()
+
+
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    # El login solo actualiza last_login, que no interviene en la autenticación
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    user_cache.invalidate(instance.pk)
+    # Otro worker pudo releer la fila vieja antes de que se confirme la transacción
+    transaction.on_commit(partial(user_cache.invalidate, instance.pk), robust=True)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Igual que JWTAuthentication (firma, vencimiento, usuario activo,
+    CHECK_REVOKE_TOKEN) pero sin consultar la base si el usuario está en
+    cache, y rechazando tokens de una versión anterior
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        user = user_cache.get(self.user_model, user_id)
+        if user is None:
+            stamp = user_cache.stamp(user_id)
+            user = super().get_user(validated_token)
+            user_cache.set(user, stamp)
+        elif api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+
+        check_token_version(validated_token, user)
+        return user
+
+
+def check_token_version(token, user):
+    if token.get(TOKEN_VERSION_CLAIM, 0) != user.token_version:
+        raise AuthenticationFailed('El token fue revocado', code='token_revoked')
@@ -43,6 +43,8 @@ class User(AbstractUser):
     phone = models.CharField('Teléfono', max_length=20, blank=True, null=True)
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
     updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
+    # Se incrementa para invalidar todos los tokens emitidos (claim `ver`)
+    token_version = models.PositiveIntegerField('Versión de token', default=0, editable=False)
 
     objects = UserManager()
 
@@ -57,6 +59,29 @@ class User(AbstractUser):
     def __str__(self):
         return f"{self.get_full_name()} ({self.get_role_display()})"
 
+    def revoke_tokens(self):
+        """
+        Invalida los tokens emitidos hasta ahora (cierre de sesión en todos los dispositivos)
+        """
+        self.token_version += 1
+        self.save(update_fields=['token_version', 'updated_at'])
+
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        self._password_changed = self.pk is not None
+
+    def save(self, *args, **kwargs):
+        # Un cambio de contraseña invalida los tokens anteriores. La
+        # actualización automática del hash al iniciar sesión guarda solo
+        # `password` y no debe revocar el token que se está por emitir.
+        update_fields = kwargs.get('update_fields')
+        if getattr(self, '_password_changed', False):
+            if update_fields is None or 'token_version' in update_fields:
+                self.token_version += 1
+            if update_fields is None or 'password' in update_fields:
+                self._password_changed = False
+        super().save(*args, **kwargs)
+
     @property
     def is_admin(self):
         return self.role == 'ADMIN'
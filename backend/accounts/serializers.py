@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import TOKEN_VERSION_CLAIM, check_token_version
 
 User = get_user_model()
 
@@ -24,6 +28,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
     Serializer personalizado para incluir información del usuario en el token
     """
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
         
@@ -40,6 +50,21 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         return data
 
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Rechaza refresh tokens de usuarios inactivos o de una versión de token anterior
+    """
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)}
+        ).only('is_active', 'token_version').first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed('Usuario inexistente o inactivo', code='user_inactive')
+        check_token_version(refresh, user)
+        return super().validate(attrs)
+
+
 class RegisterSerializer(serializers.ModelSerializer):
     """
     Serializer para el registro de usuarios
@@ -0,0 +1,70 @@
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from .authentication import UserCache, user_cache
+from .models import User
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        self.user = User.objects.create_user(
+            email='emp@shalom.com', password='pass', first_name='E', last_name='M'
+        )
+        self.client = APIClient()
+        response = self.client.post('/api/auth/login/', {'email': 'emp@shalom.com', 'password': 'pass'})
+        self.tokens = response.json()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+
+    def test_cached_user_saves_the_user_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/auth/check/').status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/auth/check/')
+        self.assertEqual(response.json()['user']['email'], 'emp@shalom.com')
+
+    def test_saving_the_user_invalidates_the_cache(self):
+        self.client.get('/api/auth/check/')
+        self.user.role = 'ADMIN'
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/check/').json()['user']['role'], 'ADMIN')
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/check/').status_code, 401)
+
+    def test_other_workers_drop_the_user_through_the_shared_stamp(self):
+        # Otro worker: su propio diccionario, la misma caché de Django
+        other = UserCache()
+        other.set(self.user, other.stamp(self.user.pk))
+        self.assertIsNotNone(other.get(User, self.user.pk))
+
+        self.user.revoke_tokens()
+        self.assertIsNone(other.get(User, self.user.pk))
+
+    def test_revoked_tokens_are_rejected(self):
+        self.client.get('/api/auth/check/')
+        self.assertEqual(self.client.post('/api/auth/logout-all/').status_code, 204)
+
+        self.assertEqual(self.client.get('/api/auth/check/').status_code, 401)
+        refresh = self.client.post('/api/auth/refresh/', {'refresh': self.tokens['refresh']})
+        self.assertEqual(refresh.status_code, 401)
+
+    def test_password_change_revokes_tokens(self):
+        self.user.set_password('nueva')
+        self.user.save()
+        self.assertEqual(self.client.get('/api/auth/check/').status_code, 401)
+
+    def test_hash_upgrade_on_login_keeps_the_token_valid(self):
+        # Hash con menos iteraciones que las actuales: el login lo actualiza
+        legacy = PBKDF2PasswordHasher().encode('pass', 'saltsalt', iterations=1000)
+        User.objects.filter(pk=self.user.pk).update(password=legacy)
+        user_cache.clear()
+
+        response = self.client.post('/api/auth/login/', {'email': 'emp@shalom.com', 'password': 'pass'})
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertNotEqual(self.user.password, legacy)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+        self.assertEqual(self.client.get('/api/auth/check/').status_code, 200)
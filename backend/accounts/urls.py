@@ -1,11 +1,11 @@
 from django.urls import path
-from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
 
 urlpatterns = [
     # Authentication
     path('login/', views.CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('refresh/', views.CustomTokenRefreshView.as_view(), name='token_refresh'),
+    path('logout-all/', views.logout_all, name='logout_all'),
     path('register/', views.RegisterView.as_view(), name='register'),
     
     # User Management
@@ -2,12 +2,13 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import get_user_model
 
 from .serializers import (
     UserSerializer,
     CustomTokenObtainPairSerializer,
+    CustomTokenRefreshSerializer,
     RegisterSerializer
 )
 
@@ -21,6 +22,13 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
 
 
+class CustomTokenRefreshView(TokenRefreshView):
+    """
+    Renovación de tokens que respeta la revocación por versión de token
+    """
+    serializer_class = CustomTokenRefreshSerializer
+
+
 class RegisterView(generics.CreateAPIView):
     """
     Vista para registrar nuevos usuarios (solo para Administradores)
@@ -58,6 +66,16 @@ def user_list(request):
     return Response(serializer.data)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def logout_all(request):
+    """
+    Revoca todos los tokens del usuario (access y refresh) en todos los dispositivos
+    """
+    request.user.revoke_tokens()
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def check_auth(request):
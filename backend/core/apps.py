@@ -0,0 +1,22 @@
+from django.apps import AppConfig
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'core'
+    verbose_name = 'Infraestructura'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from .database import configure_connection
+        from .sync import connect_signals as connect_sync_signals
+        from .versioning import connect_signals
+        connect_signals()
+        connect_sync_signals()
+        connection_created.connect(configure_connection)
+
+        # Registra las tareas en segundo plano (@job) de los módulos jobs.py
+        # y los handlers del outbox (@handler) de los módulos handlers.py
+        from django.utils.module_loading import autodiscover_modules
+        autodiscover_modules('jobs')
+        autodiscover_modules('handlers')
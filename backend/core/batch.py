@@ -0,0 +1,160 @@
+"""
+Varios GET de la API en un solo request (/api/batch/).
+
+Las páginas que al abrirse piden productos, categorías, clientes, vehículos
+y la orden pagan por cada request la autenticación JWT, los middlewares,
+CORS y el handshake. Con /api/batch/ el frontend los envía juntos:
+
+    POST /api/batch/
+    {"requests": [
+        {"id": "order", "path": "/api/services/orders/15/"},
+        {"id": "categories", "path": "/api/inventory/products/categories/",
+         "headers": {"If-None-Match": "\"abc...\""}}
+    ]}
+
+y recibe {"responses": [{"id", "status", "etag", "body"}]} en el mismo
+orden. Cada ruta se resuelve con el URL resolver y se ejecuta su vista con
+el usuario ya autenticado del request principal (sin volver a decodificar
+el token). En PostgreSQL las vistas corren en paralelo, cada una con su
+conexión; en SQLite, en serie. Solo se admiten GET de /api/ con respuesta
+JSON: las descargas (PDF, CSV, XLSX) deben pedirse por separado.
+"""
+import logging
+from urllib.parse import urlsplit
+
+import orjson
+from asgiref.sync import async_to_sync
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from .concurrency import run_with_deadline
+
+logger = logging.getLogger('shalom.performance')
+
+# Encabezados del request principal que no se pasan a las vistas
+_DROPPED_META = {
+    'CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE',
+    'QUERY_STRING', 'PATH_INFO', 'REQUEST_METHOD', 'wsgi.input',
+}
+# Encabezados que cada sub-request puede enviar
+ALLOWED_HEADERS = {'if-none-match': 'HTTP_IF_NONE_MATCH', 'if-modified-since': 'HTTP_IF_MODIFIED_SINCE'}
+
+
+class BatchError(ValueError):
+    pass
+
+
+def parse_requests(payload, max_requests):
+    """
+    Valida la lista de sub-requests. Retorna [(id, path, query, headers)].
+    """
+    requests = payload.get('requests') if isinstance(payload, dict) else None
+    if not isinstance(requests, list) or not requests:
+        raise BatchError('Debe enviar una lista de requests')
+    if len(requests) > max_requests:
+        raise BatchError(f'El lote no puede tener más de {max_requests} requests')
+
+    parsed = []
+    for index, item in enumerate(requests):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise BatchError(f'El request {index} debe tener una ruta (path)')
+        if item.get('method', 'GET').upper() != 'GET':
+            raise BatchError('Solo se admiten requests GET')
+        url = urlsplit(item['path'])
+        if url.scheme or url.netloc or not url.path.startswith('/api/'):
+            raise BatchError(f'Ruta no admitida: {item["path"]}')
+        headers = item.get('headers') or {}
+        if not isinstance(headers, dict) or set(map(str.lower, headers)) - set(ALLOWED_HEADERS):
+            raise BatchError(f'Encabezados admitidos: {", ".join(ALLOWED_HEADERS)}')
+        parsed.append((item.get('id', index), url.path, url.query, headers))
+    return parsed
+
+
+def _subrequest(request, path, query, headers):
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.META = {key: value for key, value in request.META.items() if key not in _DROPPED_META}
+    sub.META.update(REQUEST_METHOD='GET', PATH_INFO=path, QUERY_STRING=query)
+    # Mismo Accept que un GET directo (forma parte del ETag) salvo que pida otro formato
+    accept = sub.META.get('HTTP_ACCEPT', '').strip()
+    if accept not in ('', '*/*') and 'application/json' not in accept:
+        sub.META['HTTP_ACCEPT'] = 'application/json'
+    for name, value in headers.items():
+        sub.META[ALLOWED_HEADERS[name.lower()]] = str(value)
+    sub.GET = QueryDict(query)
+    # DRF usa el usuario forzado en lugar de volver a autenticar
+    sub.user = request.user
+    sub._force_auth_user = request.user
+    sub._force_auth_token = request.auth
+    return sub
+
+
+async def _await(coroutine):
+    return await coroutine
+
+
+def _error(status, message):
+    return status, None, orjson.dumps({'error': message})
+
+
+def dispatch(request, path, query, headers):
+    """
+    Ejecuta la vista de `path`. Retorna (status, etag, cuerpo JSON en bytes).
+    """
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return _error(404, 'Ruta inexistente')
+    if getattr(match.func, 'batch_exempt', False):
+        return _error(400, 'Esta ruta no se puede incluir en un lote')
+
+    sub = _subrequest(request, path, query, headers)
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+        if hasattr(response, '__await__'):
+            response = async_to_sync(_await)(response)
+    except Http404:
+        return _error(404, 'No encontrado')
+    except PermissionDenied:
+        return _error(403, 'Sin permiso')
+    except Exception:
+        logger.exception('Error en el request %s del lote', path)
+        return _error(500, 'Error interno')
+
+    if response.streaming:
+        response.close()
+        return _error(406, 'Las descargas no se pueden incluir en un lote')
+    if hasattr(response, 'render'):
+        response.render()
+    content_type = response.get('Content-Type', '')
+    if response.status_code == 304 or not response.content:
+        body = b'null'
+    elif content_type.startswith('application/json'):
+        body = response.content
+    else:
+        return _error(406, 'La respuesta no es JSON')
+    return response.status_code, response.get('ETag'), body
+
+
+def run_batch(request, requests, timeout):
+    """
+    Ejecuta los sub-requests (en paralelo si la base lo permite) y arma el
+    sobre de respuesta sin volver a serializar los cuerpos.
+    """
+    tasks = {
+        index: (lambda path=path, query=query, headers=headers: dispatch(request, path, query, headers))
+        for index, (_, path, query, headers) in enumerate(requests)
+    }
+    results, pending = run_with_deadline(tasks, timeout)
+    for index in pending:
+        results[index] = _error(504, 'Tiempo de espera agotado')
+
+    parts = []
+    for index, (request_id, *_) in enumerate(requests):
+        status, etag, body = results[index]
+        meta = orjson.dumps({'id': request_id, 'status': status, 'etag': etag})
+        parts.append(meta[:-1] + b',"body":' + body + b'}')
+    return b'{"responses":[' + b','.join(parts) + b']}'
@@ -0,0 +1,337 @@
+"""
+Suite de benchmark de endpoints: ejecuta cada escenario con el cliente de
+pruebas de Django, mide latencia y cantidad de consultas, y genera un reporte
+JSON comparable entre commits.
+"""
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.conf import settings
+
+from accounts.models import User
+from accounts.serializers import CustomTokenObtainPairSerializer
+from crm.models import Customer, Vehicle
+from inventory.models import Product, StockMovement
+from services.models import ServiceOrder, ServiceItem, Invoice
+
+
+class Rollback(Exception):
+    pass
+
+
+class Scenario:
+    """
+    Un endpoint a medir. `path` puede contener campos de formato que se
+    completan con los ids de muestra (ver sample_ids). Los escenarios que
+    modifican datos se ejecutan dentro de una transacción que se revierte.
+    """
+    def __init__(self, name, path, method='get', data=None, group='list'):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.data = data
+        self.group = group
+
+    @property
+    def mutating(self):
+        return self.method != 'get'
+
+
+SCENARIOS = [
+    # Listados
+    Scenario('customers.list', '/api/crm/customers/'),
+    Scenario('customers.list.search', '/api/crm/customers/?search=gonz'),
+    Scenario('vehicles.list', '/api/crm/vehicles/'),
+    Scenario('products.list', '/api/inventory/products/'),
+    Scenario('movements.list', '/api/inventory/movements/'),
+    Scenario('orders.list', '/api/services/orders/'),
+    Scenario('orders.list.completed', '/api/services/orders/?status=COMPLETED'),
+    Scenario('invoices.list', '/api/services/invoices/'),
+    Scenario('customers.segments', '/api/crm/customers/segments/'),
+    # Detalles
+    Scenario('customers.detail', '/api/crm/customers/{customer}/', group='detail'),
+    Scenario('customers.vehicles', '/api/crm/customers/{customer}/vehicles/', group='detail'),
+    Scenario('vehicles.detail', '/api/crm/vehicles/{vehicle}/', group='detail'),
+    Scenario('products.detail', '/api/inventory/products/{product}/', group='detail'),
+    Scenario('orders.detail', '/api/services/orders/{order}/', group='detail'),
+    Scenario('orders.by_vehicle', '/api/services/orders/by_vehicle/?vehicle_id={vehicle}', group='detail'),
+    Scenario('invoices.detail', '/api/services/invoices/{invoice}/', group='detail'),
+    Scenario('quick_card', '/api/services/quick-card/{plate}/', group='detail'),
+    # Búsquedas
+    Scenario('search.global.plate', '/api/search/?q={plate_prefix}', group='search'),
+    Scenario('search.global.name', '/api/search/?q=gonzalez', group='search'),
+    Scenario('vehicles.search_by_plate', '/api/crm/vehicles/search_by_plate/?plate={plate}', group='search'),
+    Scenario('products.low_stock', '/api/inventory/products/low_stock/', group='search'),
+    Scenario('products.categories', '/api/inventory/products/categories/', group='search'),
+    # Estadísticas
+    Scenario('customers.statistics', '/api/crm/customers/statistics/', group='statistics'),
+    Scenario('orders.statistics', '/api/services/orders/statistics/', group='statistics'),
+    Scenario('invoices.statistics', '/api/services/invoices/statistics/', group='statistics'),
+    # Acciones (revertidas)
+    Scenario('orders.complete', '/api/services/orders/{pending_order}/complete/', 'post', group='action'),
+    Scenario('orders.cancel', '/api/services/orders/{pending_order}/cancel/', 'post', group='action'),
+    Scenario('invoices.mark_as_paid', '/api/services/invoices/{issued_invoice}/mark_as_paid/', 'post', group='action'),
+    Scenario('products.adjust_stock', '/api/inventory/products/{product}/adjust_stock/', 'post',
+             {'movement_type': 'COMPRA', 'quantity': 1, 'reason': 'benchmark'}, group='action'),
+    Scenario('vehicles.update_mileage', '/api/crm/vehicles/{vehicle}/update_mileage/', 'patch',
+             {'current_mileage': 999999}, group='action'),
+]
+
+
+# Requests que dispara cada página del frontend al abrirse (ver /api/batch/)
+PAGE_LOADS = {
+    'service_order_page': [
+        '/api/services/orders/{order}/',
+        '/api/inventory/products/',
+        '/api/inventory/products/categories/',
+        '/api/crm/customers/',
+        '/api/crm/vehicles/',
+    ],
+    'customer_page': [
+        '/api/crm/customers/{customer}/',
+        '/api/crm/customers/{customer}/vehicles/',
+        '/api/services/orders/?customer={customer}',
+        '/api/services/quick-card/{plate}/',
+    ],
+}
+
+
+def sample_ids():
+    """
+    Ids de muestra para completar las rutas de detalle y acciones
+    """
+    vehicle = Vehicle.objects.order_by('-id').values('id', 'plate').first() or {}
+    plate = vehicle.get('plate', '')
+    return {
+        'customer': Customer.objects.order_by('-id').values_list('id', flat=True).first(),
+        'vehicle': vehicle.get('id'),
+        'plate': plate,
+        'plate_prefix': plate[:3],
+        'product': Product.objects.order_by('-id').values_list('id', flat=True).first(),
+        'order': ServiceOrder.objects.order_by('-id').values_list('id', flat=True).first(),
+        'pending_order': ServiceOrder.objects.filter(status='PENDING').order_by('-id')
+        .values_list('id', flat=True).first(),
+        'invoice': Invoice.objects.order_by('-id').values_list('id', flat=True).first(),
+        'issued_invoice': Invoice.objects.filter(status='ISSUED').order_by('-id')
+        .values_list('id', flat=True).first(),
+    }
+
+
+def dataset_size():
+    return {
+        'customers': Customer.objects.count(),
+        'vehicles': Vehicle.objects.count(),
+        'products': Product.objects.count(),
+        'orders': ServiceOrder.objects.count(),
+        'items': ServiceItem.objects.count(),
+        'invoices': Invoice.objects.count(),
+        'movements': StockMovement.objects.count(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=settings.BASE_DIR, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def percentile(sorted_values, fraction):
+    """
+    Percentil con interpolación lineal sobre una lista ordenada
+    """
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(latencies):
+    values = sorted(latencies)
+    return {
+        'p50': round(percentile(values, 0.50), 2),
+        'p95': round(percentile(values, 0.95), 2),
+        'p99': round(percentile(values, 0.99), 2),
+        'mean': round(statistics.fmean(values), 2) if values else 0.0,
+        'min': round(values[0], 2) if values else 0.0,
+        'max': round(values[-1], 2) if values else 0.0,
+    }
+
+
+class BenchmarkRunner:
+    def __init__(self, user=None, iterations=20, warmup=2):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.user = user or self._benchmark_user()
+        self.client = Client(
+            HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(self.user).access_token}',
+            HTTP_HOST='localhost',
+        )
+
+    @staticmethod
+    def _benchmark_user():
+        user = User.objects.filter(is_active=True, role='ADMIN').order_by('id').first()
+        if user is None:
+            user = User.objects.create_user(
+                email='benchmark@shalom.local', password=None,
+                first_name='Benchmark', last_name='Shalom', role='ADMIN'
+            )
+        return user
+
+    def _request(self, scenario, path):
+        method = getattr(self.client, scenario.method)
+        if scenario.data is None:
+            return method(path)
+        return method(path, scenario.data, content_type='application/json')
+
+    def _timed(self, scenario, path):
+        """
+        Ejecuta un request y retorna (ms, consultas, status, bytes). Los
+        escenarios que escriben se revierten para que cada iteración parta
+        del mismo estado.
+        """
+        result = {}
+        try:
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = self._request(scenario, path)
+                    elapsed = (time.perf_counter() - start) * 1000
+                result.update(
+                    ms=elapsed, queries=len(queries), status=response.status_code,
+                    bytes=len(response.content) if not response.streaming else 0,
+                )
+                if scenario.mutating:
+                    raise Rollback
+        except Rollback:
+            pass
+        return result
+
+    def run_scenario(self, scenario, ids):
+        try:
+            path = scenario.path.format(**ids)
+        except KeyError:
+            path = None
+        if path is None or 'None' in path:
+            return {'path': scenario.path, 'group': scenario.group, 'skipped': 'sin datos de muestra'}
+
+        for _ in range(self.warmup):
+            self._timed(scenario, path)
+        samples = [self._timed(scenario, path) for _ in range(self.iterations)]
+        query_counts = [s['queries'] for s in samples]
+        return {
+            'path': path,
+            'method': scenario.method.upper(),
+            'group': scenario.group,
+            'status': samples[-1]['status'],
+            'latency_ms': summarize([s['ms'] for s in samples]),
+            'queries': {'min': min(query_counts), 'max': max(query_counts)},
+            'response_bytes': samples[-1]['bytes'],
+        }
+
+    def _timed_page(self, paths, batched):
+        """
+        Carga de una página: un GET por recurso o un único POST a /api/batch/
+        """
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            if batched:
+                response = self.client.post(
+                    '/api/batch/', {'requests': [{'path': path} for path in paths]}, content_type='application/json'
+                )
+                statuses = [item['status'] for item in response.json()['responses']]
+            else:
+                statuses = [self.client.get(path).status_code for path in paths]
+            elapsed = (time.perf_counter() - start) * 1000
+        return {'ms': elapsed, 'queries': len(queries), 'statuses': statuses}
+
+    def run_page_loads(self, pages=PAGE_LOADS, log=None):
+        """
+        Compara cada página con requests separados y con /api/batch/. El
+        cliente de pruebas no mide red ni TLS: la diferencia es solo la
+        del servidor (autenticación, middlewares y despacho), más los
+        N - 1 viajes que se ahorra el navegador.
+        """
+        ids = sample_ids()
+        results = {}
+        for name, templates in pages.items():
+            try:
+                paths = [template.format(**ids) for template in templates]
+            except KeyError:
+                paths = []
+            if not paths or any('None' in path for path in paths):
+                results[name] = {'skipped': 'sin datos de muestra'}
+                continue
+            result = {'requests': len(paths)}
+            for mode, batched in (('separate', False), ('batch', True)):
+                for _ in range(self.warmup):
+                    self._timed_page(paths, batched)
+                samples = [self._timed_page(paths, batched) for _ in range(self.iterations)]
+                result[mode] = {
+                    'latency_ms': summarize([sample['ms'] for sample in samples]),
+                    'queries': samples[-1]['queries'],
+                    'statuses': samples[-1]['statuses'],
+                }
+            result['speedup_p50'] = round(
+                result['separate']['latency_ms']['p50'] / max(result['batch']['latency_ms']['p50'], 1e-6), 2
+            )
+            results[name] = result
+            if log:
+                log(name, result)
+        return {
+            'commit': git_commit(),
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+            'environment': {'python': platform.python_version(), 'database': connection.vendor},
+            'iterations': self.iterations,
+            'pages': results,
+        }
+
+    def run(self, scenarios=SCENARIOS, log=None):
+        ids = sample_ids()
+        results = {}
+        for scenario in scenarios:
+            results[scenario.name] = self.run_scenario(scenario, ids)
+            if log:
+                log(scenario.name, results[scenario.name])
+        return {
+            'commit': git_commit(),
+            'timestamp': datetime.now(dt_timezone.utc).isoformat(),
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+            },
+            'iterations': self.iterations,
+            'dataset': dataset_size(),
+            'results': results,
+        }
+
+
+def compare(baseline, current):
+    """
+    Diferencias de p50/p95 y consultas contra un reporte anterior
+    """
+    rows = []
+    for name, result in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if not before or 'skipped' in before or 'skipped' in result:
+            continue
+        rows.append({
+            'name': name,
+            'p50': (before['latency_ms']['p50'], result['latency_ms']['p50']),
+            'p95': (before['latency_ms']['p95'], result['latency_ms']['p95']),
+            'queries': (before['queries']['max'], result['queries']['max']),
+        })
+    return rows
@@ -0,0 +1,124 @@
+"""
+Ejecución concurrente de consultas independientes con un presupuesto de tiempo.
+"""
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from asgiref.sync import sync_to_async
+from django.db import DatabaseError, close_old_connections, connection
+
+
+# Pool compartido por proceso para no crear hilos en cada request
+_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='shalom-fanout')
+
+
+def supports_parallel_queries():
+    """
+    SQLite serializa los accesos y en los tests la transacción abierta no es
+    visible desde otras conexiones, por lo que se ejecuta en serie
+    """
+    return connection.vendor != 'sqlite'
+
+
+def _run_in_thread(func):
+    # Los hilos del pool conservan su conexión entre tareas, como un worker
+    # entre requests: CONN_MAX_AGE decide cuándo se cierra y las conexiones
+    # vencidas o con errores se descartan antes y después de cada tarea
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+def run_with_deadline(tasks, timeout):
+    """
+    Ejecuta las funciones de `tasks` ({nombre: callable}) y espera hasta
+    `timeout` segundos. Retorna (resultados, nombres_sin_terminar).
+
+    Las tareas que superan el plazo se descartan y en PostgreSQL el servidor
+    cancela su consulta (statement_timeout), así el hilo queda libre; en modo
+    serie, las tareas que quedan pendientes al vencer el plazo no se ejecutan.
+    """
+    results = {}
+    if not supports_parallel_queries():
+        deadline = time.monotonic() + timeout
+        pending = []
+        for name, func in tasks.items():
+            if time.monotonic() >= deadline:
+                pending.append(name)
+                continue
+            results[name] = func()
+        return results, pending
+
+    futures = {_executor.submit(_run_with_statement_timeout, func, timeout): name for name, func in tasks.items()}
+    done, not_done = wait(futures, timeout=timeout)
+    for future in done:
+        results[futures[future]] = future.result()
+    for future in not_done:
+        future.cancel()
+    return results, sorted(futures[f] for f in not_done)
+
+
+def _run_with_statement_timeout(func, timeout):
+    """
+    En PostgreSQL limita también la consulta en el servidor: al vencer el
+    plazo la espera se cancela, pero el hilo seguiría ocupando la conexión.
+    La conexión se reutiliza en la tarea siguiente, por eso el límite se
+    restablece al terminar.
+    """
+    def run():
+        if connection.vendor != 'postgresql':
+            return func()
+        with connection.cursor() as cursor:
+            cursor.execute('SET statement_timeout = %s', [max(int(timeout * 1000), 1)])
+        try:
+            return func()
+        finally:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute('RESET statement_timeout')
+            except DatabaseError:
+                # Sin poder restablecerlo no se reutiliza con el límite puesto
+                connection.close()
+    return _run_in_thread(run)
+
+
+async def gather_with_deadline(tasks, timeout):
+    """
+    Versión async de run_with_deadline para vistas async: cada tarea corre
+    en su propio hilo con `timeout` segundos como límite, de modo que la
+    latencia total es la de la tarea más lenta. Retorna (resultados,
+    nombres_sin_terminar).
+
+    Sin consultas paralelas (SQLite) se ejecutan en serie en el hilo de
+    Django y las tareas pendientes al vencer el plazo no se ejecutan.
+    """
+    results = {}
+    if not supports_parallel_queries():
+        deadline = time.monotonic() + timeout
+        pending = []
+        for name, func in tasks.items():
+            if time.monotonic() >= deadline:
+                pending.append(name)
+                continue
+            results[name] = await sync_to_async(func)()
+        return results, pending
+
+    loop = asyncio.get_running_loop()
+
+    async def run(name, func):
+        # En el pool compartido y no en el executor del loop: async_to_sync
+        # espera a ese executor al terminar y el request no respetaría el plazo
+        context = contextvars.copy_context()
+        future = loop.run_in_executor(_executor, context.run, _run_with_statement_timeout, func, timeout)
+        try:
+            results[name] = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return name
+        return None
+
+    outcomes = await asyncio.gather(*(run(name, func) for name, func in tasks.items()))
+    return results, sorted(name for name in outcomes if name)
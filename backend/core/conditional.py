@@ -0,0 +1,52 @@
+import hashlib
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from .versioning import table_versions
+
+
+class ConditionalGetMixin:
+    """
+    Respuestas condicionales para list y retrieve. El ETag se calcula con la
+    versión de las tablas de `etag_models` y la URL completa, sin ejecutar la
+    consulta; si coincide con If-None-Match se responde 304 sin cuerpo.
+
+    Los parámetros de `etag_exempt_params` dependen de la hora actual (por
+    ejemplo "sin órdenes en los últimos N días"): con ellos no se usa ETag.
+    """
+    etag_models = []
+    etag_exempt_params = []
+
+    def get_etag(self, request):
+        if any(param in request.query_params for param in self.etag_exempt_params):
+            return None
+        versions = table_versions(self.etag_models)
+        source = '|'.join([
+            request.get_full_path(),
+            request.META.get('HTTP_ACCEPT', ''),
+            *(f'{key}:{version}:{updated.timestamp() if updated else 0}' for key, version, updated in versions),
+        ])
+        return '"%s"' % hashlib.md5(source.encode()).hexdigest()
+
+    def _conditional(self, handler, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+
+        headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._conditional(super().retrieve, request, *args, **kwargs)
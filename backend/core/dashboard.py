@@ -0,0 +1,57 @@
+"""
+Dashboard administrativo en un solo request: las estadísticas de órdenes,
+facturas, clientes e inventario se calculan como consultas independientes
+en paralelo (ver gather_with_deadline), cada una con su límite de tiempo.
+"""
+import time
+
+from django.conf import settings
+
+from crm.statistics import CUSTOMER_STATISTICS
+from inventory.statistics import inventory_statistics, low_stock_products
+from services.statistics import order_statistics, invoice_statistics
+from .concurrency import gather_with_deadline
+
+
+# Cada sección se arma con el resultado de una o más consultas
+SECTIONS = {
+    'orders': [order_statistics],
+    'invoices': [invoice_statistics],
+    'customers': CUSTOMER_STATISTICS,
+    'inventory': [inventory_statistics],
+}
+
+
+def dashboard_tasks():
+    tasks = {
+        f'{section}.{part.__name__}': part
+        for section, parts in SECTIONS.items() for part in parts
+    }
+    tasks['low_stock_products'] = low_stock_products
+    return tasks
+
+
+async def build_dashboard(timeout=None):
+    """
+    Secciones con las mismas claves que los endpoints `statistics`; una
+    sección es null si alguna de sus consultas no terminó a tiempo
+    """
+    start = time.perf_counter()
+    if timeout is None:
+        timeout = getattr(settings, 'DASHBOARD_TIMEOUT_MS', 2000) / 1000
+    results, timed_out = await gather_with_deadline(dashboard_tasks(), timeout)
+
+    data = {}
+    for section, parts in SECTIONS.items():
+        values = [results.get(f'{section}.{part.__name__}') for part in parts]
+        if any(value is None for value in values):
+            data[section] = None
+            continue
+        data[section] = {}
+        for value in values:
+            data[section].update(value)
+    data['low_stock_products'] = results.get('low_stock_products')
+    data['partial'] = bool(timed_out)
+    data['timed_out'] = timed_out
+    data['took_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    return data
@@ -0,0 +1,20 @@
+"""
+Ajustes aplicados a cada conexión nueva a la base de datos.
+"""
+from django.conf import settings
+
+
+def sqlite_pragma_statements(pragmas):
+    return [f'PRAGMA {name} = {value}' for name, value in pragmas.items()]
+
+
+def configure_connection(sender, connection, **kwargs):
+    """
+    Receptor de connection_created: en SQLite aplica SQLITE_PRAGMAS (WAL,
+    synchronous, mmap, cache, busy timeout, temp_store). Se ejecutan sobre
+    la conexión DB-API para no contarlos como consultas del request.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    for statement in sqlite_pragma_statements(getattr(settings, 'SQLITE_PRAGMAS', {})):
+        connection.connection.execute(statement)
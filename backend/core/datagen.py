@@ -0,0 +1,393 @@
+"""
+Generador de datos sintéticos a escala para medir el comportamiento de la API.
+
+Las filas se arman como tuplas y se insertan con executemany en lotes, sin
+instanciar modelos ni compilar SQL por objeto (bulk_create resulta unas cinco
+veces más lento a esta escala). Los ids se asignan explícitamente para poder
+relacionar órdenes, ítems y facturas sin releerlos, y los campos derivados
+(subtotales, totales, IVA, números de orden y de factura) se calculan en
+memoria.
+"""
+import random
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from accounts.models import User
+from crm.models import Customer, Vehicle
+from inventory.models import Product, StockMovement
+from services.models import ServiceOrder, ServiceItem, Invoice
+from .versioning import bump_versions
+
+
+FIRST_NAMES = [
+    'Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Laura', 'Jorge', 'Silvia', 'Pablo',
+    'Lucía', 'Diego', 'Valeria', 'Martín', 'Florencia', 'Sergio', 'Gabriela',
+    'Ricardo', 'Natalia', 'Fernando', 'Carolina', 'Hernán', 'Romina', 'Gustavo',
+    'Verónica', 'Marcelo', 'Paula', 'Alejandro', 'Julieta', 'Roberto', 'Camila',
+]
+LAST_NAMES = [
+    'Pérez', 'González', 'Rodríguez', 'Fernández', 'López', 'Martínez', 'Gómez',
+    'Díaz', 'Sánchez', 'Romero', 'Sosa', 'Álvarez', 'Torres', 'Ruiz', 'Ramírez',
+    'Flores', 'Benítez', 'Acosta', 'Medina', 'Herrera', 'Suárez', 'Aguirre',
+    'Giménez', 'Gutiérrez', 'Pereyra', 'Rojas', 'Molina', 'Castro', 'Ortiz',
+    'Silva', 'Núñez', 'Luna', 'Juárez', 'Cabrera', 'Ríos', 'Ferreyra', 'Godoy',
+    'Morales', 'Domínguez', 'Moreno', 'Peralta', 'Vega', 'Carrizo', 'Quiroga',
+    'Castillo', 'Ledesma', 'Muñoz', 'Ojeda', 'Ponce', 'Vera', 'Villalba',
+]
+CITIES = ['Buenos Aires', 'Rosario', 'Córdoba', 'La Plata', 'Mendoza', 'Mar del Plata', 'Tucumán', 'Salta']
+VEHICLES = [
+    ('Toyota', ['Corolla', 'Etios', 'Hilux', 'Yaris']),
+    ('Ford', ['Focus', 'Ka', 'Fiesta', 'Ranger', 'EcoSport']),
+    ('Chevrolet', ['Onix', 'Cruze', 'Prisma', 'S10']),
+    ('Volkswagen', ['Gol Trend', 'Vento', 'Amarok', 'Polo']),
+    ('Fiat', ['Cronos', 'Palio', 'Uno', 'Toro']),
+    ('Renault', ['Sandero', 'Logan', 'Kangoo', 'Duster']),
+    ('Peugeot', ['208', '308', '2008', 'Partner']),
+]
+COLORS = ['Blanco', 'Negro', 'Gris', 'Rojo', 'Azul', 'Plata']
+ENGINES = ['1.4 Nafta', '1.6 Nafta', '1.8 Nafta', '2.0 Diesel', '2.8 Diesel']
+CATEGORIES = ['ACEITE', 'FILTRO_ACEITE', 'FILTRO_AIRE', 'FILTRO_COMBUSTIBLE', 'LUBRICANTE', 'NEUMATICO', 'BATERIA']
+SERVICES = [
+    ('Cambio de aceite', Decimal('8000')),
+    ('Alineación y balanceo', Decimal('15000')),
+    ('Revisión general', Decimal('12000')),
+    ('Cambio de pastillas de freno', Decimal('20000')),
+    ('Rotación de neumáticos', Decimal('6000')),
+]
+LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+def last_number(queryset, field):
+    """
+    Último número correlativo con formato PREFIJO-00001, como en los save()
+    """
+    value = queryset.order_by('-id').values_list(field, flat=True).first()
+    try:
+        return int(value.split('-')[1])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+def next_index(queryset, field, pattern):
+    """
+    Índice siguiente al mayor valor generado antes, leído de `field` con
+    `pattern` (un grupo de dígitos de ancho fijo, así el máximo del texto es
+    el del número). Con count() se repetirían valores después de las bajas.
+    """
+    last = queryset.filter(**{f'{field}__regex': pattern}).aggregate(last=models.Max(field))['last']
+    return int(re.match(pattern, last).group(1)) + 1 if last else 0
+
+
+def plate_for(index):
+    """
+    Patente única en formato AB123CD para un índice (hasta 456.976.000)
+    """
+    number = index % 1000
+    letters = index // 1000
+    chars = []
+    for _ in range(4):
+        letters, rest = divmod(letters, 26)
+        chars.append(LETTERS[rest])
+    return f'{chars[3]}{chars[2]}{number:03d}{chars[1]}{chars[0]}'
+
+
+def plate_index(plate):
+    """
+    Inversa de plate_for
+    """
+    letters = 0
+    for char in plate[:2] + plate[5:]:
+        letters = letters * 26 + LETTERS.index(char)
+    return letters * 1000 + int(plate[2:5])
+
+
+class TableWriter:
+    """
+    Inserta tuplas en las columnas indicadas de la tabla de un modelo
+    """
+    def __init__(self, model, fields, batch_size):
+        self.model = model
+        self.batch_size = batch_size
+        self.fields = [model._meta.get_field(name) for name in fields]
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(f.column) for f in self.fields)
+        placeholders = ', '.join(['%s'] * len(self.fields))
+        self.sql = f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'
+        # Solo fechas necesitan adaptarse; el resto lo maneja el driver
+        self.adapters = []
+        for index, field in enumerate(self.fields):
+            if isinstance(field, models.DateTimeField):
+                self.adapters.append((index, connection.ops.adapt_datetimefield_value))
+            elif isinstance(field, models.DateField):
+                self.adapters.append((index, connection.ops.adapt_datefield_value))
+        self.rows = []
+        self.written = 0
+
+    def add(self, row):
+        if self.adapters:
+            row = list(row)
+            for index, adapt in self.adapters:
+                if row[index] is not None:
+                    row[index] = adapt(row[index])
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.rows:
+            with connection.cursor() as cursor:
+                cursor.executemany(self.sql, self.rows)
+            self.written += len(self.rows)
+            self.rows = []
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=models.Max('id'))['last'] or 0) + 1
+
+
+def reset_sequences(*model_classes):
+    """
+    Sincroniza las secuencias de ids después de insertar ids explícitos
+    (no hace nada en SQLite)
+    """
+    statements = connection.ops.sequence_reset_sql(no_style(), model_classes)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+
+class DatasetGenerator:
+    def __init__(self, seed=42, batch_size=5000, days=730, log=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.days = days
+        self.now = timezone.now()
+        self.log = log or (lambda message: None)
+        self.user = self._get_user()
+
+    def _get_user(self):
+        user = User.objects.filter(email='benchmark@shalom.local').first()
+        if user is None:
+            user = User.objects.create_user(
+                email='benchmark@shalom.local', password=None,
+                first_name='Benchmark', last_name='Shalom', role='ADMIN'
+            )
+        return user
+
+    def _random_date(self):
+        return self.now - timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    def _write(self, model, fields, count, build):
+        """
+        Inserta `count` filas armadas con `build(i)` en una transacción
+        """
+        writer = TableWriter(model, fields, self.batch_size)
+        with transaction.atomic():
+            for i in range(count):
+                writer.add(build(i))
+            writer.flush()
+            bump_versions(model)
+        return writer.written
+
+    def products(self, count):
+        offset = next_index(Product.objects, 'code', r'^GEN-(\d{6})$')
+        rng = self.rng
+
+        def build(i):
+            category = rng.choice(CATEGORIES)
+            purchase = Decimal(rng.randrange(1000, 50000))
+            return (
+                f'GEN-{offset + i:06d}',
+                f'{category.replace("_", " ").title()} {rng.choice(["Premium", "Standard", "Eco"])} {offset + i}',
+                category,
+                rng.choice(['Mobil', 'Castrol', 'YPF', 'Shell', 'Mann', 'Bosch']),
+                rng.randrange(0, 200),
+                rng.randrange(5, 30),
+                rng.choice(['LITRO', 'UNIDAD', 'PACK']),
+                purchase,
+                (purchase * Decimal('1.4')).quantize(Decimal('0.01')),
+                True,
+                self._random_date(),
+                self.now,
+            )
+
+        self._write(Product, [
+            'code', 'name', 'category', 'brand', 'stock_quantity', 'min_stock', 'unit',
+            'purchase_price', 'sale_price', 'is_active', 'created_at', 'updated_at',
+        ], count, build)
+        self.log(f'{count} productos')
+
+    def customers(self, count):
+        rng = self.rng
+        offset = next_index(Customer.objects, 'phone', r'^\+54911(\d{8})$')
+        user_id = self.user.pk
+
+        def build(i):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            return (
+                first,
+                last,
+                f'{first}.{last}.{offset + i}@mail.com'.lower() if rng.random() < 0.6 else None,
+                f'+54911{offset + i:08d}',
+                rng.choice(CITIES),
+                True,
+                user_id,
+                self._random_date(),
+                self.now,
+            )
+
+        self._write(Customer, [
+            'first_name', 'last_name', 'email', 'phone', 'city', 'is_active',
+            'created_by', 'created_at', 'updated_at',
+        ], count, build)
+        self.log(f'{count} clientes')
+
+    def vehicles(self, count):
+        rng = self.rng
+        customer_ids = list(Customer.objects.values_list('id', flat=True))
+        if not customer_ids:
+            raise ValueError('Se necesitan clientes para generar vehículos')
+        # plate_for no conserva el orden alfabético: el máximo se calcula acá
+        plates = Vehicle.objects.filter(plate__regex=r'^[A-Z]{2}\d{3}[A-Z]{2}$').values_list('plate', flat=True)
+        offset = max((plate_index(plate) + 1 for plate in plates.iterator()), default=0)
+
+        def build(i):
+            brand, names = rng.choice(VEHICLES)
+            return (
+                plate_for(offset + i),
+                brand,
+                rng.choice(names),
+                rng.randrange(2000, self.now.year + 1),
+                rng.choice(COLORS),
+                rng.choice(ENGINES),
+                rng.randrange(0, 300000),
+                rng.choice(customer_ids),
+                True,
+                self._random_date(),
+                self.now,
+            )
+
+        self._write(Vehicle, [
+            'plate', 'brand', 'model', 'year', 'color', 'engine_type', 'current_mileage',
+            'customer', 'is_active', 'created_at', 'updated_at',
+        ], count, build)
+        self.log(f'{count} vehículos')
+
+    def orders(self, count, items, invoice_ratio=0.6):
+        """
+        Genera órdenes con `items` ítems en total (distribuidos al azar), y
+        facturas para una parte de las órdenes completadas
+        """
+        rng = self.rng
+        vehicles = list(Vehicle.objects.values_list('id', 'customer_id'))
+        products = list(Product.objects.values_list('id', 'name', 'sale_price'))
+        if not vehicles:
+            raise ValueError('Se necesitan vehículos para generar órdenes')
+        first_number = last_number(ServiceOrder.objects, 'order_number') + 1
+        invoice_counters = {
+            t: last_number(Invoice.objects.filter(invoice_type=t), 'invoice_number') for t in ('A', 'B', 'C')
+        }
+        order_id = next_id(ServiceOrder)
+        user_id = self.user.pk
+        items_per_order = items / count if count else 0
+        tax_rate = Decimal('21.00')
+
+        order_writer = TableWriter(ServiceOrder, [
+            'id', 'order_number', 'vehicle', 'customer', 'status', 'created_at', 'completed_at',
+            'observations', 'total', 'created_by',
+        ], self.batch_size)
+        item_writer = TableWriter(ServiceItem, [
+            'service_order', 'item_type', 'product', 'description', 'quantity', 'unit_price',
+            'subtotal', 'created_at',
+        ], self.batch_size)
+        invoice_writer = TableWriter(Invoice, [
+            'invoice_number', 'invoice_type', 'service_order', 'customer', 'issue_date',
+            'paid_date', 'status', 'subtotal', 'tax_rate', 'tax_amount', 'total', 'notes',
+            'created_by', 'created_at',
+        ], self.batch_size)
+
+        with transaction.atomic():
+            for i in range(count):
+                vehicle_id, customer_id = rng.choice(vehicles)
+                created_at = self._random_date()
+                status = rng.choices(['COMPLETED', 'PENDING', 'CANCELLED'], weights=[85, 10, 5])[0]
+                completed_at = created_at + timedelta(hours=rng.randrange(1, 48)) if status == 'COMPLETED' else None
+
+                total = Decimal(0)
+                # Cantidad de ítems alrededor del promedio pedido
+                for _ in range(round(rng.uniform(0, 2 * items_per_order))):
+                    if products and rng.random() < 0.6:
+                        product_id, description, price = rng.choice(products)
+                        quantity = Decimal(rng.randrange(1, 6))
+                        item_type = 'PRODUCT'
+                    else:
+                        description, price = rng.choice(SERVICES)
+                        product_id, quantity, item_type = None, Decimal(1), 'SERVICE'
+                    subtotal = quantity * price
+                    total += subtotal
+                    item_writer.add((
+                        order_id, item_type, product_id, description, quantity, price, subtotal, created_at,
+                    ))
+
+                order_writer.add((
+                    order_id, f'OS-{first_number + i:05d}', vehicle_id, customer_id, status,
+                    created_at, completed_at, '', total, user_id,
+                ))
+
+                if completed_at and rng.random() < invoice_ratio:
+                    invoice_type = rng.choices(['A', 'B', 'C'], weights=[15, 25, 60])[0]
+                    invoice_counters[invoice_type] += 1
+                    tax_amount = (total * tax_rate / 100).quantize(Decimal('0.01'))
+                    paid = rng.random() < 0.8
+                    invoice_writer.add((
+                        f'F{invoice_type}-{invoice_counters[invoice_type]:05d}', invoice_type, order_id,
+                        customer_id, completed_at.date(), completed_at.date() if paid else None,
+                        'PAID' if paid else 'ISSUED', total, tax_rate, tax_amount, total + tax_amount, '',
+                        user_id, completed_at,
+                    ))
+
+                order_id += 1
+                if (i + 1) % self.batch_size == 0:
+                    # Las órdenes van primero por las claves foráneas
+                    order_writer.flush()
+                    item_writer.flush()
+                    invoice_writer.flush()
+                    self.log(f'{i + 1}/{count} órdenes')
+
+            order_writer.flush()
+            item_writer.flush()
+            invoice_writer.flush()
+            reset_sequences(ServiceOrder)
+            bump_versions(ServiceOrder, ServiceItem, Invoice)
+
+        self.log(
+            f'{order_writer.written} órdenes, {item_writer.written} ítems, {invoice_writer.written} facturas'
+        )
+
+    def movements(self, count):
+        rng = self.rng
+        product_ids = list(Product.objects.values_list('id', flat=True))
+        if not product_ids:
+            raise ValueError('Se necesitan productos para generar movimientos')
+        user_id = self.user.pk
+
+        def build(i):
+            return (
+                rng.choice(product_ids),
+                rng.choices(['COMPRA', 'VENTA', 'AJUSTE'], weights=[30, 65, 5])[0],
+                rng.randrange(1, 50),
+                'Movimiento generado',
+                user_id,
+                self._random_date(),
+            )
+
+        self._write(StockMovement, [
+            'product', 'movement_type', 'quantity', 'reason', 'performed_by', 'created_at',
+        ], count, build)
+        self.log(f'{count} movimientos de stock')
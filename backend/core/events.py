@@ -0,0 +1,225 @@
+"""
+Eventos de cambio en tiempo real (/api/events/, server-sent events).
+
+Reemplaza el polling de las páginas que esperan que una orden cambie de
+estado, que un producto quede con stock bajo o que se pague una factura.
+
+- El flujo no tiene tabla propia: lee los eventos de dominio del outbox
+  (core.outbox) y traduce los que interesan a las pantallas con
+  stream_event(). El id del evento del outbox es el cursor (Last-Event-ID)
+  y la retención es la del outbox.
+- Cada proceso tiene un Hub: una sola tarea consulta los eventos nuevos
+  cada EVENTS_POLL_SECONDS (o apenas se registra uno en el mismo proceso)
+  y los reparte a las conexiones abiertas. El costo en la base es una
+  consulta por proceso, no por cliente, y sin conexiones no se consulta.
+  Con varios workers cada uno ve los eventos de los demás por la tabla.
+- Como los ids pueden confirmarse fuera de orden, cada consulta vuelve a
+  mirar los últimos EVENTS_REORDER_WINDOW ids y descarta los ya enviados.
+- Al reconectar con Last-Event-ID se reenvían los eventos perdidos desde la
+  tabla; si son demasiados o ya se depuraron, se envía `reset` y el cliente
+  debe recargar sus datos.
+- Las conexiones se cierran a los EVENTS_MAX_SECONDS (el navegador
+  reconecta solo) y un cliente que no lee a tiempo se desconecta.
+"""
+import asyncio
+import logging
+import time
+from decimal import Decimal
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Max, Min
+
+logger = logging.getLogger(__name__)
+
+# Estado de la orden que deja cada evento de dominio (los eventos traen
+# además `status`; OrderStatusChanged solo eso)
+ORDER_STATUS = {
+    'OrderCreated': 'PENDING', 'OrderCompleted': 'COMPLETED', 'OrderCancelled': 'CANCELLED', 'OrderStatusChanged': None,
+}
+STREAM_SOURCES = [*ORDER_STATUS, 'InvoicePaid', 'StockChanged']
+
+
+def stream_event(name, payload):
+    """
+    (tipo, datos) con que se envía el evento de dominio `name`, o None si
+    no se envía (un movimiento de stock que no cruza el mínimo)
+    """
+    if name in ORDER_STATUS:
+        return 'order.status', {
+            'order_number': payload['order_number'], 'status': payload.get('status') or ORDER_STATUS[name],
+            'previous_status': payload.get('previous_status'),
+            'vehicle_id': payload['vehicle_id'], 'customer_id': payload['customer_id'],
+        }
+    if name == 'InvoicePaid':
+        return 'invoice.paid', {
+            key: payload[key] for key in ('invoice_number', 'customer_id', 'service_order_id', 'total')
+        }
+    if name == 'StockChanged':
+        # Las salidas por orden descuentan cantidades decimales, que llegan como texto
+        stock, minimum, delta = (Decimal(str(payload[key])) for key in ('stock_quantity', 'min_stock', 'delta'))
+        is_low = stock <= minimum
+        if is_low == (stock - delta <= minimum):
+            return None
+        return 'stock.low' if is_low else 'stock.restored', {
+            'code': payload.get('code'), 'name': payload.get('product_name'),
+            'stock_quantity': int(stock), 'min_stock': int(minimum),
+        }
+    return None
+
+
+def fetch_events(after_id, limit):
+    """
+    Eventos del flujo entre las `limit` filas del outbox posteriores a
+    `after_id`. Retorna (eventos, filas leídas, último id leído).
+    """
+    from .models import OutboxEvent
+
+    rows = list(
+        OutboxEvent.objects.filter(id__gt=after_id, name__in=STREAM_SOURCES).order_by('id')
+        .values('id', 'name', 'aggregate_id', 'payload', 'created_at')[:limit]
+    )
+    events = []
+    for row in rows:
+        converted = stream_event(row['name'], row['payload'])
+        if converted is not None:
+            kind, data = converted
+            events.append({
+                'id': row['id'], 'kind': kind, 'object_id': row['aggregate_id'],
+                'data': data, 'created_at': row['created_at'],
+            })
+    return events, len(rows), rows[-1]['id'] if rows else after_id
+
+
+def event_bounds():
+    from .models import OutboxEvent
+
+    bounds = OutboxEvent.objects.aggregate(first=Min('id'), last=Max('id'))
+    return bounds['first'], bounds['last'] or 0
+
+
+def format_event(event):
+    data = {'id': event['object_id'], **event['data'], 'at': event['created_at']}
+    return f"id: {event['id']}\nevent: {event['kind']}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
+class Hub:
+    """
+    Reparto de eventos dentro del proceso: una cola por conexión y una sola
+    tarea que consulta la base
+    """
+    def __init__(self):
+        self._reset(None)
+
+    def _reset(self, loop):
+        self.loop = loop
+        self.subscribers = set()
+        self.task = None
+        self.wakeup = asyncio.Event() if loop else None
+        self.last_id = None
+        self.seen = set()
+
+    def subscribe(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            self._reset(loop)
+        queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        queue.overflowed = False
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def wake(self):
+        """Adelanta la próxima consulta (se puede llamar desde cualquier hilo)"""
+        loop = self.loop
+        if loop is not None and not loop.is_closed() and self.subscribers:
+            loop.call_soon_threadsafe(self.wakeup.set)
+
+    def broadcast(self, event):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # El cliente no lee: se lo desconecta y al volver retoma desde la base
+                queue.overflowed = True
+                self.subscribers.discard(queue)
+
+    async def _poll(self):
+        window = settings.EVENTS_REORDER_WINDOW
+        if self.last_id is None:
+            self.last_id = (await sync_to_async(event_bounds)())[1]
+        while self.subscribers:
+            try:
+                events, _, scanned = await sync_to_async(fetch_events)(self.last_id - window, settings.EVENTS_REPLAY_MAX)
+            except Exception:
+                logger.exception('No se pudieron leer los eventos')
+                events, scanned = [], self.last_id
+            for event in events:
+                if event['id'] in self.seen or event['id'] <= self.last_id - window:
+                    continue
+                self.seen.add(event['id'])
+                self.broadcast(event)
+            # También avanza sobre los eventos que no se envían
+            self.last_id = max(self.last_id, scanned)
+            self.seen = {pk for pk in self.seen if pk > self.last_id - window}
+
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), settings.EVENTS_POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+        # Sin conexiones: la próxima tarea parte del último evento de la base
+        self.last_id = None
+        self.seen = set()
+
+
+hub = Hub()
+
+
+async def event_stream(last_event_id=None):
+    """
+    Flujo SSE de una conexión. `last_event_id`: último evento que recibió
+    el cliente (None para empezar desde ahora).
+    """
+    queue = hub.subscribe()
+    deadline = time.monotonic() + settings.EVENTS_MAX_SECONDS
+    try:
+        first, last = await sync_to_async(event_bounds)()
+        yield f'retry: {settings.EVENTS_RETRY_MS}\n\n'
+        delivered = set()
+        if last_event_id is None:
+            floor = last
+        else:
+            floor = last_event_id
+            missed, read, _ = await sync_to_async(fetch_events)(last_event_id, settings.EVENTS_REPLAY_MAX + 1)
+            expired = first is not None and last_event_id < first - 1
+            if expired or read > settings.EVENTS_REPLAY_MAX:
+                floor = last
+                yield f'id: {last}\nevent: reset\ndata: {{}}\n\n'
+            else:
+                for event in missed:
+                    delivered.add(event['id'])
+                    yield format_event(event)
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (queue.overflowed and queue.empty()):
+                break
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), min(remaining, settings.EVENTS_HEARTBEAT_SECONDS)
+                )
+            except asyncio.TimeoutError:
+                # Mantiene viva la conexión a través de proxies
+                yield ': ping\n\n'
+                continue
+            if event['id'] <= floor or event['id'] in delivered:
+                continue
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(queue)
@@ -0,0 +1,319 @@
+"""
+Exportaciones CSV y XLSX en streaming.
+
+Las filas salen de una consulta values_list() recorrida con
+.iterator(chunk_size=...) (cursor del lado del servidor en PostgreSQL,
+fetchmany en SQLite) y se escriben a medida que se envían, de modo que la
+memoria del servidor no depende de la cantidad de filas:
+
+- CSV: UTF-8 con BOM, separador ';' y coma decimal sin separador de miles
+  (lo que espera Excel en es-AR).
+- XLSX: el libro se arma como un ZIP en streaming; la hoja usa strings en
+  línea (sin tabla de strings compartidos), que es lo que mantiene la
+  memoria constante.
+
+Cada exportación se declara con una lista de Column; los viewsets la
+exponen con ExportMixin en <listado>/export/?output=csv|xlsx, respetando
+los mismos filtros del listado.
+
+Bajo ASGI el flujo se entrega como iterador asíncrono (streaming_response):
+con uno sincrónico Django 5.0 lo lee completo con sync_to_async(list)
+antes de enviar el primer byte.
+"""
+import csv
+import re
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+CHUNK_SIZE = 2000
+# Filas por bloque enviado al cliente
+FLUSH_ROWS = 500
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class Column:
+    """
+    `kind`: text, number, date o datetime. `labels` traduce valores de
+    campos con choices.
+    """
+    def __init__(self, header, field, kind='text', labels=None):
+        self.header = header
+        self.field = field
+        self.kind = kind
+        self.labels = labels
+
+
+class Export:
+    def __init__(self, name, columns, ordering=('pk',)):
+        self.name = name
+        self.columns = columns
+        self.ordering = ordering
+
+    @property
+    def headers(self):
+        return [column.header for column in self.columns]
+
+    def rows(self, queryset, chunk_size=None):
+        """
+        Tuplas con las etiquetas de choices ya aplicadas y las fechas en hora local
+        """
+        tz = timezone.get_current_timezone()
+        converters = []
+        for i, column in enumerate(self.columns):
+            if column.labels:
+                converters.append((i, lambda value, labels=column.labels: labels.get(value, value)))
+            elif column.kind == 'datetime':
+                converters.append((i, lambda value: value.astimezone(tz).replace(tzinfo=None) if value else None))
+
+        values = queryset.prefetch_related(None).order_by(*self.ordering).values_list(
+            *[column.field for column in self.columns]
+        )
+        for row in values.iterator(chunk_size=chunk_size or CHUNK_SIZE):
+            if converters:
+                row = list(row)
+                for i, convert in converters:
+                    row[i] = convert(row[i])
+            yield row
+
+
+class _Sink:
+    """
+    Destino de escritura que acumula lo escrito hasta que se lo retira
+    (sin seek ni tell: zipfile escribe en modo streaming)
+    """
+    def __init__(self):
+        self.parts = []
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+class _TextSink:
+    def __init__(self, sink):
+        self.sink = sink
+
+    def write(self, text):
+        return self.sink.write(text.encode('utf-8'))
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, (Decimal, float)):
+        # Con punto, Excel en es-AR lo lee como texto (o como miles)
+        return format(Decimal(str(value)), 'f').replace('.', ',')
+    return value
+
+
+def csv_stream(headers, rows):
+    sink = _Sink()
+    writer = csv.writer(_TextSink(sink), delimiter=';')
+    sink.write('\ufeff'.encode('utf-8'))
+    writer.writerow(headers)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow([_csv_value(value) for value in row])
+        if count % FLUSH_ROWS == 0:
+            yield sink.drain()
+    yield sink.drain()
+
+
+# Caracteres de control que XML no admite
+_INVALID_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+def _column_letter(index):
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_cell(ref, value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float, Decimal)):
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if isinstance(value, datetime):
+        serial = (value - _EXCEL_EPOCH).total_seconds() / 86400
+        return f'<c r="{ref}" s="2"><v>{serial:.6f}</v></c>'
+    if isinstance(value, date):
+        return f'<c r="{ref}" s="1"><v>{(value - _EXCEL_EPOCH.date()).days}</v></c>'
+    text = escape(_INVALID_XML.sub('', str(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+        'Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    # Estilos: 0 general, 1 fecha, 2 fecha y hora, 3 encabezado en negrita
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<numFmts count="2"><numFmt numFmtId="164" formatCode="dd/mm/yyyy"/>'
+        '<numFmt numFmtId="165" formatCode="dd/mm/yyyy hh:mm"/></numFmts>'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="4"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    ),
+}
+
+
+def xlsx_stream(sheet_name, headers, rows):
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in _XLSX_PARTS.items():
+            archive.writestr(name, content)
+        archive.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+            '</workbook>'
+        ))
+        yield sink.drain()
+
+        letters = [_column_letter(i) for i in range(len(headers))]
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            header = ''.join(
+                f'<c r="{letter}1" t="inlineStr" s="3"><is><t>{escape(text)}</t></is></c>'
+                for letter, text in zip(letters, headers)
+            )
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                f'<sheetViews><sheetView workbookViewId="0"><pane ySplit="1" topLeftCell="A2" state="frozen"/>'
+                f'</sheetView></sheetViews><sheetData><row r="1">{header}</row>'
+            ).encode('utf-8'))
+
+            parts = []
+            for number, row in enumerate(rows, start=2):
+                cells = ''.join(_xlsx_cell(f'{letter}{number}', value) for letter, value in zip(letters, row))
+                parts.append(f'<row r="{number}">{cells}</row>')
+                if len(parts) == FLUSH_ROWS:
+                    sheet.write(''.join(parts).encode('utf-8'))
+                    parts = []
+                    yield sink.drain()
+            parts.append('</sheetData></worksheet>')
+            sheet.write(''.join(parts).encode('utf-8'))
+    yield sink.drain()
+
+
+async def _async_chunks(stream):
+    # Cada chunk se arma en el hilo del request (thread_sensitive): el
+    # cursor de la consulta sigue en la misma conexión
+    done = object()
+    iterator = iter(stream)
+    while (chunk := await sync_to_async(next)(iterator, done)) is not done:
+        yield chunk
+
+
+def streaming_response(stream, content_type, request=None):
+    """
+    StreamingHttpResponse de `stream` (iterador de bytes); asíncrono si
+    `request` llegó por ASGI
+    """
+    if isinstance(getattr(request, '_request', request), ASGIRequest):
+        stream = _async_chunks(stream)
+    return StreamingHttpResponse(stream, content_type=content_type)
+
+
+def streaming_export(export, queryset, output='csv', filename=None, request=None):
+    rows = export.rows(queryset)
+    if output == 'xlsx':
+        stream = xlsx_stream(export.name, export.headers, rows)
+    else:
+        stream = csv_stream(export.headers, rows)
+    response = streaming_response(stream, CONTENT_TYPES[output], request)
+    filename = filename or f'{export.name}-{timezone.localdate():%Y%m%d}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    return response
+
+
+class ExportMixin:
+    """
+    Agrega <listado>/export/?output=csv|xlsx con los filtros del listado.
+    `export` es la definición (Export) de las columnas.
+    """
+    export = None
+
+    def export_response(self, export, queryset):
+        output = self.request.query_params.get('output', 'csv')
+        if output not in CONTENT_TYPES:
+            return Response(
+                {'error': 'El formato debe ser csv o xlsx'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return streaming_export(export, queryset, output, request=self.request)
+
+    @action(detail=False, methods=['get'], url_path='export')
+    def export_list(self, request):
+        return self.export_response(self.export, self.filter_queryset(self.get_queryset()))
@@ -0,0 +1,77 @@
+"""
+Camino rápido de solo lectura para listados.
+
+Los listados con FastListMixin paginan una consulta values() con las
+relaciones unidas y arman las filas con diccionarios, sin instancias de
+modelos ni ModelSerializer. Los helpers de formato reproducen la representación de los
+campos de DRF para que el JSON resultante sea idéntico al del serializer.
+"""
+from decimal import Decimal
+
+from rest_framework.response import Response
+
+
+_QUANTIZE = {}
+
+
+def format_decimal(value, decimal_places=2):
+    """Igual que DecimalField.to_representation con COERCE_DECIMAL_TO_STRING"""
+    if value is None:
+        return None
+    exponent = _QUANTIZE.get(decimal_places)
+    if exponent is None:
+        exponent = _QUANTIZE[decimal_places] = Decimal('.1') ** decimal_places
+    return '{:f}'.format(value.quantize(exponent))
+
+
+def format_datetime(value, tz):
+    """
+    Igual que DateTimeField.to_representation: hora local e ISO 8601 (Z en
+    UTC). `tz` es timezone.get_current_timezone(), resuelta una vez por listado.
+    """
+    if not value:
+        return None
+    value = value.astimezone(tz).isoformat()
+    if value.endswith('+00:00'):
+        value = value[:-6] + 'Z'
+    return value
+
+
+def format_date(value):
+    return value.isoformat() if value else None
+
+
+def choice_labels(model, field_name):
+    """Etiquetas de un campo con choices, como get_FOO_display()"""
+    return {value: str(label) for value, label in model._meta.get_field(field_name).flatchoices}
+
+
+def full_name(first_name, last_name):
+    """Como AbstractUser.get_full_name()"""
+    return f'{first_name} {last_name}'.strip()
+
+
+def subrow(row, prefix, fields):
+    """Columnas de una relación unida en values() (`prefix` + campo), sin el prefijo"""
+    return {field: row[prefix + field] for field in fields}
+
+
+class FastListMixin:
+    """
+    Reemplaza list por un armado sin serializer: pagina
+    `queryset.values(*fast_list_fields)` y `fast_list_builder(rows)` retorna
+    las filas ya representadas (mismo JSON que get_serializer_class()).
+    """
+    fast_list_fields = None
+    fast_list_builder = None
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_list_builder is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        rows = queryset.values(*self.fast_list_fields)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(self.fast_list_builder(page))
+        return Response(self.fast_list_builder(list(rows)))
@@ -0,0 +1,169 @@
+"""
+Métricas en memoria del proceso: histogramas de latencia por ruta y
+recolector de consultas SQL por request.
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+
+# Límites superiores de los buckets en milisegundos
+BUCKETS_MS = [1, 2, 5, 10, 20, 35, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 2000, 5000, 10000]
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def sql_shape(sql):
+    """
+    Normaliza una consulta parametrizada para agrupar las que solo difieren
+    en la cantidad de parámetros de un IN
+    """
+    return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', sql)).strip()
+
+
+class Histogram:
+    """
+    Histograma de buckets fijos. Los percentiles se interpolan dentro del bucket.
+    """
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        self.counts[bisect_left(BUCKETS_MS, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= target and bucket_count:
+                lower = BUCKETS_MS[index - 1] if index > 0 else 0.0
+                upper = BUCKETS_MS[index] if index < len(BUCKETS_MS) else self.max
+                position = (target - cumulative) / bucket_count
+                return round(min(lower + (upper - lower) * position, self.max), 2)
+            cumulative += bucket_count
+        return round(self.max, 2)
+
+    def summary(self):
+        return {
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'avg': round(self.total / self.count, 2) if self.count else 0.0,
+            'max': round(self.max, 2),
+        }
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.response_bytes = 0
+        self.total = Histogram()
+        self.db = Histogram()
+        self.app = Histogram()
+        self.render = Histogram()
+
+    def summary(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'avg_queries': round(self.queries / self.requests, 2) if self.requests else 0,
+            'max_queries': self.max_queries,
+            'avg_response_bytes': round(self.response_bytes / self.requests) if self.requests else 0,
+            'total_ms': self.total.summary(),
+            'db_ms': self.db.summary(),
+            'app_ms': self.app.summary(),
+            'render_ms': self.render.summary(),
+        }
+
+
+class MetricsRegistry:
+    """
+    Acumula las métricas de todas las rutas del proceso (thread-safe)
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.routes = {}
+            self.started_at = time.time()
+            self.overhead_ms = 0.0
+            self.measured_ms = 0.0
+
+    def record(self, route, status_code, timings, queries, response_bytes, overhead_ms):
+        with self._lock:
+            stats = self.routes.get(route)
+            if stats is None:
+                stats = self.routes[route] = RouteStats()
+            stats.requests += 1
+            if status_code >= 500:
+                stats.errors += 1
+            stats.queries += queries
+            stats.max_queries = max(stats.max_queries, queries)
+            stats.response_bytes += response_bytes
+            stats.total.add(timings['total'])
+            stats.db.add(timings['db'])
+            stats.app.add(timings['app'])
+            stats.render.add(timings['render'])
+            self.overhead_ms += overhead_ms
+            self.measured_ms += timings['total']
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'since': self.started_at,
+                'overhead_pct': round(100 * self.overhead_ms / self.measured_ms, 3) if self.measured_ms else 0.0,
+                'routes': {route: stats.summary() for route, stats in sorted(self.routes.items())},
+            }
+
+
+registry = MetricsRegistry()
+
+
+class QueryCollector:
+    """
+    Wrapper de ejecución (connection.execute_wrapper) que cuenta las
+    consultas, mide su tiempo y agrupa sus formas
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # Tiempo propio del recolector, para medir el costo de la instrumentación
+        self.overhead = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            end = time.perf_counter()
+            self.duration += end - start
+            self.count += 1
+            self.shapes[sql] += 1
+            self.overhead += time.perf_counter() - end
+
+    def repeated(self, limit=5):
+        """
+        Formas de consulta repetidas, de mayor a menor
+        """
+        shapes = Counter()
+        for sql, count in self.shapes.items():
+            shapes[sql_shape(sql)] += count
+        return [(shape, count) for shape, count in shapes.most_common(limit) if count > 1]
@@ -0,0 +1,322 @@
+"""
+Cola de tareas en segundo plano sobre la tabla Job, sin broker externo.
+
+Las tareas se registran con el decorador @job en módulos `jobs.py` de cada
+app (se descubren al iniciar) y se encolan con enqueue(). El comando
+runworker las toma y ejecuta en un pool de hilos o procesos:
+
+- Tomar una tarea es atómico: SELECT ... FOR UPDATE SKIP LOCKED donde la
+  base lo soporta, y en SQLite un UPDATE condicional por id (solo un
+  worker logra pasarla de PENDING a RUNNING).
+- Si falla, se reintenta con espera exponencial hasta max_attempts.
+- Las tareas RUNNING sin latido (worker caído) vuelven a la cola. El
+  resultado de una ejecución que perdió la tarea (se reencoló y la tomó
+  otro worker) se descarta: solo se guarda si la tarea sigue tomada por
+  el mismo worker en el mismo intento.
+- La tarea informa su avance con context.progress(); se consulta en
+  /api/jobs/<id>/.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import timedelta
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger('shalom.jobs')
+
+
+class JobSpec:
+    def __init__(self, name, func, max_attempts, backoff):
+        self.name = name
+        self.func = func
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+
+
+_registry = {}
+
+
+def job(name, max_attempts=3, backoff=30):
+    """
+    Registra `func(context, **payload)` como tarea. `backoff` son los
+    segundos de espera antes del primer reintento (se duplica en cada uno).
+    """
+    def decorator(func):
+        _registry[name] = JobSpec(name, func, max_attempts, backoff)
+        return func
+    return decorator
+
+
+def registered_jobs():
+    return dict(_registry)
+
+
+def enqueue(name, payload=None, created_by=None, priority=0, delay=0):
+    """
+    Encola la tarea `name` con `payload` (serializable a JSON)
+    """
+    spec = _registry.get(name)
+    if spec is None:
+        raise ValueError(f'Tarea desconocida: {name}')
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        max_attempts=spec.max_attempts,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        created_by=created_by,
+    )
+
+
+def backoff_delay(base, attempts):
+    """Espera exponencial con ±10% de variación para no reintentar todas juntas"""
+    delay = base * 2 ** max(attempts - 1, 0)
+    return delay * random.uniform(0.9, 1.1)
+
+
+def claim(worker_id, limit=1):
+    """
+    Toma hasta `limit` tareas listas (mayor prioridad primero) y las marca RUNNING
+    """
+    now = timezone.now()
+    ready = Job.objects.filter(status='PENDING', run_after__lte=now).order_by('-priority', 'run_after', 'id')
+    changes = {
+        'status': 'RUNNING', 'locked_by': worker_id, 'locked_at': now,
+        'started_at': now, 'attempts': F('attempts') + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(ready.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            Job.objects.filter(pk__in=ids).update(**changes)
+    else:
+        # Sin SKIP LOCKED: el UPDATE condicional decide qué worker se queda con cada tarea
+        ids = []
+        for pk in ready.values_list('id', flat=True)[:limit * 4]:
+            if Job.objects.filter(pk=pk, status='PENDING').update(**changes):
+                ids.append(pk)
+                if len(ids) == limit:
+                    break
+    return list(Job.objects.filter(pk__in=ids).order_by('-priority', 'run_after', 'id'))
+
+
+def recover_stale(stale_after=None):
+    """
+    Devuelve a la cola (o marca fallidas si agotaron los intentos) las
+    tareas RUNNING cuyo worker dejó de enviar latidos
+    """
+    if stale_after is None:
+        stale_after = getattr(settings, 'JOB_STALE_SECONDS', 300)
+    now = timezone.now()
+    stale = Job.objects.filter(status='RUNNING', locked_at__lt=now - timedelta(seconds=stale_after))
+    message = 'La ejecución se interrumpió (el worker dejó de responder)'
+    requeued = stale.filter(attempts__lt=F('max_attempts')).update(
+        status='PENDING', locked_by='', locked_at=None, run_after=now, error=message
+    )
+    failed = stale.update(status='FAILED', finished_at=now, error=message)
+    if requeued or failed:
+        logger.warning('Tareas interrumpidas: %s reencoladas, %s fallidas', requeued, failed)
+    return requeued, failed
+
+
+def claimed(job):
+    """La tarea mientras siga tomada por el worker y el intento de `job`"""
+    return Job.objects.filter(pk=job.pk, status='RUNNING', locked_by=job.locked_by, attempts=job.attempts)
+
+
+class JobContext:
+    """
+    Lo que recibe la tarea: su registro y el reporte de avance
+    """
+    progress_interval = 0.5
+
+    def __init__(self, job):
+        self.job = job
+        self._reported = 0.0
+
+    def progress(self, value, message=''):
+        """Avance de 0 a 100; se guarda como mucho cada medio segundo"""
+        now = time.monotonic()
+        value = max(0.0, min(100.0, float(value)))
+        if value < 100 and now - self._reported < self.progress_interval:
+            return
+        self._reported = now
+        claimed(self.job).update(progress=value, progress_message=message[:255], locked_at=timezone.now())
+
+
+def execute(job):
+    """
+    Ejecuta una tarea ya tomada y registra el resultado, el reintento o la falla.
+    Retorna True si terminó bien.
+    """
+    spec = _registry.get(job.name)
+    running = claimed(job)
+    if spec is None:
+        running.update(status='FAILED', finished_at=timezone.now(), error=f'Tarea desconocida: {job.name}')
+        return False
+
+    start = time.perf_counter()
+    try:
+        result = spec.func(JobContext(job), **job.payload)
+        saved = running.update(
+            status='SUCCEEDED', result=result, progress=100, error='', finished_at=timezone.now()
+        )
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = backoff_delay(spec.backoff, job.attempts)
+            if running.update(
+                status='PENDING', locked_by='', locked_at=None, error=error,
+                run_after=timezone.now() + timedelta(seconds=delay)
+            ):
+                logger.warning('%s falló (intento %s/%s), se reintenta en %.0fs', job, job.attempts, job.max_attempts, delay)
+            else:
+                logger.warning('%s falló después de perder la tarea; se descarta el error', job)
+        elif running.update(status='FAILED', error=error, finished_at=timezone.now()):
+            logger.error('%s falló definitivamente:\n%s', job, error)
+        else:
+            logger.warning('%s falló después de perder la tarea; se descarta el error', job)
+        return False
+    if not saved:
+        logger.warning('%s terminó después de perder la tarea; se descarta el resultado', job)
+        return False
+    logger.info('%s completada en %.2fs', job, time.perf_counter() - start)
+    return True
+
+
+def execute_by_id(job_id):
+    """Punto de entrada de los hilos y procesos del pool"""
+    try:
+        return execute(Job.objects.get(pk=job_id))
+    finally:
+        connections.close_all()
+
+
+class _Heartbeat(threading.Thread):
+    """
+    Latido de una tarea que corre en el hilo del worker (modo inline): sin
+    él, una tarea más larga que JOB_STALE_SECONDS volvería a la cola y se
+    ejecutaría dos veces
+    """
+    def __init__(self, job, interval):
+        super().__init__(name=f'shalom-heartbeat-{job.pk}', daemon=True)
+        self.job = job
+        self.interval = interval
+        self.finished = threading.Event()
+
+    def run(self):
+        try:
+            while not self.finished.wait(self.interval):
+                try:
+                    claimed(self.job).update(locked_at=timezone.now())
+                except Exception:
+                    logger.exception('No se pudo renovar el latido de %s', self.job)
+        finally:
+            connections.close_all()
+
+    def stop(self):
+        self.finished.set()
+        self.join()
+
+
+def _init_process():
+    import django
+    django.setup()
+
+
+class Worker:
+    """
+    Toma tareas y las ejecuta con `concurrency` hilos o procesos ('thread',
+    'process'), o de a una en el hilo actual ('inline', para tests y cron).
+    Mientras hay tareas en curso renueva su latido (locked_at); en modo
+    inline lo hace un hilo aparte mientras corre la tarea.
+    """
+    heartbeat_interval = 30
+
+    def __init__(self, concurrency=2, mode='thread', poll_interval=1.0, worker_id=None):
+        if mode not in ('thread', 'process', 'inline'):
+            raise ValueError(f'Modo de worker inválido: {mode}')
+        self.concurrency = 1 if mode == 'inline' else max(concurrency, 1)
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self.worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}'
+        self.stopping = False
+        self._last_maintenance = 0.0
+
+    def stop(self):
+        self.stopping = True
+
+    def _executor(self):
+        if self.mode == 'process':
+            return ProcessPoolExecutor(self.concurrency, mp_context=get_context('spawn'), initializer=_init_process)
+        return ThreadPoolExecutor(self.concurrency, thread_name_prefix='shalom-job')
+
+    def _maintenance(self, running_ids):
+        if time.monotonic() - self._last_maintenance < self.heartbeat_interval:
+            return
+        self._last_maintenance = time.monotonic()
+        if running_ids:
+            Job.objects.filter(pk__in=running_ids, status='RUNNING').update(locked_at=timezone.now())
+        recover_stale()
+
+    def run(self, burst=False, max_jobs=None):
+        """
+        Procesa tareas hasta stop(); con `burst` termina cuando no quedan
+        tareas listas. Retorna la cantidad de tareas procesadas.
+        """
+        processed = 0
+        if self.mode == 'inline':
+            while not self.stopping and (max_jobs is None or processed < max_jobs):
+                self._maintenance([])
+                jobs = claim(self.worker_id)
+                if not jobs:
+                    if burst:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                heartbeat = _Heartbeat(jobs[0], self.heartbeat_interval)
+                heartbeat.start()
+                try:
+                    execute(jobs[0])
+                finally:
+                    heartbeat.stop()
+                processed += 1
+            return processed
+
+        running = {}
+        executor = self._executor()
+        try:
+            while not self.stopping:
+                self._maintenance(list(running.values()))
+                free = self.concurrency - len(running)
+                if max_jobs is not None:
+                    free = min(free, max_jobs - processed - len(running))
+                if free > 0:
+                    for job in claim(self.worker_id, free):
+                        running[executor.submit(execute_by_id, job.pk)] = job.pk
+                if not running:
+                    if burst or (max_jobs is not None and processed >= max_jobs):
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_id = running.pop(future)
+                    processed += 1
+                    if future.exception() is not None:
+                        logger.error('Error del pool al ejecutar la tarea #%s: %s', job_id, future.exception())
+        finally:
+            executor.shutdown(wait=True)
+        return processed
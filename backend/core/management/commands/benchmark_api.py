@@ -0,0 +1,81 @@
+"""
+Benchmark de los endpoints de la API (listados, detalles, búsquedas,
+estadísticas y acciones) con el cliente de pruebas de Django.
+
+Uso: python manage.py benchmark_api --iterations 30 --output bench.json
+     python manage.py benchmark_api --compare bench-main.json
+     python manage.py benchmark_api --pages  (cargas de página: requests separados contra /api/batch/)
+"""
+import json
+import logging
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmark import SCENARIOS, BenchmarkRunner, compare
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia (p50/p95/p99) y cantidad de consultas de los endpoints y genera un reporte JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2)
+        parser.add_argument('--only', nargs='*', help='Escenarios o grupos a ejecutar (list, detail, search, statistics, action)')
+        parser.add_argument('--output', help='Archivo donde guardar el reporte JSON (por defecto stdout)')
+        parser.add_argument('--compare', help='Reporte JSON anterior para comparar')
+        parser.add_argument('--pages', action='store_true', help='Mide las cargas de página con y sin /api/batch/')
+
+    def handle(self, *args, **options):
+        scenarios = SCENARIOS
+        if options['only']:
+            selected = set(options['only'])
+            scenarios = [s for s in SCENARIOS if s.name in selected or s.group in selected]
+            if not scenarios:
+                raise CommandError('Ningún escenario coincide con --only')
+
+        def log(name, result):
+            if 'skipped' in result:
+                self.stderr.write(f'{name:32} omitido ({result["skipped"]})')
+            else:
+                latency = result['latency_ms']
+                self.stderr.write(
+                    f'{name:32} {result["status"]} p50={latency["p50"]:8.2f}ms '
+                    f'p95={latency["p95"]:8.2f}ms consultas={result["queries"]["max"]}'
+                )
+
+        def log_page(name, result):
+            if 'skipped' in result:
+                self.stderr.write(f'{name:32} omitido ({result["skipped"]})')
+                return
+            separate, batch = result['separate'], result['batch']
+            self.stderr.write(
+                f'{name:32} {result["requests"]} requests p50={separate["latency_ms"]["p50"]:8.2f}ms '
+                f'-> batch p50={batch["latency_ms"]["p50"]:8.2f}ms (x{result["speedup_p50"]})'
+            )
+
+        # El reporte ya incluye los tiempos: se evita el log de requests lentos
+        logging.getLogger('shalom.performance').setLevel(logging.ERROR)
+        runner = BenchmarkRunner(iterations=options['iterations'], warmup=options['warmup'])
+        if options['pages']:
+            report = runner.run_page_loads(log=log_page)
+        else:
+            report = runner.run(scenarios, log=log)
+
+        payload = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as fh:
+                fh.write(payload)
+            self.stderr.write(self.style.SUCCESS(f'Reporte guardado en {options["output"]}'))
+        else:
+            self.stdout.write(payload)
+
+        if options['compare'] and not options['pages']:
+            with open(options['compare'], encoding='utf-8') as fh:
+                baseline = json.load(fh)
+            self.stderr.write(f'\nComparación con {baseline.get("commit") or options["compare"]}:')
+            for row in compare(baseline, report):
+                self.stderr.write(
+                    f'{row["name"]:32} p50 {row["p50"][0]:8.2f} -> {row["p50"][1]:8.2f}ms  '
+                    f'p95 {row["p95"][0]:8.2f} -> {row["p95"][1]:8.2f}ms  '
+                    f'consultas {row["queries"][0]} -> {row["queries"][1]}'
+                )
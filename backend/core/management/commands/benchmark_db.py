@@ -0,0 +1,147 @@
+"""
+Benchmark concurrente de lectura/escritura sobre SQLite: compara el perfil
+por defecto (conexión nueva por operación, journal DELETE, timeout de 5 s)
+con el perfil configurado (conexión persistente y SQLITE_PRAGMAS).
+
+Uso: python manage.py benchmark_db --readers 6 --writers 2 --seconds 10
+
+Cada worker es un proceso (como los workers de gunicorn) y opera sobre una
+base temporal con una tabla de órdenes; no toca la base del proyecto.
+"""
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.database import sqlite_pragma_statements
+
+
+SCHEMA = '''
+CREATE TABLE orders (
+    id INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    total REAL NOT NULL,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX orders_customer ON orders (customer_id);
+'''
+CUSTOMERS = 2000
+
+
+def populate(path, rows):
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    rng = random.Random(1)
+    db.executemany(
+        'INSERT INTO orders (customer_id, status, total, created_at) VALUES (?, ?, ?, ?)',
+        ((rng.randrange(CUSTOMERS), 'PENDING', rng.uniform(1000, 90000), f'2025-01-{i % 28 + 1:02d}') for i in range(rows))
+    )
+    db.commit()
+    db.close()
+
+
+def run_worker(path, role, seconds, profile):
+    """
+    Ejecuta operaciones de `role` durante `seconds`; retorna (operaciones, errores de bloqueo)
+    """
+    persistent = profile['persistent']
+    rng = random.Random(os.getpid())
+
+    def connect():
+        db = sqlite3.connect(path, timeout=profile['timeout'], isolation_level=None)
+        for statement in profile['pragmas']:
+            db.execute(statement)
+        return db
+
+    db = connect() if persistent else None
+    operations = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        conn = db if persistent else connect()
+        try:
+            if role == 'reader':
+                # Listado de un cliente y sus totales, como el detalle de cliente
+                customer = rng.randrange(CUSTOMERS)
+                conn.execute('SELECT * FROM orders WHERE customer_id = ? ORDER BY id DESC LIMIT 20', (customer,)).fetchall()
+                conn.execute('SELECT COUNT(*), SUM(total) FROM orders WHERE customer_id = ?', (customer,)).fetchone()
+            else:
+                conn.execute('BEGIN')
+                conn.execute(
+                    'INSERT INTO orders (customer_id, status, total, created_at) VALUES (?, ?, ?, ?)',
+                    (rng.randrange(CUSTOMERS), 'PENDING', rng.uniform(1000, 90000), '2025-02-01')
+                )
+                conn.execute("UPDATE orders SET status = 'COMPLETED' WHERE id = ?", (rng.randrange(1, 1000),))
+                conn.execute('COMMIT')
+            operations += 1
+        except sqlite3.OperationalError as exc:
+            if 'locked' not in str(exc) and 'busy' not in str(exc):
+                raise
+            errors += 1
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+        finally:
+            if not persistent:
+                conn.close()
+    if db is not None:
+        db.close()
+    return operations, errors
+
+
+def profiles():
+    return {
+        'default': {'persistent': False, 'timeout': 5.0, 'pragmas': ['PRAGMA journal_mode = DELETE']},
+        'tuned': {
+            'persistent': settings.DATABASES['default'].get('CONN_MAX_AGE', 0) != 0,
+            'timeout': float(settings.SQLITE_BUSY_TIMEOUT),
+            'pragmas': sqlite_pragma_statements(settings.SQLITE_PRAGMAS),
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = 'Mide throughput de lecturas/escrituras concurrentes en SQLite con el perfil por defecto y el configurado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=6)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=10)
+        parser.add_argument('--rows', type=int, default=200000)
+
+    def handle(self, *args, **options):
+        if settings.DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError(
+                'El benchmark es para SQLite; en PostgreSQL las conexiones persistentes '
+                'o el pool se miden con benchmark_api'
+            )
+        roles = ['reader'] * options['readers'] + ['writer'] * options['writers']
+        results = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for name, profile in profiles().items():
+                path = os.path.join(directory, f'{name}.sqlite3')
+                populate(path, options['rows'])
+                with ProcessPoolExecutor(max_workers=len(roles)) as pool:
+                    futures = [
+                        (role, pool.submit(run_worker, path, role, options['seconds'], profile)) for role in roles
+                    ]
+                    totals = {'reads': 0, 'writes': 0, 'locked_errors': 0}
+                    for role, future in futures:
+                        operations, errors = future.result()
+                        totals['reads' if role == 'reader' else 'writes'] += operations
+                        totals['locked_errors'] += errors
+                results[name] = {
+                    **totals,
+                    'reads_per_s': round(totals['reads'] / options['seconds'], 1),
+                    'writes_per_s': round(totals['writes'] / options['seconds'], 1),
+                }
+        results['speedup'] = {
+            kind: round(results['tuned'][kind] / results['default'][kind], 1) if results['default'][kind] else None
+            for kind in ('reads_per_s', 'writes_per_s')
+        }
+        self.stdout.write(json.dumps(results, indent=2))
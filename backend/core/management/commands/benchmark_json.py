@@ -0,0 +1,85 @@
+"""
+Compara el tiempo de codificación y la memoria del renderer JSON de DRF con
+FastJSONRenderer sobre un listado de órdenes de servicio serializado.
+
+Uso: python manage.py benchmark_json --orders 1000 --repeat 20
+
+Si la base tiene menos órdenes que las pedidas, se generan datos sintéticos
+dentro de una transacción que se revierte al terminar.
+"""
+import json
+import statistics
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from core.datagen import DatasetGenerator
+from core.renderers import FastJSONRenderer
+from services.models import ServiceOrder
+from services.serializers import ServiceOrderSerializer
+from services.views import ServiceOrderViewSet
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo y memoria de codificación JSON de un listado de órdenes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['orders'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, count, repeat):
+        missing = count - ServiceOrder.objects.count()
+        if missing > 0:
+            self.stderr.write(f'Generando {missing} órdenes temporales...')
+            generator = DatasetGenerator(batch_size=2000)
+            generator.products(200)
+            generator.customers(max(missing // 5, 1))
+            generator.vehicles(max(missing // 4, 1))
+            generator.orders(missing, items=missing * 5)
+
+        orders = ServiceOrderViewSet.queryset.order_by('-created_at')[:count]
+        data = ServiceOrderSerializer(orders, many=True).data
+        renderers = [('drf', JSONRenderer()), ('orjson', FastJSONRenderer())]
+
+        outputs = {}
+        results = {}
+        for name, renderer in renderers:
+            renderer.render(data)  # calentamiento
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                renderer.render(data)
+                timings.append((time.perf_counter() - start) * 1000)
+
+            tracemalloc.start()
+            output = renderer.render(data)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            outputs[name] = output
+            results[name] = {
+                'median_ms': round(statistics.median(timings), 2),
+                'min_ms': round(min(timings), 2),
+                'peak_memory_kb': round(peak / 1024, 1),
+                'bytes': len(output),
+            }
+
+        results['identical_output'] = outputs['drf'] == outputs['orjson']
+        results['speedup'] = round(results['drf']['median_ms'] / results['orjson']['median_ms'], 1)
+        results['orders'] = len(data)
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,105 @@
+"""
+Compara el armado de una página de listado con los ModelSerializer contra
+el camino rápido por values() (FastListMixin), incluyendo las consultas y
+la codificación con FastJSONRenderer.
+
+Uso: python manage.py benchmark_serializers --rows 1000 --repeat 10
+
+Si la base tiene menos filas que las pedidas, se generan datos sintéticos
+dentro de una transacción que se revierte al terminar.
+"""
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.datagen import DatasetGenerator
+from core.instrumentation import QueryCollector
+from core.renderers import FastJSONRenderer
+from services.fast_serializers import (
+    ORDER_LIST_FIELDS, INVOICE_LIST_FIELDS, serialize_orders, serialize_invoices
+)
+from services.models import ServiceOrder, Invoice
+from services.serializers import ServiceOrderSerializer, InvoiceSerializer
+from services.views import ServiceOrderViewSet, InvoiceViewSet
+
+
+class Rollback(Exception):
+    pass
+
+
+def measure(build, repeat):
+    """
+    Tiempos totales y sin base de datos (el ORDER BY de la página es el mismo
+    en ambos caminos y domina el total en bases grandes)
+    """
+    build()  # calentamiento
+    totals, apps = [], []
+    for _ in range(repeat):
+        collector = QueryCollector()
+        with connection.execute_wrapper(collector):
+            start = time.perf_counter()
+            build()
+            elapsed = (time.perf_counter() - start) * 1000
+        totals.append(elapsed)
+        apps.append(elapsed - collector.duration * 1000)
+    return totals, apps
+
+
+class Command(BaseCommand):
+    help = 'Mide serializers contra el armado por values() en listados de órdenes y facturas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['rows'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, count, repeat):
+        missing = count - Invoice.objects.count()
+        if missing > 0:
+            self.stderr.write(f'Generando {missing} órdenes facturadas temporales...')
+            generator = DatasetGenerator(batch_size=2000)
+            generator.products(200)
+            generator.customers(max(missing // 5, 1))
+            generator.vehicles(max(missing // 4, 1))
+            generator.orders(missing, items=missing * 5, invoice_ratio=1.0)
+
+        renderer = FastJSONRenderer()
+        endpoints = [
+            ('orders', ServiceOrderViewSet.queryset.order_by('-created_at'), ServiceOrderSerializer,
+             ORDER_LIST_FIELDS, serialize_orders),
+            ('invoices', InvoiceViewSet.queryset.order_by('-issue_date'), InvoiceSerializer,
+             INVOICE_LIST_FIELDS, serialize_invoices),
+        ]
+        results = {}
+        for name, queryset, serializer_class, fields, builder in endpoints:
+            page = queryset[:count]
+            fast_page = queryset.prefetch_related(None).values(*fields)[:count]
+            outputs = {
+                'serializer': lambda: renderer.render(serializer_class(page.all(), many=True).data),
+                'values': lambda: renderer.render(builder(list(fast_page.all()))),
+            }
+            result = {}
+            for variant, build in outputs.items():
+                totals, apps = measure(build, repeat)
+                result[variant] = {
+                    'median_ms': round(statistics.median(totals), 2),
+                    'app_median_ms': round(statistics.median(apps), 2),
+                }
+            result['rows'] = len(page)
+            result['identical_output'] = outputs['serializer']() == outputs['values']()
+            result['speedup'] = round(result['serializer']['median_ms'] / result['values']['median_ms'], 1)
+            result['app_speedup'] = round(
+                result['serializer']['app_median_ms'] / result['values']['app_median_ms'], 1
+            )
+            results[name] = result
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,54 @@
+"""
+Genera datos sintéticos a escala para medir el rendimiento de la API.
+
+Uso: python manage.py generate_dataset --customers 100000 --vehicles 150000 \
+        --orders 1000000 --items 5000000 --movements 2000000
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.datagen import DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = 'Genera clientes, vehículos, productos, órdenes, ítems, facturas y movimientos sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=500)
+        parser.add_argument('--customers', type=int, default=10000)
+        parser.add_argument('--vehicles', type=int, default=15000)
+        parser.add_argument('--orders', type=int, default=100000)
+        parser.add_argument('--items', type=int, default=500000, help='Ítems en total, repartidos entre las órdenes')
+        parser.add_argument('--movements', type=int, default=200000)
+        parser.add_argument('--invoice-ratio', type=float, default=0.6, help='Proporción de órdenes completadas facturadas')
+        parser.add_argument('--days', type=int, default=730, help='Rango de fechas hacia atrás')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+
+        def log(message):
+            self.stdout.write(f'[{time.perf_counter() - start:7.1f}s] {message}')
+
+        generator = DatasetGenerator(
+            seed=options['seed'], batch_size=options['batch_size'], days=options['days'], log=log
+        )
+        try:
+            if options['products']:
+                generator.products(options['products'])
+            if options['customers']:
+                generator.customers(options['customers'])
+            if options['vehicles']:
+                generator.vehicles(options['vehicles'])
+            if options['orders']:
+                generator.orders(options['orders'], options['items'], options['invoice_ratio'])
+            if options['movements']:
+                generator.movements(options['movements'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Datos generados en {time.perf_counter() - start:.1f}s'
+        ))
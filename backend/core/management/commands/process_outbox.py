@@ -0,0 +1,71 @@
+"""
+Procesa los eventos del outbox con los handlers registrados (core.outbox).
+
+Uso: python manage.py process_outbox              (pone al día los handlers y termina)
+     python manage.py process_outbox --loop       (consumidor permanente)
+     python manage.py process_outbox --replay crm.segments [--from-id 1]
+     python manage.py process_outbox --status
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import HandlerCheckpoint
+from core.outbox import drain, prune, registered_handlers, replay
+
+# Cada cuántas pasadas del modo --loop se depuran los eventos viejos
+PRUNE_EVERY = 1000
+
+
+class Command(BaseCommand):
+    help = 'Procesa los eventos de dominio del outbox con los handlers registrados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--handler', action='append', help='Solo estos handlers (se puede repetir)')
+        parser.add_argument('--loop', action='store_true', help='Sigue consultando el outbox')
+        parser.add_argument('--interval', type=float, default=settings.OUTBOX_POLL_SECONDS)
+        parser.add_argument('--replay', metavar='HANDLER', help='Vuelve a procesar los eventos del handler')
+        parser.add_argument('--from-id', type=int, default=1, help='Primer evento a reprocesar con --replay')
+        parser.add_argument('--status', action='store_true', help='Muestra el avance de cada handler')
+
+    def handle(self, *args, **options):
+        handlers = registered_handlers()
+        unknown = set(options['handler'] or ()) - set(handlers)
+        if unknown:
+            raise CommandError(f'Handlers desconocidos: {", ".join(sorted(unknown))}')
+
+        if options['status']:
+            checkpoints = {c.handler: c for c in HandlerCheckpoint.objects.filter(handler__in=handlers)}
+            for name in handlers:
+                checkpoint = checkpoints.get(name)
+                if checkpoint is None:
+                    self.stdout.write(f'{name:30} sin procesar')
+                else:
+                    self.stdout.write(
+                        f'{name:30} evento {checkpoint.position}, {checkpoint.processed} procesados, '
+                        f'{checkpoint.failures} fallas'
+                    )
+            return
+
+        if options['replay']:
+            try:
+                replay(options['replay'], options['from_id'])
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(f'{options["replay"]} vuelve a procesar desde el evento {options["from_id"]}')
+            options['handler'] = [options['replay']]
+
+        passes = 0
+        while True:
+            results = drain(options['handler'])
+            delivered = sum(results.values())
+            if delivered or not options['loop']:
+                self.stdout.write(', '.join(f'{name}: {count}' for name, count in results.items()))
+            if not options['loop']:
+                return
+            passes += 1
+            if passes % PRUNE_EVERY == 0:
+                prune()
+            if not delivered:
+                time.sleep(options['interval'])
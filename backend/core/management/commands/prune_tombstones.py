@@ -0,0 +1,19 @@
+"""
+Elimina las bajas registradas para la sincronización que superan la retención.
+
+Uso: python manage.py prune_tombstones [--days 90]
+"""
+from django.core.management.base import BaseCommand
+
+from core.sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Elimina las bajas registradas (tombstones) más antiguas que SYNC_TOMBSTONE_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Días a conservar (por defecto SYNC_TOMBSTONE_DAYS)')
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'{deleted} bajas eliminadas'))
@@ -0,0 +1,44 @@
+"""
+Worker de tareas en segundo plano (core.jobs).
+
+Uso: python manage.py runworker --concurrency 4
+     python manage.py runworker --mode process --concurrency 2
+     python manage.py runworker --burst          # procesa lo pendiente y termina (cron)
+
+En PythonAnywhere se puede correr como "always-on task" o como tarea
+programada con --burst.
+"""
+import logging
+import signal
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import Worker, registered_jobs
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta las tareas en segundo plano encoladas en la tabla Job'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=2)
+        parser.add_argument('--mode', choices=['thread', 'process', 'inline'], default='thread')
+        parser.add_argument('--poll', type=float, default=1.0, help='Segundos entre consultas a la cola')
+        parser.add_argument('--burst', action='store_true', help='Terminar cuando no queden tareas listas')
+        parser.add_argument('--max-jobs', type=int, help='Terminar después de procesar esta cantidad de tareas')
+
+    def handle(self, *args, **options):
+        logging.getLogger('shalom.jobs').setLevel(logging.INFO)
+        worker = Worker(concurrency=options['concurrency'], mode=options['mode'], poll_interval=options['poll'])
+
+        def stop(signum, frame):
+            self.stderr.write('Deteniendo: se esperan las tareas en curso...')
+            worker.stop()
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        self.stdout.write(
+            f"Worker {worker.worker_id} ({options['mode']} x{worker.concurrency}); "
+            f"tareas: {', '.join(sorted(registered_jobs())) or '-'}"
+        )
+        processed = worker.run(burst=options['burst'], max_jobs=options['max_jobs'])
+        self.stdout.write(self.style.SUCCESS(f'{processed} tareas procesadas'))
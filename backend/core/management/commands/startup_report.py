@@ -0,0 +1,52 @@
+"""
+Reporte de arranque en frío: tiempo de importación por paquete y módulo,
+duración de las fases de precalentamiento y latencia del primer request
+con y sin precalentamiento.
+
+Uso: python manage.py startup_report --top 20
+     python manage.py startup_report --json > startup.json
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from core.startup import probe_startup, summarize_imports
+
+
+class Command(BaseCommand):
+    help = 'Mide el arranque en frío del entry point WSGI (importaciones, precalentamiento y primer request)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=15)
+        parser.add_argument('--path', default='/api/search/', help='Ruta del request de prueba')
+        parser.add_argument('--json', action='store_true', help='Emitir el reporte en JSON')
+
+    def handle(self, *args, **options):
+        cold, _ = probe_startup(warmup=False, path=options['path'])
+        warm, rows = probe_startup(warmup=True, path=options['path'])
+        report = {
+            'imports': summarize_imports(rows, top=options['top']),
+            'without_warmup': cold,
+            'with_warmup': warm,
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        imports = report['imports']
+        self.stdout.write(f"Importaciones: {imports['modules']} módulos, {imports['total_ms']} ms")
+        self.stdout.write('\nPor paquete (tiempo propio):')
+        for row in imports['packages']:
+            self.stdout.write(f"  {row['self_ms']:>8.1f} ms  {row['package']}")
+        self.stdout.write('\nMódulos más caros (acumulado / propio):')
+        for row in imports['slowest']:
+            self.stdout.write(f"  {row['cumulative_ms']:>8.1f} / {row['self_ms']:>6.1f} ms  {row['module']}")
+        self.stdout.write('\nFases de precalentamiento:')
+        for phase, ms in warm['warmup_phases'].items():
+            self.stdout.write(f'  {ms:>8.1f} ms  {phase}')
+        self.stdout.write('')
+        for label, run in (('Sin precalentamiento', cold), ('Con precalentamiento', warm)):
+            self.stdout.write(
+                f"{label}: carga {run['load_ms']} ms, precalentamiento {run['warmup_ms']} ms, "
+                f"primer request {run['first_request_ms']} ms, segundo {run['second_request_ms']} ms"
+            )
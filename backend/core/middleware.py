@@ -0,0 +1,80 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .instrumentation import QueryCollector, registry
+
+
+logger = logging.getLogger('shalom.performance')
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Mide por request la cantidad de consultas SQL, el tiempo en base de datos,
+    el tiempo de la vista (serialización y lógica, sin SQL), el tiempo de
+    renderizado y la latencia total.
+
+    Agrega los encabezados Server-Timing y X-Query-Count, acumula las métricas
+    por ruta (ver /api/_metrics/) y registra los requests lentos junto con sus
+    consultas repetidas.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'INSTRUMENTATION_ENABLED', True)
+        self.slow_ms = getattr(settings, 'SLOW_REQUEST_MS', 500)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        begin = time.perf_counter()
+        collector = QueryCollector()
+        request._instrumentation_render = None
+        start = time.perf_counter()
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+        end = time.perf_counter()
+
+        total_ms = (end - start) * 1000
+        db_ms = collector.duration * 1000
+        render = request._instrumentation_render
+        render_ms = (render[1] - render[0]) * 1000 if render and render[1] else 0.0
+        timings = {
+            'total': total_ms,
+            'db': db_ms,
+            'render': render_ms,
+            'app': max(total_ms - db_ms - render_ms, 0.0),
+        }
+
+        response['X-Query-Count'] = str(collector.count)
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={value:.1f}' for name, value in timings.items()
+        )
+
+        match = getattr(request, 'resolver_match', None)
+        route = f'{request.method} {match.view_name if match else "unresolved"}'
+        size = 0 if response.streaming else len(response.content)
+
+        if total_ms >= self.slow_ms:
+            repeated = '; '.join(f'{count}x {shape[:200]}' for shape, count in collector.repeated())
+            logger.warning(
+                'Request lento %s %s: %.0fms, %d consultas (%.0fms en DB). Repetidas: %s',
+                request.method, request.get_full_path(), total_ms, collector.count, db_ms, repeated or '-'
+            )
+
+        overhead_ms = ((start - begin) + (time.perf_counter() - end) + collector.overhead) * 1000
+        registry.record(route, response.status_code, timings, collector.count, size, overhead_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        """
+        Las respuestas de DRF se renderizan después de este hook: se marca el
+        inicio y un callback post-render marca el final
+        """
+        if self.enabled and hasattr(request, '_instrumentation_render'):
+            timing = [time.perf_counter(), None]
+            request._instrumentation_render = timing
+            response.add_post_render_callback(lambda r: timing.__setitem__(1, time.perf_counter()))
+        return response
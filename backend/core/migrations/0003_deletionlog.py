@@ -0,0 +1,29 @@
+# Generated by Django 5.0 on 2026-10-19 15:08
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=100, verbose_name='Modelo')),
+                ('object_id', models.BigIntegerField(verbose_name='ID')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha de baja')),
+            ],
+            options={
+                'verbose_name': 'Baja registrada',
+                'verbose_name_plural': 'Bajas registradas',
+                'ordering': ['deleted_at', 'id'],
+                'indexes': [models.Index(fields=['deleted_at', 'id'], name='core_deleti_deleted_d306d9_idx')],
+            },
+        ),
+    ]
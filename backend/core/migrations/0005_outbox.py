@@ -0,0 +1,47 @@
+# Generated by Django 5.0 on 2026-10-19 15:24
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_changeevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HandlerCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('handler', models.CharField(max_length=100, unique=True, verbose_name='Handler')),
+                ('position', models.BigIntegerField(default=0, verbose_name='Último evento procesado')),
+                ('processed', models.BigIntegerField(default=0, verbose_name='Eventos procesados')),
+                ('failures', models.PositiveIntegerField(default=0, verbose_name='Fallas consecutivas')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de actualización')),
+            ],
+            options={
+                'verbose_name': 'Avance de handler',
+                'verbose_name_plural': 'Avance de handlers',
+                'ordering': ['handler'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='Evento')),
+                ('aggregate_id', models.BigIntegerField(verbose_name='ID del objeto')),
+                ('payload', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Datos')),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now, verbose_name='Fecha')),
+            ],
+            options={
+                'verbose_name': 'Evento de dominio',
+                'verbose_name_plural': 'Eventos de dominio',
+                'ordering': ['id'],
+            },
+        ),
+    ]
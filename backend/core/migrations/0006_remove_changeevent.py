@@ -0,0 +1,16 @@
+# Generated by Django 5.0 on 2026-10-19 15:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_outbox'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='ChangeEvent',
+        ),
+    ]
@@ -0,0 +1,139 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class TableVersion(models.Model):
+    """
+    Contador de versión por tabla. Se incrementa con cada alta, modificación
+    o baja (y en las escrituras masivas) y permite calcular ETags sin
+    consultar los datos.
+    """
+    table = models.CharField('Tabla', max_length=100, unique=True)
+    version = models.BigIntegerField('Versión', default=0)
+    updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Versión de tabla'
+        verbose_name_plural = 'Versiones de tablas'
+        ordering = ['table']
+
+    def __str__(self):
+        return f"{self.table} v{self.version}"
+
+
+class DeletionLog(models.Model):
+    """
+    Registro de bajas de los modelos sincronizados, para que /api/sync/
+    pueda informar a los clientes qué registros eliminar (tombstones)
+    """
+    model = models.CharField('Modelo', max_length=100)
+    object_id = models.BigIntegerField('ID')
+    deleted_at = models.DateTimeField('Fecha de baja', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Baja registrada'
+        verbose_name_plural = 'Bajas registradas'
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(fields=['deleted_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.model} #{self.object_id}"
+
+
+class Job(models.Model):
+    """
+    Tarea en segundo plano. La ejecuta el comando runworker; no requiere
+    un broker externo, la cola es esta tabla.
+    """
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendiente'),
+        ('RUNNING', 'En ejecución'),
+        ('SUCCEEDED', 'Completada'),
+        ('FAILED', 'Fallida'),
+        ('CANCELLED', 'Cancelada'),
+    ]
+
+    name = models.CharField('Tarea', max_length=100)
+    payload = models.JSONField('Parámetros', default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField('Estado', max_length=10, choices=STATUS_CHOICES, default='PENDING')
+    priority = models.SmallIntegerField('Prioridad', default=0)
+
+    # Reintentos: los intentos se cuentan al tomar la tarea
+    attempts = models.PositiveSmallIntegerField('Intentos', default=0)
+    max_attempts = models.PositiveSmallIntegerField('Máximo de intentos', default=3)
+    run_after = models.DateTimeField('Ejecutar desde', default=timezone.now)
+
+    # Worker que la tomó
+    locked_by = models.CharField('Tomada por', max_length=100, blank=True)
+    locked_at = models.DateTimeField('Tomada el', null=True, blank=True)
+
+    # Avance y resultado
+    progress = models.FloatField('Avance', default=0)
+    progress_message = models.CharField('Detalle del avance', max_length=255, blank=True)
+    result = models.JSONField('Resultado', null=True, blank=True, encoder=DjangoJSONEncoder)
+    error = models.TextField('Error', blank=True)
+
+    created_by = models.ForeignKey('accounts.User', on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs', verbose_name='Creada por')
+    created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
+    started_at = models.DateTimeField('Inicio', null=True, blank=True)
+    finished_at = models.DateTimeField('Fin', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Tarea en segundo plano'
+        verbose_name_plural = 'Tareas en segundo plano'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after', 'priority']),
+            models.Index(fields=['status', 'locked_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in ('SUCCEEDED', 'FAILED', 'CANCELLED')
+
+
+class OutboxEvent(models.Model):
+    """
+    Evento de dominio (OrderCompleted, StockChanged, InvoicePaid...) que se
+    guarda en la misma transacción que el cambio que lo produjo. Los
+    handlers de core.outbox lo procesan después, en lotes, y /api/events/
+    envía los que interesan a las pantallas (core.events).
+    """
+    name = models.CharField('Evento', max_length=50)
+    aggregate_id = models.BigIntegerField('ID del objeto')
+    payload = models.JSONField('Datos', default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField('Fecha', default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = 'Evento de dominio'
+        verbose_name_plural = 'Eventos de dominio'
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.name} #{self.aggregate_id}"
+
+
+class HandlerCheckpoint(models.Model):
+    """
+    Último evento del outbox procesado por cada handler
+    """
+    handler = models.CharField('Handler', max_length=100, unique=True)
+    position = models.BigIntegerField('Último evento procesado', default=0)
+    processed = models.BigIntegerField('Eventos procesados', default=0)
+    failures = models.PositiveIntegerField('Fallas consecutivas', default=0)
+    last_error = models.TextField('Último error', blank=True)
+    updated_at = models.DateTimeField('Fecha de actualización', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Avance de handler'
+        verbose_name_plural = 'Avance de handlers'
+        ordering = ['handler']
+
+    def __str__(self):
+        return f"{self.handler} @ {self.position}"
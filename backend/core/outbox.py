@@ -0,0 +1,178 @@
+"""
+Outbox transaccional y procesamiento de eventos de dominio en lotes.
+
+Las escrituras registran eventos (record) en OutboxEvent dentro de su misma
+transacción: si el cambio se revierte, el evento también. Los handlers se
+registran con @handler (en los módulos handlers.py de cada app) y el
+comando process_outbox los ejecuta:
+
+- Cada handler recibe listas de eventos de los tipos que declaró y avanza
+  su propio HandlerCheckpoint en la misma transacción que sus escrituras.
+  Si falla, el lote se revierte y se reintenta en la próxima pasada: la
+  entrega es al menos una vez y los handlers deben ser idempotentes.
+- Los ids se asignan al insertar pero las transacciones pueden confirmarse
+  en otro orden: un hueco en la secuencia puede ser una transacción todavía
+  abierta. El lote se corta en el primer hueco hasta que tenga más de
+  OUTBOX_GAP_SECONDS (entonces se lo considera una transacción revertida).
+- replay() vuelve un handler a una posición anterior para reconstruir su
+  proyección; los eventos se conservan OUTBOX_RETENTION_DAYS.
+- El flujo de /api/events/ (core.events) también lee esta tabla.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Min
+from django.utils import timezone
+
+from .events import hub
+from .models import HandlerCheckpoint, OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+
+class HandlerSpec:
+    def __init__(self, name, func, events, batch_size):
+        self.name = name
+        self.func = func
+        self.events = set(events)
+        self.batch_size = batch_size
+
+
+_registry = {}
+
+
+def handler(name, events, batch_size=500):
+    """
+    Registra `func(events)` como handler de los tipos de evento `events`.
+    Recibe una lista de diccionarios (id, name, aggregate_id, payload,
+    created_at) en orden.
+    """
+    def decorator(func):
+        _registry[name] = HandlerSpec(name, func, events, batch_size)
+        return func
+    return decorator
+
+
+def registered_handlers():
+    return dict(_registry)
+
+
+def record(name, aggregate_id, **payload):
+    """
+    Agrega un evento al outbox en la transacción actual
+    """
+    event = OutboxEvent.objects.create(name=name, aggregate_id=aggregate_id, payload=payload)
+    # Las conexiones SSE de este proceso lo reciben sin esperar a la próxima consulta
+    transaction.on_commit(hub.wake, robust=True)
+    return event
+
+
+def _checkpoint(name):
+    queryset = HandlerCheckpoint.objects.all()
+    if connection.features.has_select_for_update_skip_locked:
+        # Otro consumidor ya está procesando este handler
+        queryset = queryset.select_for_update(skip_locked=True)
+    return queryset.filter(handler=name).first()
+
+
+def _settled(events, position, now):
+    """
+    Prefijo de `events` sin huecos recientes en la secuencia de ids
+    """
+    horizon = now - timedelta(seconds=settings.OUTBOX_GAP_SECONDS)
+    # Un handler nuevo empieza por el evento más antiguo que se conserve
+    expected = position + 1 if position else (events[0]['id'] if events else 0)
+    for index, event in enumerate(events):
+        if event['id'] != expected and event['created_at'] > horizon:
+            return events[:index]
+        expected = event['id'] + 1
+    return events
+
+
+def run_handler(spec, now=None):
+    """
+    Procesa un lote del handler. Retorna la cantidad de eventos entregados
+    o None si no hay nada más que procesar (o si falló).
+    """
+    now = now or timezone.now()
+    HandlerCheckpoint.objects.get_or_create(handler=spec.name)
+    try:
+        with transaction.atomic():
+            checkpoint = _checkpoint(spec.name)
+            if checkpoint is None:
+                return None
+            events = list(
+                OutboxEvent.objects.filter(id__gt=checkpoint.position).order_by('id')
+                .values('id', 'name', 'aggregate_id', 'payload', 'created_at')[:spec.batch_size]
+            )
+            events = _settled(events, checkpoint.position, now)
+            if not events:
+                return None
+            relevant = [event for event in events if event['name'] in spec.events]
+            if relevant:
+                spec.func(relevant)
+            HandlerCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                position=events[-1]['id'], processed=F('processed') + len(relevant),
+                failures=0, last_error='',
+            )
+            return len(relevant)
+    except Exception:
+        logger.exception('Falló el handler %s', spec.name)
+        HandlerCheckpoint.objects.filter(handler=spec.name).update(
+            failures=F('failures') + 1, last_error=traceback.format_exc()[-2000:],
+        )
+        return None
+
+
+def drain(names=None, max_batches=None):
+    """
+    Ejecuta los handlers hasta ponerlos al día. Retorna {handler: eventos}.
+    """
+    results = {}
+    for name, spec in registered_handlers().items():
+        if names and name not in names:
+            continue
+        delivered = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            count = run_handler(spec)
+            if count is None:
+                break
+            delivered += count
+            batches += 1
+        results[name] = delivered
+    return results
+
+
+def replay(name, from_id=1):
+    """
+    Vuelve el handler a procesar desde el evento `from_id`
+    """
+    if name not in _registry:
+        raise ValueError(f'Handler desconocido: {name}')
+    checkpoint, _ = HandlerCheckpoint.objects.get_or_create(handler=name)
+    checkpoint.position = max(from_id - 1, 0)
+    checkpoint.failures = 0
+    checkpoint.last_error = ''
+    checkpoint.save()
+    return checkpoint
+
+
+def prune(days=None):
+    """
+    Elimina los eventos ya procesados por todos los handlers y más antiguos
+    que la retención
+    """
+    days = settings.OUTBOX_RETENTION_DAYS if days is None else days
+    names = list(registered_handlers())
+    positions = HandlerCheckpoint.objects.filter(handler__in=names)
+    if positions.count() < len(names):
+        return 0
+    processed = positions.aggregate(position=Min('position'))['position'] or 0
+    deleted, _ = OutboxEvent.objects.filter(
+        id__lte=processed, created_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
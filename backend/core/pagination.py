@@ -0,0 +1,11 @@
+from rest_framework.pagination import PageNumberPagination
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """
+    Paginación por defecto de la API. El cliente puede pedir hasta 100
+    resultados por página con ?page_size=
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
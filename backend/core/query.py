@@ -0,0 +1,673 @@
+"""
+Consultas de lectura con la forma que pide cada pantalla (/api/query/).
+
+Un subconjunto de GraphQL sobre los modelos del taller. Cada pantalla pide
+solo los campos y relaciones que muestra:
+
+    query Orden($id: Int!) {
+      service_order(id: $id) {
+        order_number status
+        items { description quantity product { code } }
+      }
+    }
+
+- Se admiten operaciones query con variables, alias y argumentos en los
+  campos raíz. No se admiten fragmentos, directivas, mutaciones ni
+  introspección (salvo __typename).
+- Los campos de cada tipo son las columnas del modelo con sus nombres de
+  la API REST (las FK como `<campo>_id`, las opciones también como
+  `<campo>_display`) y las relaciones declaradas en TYPES.
+- Las relaciones se resuelven por nivel con loaders por request: las filas
+  de todos los padres de un nivel se leen con una sola consulta IN. Una
+  consulta cuesta una consulta SQL por relación pedida, sin importar la
+  cantidad de filas.
+- Antes de ejecutar se rechazan las consultas con más de QUERY_MAX_DEPTH
+  niveles o cuya complejidad (filas que podría devolver, estimando
+  QUERY_RELATION_ESTIMATE hijos por relación de muchos) supera
+  QUERY_MAX_COMPLEXITY. La estimación puede quedarse corta (un producto
+  con miles de movimientos), así que al ejecutar se cuentan las filas
+  leídas y la consulta se corta apenas superan QUERY_MAX_COMPLEXITY.
+- Consultas persistidas: el cliente envía el sha256 del texto en
+  extensions.persistedQuery.sha256Hash. Si el servidor no lo conoce
+  responde PERSISTED_QUERY_NOT_FOUND y el cliente reenvía el hash con el
+  texto, que queda en la caché QUERY_PERSISTED_SECONDS. Con solo el hash
+  la consulta entra en la URL de un GET.
+"""
+import hashlib
+import re
+from functools import cached_property, lru_cache
+
+import orjson
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, models
+from django.db.models import Q
+from django.utils import timezone
+
+from .fastlist import choice_labels, format_date, format_datetime, format_decimal, full_name
+
+
+class QueryError(ValueError):
+    """Consulta inválida; `code` se devuelve en extensions.code"""
+    def __init__(self, message, code='BAD_QUERY'):
+        super().__init__(message)
+        self.code = code
+
+
+# Sintaxis
+
+_TOKEN = re.compile(r'''
+    (?P<skip>[\s,\ufeff]+|\#[^\n\r]*)
+  | (?P<punct>\.\.\.|[{}()\[\]:!$=@])
+  | (?P<number>-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?)
+  | (?P<string>"(?:[^"\\\n\r]|\\["\\/bfnrt]|\\u[0-9A-Fa-f]{4})*")
+  | (?P<name>[_A-Za-z][_0-9A-Za-z]*)
+''', re.VERBOSE)
+
+
+def _tokenize(text):
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise QueryError(f'Carácter inesperado en la posición {position}', 'SYNTAX_ERROR')
+        kind = match.lastgroup
+        if kind != 'skip':
+            tokens.append((kind, match.group(), position))
+        position = match.end()
+    tokens.append(('end', '', position))
+    return tokens
+
+
+class Variable:
+    def __init__(self, name):
+        self.name = name
+
+
+class Field:
+    def __init__(self, alias, name, arguments, selections):
+        self.alias = alias
+        self.name = name
+        self.arguments = arguments
+        # None en los campos escalares
+        self.selections = selections
+
+
+class Operation:
+    def __init__(self, name, variables, selections):
+        self.name = name
+        # {nombre: (obligatoria, valor por defecto)}
+        self.variables = variables
+        self.selections = selections
+
+
+class _Parser:
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.index = 0
+        self.depth = 0
+
+    def enter(self):
+        """
+        Cada selección y cada lista anidada es un nivel de recursión: se
+        corta antes de validar para que `{a{a{...}}}` no agote la pila
+        """
+        self.depth += 1
+        # La selección de la operación no cuenta como nivel
+        if self.depth > settings.QUERY_MAX_DEPTH + 1:
+            raise QueryError(
+                f'La consulta supera la profundidad máxima ({settings.QUERY_MAX_DEPTH})', 'QUERY_TOO_COMPLEX'
+            )
+
+    def error(self, message=None):
+        kind, value, position = self.tokens[self.index]
+        found = 'el final de la consulta' if kind == 'end' else f'"{value}"'
+        raise QueryError(message or f'Se encontró {found} en la posición {position}', 'SYNTAX_ERROR')
+
+    def peek(self, value):
+        return self.tokens[self.index][1] == value and self.tokens[self.index][0] != 'string'
+
+    def skip(self, value):
+        if self.peek(value):
+            self.index += 1
+            return True
+        return False
+
+    def expect(self, value):
+        if not self.skip(value):
+            self.error()
+
+    def name(self):
+        kind, value, _ = self.tokens[self.index]
+        if kind != 'name':
+            self.error()
+        self.index += 1
+        return value
+
+    def document(self):
+        operations = []
+        while self.tokens[self.index][0] != 'end':
+            operations.append(self.operation())
+        if not operations:
+            self.error()
+        return operations
+
+    def operation(self):
+        name = None
+        variables = {}
+        if self.peek('{'):
+            return Operation(None, variables, self.selection_set())
+        keyword = self.name()
+        if keyword != 'query':
+            raise QueryError('Solo se admiten operaciones query', 'UNSUPPORTED')
+        if self.tokens[self.index][0] == 'name':
+            name = self.name()
+        if self.skip('('):
+            while not self.skip(')'):
+                self.expect('$')
+                variable = self.name()
+                self.expect(':')
+                required = self.type_reference()
+                default = self.value(constant=True) if self.skip('=') else None
+                variables[variable] = (required and default is None, default)
+        if self.peek('@'):
+            raise QueryError('Las directivas no están soportadas', 'UNSUPPORTED')
+        return Operation(name, variables, self.selection_set())
+
+    def type_reference(self):
+        """Solo se valida la forma; retorna si es obligatoria (!)"""
+        if self.skip('['):
+            self.type_reference()
+            self.expect(']')
+        else:
+            self.name()
+        return self.skip('!')
+
+    def selection_set(self):
+        self.expect('{')
+        self.enter()
+        selections = []
+        while not self.skip('}'):
+            if self.peek('...'):
+                raise QueryError('Los fragmentos no están soportados', 'UNSUPPORTED')
+            selections.append(self.field())
+        if not selections:
+            self.error('La selección de campos no puede estar vacía')
+        self.depth -= 1
+        return selections
+
+    def field(self):
+        alias = name = self.name()
+        if self.skip(':'):
+            name = self.name()
+        arguments = {}
+        if self.skip('('):
+            while not self.skip(')'):
+                argument = self.name()
+                self.expect(':')
+                arguments[argument] = self.value()
+        if self.peek('@'):
+            raise QueryError('Las directivas no están soportadas', 'UNSUPPORTED')
+        selections = self.selection_set() if self.peek('{') else None
+        return Field(alias, name, arguments, selections)
+
+    def value(self, constant=False):
+        kind, value, _ = self.tokens[self.index]
+        if kind == 'punct' and value == '$' and not constant:
+            self.index += 1
+            return Variable(self.name())
+        if kind == 'punct' and value == '[':
+            self.index += 1
+            self.enter()
+            items = []
+            while not self.skip(']'):
+                items.append(self.value(constant))
+            self.depth -= 1
+            return items
+        self.index += 1
+        if kind == 'number':
+            return float(value) if any(c in value for c in '.eE') else int(value)
+        if kind == 'string':
+            return orjson.loads(value)
+        if kind == 'name':
+            # Los enums se tratan como texto (status: COMPLETED)
+            return {'true': True, 'false': False, 'null': None}.get(value, value)
+        self.index -= 1
+        self.error()
+
+
+@lru_cache(maxsize=256)
+def parse(text):
+    """Operaciones de `text`; se guarda el resultado de los textos frecuentes"""
+    return _Parser(text).document()
+
+
+# Esquema
+
+class Scalar:
+    def __init__(self, columns, convert):
+        self.columns = columns
+        # convert(fila, tz)
+        self.convert = convert
+
+
+class Relation:
+    """
+    `column`: columna del padre con el valor a buscar; `key`: columna del
+    tipo relacionado que se compara. `many`: lista o un solo objeto.
+    """
+    def __init__(self, target, column, key, many=False):
+        self.target = target
+        self.column = column
+        self.key = key
+        self.many = many
+
+
+class ObjectType:
+    def __init__(self, name, plural, label, relations, filters, extra=None):
+        self.name = name
+        self.plural = plural
+        self.label = label
+        self.relations = relations
+        # {argumento: (tipo, lookups)}; con varios lookups se combinan con OR
+        self.filters = filters
+        self.extra = extra or {}
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    @cached_property
+    def ordering(self):
+        return [*(self.model._meta.ordering or []), 'id']
+
+    @cached_property
+    def scalars(self):
+        fields = {}
+        for field in self.model._meta.concrete_fields:
+            column = field.attname
+            if isinstance(field, models.DateTimeField):
+                convert = lambda row, tz, column=column: format_datetime(row[column], tz)
+            elif isinstance(field, models.DateField):
+                convert = lambda row, tz, column=column: format_date(row[column])
+            elif isinstance(field, models.DecimalField):
+                convert = lambda row, tz, column=column, places=field.decimal_places: format_decimal(row[column], places)
+            else:
+                convert = lambda row, tz, column=column: row[column]
+            fields[column] = Scalar((column,), convert)
+            if field.choices:
+                labels = choice_labels(self.model, field.name)
+                fields[f'{column}_display'] = Scalar(
+                    (column,), lambda row, tz, column=column, labels=labels: labels.get(row[column], row[column])
+                )
+        fields.update(self.extra)
+        return fields
+
+
+_customer_name = Scalar(
+    ('first_name', 'last_name'), lambda row, tz: full_name(row['first_name'], row['last_name'])
+)
+
+TYPES = {
+    object_type.name: object_type
+    for object_type in [
+        ObjectType('customer', 'customers', 'crm.Customer', {
+            'vehicles': Relation('vehicle', 'id', 'customer_id', many=True),
+            'service_orders': Relation('service_order', 'id', 'customer_id', many=True),
+            'invoices': Relation('invoice', 'id', 'customer_id', many=True),
+        }, {
+            'search': ('str', ['first_name__icontains', 'last_name__icontains', 'phone__icontains', 'email__icontains']),
+            'city': ('str', ['city__iexact']),
+            'is_active': ('bool', ['is_active']),
+        }, extra={'full_name': _customer_name}),
+        ObjectType('vehicle', 'vehicles', 'crm.Vehicle', {
+            'customer': Relation('customer', 'customer_id', 'id'),
+            'service_orders': Relation('service_order', 'id', 'vehicle_id', many=True),
+        }, {
+            'plate': ('str', ['plate__iexact']),
+            'customer_id': ('int', ['customer_id']),
+            'is_active': ('bool', ['is_active']),
+        }),
+        ObjectType('product', 'products', 'inventory.Product', {
+            'movements': Relation('stock_movement', 'id', 'product_id', many=True),
+        }, {
+            'search': ('str', ['code__icontains', 'name__icontains', 'brand__icontains']),
+            'code': ('str', ['code']),
+            'category': ('str', ['category']),
+            'is_active': ('bool', ['is_active']),
+        }),
+        ObjectType('stock_movement', 'stock_movements', 'inventory.StockMovement', {
+            'product': Relation('product', 'product_id', 'id'),
+        }, {
+            'product_id': ('int', ['product_id']),
+            'movement_type': ('str', ['movement_type']),
+        }),
+        ObjectType('service_order', 'service_orders', 'services.ServiceOrder', {
+            'vehicle': Relation('vehicle', 'vehicle_id', 'id'),
+            'customer': Relation('customer', 'customer_id', 'id'),
+            'items': Relation('service_item', 'id', 'service_order_id', many=True),
+            'invoice': Relation('invoice', 'id', 'service_order_id'),
+        }, {
+            'status': ('str', ['status']),
+            'customer_id': ('int', ['customer_id']),
+            'vehicle_id': ('int', ['vehicle_id']),
+            'order_number': ('str', ['order_number']),
+        }),
+        ObjectType('service_item', 'service_items', 'services.ServiceItem', {
+            'service_order': Relation('service_order', 'service_order_id', 'id'),
+            'product': Relation('product', 'product_id', 'id'),
+        }, {
+            'service_order_id': ('int', ['service_order_id']),
+            'product_id': ('int', ['product_id']),
+            'item_type': ('str', ['item_type']),
+        }),
+        ObjectType('invoice', 'invoices', 'services.Invoice', {
+            'service_order': Relation('service_order', 'service_order_id', 'id'),
+            'customer': Relation('customer', 'customer_id', 'id'),
+        }, {
+            'status': ('str', ['status']),
+            'customer_id': ('int', ['customer_id']),
+            'invoice_number': ('str', ['invoice_number']),
+        }),
+    ]
+}
+
+# Campos raíz: `<tipo>(id)` y `<plural>(filtros, ids, limit, offset)`
+ROOTS = {}
+for _type in TYPES.values():
+    ROOTS[_type.name] = (_type, False)
+    ROOTS[_type.plural] = (_type, True)
+
+
+# Validación
+
+_KINDS = {
+    'int': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'str': lambda value: isinstance(value, str),
+    'bool': lambda value: isinstance(value, bool),
+}
+
+
+class Node:
+    """
+    Campo de objeto validado: columnas a leer y, por cada campo pedido,
+    ('scalar', Scalar), ('typename', nombre) o ('object', Node)
+    """
+    def __init__(self, alias, object_type, relation=None, arguments=None):
+        self.alias = alias
+        self.type = object_type
+        self.relation = relation
+        self.arguments = arguments or {}
+        self.fields = []
+        self.columns = {'id'}
+        if relation is not None:
+            self.columns.add(relation.key)
+
+
+class _Validator:
+    def __init__(self, variables):
+        self.variables = variables
+        self.complexity = 0
+
+    def argument(self, value, kind, name):
+        if isinstance(value, Variable):
+            value = self.variables[value.name]
+        elif isinstance(value, list):
+            value = [self.variables[item.name] if isinstance(item, Variable) else item for item in value]
+        if value is None:
+            return None
+        if kind.endswith('_list'):
+            valid = isinstance(value, list) and all(_KINDS[kind[:-5]](item) for item in value)
+        else:
+            valid = _KINDS[kind](value)
+        if not valid:
+            raise QueryError(f'Valor inválido para el argumento {name}')
+        return value
+
+    def root(self, field):
+        if field.name not in ROOTS:
+            raise QueryError(f'Campo raíz desconocido: {field.name}')
+        object_type, many = ROOTS[field.name]
+        if many:
+            allowed = {name: kind for name, (kind, _) in object_type.filters.items()}
+            allowed.update(ids='int_list', limit='int', offset='int')
+        else:
+            allowed = {'id': 'int'}
+        unknown = set(field.arguments) - set(allowed)
+        if unknown:
+            raise QueryError(f'Argumentos desconocidos en {field.name}: {", ".join(sorted(unknown))}')
+        arguments = {
+            name: self.argument(value, allowed[name], name) for name, value in field.arguments.items()
+        }
+        arguments = {name: value for name, value in arguments.items() if value is not None}
+
+        if many:
+            limit = arguments.get('limit', settings.QUERY_DEFAULT_LIMIT)
+            if not 1 <= limit <= settings.QUERY_MAX_LIMIT:
+                raise QueryError(f'limit debe estar entre 1 y {settings.QUERY_MAX_LIMIT}')
+            if arguments.get('offset', 0) < 0:
+                raise QueryError('offset no puede ser negativo')
+            arguments['limit'] = limit
+            rows = limit
+        else:
+            if 'id' not in arguments:
+                raise QueryError(f'{field.name} requiere el argumento id')
+            rows = 1
+        node = Node(field.alias, object_type, arguments=arguments)
+        self.selections(node, field, rows, depth=1)
+        return node, many
+
+    def selections(self, node, field, rows, depth):
+        if field.selections is None:
+            raise QueryError(f'{field.name} es un objeto: debe indicar sus campos')
+        if depth > settings.QUERY_MAX_DEPTH:
+            raise QueryError(
+                f'La consulta supera la profundidad máxima ({settings.QUERY_MAX_DEPTH})', 'QUERY_TOO_COMPLEX'
+            )
+        self.complexity += rows
+        if self.complexity > settings.QUERY_MAX_COMPLEXITY:
+            raise QueryError(
+                f'La consulta supera la complejidad máxima ({settings.QUERY_MAX_COMPLEXITY} filas estimadas)',
+                'QUERY_TOO_COMPLEX'
+            )
+
+        object_type = node.type
+        aliases = set()
+        for child in field.selections:
+            if child.alias in aliases:
+                raise QueryError(f'Alias repetido: {child.alias}')
+            aliases.add(child.alias)
+            if child.arguments:
+                raise QueryError(f'El campo {child.name} no admite argumentos')
+            if child.name == '__typename':
+                node.fields.append((child.alias, 'typename', object_type.name))
+            elif child.name in object_type.scalars:
+                if child.selections is not None:
+                    raise QueryError(f'{child.name} no tiene subcampos')
+                scalar = object_type.scalars[child.name]
+                node.fields.append((child.alias, 'scalar', scalar))
+                node.columns.update(scalar.columns)
+            elif child.name in object_type.relations:
+                relation = object_type.relations[child.name]
+                child_node = Node(child.alias, TYPES[relation.target], relation)
+                estimate = rows * settings.QUERY_RELATION_ESTIMATE if relation.many else rows
+                self.selections(child_node, child, estimate, depth + 1)
+                node.fields.append((child.alias, 'object', child_node))
+                node.columns.add(relation.column)
+            else:
+                raise QueryError(f'El tipo {object_type.name} no tiene el campo {child.name}')
+
+
+def validate(operation, variables):
+    """
+    Valida la operación con sus variables. Retorna [(Node, es_lista)] de
+    los campos raíz.
+    """
+    values = {}
+    for name, (required, default) in operation.variables.items():
+        if name in variables:
+            values[name] = variables[name]
+        elif required:
+            raise QueryError(f'Falta la variable obligatoria ${name}')
+        else:
+            values[name] = default
+    validator = _Validator(values)
+    roots = []
+    aliases = set()
+    for field in operation.selections:
+        if field.alias in aliases:
+            raise QueryError(f'Alias repetido: {field.alias}')
+        aliases.add(field.alias)
+        try:
+            roots.append(validator.root(field))
+        except KeyError as exc:
+            raise QueryError(f'Variable no declarada: ${exc.args[0]}')
+    return roots
+
+
+# Ejecución
+
+class Loaders:
+    """
+    Filas ya leídas en el request, por (tipo, columna clave, columnas): cada
+    relación pide de una vez todas las claves de su nivel y las que ya se
+    leyeron no se vuelven a consultar
+    """
+    def __init__(self):
+        self.loaded = {}
+        self.remaining = settings.QUERY_MAX_COMPLEXITY
+
+    def count(self, rows):
+        """Descuenta `rows` filas leídas del máximo de la consulta"""
+        self.remaining -= rows
+        if self.remaining < 0:
+            raise QueryError(
+                f'La consulta supera la complejidad máxima ({settings.QUERY_MAX_COMPLEXITY} filas leídas)',
+                'QUERY_TOO_COMPLEX'
+            )
+
+    def load(self, object_type, key, values, columns):
+        """Filas de `object_type` con `key` en `values`, agrupadas por key"""
+        groups = self.loaded.setdefault((object_type.name, key, frozenset(columns)), {})
+        missing = {value for value in values if value is not None and value not in groups}
+        if missing:
+            for value in missing:
+                groups[value] = []
+            # SQLite limita la cantidad de parámetros por consulta
+            size = connection.features.max_query_params or len(missing)
+            missing = sorted(missing)
+            for start in range(0, len(missing), size):
+                queryset = (
+                    object_type.model._default_manager
+                    .filter(**{f'{key}__in': missing[start:start + size]})
+                    .order_by(*object_type.ordering).values(*columns)
+                )
+                # Una fila más que las permitidas alcanza para saber que se pasa
+                rows = list(queryset[:self.remaining + 1])
+                self.count(len(rows))
+                for row in rows:
+                    groups[row[key]].append(row)
+        return groups
+
+
+class Executor:
+    def __init__(self):
+        self.loaders = Loaders()
+        self.tz = timezone.get_current_timezone()
+
+    def root(self, node, many):
+        object_type = node.type
+        arguments = node.arguments
+        queryset = object_type.model._default_manager.order_by(*object_type.ordering)
+        if not many:
+            rows = list(queryset.filter(pk=arguments['id']).values(*node.columns))
+            self.loaders.count(len(rows))
+            return self.resolve(node, rows)[0] if rows else None
+
+        for name, (_, lookups) in object_type.filters.items():
+            if name in arguments:
+                condition = Q()
+                for lookup in lookups:
+                    condition |= Q(**{lookup: arguments[name]})
+                queryset = queryset.filter(condition)
+        if 'ids' in arguments:
+            queryset = queryset.filter(pk__in=arguments['ids'])
+        offset = arguments.get('offset', 0)
+        rows = list(queryset.values(*node.columns)[offset:offset + arguments['limit']])
+        self.loaders.count(len(rows))
+        return self.resolve(node, rows)
+
+    def resolve(self, node, rows):
+        """Resultado de `rows` (filas de values()) con los campos de `node`"""
+        results = [{} for _ in rows]
+        for alias, kind, value in node.fields:
+            if kind == 'typename':
+                for result in results:
+                    result[alias] = value
+            elif kind == 'scalar':
+                convert = value.convert
+                for result, row in zip(results, rows):
+                    result[alias] = convert(row, self.tz)
+            else:
+                relation = value.relation
+                groups = self.loaders.load(
+                    value.type, relation.key, {row[relation.column] for row in rows}, value.columns
+                )
+                # Una fila compartida por varios padres se arma una sola vez
+                children = {id(child): child for row in rows for child in groups.get(row[relation.column], ())}
+                resolved = dict(zip(children, self.resolve(value, list(children.values()))))
+                for result, row in zip(results, rows):
+                    related = [resolved[id(child)] for child in groups.get(row[relation.column], ())]
+                    result[alias] = related if relation.many else (related[0] if related else None)
+        return results
+
+
+def query_text(query, extensions):
+    """
+    Texto de la consulta, resolviendo las consultas persistidas
+    """
+    persisted = extensions.get('persistedQuery') if isinstance(extensions, dict) else None
+    if not persisted:
+        if not isinstance(query, str) or not query.strip():
+            raise QueryError('Debe enviar una consulta (query)')
+        return query
+    digest = persisted.get('sha256Hash') if isinstance(persisted, dict) else None
+    if not isinstance(digest, str) or not re.fullmatch(r'[0-9a-f]{64}', digest):
+        raise QueryError('persistedQuery.sha256Hash inválido')
+
+    key = f'query:persisted:{digest}'
+    if query:
+        if not isinstance(query, str) or hashlib.sha256(query.encode()).hexdigest() != digest:
+            raise QueryError('El hash no corresponde a la consulta', 'PERSISTED_QUERY_HASH_MISMATCH')
+        cache.set(key, query, settings.QUERY_PERSISTED_SECONDS)
+        return query
+    query = cache.get(key)
+    if query is None:
+        raise QueryError('Consulta persistida desconocida; reenvíela con su texto', 'PERSISTED_QUERY_NOT_FOUND')
+    return query
+
+
+def execute(query=None, variables=None, operation_name=None, extensions=None):
+    """
+    Ejecuta una consulta. Retorna {'data': {...}}; lanza QueryError si la
+    consulta no es válida.
+    """
+    text = query_text(query, extensions)
+    if len(text) > settings.QUERY_MAX_LENGTH:
+        raise QueryError(f'La consulta supera los {settings.QUERY_MAX_LENGTH} caracteres', 'QUERY_TOO_COMPLEX')
+    if variables is not None and not isinstance(variables, dict):
+        raise QueryError('variables debe ser un objeto')
+
+    operations = parse(text)
+    if operation_name:
+        operations = [operation for operation in operations if operation.name == operation_name]
+        if not operations:
+            raise QueryError(f'No existe la operación {operation_name}')
+    elif len(operations) > 1:
+        raise QueryError('La consulta tiene varias operaciones: indique operationName')
+
+    roots = validate(operations[0], variables or {})
+    executor = Executor()
+    return {'data': {node.alias: executor.root(node, many) for node, many in roots}}
@@ -0,0 +1,199 @@
+"""
+Búsqueda global: patentes, clientes, productos y órdenes en una sola consulta.
+
+Cada fuente devuelve como máximo K resultados, ordenados en la base de datos
+por calidad de coincidencia (exacta, prefijo, contiene), y luego se combinan
+en una única lista ordenada por puntaje.
+"""
+import re
+import time
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from crm.models import Customer, Vehicle
+from inventory.models import Product
+from services.models import ServiceOrder
+from .concurrency import run_with_deadline
+
+
+DEFAULT_LIMIT = 5
+MAX_LIMIT = 20
+MIN_QUERY_LENGTH = 2
+
+# Puntaje según la calidad de la coincidencia (0 = exacta, 1 = prefijo, 2 = contiene)
+MATCH_SCORES = {0: 100, 1: 80, 2: 50}
+# Ajuste por tipo cuando el término parece una patente o un número de orden
+PLATE_PATTERN = re.compile(r'^[A-Z]{2,3}\d{0,3}[A-Z]{0,2}$')
+ORDER_PATTERN = re.compile(r'^(OS-?)?\d+$')
+
+
+def _match_rank(field, term):
+    """
+    Expresión SQL que clasifica la coincidencia de `field` con `term`
+    """
+    return Case(
+        When(**{f'{field}__iexact': term}, then=Value(0)),
+        When(**{f'{field}__istartswith': term}, then=Value(1)),
+        default=Value(2),
+        output_field=IntegerField(),
+    )
+
+
+def search_vehicles(term, limit):
+    plate = term.upper().replace(' ', '').replace('-', '')
+    rows = Vehicle.objects.filter(plate__icontains=plate).annotate(
+        rank=_match_rank('plate', plate)
+    ).order_by('rank', 'plate').values(
+        'id', 'plate', 'brand', 'model', 'year', 'rank',
+        'customer_id', 'customer__first_name', 'customer__last_name'
+    )[:limit]
+    return [
+        {
+            'type': 'vehicle',
+            'id': row['id'],
+            'title': row['plate'],
+            'subtitle': ' '.join(filter(None, [
+                str(row['year']) if row['year'] else None, row['brand'], row['model'],
+                f"- {row['customer__first_name']} {row['customer__last_name']}",
+            ])),
+            'customer_id': row['customer_id'],
+            'rank': row['rank'],
+        }
+        for row in rows
+    ]
+
+
+def search_customers(term, limit):
+    condition = Q()
+    for token in term.split():
+        token_condition = Q(first_name__icontains=token) | Q(last_name__icontains=token)
+        digits = re.sub(r'\D', '', token)
+        if len(digits) >= 3:
+            token_condition |= Q(phone__contains=digits)
+        condition &= token_condition
+    first_token = term.split()[0]
+    rows = Customer.objects.filter(condition).annotate(
+        rank=Case(
+            When(Q(last_name__iexact=first_token) | Q(first_name__iexact=first_token), then=Value(0)),
+            When(Q(last_name__istartswith=first_token) | Q(first_name__istartswith=first_token)
+                 | Q(phone__startswith=first_token), then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+    ).order_by('rank', 'last_name', 'first_name').values(
+        'id', 'first_name', 'last_name', 'phone', 'rank'
+    )[:limit]
+    return [
+        {
+            'type': 'customer',
+            'id': row['id'],
+            'title': f"{row['first_name']} {row['last_name']}",
+            'subtitle': row['phone'],
+            'rank': row['rank'],
+        }
+        for row in rows
+    ]
+
+
+def search_products(term, limit):
+    rows = Product.objects.filter(
+        Q(code__icontains=term) | Q(name__icontains=term)
+    ).annotate(
+        rank=Case(
+            When(code__iexact=term, then=Value(0)),
+            When(Q(code__istartswith=term) | Q(name__istartswith=term), then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+    ).order_by('rank', 'name').values(
+        'id', 'code', 'name', 'stock_quantity', 'sale_price', 'rank'
+    )[:limit]
+    return [
+        {
+            'type': 'product',
+            'id': row['id'],
+            'title': row['name'],
+            'subtitle': f"{row['code']} - Stock: {row['stock_quantity']}",
+            'rank': row['rank'],
+        }
+        for row in rows
+    ]
+
+
+def search_orders(term, limit):
+    number = term.upper()
+    digits = re.sub(r'\D', '', number)
+    if not digits:
+        return []
+    # Los números de orden tienen el formato OS-00001
+    exact = f'OS-{int(digits):05d}' if len(digits) <= 5 else f'OS-{digits}'
+    rows = ServiceOrder.objects.filter(order_number__icontains=digits).annotate(
+        rank=Case(
+            When(order_number=exact, then=Value(0)),
+            When(order_number__iexact=number, then=Value(0)),
+            default=Value(2),
+            output_field=IntegerField(),
+        )
+    ).order_by('rank', '-created_at').values(
+        'id', 'order_number', 'status', 'total', 'vehicle__plate', 'rank'
+    )[:limit]
+    return [
+        {
+            'type': 'order',
+            'id': row['id'],
+            'title': row['order_number'],
+            'subtitle': f"{row['vehicle__plate']} - {row['status']}",
+            'rank': row['rank'],
+        }
+        for row in rows
+    ]
+
+
+SOURCES = {
+    'vehicle': search_vehicles,
+    'customer': search_customers,
+    'product': search_products,
+    'order': search_orders,
+}
+
+
+def _type_bonus(result_type, term):
+    compact = term.upper().replace(' ', '').replace('-', '')
+    if result_type == 'vehicle' and PLATE_PATTERN.match(compact):
+        return 10
+    if result_type == 'order' and ORDER_PATTERN.match(compact):
+        return 10
+    return 0
+
+
+def global_search(term, limit=DEFAULT_LIMIT, types=None, timeout=None):
+    """
+    Ejecuta las búsquedas por entidad dentro del presupuesto de tiempo y
+    combina los resultados. Si alguna fuente no termina a tiempo se devuelven
+    resultados parciales y se la informa en `timed_out`.
+    """
+    start = time.perf_counter()
+    if timeout is None:
+        timeout = getattr(settings, 'SEARCH_TIMEOUT_MS', 300) / 1000
+    selected = [t for t in (types or SOURCES) if t in SOURCES]
+
+    tasks = {name: (lambda source=SOURCES[name]: source(term, limit)) for name in selected}
+    results, timed_out = run_with_deadline(tasks, timeout)
+
+    merged = []
+    for name, rows in results.items():
+        bonus = _type_bonus(name, term)
+        for row in rows:
+            row['score'] = MATCH_SCORES[row.pop('rank')] + bonus
+            merged.append(row)
+    type_order = list(SOURCES)
+    merged.sort(key=lambda r: (-r['score'], type_order.index(r['type']), r['title']))
+
+    return {
+        'query': term,
+        'results': merged,
+        'partial': bool(timed_out),
+        'timed_out': timed_out,
+        'took_ms': round((time.perf_counter() - start) * 1000, 1),
+    }
@@ -0,0 +1,34 @@
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    error = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = [
+            'id',
+            'name',
+            'status',
+            'status_display',
+            'progress',
+            'progress_message',
+            'attempts',
+            'max_attempts',
+            'run_after',
+            'result',
+            'error',
+            'created_by',
+            'created_at',
+            'started_at',
+            'finished_at',
+        ]
+        read_only_fields = fields
+
+    def get_error(self, obj):
+        # Solo la última línea del traceback (el detalle queda en el log del worker)
+        lines = obj.error.strip().splitlines()
+        return lines[-1] if lines else ''
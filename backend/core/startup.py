@@ -0,0 +1,98 @@
+"""
+Medición del arranque en frío: tiempos de importación (`python -X importtime`)
+y latencia del primer request, con y sin precalentamiento.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+
+
+# Se ejecuta en un proceso nuevo: importa el entry point WSGI, precalienta
+# (si corresponde) y mide dos requests seguidos sin credenciales
+PROBE = '''
+import json, os, time
+from wsgiref.util import setup_testing_defaults
+
+start = time.perf_counter()
+from shalom_backend.wsgi import application
+loaded = time.perf_counter()
+phases = {}
+if os.environ.get('STARTUP_WARMUP') == '1':
+    from shalom_backend.warmup import warmup
+    phases = warmup()
+ready = time.perf_counter()
+
+def request(path):
+    environ = {'PATH_INFO': path, 'HTTP_HOST': 'localhost'}
+    setup_testing_defaults(environ)
+    begin = time.perf_counter()
+    result = application(environ, lambda status, headers: None)
+    b''.join(result)
+    getattr(result, 'close', lambda: None)()
+    return round((time.perf_counter() - begin) * 1000, 2)
+
+first = request(os.environ['STARTUP_PATH'])
+second = request(os.environ['STARTUP_PATH'])
+print(json.dumps({
+    'load_ms': round((loaded - start) * 1000, 2),
+    'warmup_ms': round((ready - loaded) * 1000, 2),
+    'warmup_phases': phases,
+    'first_request_ms': first,
+    'second_request_ms': second,
+}))
+'''
+
+
+def parse_importtime(output):
+    """
+    Filas (módulo, self_us, cumulative_us, profundidad) de la salida de -X importtime
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def summarize_imports(rows, top=15):
+    """
+    Total, tiempo propio por paquete de primer nivel y los módulos más caros
+    """
+    packages = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        packages[name.split('.')[0]] += self_us
+    by_package = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+    return {
+        'modules': len(rows),
+        'total_ms': round(sum(self_us for _, self_us, _, _ in rows) / 1000, 1),
+        'packages': [{'package': name, 'self_ms': round(us / 1000, 1)} for name, us in by_package[:top]],
+        'slowest': [
+            {'module': name, 'self_ms': round(self_us / 1000, 1), 'cumulative_ms': round(cumulative_us / 1000, 1)}
+            for name, self_us, cumulative_us, _ in sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+        ],
+    }
+
+
+def probe_startup(warmup, path='/api/search/'):
+    """
+    Arranca un intérprete nuevo con -X importtime y retorna (mediciones, filas de importación)
+    """
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'shalom_backend.settings'),
+        DJANGO_WARMUP='0',
+        STARTUP_WARMUP='1' if warmup else '0',
+        STARTUP_PATH=path,
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
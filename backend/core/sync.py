@@ -0,0 +1,220 @@
+"""
+Sincronización incremental para la caché local del frontend.
+
+/api/sync/ devuelve, por modelo, las filas creadas o modificadas (upserts)
+y los ids eliminados (tombstones) desde un cursor emitido por el servidor.
+El cliente guarda el cursor de la respuesta y lo envía en la siguiente
+llamada; sin cursor recibe todo (sin tombstones).
+
+- Los cambios se recorren por (updated_at, id) con los índices de esa
+  forma, en páginas de `limit` filas por modelo (`has_more` indica que hay
+  que volver a llamar enseguida).
+- Una transacción puede confirmarse después de que el cursor pasó por su
+  updated_at. Por eso, al terminar un modelo, el cursor retrocede hasta
+  SYNC_OVERLAP_SECONDS antes del momento de la consulta: esas filas se
+  reenvían en la próxima llamada y el cliente las vuelve a aplicar (los
+  upserts son idempotentes).
+- Las bajas se registran en DeletionLog con señales post_delete (incluye
+  las bajas en cascada). Se conservan SYNC_TOMBSTONE_DAYS días: un cursor
+  más viejo se rechaza y el cliente debe sincronizar desde cero.
+- Las escrituras con update() no actualizan updated_at (auto_now); deben
+  incluirlo explícitamente para que el cambio se sincronice.
+"""
+import base64
+import binascii
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import orjson
+from django.apps import apps
+from django.conf import settings
+from django.db import models
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from .fastlist import format_date, format_datetime, format_decimal
+
+CURSOR_VERSION = 1
+
+
+class SyncSource:
+    """
+    Modelo sincronizable: `fields` son columnas propias (las FK como `<campo>_id`)
+    """
+    def __init__(self, name, label, fields):
+        self.name = name
+        self.label = label
+        self.fields = fields
+
+    @property
+    def model(self):
+        return apps.get_model(self.label)
+
+    def formatters(self, tz):
+        """
+        Conversión de cada columna al formato de la API, resuelta una vez
+        """
+        result = []
+        for name in self.fields:
+            field = self.model._meta.get_field(name[:-3] if name.endswith('_id') and name != 'id' else name)
+            if isinstance(field, models.DateTimeField):
+                result.append((name, lambda value: format_datetime(value, tz)))
+            elif isinstance(field, models.DateField):
+                result.append((name, format_date))
+            elif isinstance(field, models.DecimalField):
+                result.append((name, lambda value, places=field.decimal_places: format_decimal(value, places)))
+            else:
+                result.append((name, None))
+        return result
+
+
+SOURCES = {
+    source.name: source
+    for source in [
+        SyncSource('customer', 'crm.Customer', [
+            'id', 'first_name', 'last_name', 'email', 'phone', 'address', 'city', 'notes',
+            'is_active', 'created_by_id', 'created_at', 'updated_at',
+        ]),
+        SyncSource('vehicle', 'crm.Vehicle', [
+            'id', 'plate', 'brand', 'model', 'year', 'color', 'engine_type', 'vin', 'current_mileage',
+            'customer_id', 'notes', 'is_active', 'created_at', 'updated_at',
+        ]),
+        SyncSource('product', 'inventory.Product', [
+            'id', 'code', 'name', 'category', 'brand', 'description', 'stock_quantity', 'min_stock',
+            'unit', 'purchase_price', 'sale_price', 'is_active', 'created_at', 'updated_at',
+        ]),
+    ]
+}
+
+
+class CursorError(ValueError):
+    pass
+
+
+class CursorExpired(CursorError):
+    pass
+
+
+def encode_cursor(positions):
+    """
+    `positions`: {nombre: (datetime, id)}; la clave 'deleted' es la de las bajas
+    """
+    payload = {'v': CURSOR_VERSION}
+    payload.update({name: [at.isoformat(), pk] for name, (at, pk) in positions.items()})
+    return base64.urlsafe_b64encode(orjson.dumps(payload)).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return {}
+    try:
+        payload = orjson.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if payload.pop('v') != CURSOR_VERSION:
+            raise CursorError('Cursor de otra versión')
+        return {name: (datetime.fromisoformat(at), int(pk)) for name, (at, pk) in payload.items()}
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError) as exc:
+        if isinstance(exc, CursorError):
+            raise
+        raise CursorError('Cursor inválido') from exc
+
+
+def _after(position, field='updated_at'):
+    """(field, id) > position; el >= permite recorrer el índice por rango"""
+    at, pk = position
+    return Q(**{f'{field}__gte': at}) & (Q(**{f'{field}__gt': at}) | Q(**{field: at, 'id__gt': pk}))
+
+
+def _advance(rows, position, limit, horizon, field='updated_at'):
+    """
+    Nueva posición del cursor luego de leer `rows`. Si no quedan más filas,
+    se leyó todo hasta el horizonte de solapamiento: el cursor queda ahí
+    (aunque no haya habido cambios, para que no venza por inactividad).
+    """
+    if len(rows) < limit:
+        return (horizon, 0)
+    return (rows[-1][field], rows[-1]['id'])
+
+
+def sync_changes(cursor=None, names=None, limit=500):
+    """
+    Cambios desde `cursor` para los modelos `names` (todos si es None)
+    """
+    positions = decode_cursor(cursor)
+    now = timezone.now()
+    retention = now - timedelta(days=settings.SYNC_TOMBSTONE_DAYS)
+    horizon = now - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)
+    epoch = (datetime.min.replace(tzinfo=dt_timezone.utc), 0)
+    if cursor and positions.get('deleted', epoch)[0] < retention:
+        raise CursorExpired('El cursor es demasiado antiguo; sincronice desde cero')
+
+    tz = timezone.get_current_timezone()
+    sources = [SOURCES[name] for name in (names or SOURCES)]
+    changes = {}
+    next_positions = {}
+    has_more = False
+    for source in sources:
+        position = positions.get(source.name, epoch)
+        queryset = source.model._default_manager.order_by('updated_at', 'id')
+        if source.name in positions:
+            queryset = queryset.filter(_after(position))
+        rows = list(queryset.values(*source.fields)[:limit])
+        has_more = has_more or len(rows) == limit
+
+        formatters = source.formatters(tz)
+        upserts = []
+        for row in rows:
+            item = dict(row)
+            for name, convert in formatters:
+                if convert is not None:
+                    item[name] = convert(item[name])
+            upserts.append(item)
+        changes[source.name] = {'upserts': upserts, 'deletes': []}
+        next_positions[source.name] = _advance(rows, position, limit, horizon)
+
+    # Bajas: sin cursor el cliente no tiene nada que borrar
+    from .models import DeletionLog
+
+    deleted_position = positions.get('deleted')
+    if deleted_position is None:
+        next_positions['deleted'] = (horizon, 0)
+    else:
+        labels = {source.label.lower(): source.name for source in sources}
+        rows = list(
+            DeletionLog.objects.filter(_after(deleted_position, 'deleted_at'), model__in=labels)
+            .order_by('deleted_at', 'id').values('id', 'model', 'object_id', 'deleted_at')[:limit]
+        )
+        has_more = has_more or len(rows) == limit
+        for row in rows:
+            changes[labels[row['model']]]['deletes'].append(row['object_id'])
+        next_positions['deleted'] = _advance(rows, deleted_position, limit, horizon, 'deleted_at')
+
+    # Los modelos no pedidos conservan su posición
+    for name, position in positions.items():
+        next_positions.setdefault(name, position)
+    return {
+        'cursor': encode_cursor(next_positions),
+        'has_more': has_more,
+        'changes': changes,
+    }
+
+
+def _log_deletion(sender, instance, **kwargs):
+    from .models import DeletionLog
+
+    DeletionLog.objects.create(model=sender._meta.label_lower, object_id=instance.pk)
+
+
+def connect_signals():
+    for source in SOURCES.values():
+        post_delete.connect(_log_deletion, sender=source.model, dispatch_uid=f'sync-delete-{source.label}')
+
+
+def prune_tombstones(days=None):
+    """
+    Elimina las bajas registradas con más de `days` días
+    """
+    from .models import DeletionLog
+
+    days = settings.SYNC_TOMBSTONE_DAYS if days is None else days
+    deleted, _ = DeletionLog.objects.filter(deleted_at__lt=timezone.now() - timedelta(days=days)).delete()
+    return deleted
@@ -0,0 +1,192 @@
+"""
+Presupuestos de consultas por endpoint para detectar regresiones N+1.
+
+Cada presupuesto declara un endpoint, la cantidad máxima de consultas y cómo
+hacer crecer los datos que devuelve. El endpoint se ejecuta con 1 fila y con
+100 filas: falla si supera el presupuesto o si la cantidad de consultas crece
+con la cantidad de filas, mostrando las consultas repetidas.
+"""
+import re
+from collections import Counter
+from decimal import Decimal
+from itertools import count
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from crm.models import Customer, Vehicle
+from inventory.models import Product, StockMovement
+from services.models import ServiceOrder, ServiceItem, Invoice
+from .instrumentation import sql_shape
+
+
+class BudgetFixture:
+    """
+    Crea filas con todas sus relaciones, cada una con objetos relacionados
+    propios para que un acceso por fila se note como consulta extra
+    """
+    def __init__(self):
+        self.sequence = count(1)
+        self.created = {}
+
+    def _next(self):
+        return next(self.sequence)
+
+    def _grow(self, kind, total, factory):
+        rows = self.created.setdefault(kind, [])
+        while len(rows) < total:
+            rows.append(factory())
+        return rows
+
+    def user(self):
+        n = self._next()
+        return User.objects.create_user(
+            email=f'budget{n}@shalom.test', password=None, first_name='Usuario', last_name=str(n)
+        )
+
+    def customer(self, vehicles=2):
+        n = self._next()
+        customer = Customer.objects.create(
+            first_name='Cliente', last_name=str(n), phone=f'+54911{n:08d}',
+            email=f'cliente{n}@mail.com', created_by=self.user()
+        )
+        for _ in range(vehicles):
+            self.vehicle(customer)
+        return customer
+
+    def vehicle(self, customer=None):
+        n = self._next()
+        return Vehicle.objects.create(
+            plate=f'AB{n % 1000:03d}{chr(65 + n // 1000 % 26)}{chr(65 + n // 26000 % 26)}',
+            brand='Ford', model='Ka', year=2015, customer=customer or self.customer(vehicles=0)
+        )
+
+    def product(self):
+        n = self._next()
+        return Product.objects.create(
+            code=f'P-{n:05d}', name=f'Producto {n}', category='ACEITE',
+            stock_quantity=1, min_stock=5, purchase_price=Decimal('100'), sale_price=Decimal('150')
+        )
+
+    def order(self, vehicle=None, status='PENDING'):
+        vehicle = vehicle or self.customer().vehicles.first()
+        order = ServiceOrder.objects.create(vehicle=vehicle, status=status, created_by=self.user())
+        ServiceItem.objects.create(
+            service_order=order, item_type='PRODUCT', product=self.product(), quantity=1, unit_price=Decimal('150')
+        )
+        ServiceItem.objects.create(
+            service_order=order, item_type='SERVICE', description='Mano de obra', quantity=1, unit_price=Decimal('500')
+        )
+        return order
+
+    def invoice(self):
+        order = self.order(status='COMPLETED')
+        return Invoice.objects.create(
+            service_order=order, customer=order.customer, subtotal=order.total, created_by=self.user()
+        )
+
+    def movement(self):
+        return StockMovement.objects.create(
+            product=self.product(), movement_type='COMPRA', quantity=3, performed_by=self.user()
+        )
+
+    # Crecimiento hasta `total` filas del tipo pedido
+
+    def customers(self, total):
+        return self._grow('customers', total, self.customer)
+
+    def vehicles(self, total):
+        return self._grow('vehicles', total, self.vehicle)
+
+    def products(self, total):
+        return self._grow('products', total, self.product)
+
+    def orders(self, total):
+        return self._grow('orders', total, self.order)
+
+    def invoices(self, total):
+        return self._grow('invoices', total, self.invoice)
+
+    def movements(self, total):
+        return self._grow('movements', total, self.movement)
+
+    def customer_vehicles(self, total):
+        """Vehículos de un mismo cliente"""
+        customer = self._grow('owner', 1, lambda: self.customer(vehicles=0))[0]
+        return self._grow('owned_vehicles', total, lambda: self.vehicle(customer))
+
+    def vehicle_orders(self, total):
+        """Órdenes de un mismo vehículo"""
+        vehicle = self._grow('serviced_vehicle', 1, self.vehicle)[0]
+        return self._grow('vehicle_orders', total, lambda: self.order(vehicle))
+
+
+class QueryBudget:
+    """
+    `grow(fixture, n)` debe dejar n filas y retornar los valores con los que
+    se completa `path` (la última fila creada como `obj`)
+    """
+    def __init__(self, name, path, budget, grow):
+        self.name = name
+        self.path = path
+        self.budget = budget
+        self.grow = grow
+
+
+# Las consultas capturadas tienen los parámetros ya interpolados
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def duplicated_sql(queries, limit=5):
+    """
+    Formas de consulta repetidas (sin literales), de mayor a menor
+    """
+    shapes = Counter(_LITERALS.sub('%s', sql_shape(q['sql'])) for q in queries)
+    return [(shape, n) for shape, n in shapes.most_common(limit) if n > 1]
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Genera un test por cada presupuesto declarado en `budgets`
+    """
+    budgets = []
+    sizes = (1, 100)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for budget in cls.budgets:
+            setattr(cls, f'test_budget_{budget.name}', lambda self, budget=budget: self.assertQueryBudget(budget))
+
+    def setUp(self):
+        self.fixture = BudgetFixture()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@shalom.test', password=None, first_name='A', last_name='D', role='ADMIN'
+        ))
+
+    def assertQueryBudget(self, budget):
+        measured = []
+        for size in self.sizes:
+            rows = budget.grow(self.fixture, size)
+            path = budget.path.format(obj=rows[-1])
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(path)
+            self.assertEqual(response.status_code, 200, f'{path}: {response.status_code}')
+            measured.append((size, path, context.captured_queries))
+
+        counts = ', '.join(f'{len(queries)} con {size} filas' for size, _, queries in measured)
+        smallest, largest = measured[0][2], measured[-1][2]
+        problems = []
+        if len(largest) > len(smallest):
+            problems.append('la cantidad de consultas crece con las filas')
+        if max(len(queries) for _, _, queries in measured) > budget.budget:
+            problems.append(f'supera el presupuesto de {budget.budget}')
+        if problems:
+            repeated = '\n'.join(f'  {n}x {shape}' for shape, n in duplicated_sql(largest))
+            self.fail(
+                f'GET {measured[-1][1]}: {" y ".join(problems)} ({counts}).\n'
+                f'Consultas repetidas:\n{repeated or "  -"}'
+            )
@@ -0,0 +1,1029 @@
+import asyncio
+import hashlib
+import io
+import json
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from shalom_backend.warmup import PHASES, project_serializers, warmup
+from crm.models import Customer, Vehicle
+from accounts.serializers import CustomTokenObtainPairSerializer
+from inventory.models import Product, StockMovement
+from services.models import ServiceItem, ServiceOrder, Invoice
+from .benchmark import SCENARIOS, BenchmarkRunner
+from .concurrency import gather_with_deadline, run_with_deadline
+from .datagen import DatasetGenerator, plate_for, plate_index
+from .events import event_stream, fetch_events, hub
+from .instrumentation import Histogram, registry, sql_shape
+from .jobs import Worker, claim, enqueue, execute, job, recover_stale
+from .outbox import drain, handler, prune, record, replay
+from .query import QueryError, execute as run_query
+from .models import DeletionLog, HandlerCheckpoint, Job, OutboxEvent, TableVersion
+from .renderers import FastJSONParser, FastJSONRenderer
+from .startup import parse_importtime, summarize_imports
+from .sync import encode_cursor
+from .testing import QueryBudget, QueryBudgetTestCase, duplicated_sql
+from .versioning import bump_versions
+
+
+class RunWithDeadlineTests(TestCase):
+    @mock.patch('core.concurrency.supports_parallel_queries', return_value=True)
+    def test_parallel_returns_partial_results_on_timeout(self, _):
+        results, timed_out = run_with_deadline({
+            'fast': lambda: 'ok',
+            'slow': lambda: time.sleep(0.5) or 'late',
+        }, timeout=0.1)
+        self.assertEqual(results, {'fast': 'ok'})
+        self.assertEqual(timed_out, ['slow'])
+
+    @mock.patch('core.concurrency.supports_parallel_queries', return_value=True)
+    def test_async_gather_takes_the_slowest_task(self, _):
+        start = time.perf_counter()
+        results, timed_out = async_to_sync(gather_with_deadline)({
+            'a': lambda: time.sleep(0.1) or 'a',
+            'b': lambda: time.sleep(0.1) or 'b',
+            'slow': lambda: time.sleep(0.5) or 'late',
+        }, timeout=0.3)
+        self.assertEqual(results, {'a': 'a', 'b': 'b'})
+        self.assertEqual(timed_out, ['slow'])
+        self.assertLess(time.perf_counter() - start, 0.45)
+
+    def test_serial_skips_tasks_after_deadline(self):
+        results, timed_out = run_with_deadline({
+            'slow': lambda: time.sleep(0.15) or 'done',
+            'skipped': lambda: 'never',
+        }, timeout=0.1)
+        self.assertEqual(results, {'slow': 'done'})
+        self.assertEqual(timed_out, ['skipped'])
+
+
+class GlobalSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='emp@shalom.com', password='pass', first_name='E', last_name='M')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        customer = Customer.objects.create(first_name='Juan', last_name='Abcarian', phone='+5491123456789')
+        self.vehicle = Vehicle.objects.create(plate='ABC123', brand='Ford', model='Ka', customer=customer)
+        Vehicle.objects.create(plate='XABC12', brand='Fiat', model='Uno', customer=customer)
+        Product.objects.create(code='ABC-OIL', name='Aceite', purchase_price=10, sale_price=20)
+        self.order = ServiceOrder.objects.create(vehicle=self.vehicle)
+
+    def test_results_are_typed_ranked_and_capped(self):
+        response = self.client.get('/api/search/', {'q': 'abc123', 'limit': 1})
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(results[0]['type'], 'vehicle')
+        self.assertEqual(results[0]['id'], self.vehicle.pk)
+        self.assertEqual(len([r for r in results if r['type'] == 'vehicle']), 1)
+        self.assertFalse(response.json()['partial'])
+
+    def test_order_number_lookup(self):
+        response = self.client.get('/api/search/', {'q': self.order.order_number, 'types': 'order'})
+        self.assertEqual(response.json()['results'][0]['title'], self.order.order_number)
+
+    def test_short_query_is_rejected(self):
+        self.assertEqual(self.client.get('/api/search/', {'q': 'a'}).status_code, 400)
+
+
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.admin = User.objects.create_user(
+            email='admin@shalom.com', password='pass', first_name='A', last_name='D', role='ADMIN'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_histogram_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 101):
+            histogram.add(value)
+        self.assertLessEqual(histogram.percentile(0.5), 75)
+        self.assertGreaterEqual(histogram.percentile(0.5), 35)
+        self.assertEqual(histogram.percentile(1.0), 100)
+
+    def test_sql_shape_collapses_in_lists(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM t WHERE id IN (%s, %s, %s)'),
+            sql_shape('SELECT * FROM t WHERE id IN (%s)')
+        )
+
+    def test_headers_and_metrics_endpoint(self):
+        response = self.client.get('/api/crm/customers/')
+        self.assertIn('X-Query-Count', response)
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+        metrics = self.client.get('/api/_metrics/').json()
+        route = metrics['routes']['GET customer-list']
+        self.assertEqual(route['requests'], 1)
+        self.assertIn('p95', route['total_ms'])
+
+    def test_metrics_endpoint_is_admin_only(self):
+        employee = User.objects.create_user(email='emp@shalom.com', password='pass', first_name='E', last_name='M')
+        self.client.force_authenticate(employee)
+        self.assertEqual(self.client.get('/api/_metrics/').status_code, 403)
+
+
+class DatasetGeneratorTests(TestCase):
+    def test_generated_rows_are_consistent(self):
+        generator = DatasetGenerator(seed=1, batch_size=7)
+        generator.products(5)
+        generator.customers(10)
+        generator.vehicles(15)
+        generator.orders(40, items=120, invoice_ratio=1)
+        generator.movements(20)
+
+        self.assertEqual(ServiceOrder.objects.count(), 40)
+        self.assertEqual(Vehicle.objects.values('plate').distinct().count(), 15)
+        for order in ServiceOrder.objects.annotate(items_total=Sum('items__subtotal')):
+            self.assertEqual(order.total, order.items_total or 0)
+        for invoice in Invoice.objects.select_related('service_order'):
+            self.assertEqual(invoice.subtotal, invoice.service_order.total)
+            self.assertEqual(invoice.service_order.status, 'COMPLETED')
+
+        # Las órdenes creadas después continúan la numeración
+        order = ServiceOrder.objects.create(vehicle=Vehicle.objects.first())
+        self.assertEqual(order.order_number, 'OS-00041')
+
+    def test_plates_are_unique(self):
+        plates = {plate_for(i) for i in range(30000)}
+        self.assertEqual(len(plates), 30000)
+        self.assertEqual([plate_index(plate_for(i)) for i in (0, 999, 1000, 456975999)], [0, 999, 1000, 456975999])
+
+    def test_later_runs_continue_after_deletes(self):
+        generator = DatasetGenerator(seed=3)
+        generator.products(3)
+        generator.customers(3)
+        generator.vehicles(3)
+        Product.objects.filter(code='GEN-000000').delete()
+        Vehicle.objects.filter(plate=plate_for(0)).delete()
+
+        generator.products(2)
+        generator.customers(1)
+        generator.vehicles(2)
+        self.assertEqual(
+            sorted(Product.objects.values_list('code', flat=True)),
+            ['GEN-000001', 'GEN-000002', 'GEN-000003', 'GEN-000004']
+        )
+        self.assertEqual(sorted(Vehicle.objects.values_list('plate', flat=True)), [plate_for(i) for i in range(1, 5)])
+        self.assertEqual(Customer.objects.values('phone').distinct().count(), 4)
+
+
+class BenchmarkRunnerTests(TestCase):
+    def test_report_and_rollback_of_actions(self):
+        generator = DatasetGenerator(seed=2)
+        generator.products(3)
+        generator.customers(3)
+        generator.vehicles(3)
+        generator.orders(10, items=20)
+        pending = ServiceOrder.objects.create(vehicle=Vehicle.objects.first())
+        scenarios = [s for s in SCENARIOS if s.name in ('orders.list', 'orders.complete')]
+
+        report = BenchmarkRunner(iterations=2, warmup=0).run(scenarios)
+
+        self.assertEqual(report['results']['orders.list']['status'], 200)
+        self.assertIn('p95', report['results']['orders.list']['latency_ms'])
+        self.assertEqual(report['results']['orders.complete']['status'], 200)
+        pending.refresh_from_db()
+        self.assertEqual(pending.status, 'PENDING')
+
+
+class EndpointQueryBudgetTests(QueryBudgetTestCase):
+    # Los list y retrieve con ETag incluyen la consulta de versiones de tablas
+    budgets = [
+        QueryBudget('customers_list', '/api/crm/customers/?page_size=50', 4, lambda f, n: f.customers(n)),
+        QueryBudget('customers_search', '/api/crm/customers/?search=Cliente', 3, lambda f, n: f.customers(n)),
+        QueryBudget('customer_detail', '/api/crm/customers/{obj.customer_id}/', 3, lambda f, n: f.customer_vehicles(n)),
+        QueryBudget('customer_vehicles', '/api/crm/customers/{obj.customer_id}/vehicles/', 2,
+                    lambda f, n: f.customer_vehicles(n)),
+        QueryBudget('vehicles_list', '/api/crm/vehicles/?page_size=50', 3, lambda f, n: f.vehicles(n)),
+        QueryBudget('vehicle_detail', '/api/crm/vehicles/{obj.pk}/', 3, lambda f, n: f.customer_vehicles(n)),
+        QueryBudget('products_list', '/api/inventory/products/?page_size=50', 3, lambda f, n: f.products(n)),
+        QueryBudget('products_low_stock', '/api/inventory/products/low_stock/', 1, lambda f, n: f.products(n)),
+        QueryBudget('movements_list', '/api/inventory/movements/?page_size=50', 2, lambda f, n: f.movements(n)),
+        QueryBudget('orders_list', '/api/services/orders/?page_size=50', 5, lambda f, n: f.orders(n)),
+        QueryBudget('order_detail', '/api/services/orders/{obj.pk}/', 5, lambda f, n: f.orders(n)),
+        QueryBudget('orders_by_vehicle', '/api/services/orders/by_vehicle/?vehicle_id={obj.vehicle_id}', 5,
+                    lambda f, n: f.vehicle_orders(n)),
+        QueryBudget('invoices_list', '/api/services/invoices/?page_size=50', 4, lambda f, n: f.invoices(n)),
+        QueryBudget('invoice_detail', '/api/services/invoices/{obj.pk}/', 3, lambda f, n: f.invoices(n)),
+    ]
+
+
+    def test_duplicated_sql_ignores_literals(self):
+        queries = [
+            {'sql': 'SELECT * FROM "crm_customer" WHERE "crm_customer"."id" = 1'},
+            {'sql': 'SELECT * FROM "crm_customer" WHERE "crm_customer"."id" = 2'},
+            {'sql': "SELECT * FROM \"crm_vehicle\" WHERE \"plate\" = 'AB123CD'"},
+        ]
+        self.assertEqual(
+            duplicated_sql(queries),
+            [('SELECT * FROM "crm_customer" WHERE "crm_customer"."id" = %s', 2)]
+        )
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='admin@shalom.com', password='pass', first_name='A', last_name='D', role='ADMIN'
+        ))
+        self.product = Product.objects.create(code='OIL-1', name='Aceite', purchase_price=10, sale_price=20)
+
+    def test_not_modified_until_table_changes(self):
+        first = self.client.get('/api/inventory/products/')
+        etag = first['ETag']
+
+        with self.assertNumQueries(1):
+            cached = self.client.get('/api/inventory/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+
+        # La versión cambia recién al confirmarse la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.sale_price = 25
+            self.product.save()
+            self.assertEqual(self.client.get('/api/inventory/products/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        changed = self.client.get('/api/inventory/products/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_etag_depends_on_query_params_and_related_tables(self):
+        customer = Customer.objects.create(first_name='Juan', last_name='Pérez', phone='+5491123456789')
+        vehicle = Vehicle.objects.create(plate='ABC123', brand='Ford', model='Ka', customer=customer)
+        order = ServiceOrder.objects.create(vehicle=vehicle)
+        etag = self.client.get('/api/services/orders/')['ETag']
+
+        self.assertNotEqual(self.client.get('/api/services/orders/?status=PENDING')['ETag'], etag)
+        self.assertEqual(
+            self.client.get(f'/api/services/orders/{order.pk}/', HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+        # Cambios en tablas relacionadas (el cliente anidado) invalidan la lista
+        with self.captureOnCommitCallbacks(execute=True):
+            customer.city = 'Rosario'
+            customer.save()
+        self.assertEqual(self.client.get('/api/services/orders/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_login_and_users_do_not_change_listings(self):
+        etag = self.client.get('/api/services/orders/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            user = User.objects.get(email='admin@shalom.com')
+            user.last_login = timezone.now()
+            user.save(update_fields=['last_login'])
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.first_name = 'Ana'
+            user.save()
+        self.assertEqual(self.client.get('/api/services/orders/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_bulk_writes_bump_versions(self):
+        etag = self.client.get('/api/crm/vehicles/')['ETag']
+        customer = Customer.objects.create(first_name='Ana', last_name='Gómez', phone='+5491100000000')
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehicle.objects.bulk_create([Vehicle(plate='XYZ999', brand='VW', model='Gol', customer=customer)])
+            bump_versions(Vehicle)
+        self.assertEqual(self.client.get('/api/crm/vehicles/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class FastJSONRendererTests(TestCase):
+    def test_output_matches_drf_renderer(self):
+        data = {
+            'decimal': Decimal('10.50'),
+            'aware': datetime(2024, 5, 1, 12, 30, tzinfo=dt_timezone.utc),
+            'date': date(2024, 5, 1),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'lazy': gettext_lazy('Activo'),
+            'text': 'Ñandú\u2028línea\u2029',
+            'nested': [{1: 'clave entera'}, None, True, 3.5],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_falls_back_to_drf(self):
+        output = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(output, b'{\n  "a": 1\n}')
+
+    def test_parser_reads_utf8_and_rejects_invalid_json(self):
+        parser = FastJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"nombre": "Pérez"}'.encode())), {'nombre': 'Pérez'})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"nombre": '))
+
+
+class StartupTests(TestCase):
+    IMPORTTIME = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |     django.utils.version\n"
+        "import time:       300 |        420 |   django.utils\n"
+        "import time:      1000 |       1420 | django\n"
+        "import time:       500 |        500 | rest_framework.serializers\n"
+    )
+
+    def test_warmup_runs_every_phase(self):
+        timings = warmup()
+        self.assertEqual(list(timings), [name for name, _ in PHASES])
+        self.assertIn('services.serializers.ServiceOrderSerializer', {
+            f'{cls.__module__}.{cls.__name__}' for cls in project_serializers()
+        })
+
+    def test_asgi_service_only_serves_events(self):
+        with mock.patch.dict('os.environ', {'DJANGO_WARMUP': '0'}):
+            from shalom_backend.asgi import application
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/inventory/products/', 'headers': []}
+        asyncio.run(application(scope, receive, send))
+        self.assertEqual(sent[0]['status'], 404)
+
+    def test_asgi_warmup_skips_the_database_inside_the_event_loop(self):
+        async def start():
+            return warmup(skip=('database',))
+
+        with self.assertNoLogs('shalom.startup', 'ERROR'):
+            timings = asyncio.run(start())
+        self.assertEqual(list(timings), ['urls', 'translations', 'serializers'])
+
+    def test_importtime_summary_groups_by_package(self):
+        rows = parse_importtime(self.IMPORTTIME)
+        self.assertEqual(rows[0], ('django.utils.version', 120, 120, 2))
+
+        summary = summarize_imports(rows, top=2)
+        self.assertEqual(summary['modules'], 4)
+        self.assertEqual(summary['total_ms'], 1.9)
+        self.assertEqual(summary['packages'][0], {'package': 'django', 'self_ms': 1.4})
+        self.assertEqual(summary['slowest'][0]['module'], 'django')
+
+
+class DatabaseProfileTests(TestCase):
+    def test_sqlite_connections_apply_pragmas(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('Solo SQLite')
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='admin@shalom.com', password='pass', first_name='A', last_name='D', role='ADMIN')
+        customer = Customer.objects.create(first_name='Juan', last_name='Pérez', phone='+5491100000000')
+        vehicle = Vehicle.objects.create(plate='AAA111', brand='Ford', model='Ka', customer=customer)
+        Vehicle.objects.create(plate='BBB222', brand='Fiat', model='Uno', customer=customer)
+        order = ServiceOrder.objects.create(vehicle=vehicle, status='COMPLETED', total=Decimal('1000'))
+        Invoice.objects.create(service_order=order, customer=customer, subtotal=Decimal('1000'))
+        Product.objects.create(
+            code='P-1', name='Filtro', category='FILTRO', stock_quantity=2, min_stock=5,
+            purchase_price=Decimal('10'), sale_price=Decimal('20')
+        )
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {CustomTokenObtainPairSerializer.get_token(self.user).access_token}'
+        )
+
+    def test_dashboard_combines_statistics_endpoints(self):
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+
+        self.assertFalse(data['partial'])
+        self.assertEqual(data['orders'], self.client.get('/api/services/orders/statistics/').json())
+        self.assertEqual(data['invoices'], self.client.get('/api/services/invoices/statistics/').json())
+        self.assertEqual(data['customers'], self.client.get('/api/crm/customers/statistics/').json())
+        self.assertEqual(data['low_stock_products'], self.client.get('/api/inventory/products/low_stock/').json())
+        self.assertEqual(data['inventory']['low_stock'], 1)
+        self.assertEqual(data['inventory']['inventory_value'], 40.0)
+
+    def test_dashboard_requires_authentication(self):
+        response = APIClient().get('/api/dashboard/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+
+@job('tests.add')
+def add_job(context, a, b):
+    context.progress(50, 'sumando')
+    return {'sum': a + b}
+
+
+@job('tests.flaky', max_attempts=2, backoff=60)
+def flaky_job(context):
+    raise RuntimeError('falla siempre')
+
+
+@job('tests.slow')
+def slow_job(context, seconds):
+    time.sleep(seconds)
+    return {'slept': seconds}
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='emp@shalom.com', password=None, first_name='E', last_name='M')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unknown_job_is_rejected(self):
+        with self.assertRaises(ValueError):
+            enqueue('tests.nope')
+
+    def test_inline_worker_runs_by_priority(self):
+        low = enqueue('tests.add', {'a': 1, 'b': 2})
+        high = enqueue('tests.add', {'a': 10, 'b': 20}, priority=5)
+        later = enqueue('tests.add', {'a': 0, 'b': 0}, delay=3600)
+
+        self.assertEqual(claim('w1')[0].pk, high.pk)
+        self.assertEqual(claim('w2')[0].pk, low.pk)
+        self.assertEqual(claim('w3'), [])  # `later` todavía no está lista
+
+        Job.objects.filter(pk__in=[low.pk, high.pk]).update(status='PENDING')
+        self.assertEqual(Worker(mode='inline').run(burst=True), 2)
+        high.refresh_from_db()
+        self.assertEqual((high.status, high.result, high.progress), ('SUCCEEDED', {'sum': 30}, 100))
+        self.assertEqual(Job.objects.get(pk=later.pk).status, 'PENDING')
+
+    def test_failures_retry_with_backoff_then_fail(self):
+        failing = enqueue('tests.flaky')
+        execute(claim('w')[0])
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), ('PENDING', 1))
+        self.assertGreater(failing.run_after, timezone.now() + timedelta(seconds=50))
+        self.assertIn('RuntimeError', failing.error)
+
+        Job.objects.filter(pk=failing.pk).update(run_after=timezone.now())
+        execute(claim('w')[0])
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), ('FAILED', 2))
+
+    def test_stale_running_jobs_are_requeued(self):
+        stale = enqueue('tests.add', {'a': 1, 'b': 1})
+        claim('caido')
+        Job.objects.filter(pk=stale.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(recover_stale(stale_after=60), (1, 0))
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.locked_by), ('PENDING', ''))
+
+    def test_result_of_a_lost_claim_is_discarded(self):
+        enqueue('tests.add', {'a': 1, 'b': 1})
+        lost = claim('lento')[0]
+        Job.objects.filter(pk=lost.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+        recover_stale(stale_after=60)
+        current = claim('otro')[0]
+
+        self.assertFalse(execute(lost))
+        job = Job.objects.get(pk=lost.pk)
+        self.assertEqual((job.status, job.locked_by, job.attempts, job.result), ('RUNNING', 'otro', 2, None))
+        self.assertTrue(execute(current))
+        self.assertEqual(Job.objects.get(pk=lost.pk).result, {'sum': 2})
+
+    def test_status_endpoint_and_cancel(self):
+        own = enqueue('tests.add', {'a': 1, 'b': 1}, created_by=self.user)
+        other = enqueue('tests.add', {'a': 1, 'b': 1})
+
+        response = self.client.get(f'/api/jobs/{own.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'PENDING')
+        self.assertEqual(self.client.get(f'/api/jobs/{other.pk}/').status_code, 404)
+
+        self.assertEqual(self.client.post(f'/api/jobs/{own.pk}/cancel/').json()['status'], 'CANCELLED')
+        self.assertEqual(self.client.post(f'/api/jobs/{own.pk}/cancel/').status_code, 400)
+
+
+class InlineHeartbeatTests(TransactionTestCase):
+    # El latido corre en otro hilo con su propia conexión: necesita filas confirmadas
+    def test_inline_worker_heartbeats_while_the_job_runs(self):
+        enqueue('tests.slow', {'seconds': 0.5})
+        worker = Worker(mode='inline')
+        worker.heartbeat_interval = 0.1
+        self.assertEqual(worker.run(burst=True), 1)
+
+        job = Job.objects.get()
+        self.assertEqual(job.status, 'SUCCEEDED')
+        self.assertGreater(job.locked_at, job.started_at + timedelta(seconds=0.2))
+
+
+@override_settings(SYNC_OVERLAP_SECONDS=0)
+class SyncTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            email='sync@shalom.com', password=None, first_name='S', last_name='Y'
+        ))
+        self.customers = [
+            Customer.objects.create(first_name=f'Cliente{i}', last_name='Sync', phone=f'+54911000000{i}')
+            for i in range(3)
+        ]
+        self.vehicle = Vehicle.objects.create(
+            plate='SYN123', brand='Ford', model='Ka', customer=self.customers[0]
+        )
+        # Filas anteriores al inicio de la sincronización
+        Customer.objects.update(updated_at=timezone.now() - timedelta(minutes=5))
+        Vehicle.objects.update(updated_at=timezone.now() - timedelta(minutes=5))
+
+    def sync(self, **params):
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_initial_sync_returns_everything_without_deletes(self):
+        data = self.sync(models='customer,vehicle')
+        self.assertEqual(set(data['changes']), {'customer', 'vehicle'})
+        self.assertEqual(
+            [row['id'] for row in data['changes']['customer']['upserts']],
+            [customer.pk for customer in self.customers]
+        )
+        self.assertEqual(data['changes']['vehicle']['upserts'][0]['customer_id'], self.customers[0].pk)
+        self.assertEqual(data['changes']['customer']['deletes'], [])
+        self.assertFalse(data['has_more'])
+
+        again = self.sync(cursor=data['cursor'], models='customer,vehicle')
+        self.assertEqual(again['changes']['customer'], {'upserts': [], 'deletes': []})
+
+    def test_updates_and_cascading_deletes_after_the_cursor(self):
+        cursor = self.sync()['cursor']
+        self.customers[1].notes = 'Cambió el teléfono'
+        self.customers[1].save()
+        deleted_pk, vehicle_pk = self.customers[0].pk, self.vehicle.pk
+        self.customers[0].delete()  # borra también su vehículo
+
+        data = self.sync(cursor=cursor)
+        self.assertEqual([row['id'] for row in data['changes']['customer']['upserts']], [self.customers[1].pk])
+        self.assertEqual(data['changes']['customer']['upserts'][0]['notes'], 'Cambió el teléfono')
+        self.assertEqual(data['changes']['customer']['deletes'], [deleted_pk])
+        self.assertEqual(data['changes']['vehicle']['deletes'], [vehicle_pk])
+        self.assertEqual(data['changes']['product'], {'upserts': [], 'deletes': []})
+
+    def test_pagination_follows_has_more(self):
+        seen = []
+        cursor = None
+        for _ in range(5):
+            data = self.sync(models='customer', limit=2, **({'cursor': cursor} if cursor else {}))
+            seen += [row['id'] for row in data['changes']['customer']['upserts']]
+            cursor = data['cursor']
+            if not data['has_more']:
+                break
+        self.assertEqual(seen, [customer.pk for customer in self.customers])
+
+    @override_settings(SYNC_OVERLAP_SECONDS=60)
+    def test_recent_rows_are_sent_again(self):
+        cursor = self.sync(models='customer')['cursor']
+        recent = Customer.objects.create(first_name='Nuevo', last_name='Sync', phone='+549110000009')
+
+        first = self.sync(models='customer', cursor=cursor)
+        second = self.sync(models='customer', cursor=first['cursor'])
+        self.assertEqual([row['id'] for row in first['changes']['customer']['upserts']], [recent.pk])
+        self.assertEqual([row['id'] for row in second['changes']['customer']['upserts']], [recent.pk])
+
+    def test_invalid_expired_and_unknown(self):
+        self.assertEqual(self.client.get('/api/sync/', {'cursor': 'basura'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/sync/', {'models': 'factura'}).status_code, 400)
+
+        old = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_DAYS + 1)
+        response = self.client.get('/api/sync/', {'cursor': encode_cursor({'customer': (old, 0), 'deleted': (old, 0)})})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(response.json()['code'], 'cursor_expired')
+
+    @override_settings(SYNC_TOMBSTONE_DAYS=3)
+    def test_idle_cursor_does_not_expire(self):
+        cursor = self.sync()['cursor']
+        start = timezone.now()
+        # Un cliente que sincroniza todos los días sin bajas ni cambios
+        for day in range(1, 8):
+            with mock.patch('django.utils.timezone.now', return_value=start + timedelta(days=day)):
+                data = self.sync(cursor=cursor)
+            self.assertEqual(data['changes']['customer'], {'upserts': [], 'deletes': []})
+            cursor = data['cursor']
+
+    def test_prune_tombstones(self):
+        deleted_pk = self.customers[2].pk
+        self.customers[2].delete()
+        DeletionLog.objects.create(model='crm.customer', object_id=999, deleted_at=timezone.now() - timedelta(days=400))
+        call_command('prune_tombstones', stdout=io.StringIO())
+        self.assertEqual(list(DeletionLog.objects.values_list('object_id', flat=True)), [deleted_pk])
+
+
+class QueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='query@shalom.com', password='pass', first_name='Q', last_name='U', role='ADMIN'
+        )
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client = APIClient(HTTP_AUTHORIZATION=f'Bearer {token}')
+        products = [
+            Product.objects.create(code=f'P-{i}', name=f'Producto {i}', purchase_price=5, sale_price=10)
+            for i in range(2)
+        ]
+        self.orders = []
+        for i in range(3):
+            customer = Customer.objects.create(first_name=f'Cliente{i}', last_name='Test', phone=f'11000000{i}')
+            vehicle = Vehicle.objects.create(plate=f'QRY10{i}', brand='Ford', model='Ka', customer=customer)
+            order = ServiceOrder.objects.create(vehicle=vehicle)
+            for product in products:
+                ServiceItem.objects.create(
+                    service_order=order, item_type='PRODUCT', product=product, quantity=1, unit_price=10
+                )
+            self.orders.append(order)
+
+    def post(self, body):
+        return self.client.post('/api/query/', body, format='json')
+
+    def test_relations_cost_one_query_per_level(self):
+        text = """
+            query Ordenes($limit: Int) {
+              service_orders(limit: $limit) {
+                order_number total
+                items { product { code } }
+                customer { full_name vehicles { plate } }
+              }
+            }
+        """
+        # Órdenes, ítems, productos, clientes y vehículos
+        with self.assertNumQueries(5):
+            data = run_query(text, {'limit': 10})['data']
+        orders = data['service_orders']
+        self.assertEqual(len(orders), 3)
+        last = orders[0]
+        self.assertEqual(list(last), ['order_number', 'total', 'items', 'customer'])
+        self.assertEqual(last['total'], '20.00')
+        self.assertEqual([item['product']['code'] for item in last['items']], ['P-0', 'P-1'])
+        self.assertEqual(last['customer'], {'full_name': 'Cliente2 Test', 'vehicles': [{'plate': 'QRY102'}]})
+
+    def test_single_objects_aliases_and_filters(self):
+        order = self.orders[0]
+        data = self.post({
+            'query': """
+                query($id: Int!, $missing: Int!) {
+                  orden: service_order(id: $id) { __typename id status_display invoice { id } }
+                  nada: service_order(id: $missing) { id }
+                  pendientes: service_orders(status: PENDING, customer_id: %d) { id }
+                }
+            """ % order.customer_id,
+            'variables': {'id': order.pk, 'missing': 999999},
+        }).json()['data']
+        self.assertEqual(
+            data['orden'], {'__typename': 'service_order', 'id': order.pk, 'status_display': 'Pendiente', 'invoice': None}
+        )
+        self.assertIsNone(data['nada'])
+        self.assertEqual(data['pendientes'], [{'id': order.pk}])
+
+    def test_invalid_queries(self):
+        cases = [
+            ('{ service_orders { id ', 'SYNTAX_ERROR'),
+            ('mutation { service_orders { id } }', 'UNSUPPORTED'),
+            ('{ service_orders { ...campos } }', 'UNSUPPORTED'),
+            ('{ service_orders { secreto } }', 'BAD_QUERY'),
+            ('{ service_orders { customer } }', 'BAD_QUERY'),
+            ('{ service_orders(limit: 100000) { id } }', 'BAD_QUERY'),
+            ('query($id: Int!) { service_order(id: $id) { id } }', 'BAD_QUERY'),
+        ]
+        for text, code in cases:
+            with self.subTest(text=text):
+                response = self.post({'query': text})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['errors'][0]['extensions']['code'], code)
+
+    @override_settings(QUERY_MAX_DEPTH=3, QUERY_MAX_COMPLEXITY=1000)
+    def test_depth_and_complexity_limits(self):
+        deep = '{ service_orders(limit: 1) { customer { vehicles { service_orders { id } } } } }'
+        wide = '{ service_orders(limit: 100) { items { id } customer { id } } }'
+        for text in (deep, wide):
+            with self.subTest(text=text):
+                with self.assertRaises(QueryError) as context:
+                    run_query(text)
+                self.assertEqual(context.exception.code, 'QUERY_TOO_COMPLEX')
+        # 20 órdenes + 200 ítems estimados + 20 clientes
+        self.assertEqual(len(run_query('{ service_orders(limit: 20) { items { id } customer { id } } }')['data']['service_orders']), 3)
+
+    def test_deep_nesting_is_rejected_while_parsing(self):
+        nested = '{' + 'a{' * 3000 + 'id' + '}' * 3001
+        lists = '{ service_orders(ids: ' + '[' * 3000 + ']' * 3000 + ') { id } }'
+        self.assertTrue(all(len(text) < settings.QUERY_MAX_LENGTH for text in (nested, lists)))
+        for text in (nested, lists):
+            with self.subTest(text=text[:30]):
+                response = self.post({'query': text})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'QUERY_TOO_COMPLEX')
+
+    @override_settings(QUERY_MAX_COMPLEXITY=20)
+    def test_rows_read_count_against_complexity(self):
+        product = Product.objects.get(code='P-0')
+        StockMovement.objects.bulk_create(
+            StockMovement(product=product, movement_type='AJUSTE', quantity=1) for _ in range(30)
+        )
+        text = '{ products(code: "P-0", limit: 1) { code movements { id } } }'
+        # La estimación (1 producto + 10 movimientos) entra; las 31 filas leídas no
+        with self.assertRaises(QueryError) as context:
+            run_query(text)
+        self.assertEqual(context.exception.code, 'QUERY_TOO_COMPLEX')
+
+        StockMovement.objects.filter(pk__in=StockMovement.objects.values('pk')[:15]).delete()
+        data = run_query(text)['data']
+        self.assertEqual(len(data['products'][0]['movements']), 15)
+
+    def test_persisted_queries(self):
+        text = '{ products(limit: 5) { code } }'
+        digest = hashlib.sha256(text.encode()).hexdigest()
+        extensions = {'persistedQuery': {'version': 1, 'sha256Hash': digest}}
+
+        response = self.post({'extensions': extensions})
+        self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_NOT_FOUND')
+        response = self.post({'query': text + ' ', 'extensions': extensions})
+        self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'PERSISTED_QUERY_HASH_MISMATCH')
+
+        expected = {'data': {'products': [{'code': 'P-1'}, {'code': 'P-0'}]}}
+        self.assertEqual(self.post({'query': text, 'extensions': extensions}).json(), expected)
+        # Después alcanza con el hash, también por GET
+        response = self.client.get('/api/query/', {'extensions': json.dumps(extensions)})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), expected)
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='batch@shalom.com', password='pass', first_name='B', last_name='A', role='ADMIN'
+        )
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+        self.client = APIClient(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.product = Product.objects.create(code='OIL-1', name='Aceite', purchase_price=10, sale_price=20)
+
+    def batch(self, *requests):
+        return self.client.post('/api/batch/', {'requests': list(requests)}, format='json')
+
+    def test_responses_match_separate_requests(self):
+        paths = ['/api/inventory/products/', f'/api/inventory/products/{self.product.pk}/',
+                 '/api/inventory/products/categories/', '/api/dashboard/']
+        with mock.patch(
+            'accounts.authentication.CachedJWTAuthentication.authenticate',
+            autospec=True, side_effect=lambda auth, request: (self.user, None),
+        ) as authenticate:
+            response = self.batch(*[{'id': path, 'path': path} for path in paths])
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual(response.status_code, 200)
+
+        responses = response.json()['responses']
+        self.assertEqual([item['id'] for item in responses], paths)
+        for path, item in zip(paths[:3], responses):
+            self.assertEqual(item['status'], 200)
+            self.assertEqual(item['body'], self.client.get(path).json())
+        self.assertEqual(responses[3]['status'], 200)
+        self.assertIn('orders', responses[3]['body'])
+
+    def test_conditional_and_failing_subrequests(self):
+        etag = self.client.get('/api/inventory/products/')['ETag']
+        responses = self.batch(
+            {'path': '/api/inventory/products/', 'headers': {'If-None-Match': etag}},
+            {'path': '/api/inventory/products/999999/'},
+            {'path': '/api/no-existe/'},
+            {'path': '/api/services/orders/export/?output=csv'},
+        ).json()['responses']
+        self.assertEqual([item['status'] for item in responses], [304, 404, 404, 406])
+        self.assertEqual((responses[0]['etag'], responses[0]['body']), (etag, None))
+
+    def test_invalid_batches(self):
+        self.assertEqual(self.batch().status_code, 400)
+        self.assertEqual(self.batch({'path': 'https://example.com/api/'}).status_code, 400)
+        self.assertEqual(self.batch({'path': '/api/sync/', 'method': 'POST'}).status_code, 400)
+        with override_settings(BATCH_MAX_REQUESTS=1):
+            self.assertEqual(self.batch({'path': '/api/sync/'}, {'path': '/api/sync/'}).status_code, 400)
+        nested = self.batch({'path': '/api/batch/'}).json()['responses'][0]
+        self.assertEqual(nested['status'], 400)
+        self.assertEqual(APIClient().post('/api/batch/', {'requests': [{'path': '/api/sync/'}]}, format='json').status_code, 401)
+
+
+@override_settings(EVENTS_POLL_SECONDS=0.05, EVENTS_MAX_SECONDS=0)
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='events@shalom.com', password='pass', first_name='E', last_name='V', role='ADMIN'
+        )
+        self.token = str(CustomTokenObtainPairSerializer.get_token(self.user).access_token)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        customer = Customer.objects.create(first_name='Juan', last_name='Pérez', phone='+5491123456789')
+        self.vehicle = Vehicle.objects.create(plate='EVT123', brand='Ford', model='Ka', customer=customer)
+        self.product = Product.objects.create(
+            code='OIL-1', name='Aceite', stock_quantity=6, min_stock=5, purchase_price=10, sale_price=20
+        )
+
+    def kinds(self):
+        events, _, _ = fetch_events(0, 1000)
+        return [(event['kind'], event['object_id']) for event in events]
+
+    def events(self, params, **headers):
+        """GET /api/events/ por ASGI, como en producción"""
+        return async_to_sync(AsyncClient().get)('/api/events/', params, headers=headers)
+
+    def read(self, response):
+        async def collect():
+            return b''.join([chunk async for chunk in response.streaming_content]).decode()
+        return async_to_sync(collect)()
+
+    def test_stream_translates_domain_events(self):
+        order = ServiceOrder.objects.create(vehicle=self.vehicle)
+        order.items.create(item_type='PRODUCT', product=self.product, description='Aceite', quantity=2, unit_price=20)
+        self.assertEqual(self.client.post(f'/api/services/orders/{order.pk}/complete/').status_code, 200)
+        invoice = Invoice.objects.create(service_order=order, customer=order.customer, subtotal=40)
+        self.client.post(f'/api/services/invoices/{invoice.pk}/mark_as_paid/')
+        StockMovement.objects.create(product=self.product, movement_type='COMPRA', quantity=6)
+        # No cruza el mínimo: queda en el outbox pero no se envía
+        StockMovement.objects.create(product=self.product, movement_type='COMPRA', quantity=1)
+
+        self.assertEqual(self.kinds(), [
+            ('order.status', order.pk), ('stock.low', self.product.pk), ('order.status', order.pk),
+            ('invoice.paid', invoice.pk), ('stock.restored', self.product.pk),
+        ])
+        events, read, last = fetch_events(0, 1000)
+        self.assertEqual((read, last), (6, OutboxEvent.objects.last().pk))
+        self.assertEqual(events[0]['data']['status'], 'PENDING')
+        completed = events[2]['data']
+        self.assertEqual((completed['status'], completed['previous_status']), ('COMPLETED', 'PENDING'))
+        self.assertEqual(events[1]['data'], {'code': 'OIL-1', 'name': 'Aceite', 'stock_quantity': 4, 'min_stock': 5})
+
+    def test_status_changes_outside_the_actions_are_published(self):
+        order = ServiceOrder.objects.create(vehicle=self.vehicle)
+        invoice = Invoice.objects.create(service_order=order, customer=order.customer, subtotal=40)
+        response = self.client.patch(f'/api/services/invoices/{invoice.pk}/', {'status': 'PAID'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # Guardar de nuevo sin cambiar el status no repite el evento
+        invoice.refresh_from_db()
+        invoice.save()
+        order.status = 'CANCELLED'
+        order.save(update_fields=['status'])
+        ServiceOrder.objects.get(pk=order.pk).save()
+
+        self.assertEqual(self.kinds(), [
+            ('order.status', order.pk), ('invoice.paid', invoice.pk), ('order.status', order.pk),
+        ])
+        self.assertEqual(fetch_events(0, 1000)[0][2]['data']['status'], 'CANCELLED')
+
+    def test_rolled_back_changes_publish_nothing(self):
+        with self.assertRaises(ValueError), transaction.atomic():
+            StockMovement.objects.create(product=self.product, movement_type='VENTA', quantity=3)
+            raise ValueError
+        self.assertEqual(self.kinds(), [])
+
+    def order_created(self, order_id):
+        return record(
+            'OrderCreated', order_id, order_number=f'OS-{order_id}', vehicle_id=self.vehicle.pk,
+            customer_id=self.vehicle.customer_id,
+        )
+
+    def test_resume_replays_missed_events(self):
+        events = [self.order_created(i) for i in range(3)]
+        response = self.events({'token': self.token}, **{'Last-Event-ID': str(events[0].pk)})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = self.read(response)
+        self.assertTrue(body.startswith('retry: '))
+        self.assertNotIn(f'id: {events[0].pk}\n', body)
+        self.assertIn(
+            f'id: {events[2].pk}\nevent: order.status\ndata: {{"id":2,"order_number":"OS-2","status":"PENDING"', body
+        )
+
+        OutboxEvent.objects.filter(pk__in=[events[0].pk, events[1].pk]).delete()
+        stale = self.events({'token': self.token, 'last_event_id': events[0].pk - 1})
+        self.assertIn('event: reset', self.read(stale))
+
+        self.assertEqual(self.events({}).status_code, 401)
+        self.assertEqual(self.events({'token': self.token, 'last_event_id': 'x'}).status_code, 400)
+        # Bajo WSGI el flujo no se enviaría hasta cerrarse
+        self.assertEqual(self.client.get('/api/events/', {'token': self.token}).status_code, 501)
+
+    @override_settings(EVENTS_MAX_SECONDS=5)
+    async def test_hub_delivers_new_events_once(self):
+        stream = event_stream()
+        self.assertTrue((await anext(stream)).startswith('retry: '))
+        self.assertEqual(len(hub.subscribers), 1)
+
+        stock = {'code': 'X', 'product_name': 'X', 'min_stock': 1}
+        await sync_to_async(record)('StockChanged', 7, delta=-1, stock_quantity=3, **stock)
+        event = await sync_to_async(record)('StockChanged', 7, delta=-2, stock_quantity=1, **stock)
+        hub.wake()
+        chunk = await asyncio.wait_for(anext(stream), 2)
+        self.assertTrue(chunk.startswith(f'id: {event.pk}\nevent: stock.low\n'))
+
+        # La ventana de reordenamiento vuelve a leer el evento pero no lo reenvía
+        await asyncio.sleep(0.15)
+        self.assertTrue(all(queue.empty() for queue in hub.subscribers))
+        self.assertEqual(hub.last_id, event.pk)
+        await stream.aclose()
+        self.assertEqual(hub.subscribers, set())
+        await asyncio.wait_for(hub.task, 1)
+
+    def test_slow_clients_are_dropped(self):
+        queue = asyncio.Queue(maxsize=1)
+        queue.overflowed = False
+        hub.subscribers = {queue}
+        hub.broadcast({'id': 1})
+        hub.broadcast({'id': 2})
+        self.assertTrue(queue.overflowed)
+        self.assertEqual(hub.subscribers, set())
+
+
+received = []
+
+
+@handler('tests.collect', events=['Ping'], batch_size=2)
+def collect_handler(events):
+    if any(event['payload'].get('fail') for event in events):
+        # Escritura que debe revertirse junto con el lote
+        bump_versions(Product)
+        raise RuntimeError('payload inválido')
+    received.append([event['aggregate_id'] for event in events])
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        received.clear()
+
+    def test_events_are_part_of_the_transaction(self):
+        try:
+            with transaction.atomic():
+                record('Ping', 1)
+                raise ValueError
+        except ValueError:
+            pass
+        record('Ping', 2)
+        self.assertEqual(list(OutboxEvent.objects.values_list('aggregate_id', flat=True)), [2])
+
+    def test_drain_delivers_batches_once(self):
+        for i in range(5):
+            record('Ping', i)
+        record('Other', 99)
+
+        self.assertEqual(drain(['tests.collect'])['tests.collect'], 5)
+        self.assertEqual(received, [[0, 1], [2, 3], [4]])
+        checkpoint = HandlerCheckpoint.objects.get(handler='tests.collect')
+        self.assertEqual((checkpoint.position, checkpoint.processed), (OutboxEvent.objects.last().pk, 5))
+        self.assertEqual(drain(['tests.collect'])['tests.collect'], 0)
+
+        replay('tests.collect', OutboxEvent.objects.get(aggregate_id=4).pk)
+        drain(['tests.collect'])
+        self.assertEqual(received[-1], [4])
+
+    def test_failed_batch_is_rolled_back_and_retried(self):
+        record('Ping', 1)
+        bad = record('Ping', 2, fail=True)
+        versions = list(TableVersion.objects.values_list('table', 'version'))
+
+        with self.assertLogs('core.outbox', 'ERROR'):
+            self.assertEqual(drain(['tests.collect'])['tests.collect'], 0)
+        checkpoint = HandlerCheckpoint.objects.get(handler='tests.collect')
+        self.assertEqual((checkpoint.position, checkpoint.failures), (0, 1))
+        self.assertIn('payload inválido', checkpoint.last_error)
+        self.assertEqual(list(TableVersion.objects.values_list('table', 'version')), versions)
+
+        OutboxEvent.objects.filter(pk=bad.pk).update(payload={})
+        self.assertEqual(drain(['tests.collect'])['tests.collect'], 2)
+        self.assertEqual(HandlerCheckpoint.objects.get(handler='tests.collect').failures, 0)
+
+    @override_settings(OUTBOX_GAP_SECONDS=60)
+    def test_recent_gaps_wait_for_late_commits(self):
+        first = record('Ping', 1)
+        OutboxEvent.objects.create(id=first.pk + 2, name='Ping', aggregate_id=3)
+        drain(['tests.collect'])
+        self.assertEqual(received, [[1]])
+
+        # El hueco ya es viejo: se da por revertido
+        OutboxEvent.objects.filter(pk=first.pk + 2).update(created_at=timezone.now() - timedelta(minutes=5))
+        drain(['tests.collect'])
+        self.assertEqual(received, [[1], [3]])
+
+    def test_prune_keeps_unprocessed_events(self):
+        old = timezone.now() - timedelta(days=settings.OUTBOX_RETENTION_DAYS + 1)
+        record('Ping', 1)
+        OutboxEvent.objects.update(created_at=old)
+        self.assertEqual(prune(), 0)
+        drain()
+        self.assertEqual(prune(), 1)
@@ -0,0 +1,17 @@
+from django.urls import path, include
+from rest_framework.routers import SimpleRouter
+from . import views
+
+router = SimpleRouter()
+router.register(r'jobs', views.JobViewSet, basename='job')
+
+urlpatterns = [
+    path('search/', views.search, name='global_search'),
+    path('_metrics/', views.metrics, name='metrics'),
+    path('dashboard/', views.dashboard, name='dashboard'),
+    path('sync/', views.sync, name='sync'),
+    path('batch/', views.batch, name='batch'),
+    path('query/', views.query, name='query'),
+    path('events/', views.events, name='events'),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,84 @@
+"""
+Versiones por tabla para las respuestas condicionales (ETag / 304).
+
+Las altas, modificaciones y bajas de los modelos registrados incrementan la
+versión de su tabla mediante señales. El incremento se hace al confirmarse
+la transacción de la escritura (on_commit): hacerlo adentro tomaría el lock
+de la fila de la tabla hasta el final y serializaría a los escritores
+concurrentes. Las escrituras que no disparan señales (bulk_create,
+update(), executemany) deben llamar a bump_versions() explícitamente.
+"""
+from functools import partial
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+
+
+TRACKED_MODELS = [
+    'accounts.User',
+    'crm.Customer',
+    'crm.Vehicle',
+    'crm.CustomerSegment',
+    'inventory.Product',
+    'services.ServiceOrder',
+    'services.ServiceItem',
+    'services.Invoice',
+]
+
+
+def table_key(model):
+    return model._meta.label_lower
+
+
+def bump_versions(*models):
+    """
+    Incrementa la versión de las tablas de los modelos indicados al
+    confirmarse la transacción en curso (en el acto fuera de una transacción);
+    si se revierte, las versiones no cambian
+    """
+    transaction.on_commit(partial(_bump, sorted({table_key(model) for model in models})), robust=True)
+
+
+def _bump(keys):
+    from .models import TableVersion
+
+    now = timezone.now()
+    for key in keys:
+        updated = TableVersion.objects.filter(table=key).update(version=F('version') + 1, updated_at=now)
+        if not updated:
+            TableVersion.objects.bulk_create(
+                [TableVersion(table=key, version=1, updated_at=now)], ignore_conflicts=True
+            )
+
+
+def table_versions(models):
+    """
+    Versiones actuales de las tablas en una sola consulta, en el orden de `models`
+    """
+    from .models import TableVersion
+
+    keys = [table_key(model) for model in models]
+    rows = {
+        row[0]: row[1:]
+        for row in TableVersion.objects.filter(table__in=keys).values_list('table', 'version', 'updated_at')
+    }
+    return [(key, *rows.get(key, (0, None))) for key in keys]
+
+
+def _bump_sender(sender, update_fields=None, **kwargs):
+    if kwargs.get('raw'):
+        return
+    # El login solo actualiza last_login, que no se muestra en ningún listado
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    bump_versions(sender)
+
+
+def connect_signals():
+    for label in TRACKED_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(_bump_sender, sender=model, dispatch_uid=f'version-save-{label}')
+        post_delete.connect(_bump_sender, sender=model, dispatch_uid=f'version-delete-{label}')
@@ -0,0 +1,273 @@
+import os
+
+import orjson
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from rest_framework import exceptions, status, viewsets
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .dashboard import build_dashboard
+from .events import event_stream
+from .models import Job
+from .serializers import JobSerializer
+from .instrumentation import registry
+from .search import global_search, DEFAULT_LIMIT, MAX_LIMIT, MIN_QUERY_LENGTH
+from .batch import BatchError, parse_requests, run_batch
+from .query import QueryError, execute
+from .sync import SOURCES, CursorError, CursorExpired, sync_changes
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search(request):
+    """
+    Búsqueda global de vehículos, clientes, productos y órdenes.
+    Parámetros: q (término), limit (máximo por tipo), types (ej: vehicle,customer)
+    """
+    term = request.query_params.get('q', '').strip()
+    if len(term) < MIN_QUERY_LENGTH:
+        return Response(
+            {'error': f'El término de búsqueda debe tener al menos {MIN_QUERY_LENGTH} caracteres'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    limit = request.query_params.get('limit', '')
+    limit = min(int(limit), MAX_LIMIT) if limit.isdigit() and int(limit) > 0 else DEFAULT_LIMIT
+    types = request.query_params.get('types', None)
+    types = [t.strip() for t in types.split(',')] if types else None
+
+    return Response(global_search(term, limit=limit, types=types))
+
+
+@api_view(['GET', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def metrics(request):
+    """
+    Métricas por ruta del proceso actual: p50/p95/p99 de latencia total, DB,
+    vista y renderizado, consultas promedio y tamaño de respuesta.
+    DELETE reinicia los contadores. Solo para administradores.
+    """
+    if not request.user.is_admin:
+        return Response(
+            {"detail": "No tiene permisos para ver esta información."},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    if request.method == 'DELETE':
+        registry.reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    return Response(registry.snapshot())
+
+
+def _json_response(data, status_code=200):
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    return HttpResponse(renderer.render(data), status=status_code, content_type='application/json')
+
+
+def _authenticate(request):
+    """
+    Autenticación de DRF para vistas async (api_view no las admite)
+    """
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = drf_request.user
+    except exceptions.AuthenticationFailed as exc:
+        return None, exc.detail
+    if not user or not user.is_authenticated:
+        return None, exceptions.NotAuthenticated.default_detail
+    return user, None
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sync(request):
+    """
+    Cambios desde el último cursor para la caché local del frontend.
+    Parámetros: cursor (el de la respuesta anterior; vacío para empezar),
+    models (ej: customer,vehicle; por defecto todos), limit (filas por modelo).
+    El cliente aplica primero los upserts y después los deletes, y repite
+    mientras has_more sea true. Responde 410 si el cursor expiró.
+    """
+    names = [name for name in request.query_params.get('models', '').split(',') if name] or None
+    unknown = set(names or ()) - set(SOURCES)
+    if unknown:
+        return Response(
+            {'error': f'Modelos desconocidos: {", ".join(sorted(unknown))}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        limit = min(max(int(request.query_params.get('limit', settings.SYNC_PAGE_SIZE)), 1), settings.SYNC_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = settings.SYNC_PAGE_SIZE
+
+    try:
+        data = sync_changes(request.query_params.get('cursor'), names, limit)
+    except CursorExpired as exc:
+        return Response({'error': str(exc), 'code': 'cursor_expired'}, status=status.HTTP_410_GONE)
+    except CursorError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def batch(request):
+    """
+    Varios GET de la API en un solo request (ver core.batch). Cada respuesta
+    lleva su propio status; el lote responde 200 aunque alguna falle.
+    """
+    try:
+        requests = parse_requests(request.data, settings.BATCH_MAX_REQUESTS)
+    except BatchError as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    content = run_batch(request, requests, settings.BATCH_TIMEOUT_MS / 1000)
+    return HttpResponse(content, content_type='application/json')
+
+
+batch.batch_exempt = True
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def query(request):
+    """
+    Consultas de lectura con los campos que pide el cliente (ver core.query).
+    POST {query, variables, operationName, extensions}; por GET los mismos
+    parámetros, con variables y extensions en JSON. Los errores responden
+    400 con {errors: [{message, extensions: {code}}]}.
+    """
+    if request.method == 'GET':
+        params = request.query_params
+        try:
+            payload = {
+                'query': params.get('query'),
+                'operationName': params.get('operationName'),
+                'variables': orjson.loads(params['variables']) if params.get('variables') else None,
+                'extensions': orjson.loads(params['extensions']) if params.get('extensions') else None,
+            }
+        except orjson.JSONDecodeError:
+            return _query_error(QueryError('variables y extensions deben ser JSON'))
+    else:
+        payload = request.data if isinstance(request.data, dict) else {}
+
+    try:
+        result = execute(
+            payload.get('query'), payload.get('variables'), payload.get('operationName'), payload.get('extensions')
+        )
+    except QueryError as exc:
+        return _query_error(exc)
+    return HttpResponse(orjson.dumps(result), content_type='application/json')
+
+
+def _query_error(exc):
+    return Response(
+        {'errors': [{'message': str(exc), 'extensions': {'code': exc.code}}]},
+        status=status.HTTP_400_BAD_REQUEST
+    )
+
+
+@require_GET
+async def dashboard(request):
+    """
+    Estadísticas de órdenes, facturas, clientes e inventario y productos con
+    stock bajo en una sola respuesta. Las consultas corren en paralelo con
+    un límite de DASHBOARD_TIMEOUT_MS; las secciones que no terminan a
+    tiempo vuelven en null y se informan en `timed_out`.
+    """
+    user, error = await sync_to_async(_authenticate)(request)
+    if user is None:
+        response = _json_response({'detail': error}, status.HTTP_401_UNAUTHORIZED)
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+        return response
+    return _json_response(await build_dashboard())
+
+
+@require_GET
+async def events(request):
+    """
+    Eventos de cambio como server-sent events (ver core.events): order.status,
+    stock.low, stock.restored e invoice.paid. EventSource no permite enviar
+    encabezados, por eso el token se acepta también como ?token=. Se retoma
+    con Last-Event-ID (o ?last_event_id=). Lo atiende el servicio ASGI
+    (shalom_backend.asgi): bajo WSGI Django consume el flujo completo antes
+    de enviar el primer byte y la conexión ocupa un worker sin recibir nada.
+    """
+    if not isinstance(request, ASGIRequest):
+        return _json_response(
+            {'error': 'Los eventos en tiempo real requieren un servidor ASGI'}, status.HTTP_501_NOT_IMPLEMENTED
+        )
+    token = request.GET.get('token')
+    if token and 'HTTP_AUTHORIZATION' not in request.META:
+        request.META['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    user, error = await sync_to_async(_authenticate)(request)
+    if user is None:
+        return _json_response({'detail': error}, status.HTTP_401_UNAUTHORIZED)
+
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    if last_event_id is not None:
+        try:
+            last_event_id = int(last_event_id)
+        except ValueError:
+            return _json_response({'error': 'Last-Event-ID inválido'}, status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(event_stream(last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Sin buffer en nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Estado y avance de las tareas en segundo plano. Cada usuario ve las
+    suyas; los administradores, todas. Filtros: ?status=RUNNING&name=...
+    """
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Job.objects.all()
+        if not self.request.user.is_admin:
+            queryset = queryset.filter(created_by=self.request.user)
+        for field in ('status', 'name'):
+            value = self.request.query_params.get(field)
+            if value:
+                queryset = queryset.filter(**{field: value})
+        return queryset
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """
+        Cancela una tarea que todavía no empezó
+        """
+        job = self.get_object()
+        if not Job.objects.filter(pk=job.pk, status='PENDING').update(status='CANCELLED', finished_at=timezone.now()):
+            return Response(
+                {'error': 'Solo se pueden cancelar tareas pendientes'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        job.refresh_from_db()
+        return Response(JobSerializer(job).data)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Archivo generado por la tarea (result.file, relativo a MEDIA_ROOT)
+        """
+        job = self.get_object()
+        name = (job.result or {}).get('file') if job.status == 'SUCCEEDED' else None
+        path = os.path.realpath(os.path.join(settings.MEDIA_ROOT, name)) if name else None
+        if not path or not path.startswith(os.path.realpath(settings.MEDIA_ROOT) + os.sep) or not os.path.exists(path):
+            return Response(
+                {'error': 'La tarea no tiene un archivo para descargar'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=os.path.basename(path))
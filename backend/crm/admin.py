@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Customer, Vehicle
+from .models import Customer, Vehicle, CustomerSegment
 
 
 @admin.register(Customer)
@@ -52,3 +52,11 @@ class VehicleAdmin(admin.ModelAdmin):
         }),
     )
 
+
+
+@admin.register(CustomerSegment)
+class CustomerSegmentAdmin(admin.ModelAdmin):
+    list_display = ['customer', 'segment', 'rfm_score', 'frequency', 'monetary', 'last_order_at', 'computed_at']
+    list_filter = ['segment']
+    search_fields = ['customer__first_name', 'customer__last_name', 'customer__phone']
+    readonly_fields = [f.name for f in CustomerSegment._meta.fields]
@@ -0,0 +1,279 @@
+"""
+Detección de clientes duplicados y fusión de registros.
+
+La detección agrupa a los clientes en bloques (teléfono normalizado, email y
+clave fonética del nombre) y solo compara los pares que comparten algún bloque,
+evitando las comparaciones O(n²) sobre toda la tabla. El endpoint usa
+cached_duplicates(), que repite la detección solo cuando cambia la versión
+de la tabla de clientes.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+from functools import lru_cache
+from itertools import combinations
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.versioning import bump_versions, table_versions
+
+from .models import Customer, CustomerSegment, Vehicle
+
+
+# Pesos de cada coincidencia en el puntaje final (0 a 1)
+PHONE_WEIGHT = 0.45
+EMAIL_WEIGHT = 0.35
+NAME_WEIGHT = 0.40
+
+DEFAULT_THRESHOLD = 0.6
+# Bloques más grandes que esto (ej: "Juan Pérez" o un teléfono genérico) no se comparan
+MAX_BLOCK_SIZE = 50
+# La clave incluye la versión de la tabla: el vencimiento solo libera memoria
+DUPLICATES_CACHE_SECONDS = 3600
+
+_NON_DIGITS = re.compile(r'\D')
+_PHONE_SEPARATORS = re.compile(r'[\s\-().]')
+_PHONETIC_RULES = [
+    (re.compile(r'LL'), 'Y'),
+    (re.compile(r'QU'), 'K'),
+    (re.compile(r'C([EI])'), r'S\1'),
+    (re.compile(r'G([EI])'), r'J\1'),
+    (re.compile(r'GU([EI])'), r'G\1'),
+    (re.compile(r'C'), 'K'),
+    (re.compile(r'Z'), 'S'),
+    (re.compile(r'V'), 'B'),
+    (re.compile(r'W'), 'U'),
+    (re.compile(r'X'), 'KS'),
+    (re.compile(r'H'), ''),
+]
+
+
+def clean_phone(value):
+    """
+    Elimina los separadores habituales de un teléfono (espacios, guiones,
+    paréntesis y puntos), conservando el prefijo '+'
+    """
+    return _PHONE_SEPARATORS.sub('', value or '')
+
+
+def normalize_phone(value):
+    """
+    Retorna los últimos 8 dígitos del teléfono, que identifican al abonado
+    independientemente del formato (+54 9, 0, 15, código de área, etc.)
+    """
+    digits = _NON_DIGITS.sub('', value or '')
+    if len(digits) < 8:
+        return ''
+    return digits[-8:]
+
+
+def normalize_email(value):
+    return (value or '').strip().lower()
+
+
+@lru_cache(maxsize=65536)
+def normalize_name(value):
+    """
+    Pasa el nombre a mayúsculas, sin acentos ni caracteres no alfabéticos
+    """
+    text = unicodedata.normalize('NFKD', value or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return re.sub(r'[^A-Z ]', '', text.upper()).strip()
+
+
+@lru_cache(maxsize=65536)
+def phonetic_key(value):
+    """
+    Clave fonética simplificada para apellidos en español.
+    Unifica grafías que suenan igual (V/B, Z/S, LL/Y, C/K/QU, H muda)
+    y conserva la primera letra más el esqueleto de consonantes.
+    """
+    name = normalize_name(value).split(' ')[0]
+    if not name:
+        return ''
+    for pattern, replacement in _PHONETIC_RULES:
+        name = pattern.sub(replacement, name)
+    if not name:
+        return ''
+    head, tail = name[0], re.sub(r'[AEIOU]', '', name[1:])
+    key = head
+    for ch in tail:
+        if ch != key[-1]:
+            key += ch
+    return key[:6]
+
+
+def blocking_keys(first_name, last_name, phone, email):
+    """
+    Claves de bloqueo de un cliente. Dos clientes solo se comparan si
+    comparten al menos una clave.
+    """
+    keys = []
+    phone_key = normalize_phone(phone)
+    if phone_key:
+        keys.append(f'p:{phone_key}')
+    email_key = normalize_email(email)
+    if email_key:
+        keys.append(f'e:{email_key}')
+    # Clave de nombre independiente del orden para detectar nombres invertidos
+    name_parts = sorted(filter(None, [phonetic_key(first_name or ''), phonetic_key(last_name or '')]))
+    if len(name_parts) == 2:
+        keys.append('n:' + '|'.join(name_parts))
+    return keys
+
+
+def score_pair(a, b, threshold=0.0):
+    """
+    Puntúa la similitud entre dos clientes normalizados.
+    Retorna (puntaje, motivos). Si el par no puede alcanzar `threshold`
+    ni siquiera con nombres idénticos, se descarta sin comparar nombres.
+    """
+    score = 0.0
+    reasons = []
+    if a['phone'] and a['phone'] == b['phone']:
+        score += PHONE_WEIGHT
+        reasons.append('phone')
+    if a['email'] and a['email'] == b['email']:
+        score += EMAIL_WEIGHT
+        reasons.append('email')
+    if score + NAME_WEIGHT < threshold:
+        return score, reasons
+
+    direct = SequenceMatcher(None, a['name'], b['name']).ratio()
+    reversed_ = SequenceMatcher(None, a['name'], b['reversed_name']).ratio()
+    similarity = max(direct, reversed_)
+    if similarity >= 0.75:
+        score += NAME_WEIGHT * similarity
+        reasons.append('reversed_name' if reversed_ > direct else 'name')
+
+    return min(round(score, 3), 1.0), reasons
+
+
+def _normalize_row(first_name, last_name, phone, email):
+    first = normalize_name(first_name or '')
+    last = normalize_name(last_name or '')
+    return {
+        'name': f'{first} {last}'.strip(),
+        'reversed_name': f'{last} {first}'.strip(),
+        'phone': normalize_phone(phone),
+        'email': normalize_email(email),
+    }
+
+
+def find_duplicate_candidates(rows, threshold=DEFAULT_THRESHOLD, max_block_size=MAX_BLOCK_SIZE):
+    """
+    Detecta pares de clientes posiblemente duplicados.
+
+    `rows` es un iterable de tuplas (id, first_name, last_name, phone, email).
+    Retorna una lista de dicts {'ids': (a, b), 'score', 'reasons'} ordenada
+    por puntaje descendente.
+    """
+    normalized = {}
+    blocks = defaultdict(list)
+    for pk, first_name, last_name, phone, email in rows:
+        normalized[pk] = _normalize_row(first_name, last_name, phone, email)
+        for key in blocking_keys(first_name, last_name, phone, email):
+            blocks[key].append(pk)
+
+    seen = set()
+    suggestions = []
+    for key, ids in blocks.items():
+        if len(ids) < 2:
+            continue
+        if len(ids) > max_block_size:
+            continue
+        for a, b in combinations(sorted(ids), 2):
+            if (a, b) in seen:
+                continue
+            seen.add((a, b))
+            score, reasons = score_pair(normalized[a], normalized[b], threshold)
+            if score >= threshold:
+                suggestions.append({'ids': (a, b), 'score': score, 'reasons': reasons})
+
+    suggestions.sort(key=lambda s: (-s['score'], s['ids']))
+    return suggestions
+
+
+def detect_duplicates(queryset=None, threshold=DEFAULT_THRESHOLD):
+    """
+    Ejecuta la detección sobre la base de datos (una única consulta)
+    """
+    if queryset is None:
+        queryset = Customer.objects.filter(is_active=True)
+    rows = queryset.order_by().values_list(
+        'id', 'first_name', 'last_name', 'phone', 'email'
+    ).iterator(chunk_size=5000)
+    return find_duplicate_candidates(rows, threshold=threshold)
+
+
+def cached_duplicates(threshold=DEFAULT_THRESHOLD):
+    """
+    detect_duplicates() guardado en caché con la versión de la tabla de
+    clientes en la clave: cualquier alta, modificación o baja de clientes
+    (core.versioning) la invalida. Una consulta por pedido si no cambió.
+    """
+    [(_, version, updated)] = table_versions([Customer])
+    key = f'crm:duplicates:{version}:{updated.timestamp() if updated else 0}:{threshold}'
+    suggestions = cache.get(key)
+    if suggestions is None:
+        suggestions = detect_duplicates(threshold=threshold)
+        cache.set(key, suggestions, DUPLICATES_CACHE_SECONDS)
+    return suggestions
+
+
+def merge_customers(survivor, duplicate_ids):
+    """
+    Fusiona los clientes duplicados en `survivor`.
+
+    Mueve vehículos, órdenes de servicio y facturas con UPDATEs por conjunto,
+    completa los datos vacíos del cliente que se conserva y elimina los
+    duplicados, todo dentro de una única transacción.
+    """
+    from services.models import ServiceOrder, Invoice
+    from services.quickcard import invalidate_customer_cards
+
+    duplicate_ids = [pk for pk in set(duplicate_ids) if pk != survivor.pk]
+    if not duplicate_ids:
+        return {'vehicles': 0, 'service_orders': 0, 'invoices': 0, 'merged': 0}
+
+    with transaction.atomic():
+        duplicates = list(Customer.objects.select_for_update().filter(pk__in=duplicate_ids))
+        found_ids = [c.pk for c in duplicates]
+
+        moved = {
+            # updated_at explícito: update() no lo actualiza y la sincronización lo necesita
+            'vehicles': Vehicle.objects.filter(customer_id__in=found_ids).update(
+                customer=survivor, updated_at=timezone.now()
+            ),
+            'service_orders': ServiceOrder.objects.filter(customer_id__in=found_ids).update(customer=survivor),
+            'invoices': Invoice.objects.filter(customer_id__in=found_ids).update(customer=survivor),
+        }
+
+        bump_versions(Vehicle, ServiceOrder, Invoice)
+
+        # Completar datos faltantes con los de los duplicados
+        updated_fields = []
+        for field in ('email', 'address', 'city'):
+            if not getattr(survivor, field):
+                value = next((getattr(c, field) for c in duplicates if getattr(c, field)), None)
+                if value:
+                    setattr(survivor, field, value)
+                    updated_fields.append(field)
+        extra_notes = [c.notes for c in duplicates if c.notes]
+        if extra_notes:
+            survivor.notes = '\n'.join(filter(None, [survivor.notes] + extra_notes))
+            updated_fields.append('notes')
+        if updated_fields:
+            survivor.save(update_fields=updated_fields + ['updated_at'])
+
+        Customer.objects.filter(pk__in=found_ids).delete()
+        # Forzar el recálculo del segmento RFM en la próxima ejecución
+        CustomerSegment.objects.filter(customer=survivor).delete()
+        # Los UPDATE por conjunto no disparan señales: invalidar las fichas rápidas
+        transaction.on_commit(lambda: invalidate_customer_cards([survivor.pk]))
+
+    moved['merged'] = len(found_ids)
+    return moved
@@ -0,0 +1,103 @@
+"""
+Representación de clientes y vehículos desde filas values(), idéntica a
+CustomerSerializer y VehicleSerializer
+"""
+from core.fastlist import format_datetime, full_name
+from .models import Vehicle
+
+
+VEHICLE_FIELDS = [
+    'id', 'plate', 'brand', 'model', 'year', 'color', 'engine_type', 'vin', 'current_mileage',
+    'customer_id', 'notes', 'is_active', 'created_at', 'updated_at',
+]
+CUSTOMER_FIELDS = [
+    'id', 'first_name', 'last_name', 'email', 'phone', 'address', 'city', 'notes', 'is_active',
+    'created_by_id', 'created_by__first_name', 'created_by__last_name', 'created_at', 'updated_at',
+]
+# Lo que VehicleSerializer muestra de su cliente
+VEHICLE_CUSTOMER_FIELDS = ['id', 'first_name', 'last_name', 'phone', 'email']
+
+
+def vehicle_representation(row, customer, tz):
+    name = f"{customer['first_name']} {customer['last_name']}"
+    year = row['year']
+    return {
+        'id': row['id'],
+        'plate': row['plate'],
+        'brand': row['brand'],
+        'model': row['model'],
+        'year': year,
+        'color': row['color'],
+        'engine_type': row['engine_type'],
+        'vin': row['vin'],
+        'current_mileage': row['current_mileage'],
+        'customer': row['customer_id'],
+        'customer_name': name,
+        'customer_details': {
+            'id': customer['id'],
+            'full_name': name,
+            'phone': customer['phone'],
+            'email': customer['email'],
+        },
+        'notes': row['notes'],
+        'is_active': row['is_active'],
+        'created_at': format_datetime(row['created_at'], tz),
+        'updated_at': format_datetime(row['updated_at'], tz),
+        'display_name': f"{f'{year} ' if year else ''}{row['brand']} {row['model']}",
+    }
+
+
+def customer_representation(row, vehicles, tz):
+    data = {
+        'id': row['id'],
+        'first_name': row['first_name'],
+        'last_name': row['last_name'],
+        'full_name': f"{row['first_name']} {row['last_name']}",
+        'email': row['email'],
+        'phone': row['phone'],
+        'address': row['address'],
+        'city': row['city'],
+        'notes': row['notes'],
+        'is_active': row['is_active'],
+        'vehicles': vehicles,
+        'vehicles_count': len(vehicles),
+        'created_by': row['created_by_id'],
+    }
+    # Sin creador, DRF omite created_by_name (el atributo no existe)
+    if row['created_by_id'] is not None:
+        data['created_by_name'] = full_name(row['created_by__first_name'], row['created_by__last_name'])
+    data['created_at'] = format_datetime(row['created_at'], tz)
+    data['updated_at'] = format_datetime(row['updated_at'], tz)
+    return data
+
+
+class CustomerGraph:
+    """
+    Arma una sola vez por id los clientes (con sus vehículos) y los
+    vehículos, a partir de las filas de clientes ya leídas y una consulta
+    para los vehículos de esos clientes
+    """
+    def __init__(self, customers, tz):
+        self.tz = tz
+        self.customer_rows = customers
+        self.vehicles = {}
+        self.vehicles_by_customer = {pk: [] for pk in customers}
+        # Mismo orden que el prefetch de customer.vehicles
+        rows = Vehicle.objects.filter(customer_id__in=customers).order_by('-created_at').values(*VEHICLE_FIELDS)
+        for row in rows:
+            self.vehicles_by_customer[row['customer_id']].append(self.vehicle(row, customers[row['customer_id']]))
+        self._customers = {}
+
+    def vehicle(self, row, customer):
+        data = self.vehicles.get(row['id'])
+        if data is None:
+            data = self.vehicles[row['id']] = vehicle_representation(row, customer, self.tz)
+        return data
+
+    def customer(self, pk):
+        data = self._customers.get(pk)
+        if data is None:
+            data = self._customers[pk] = customer_representation(
+                self.customer_rows[pk], self.vehicles_by_customer[pk], self.tz
+            )
+        return data
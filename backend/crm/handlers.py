@@ -0,0 +1,23 @@
+"""
+Handlers del outbox del CRM (ver core.outbox)
+"""
+from django.utils import timezone
+
+from core.outbox import handler
+from core.versioning import bump_versions
+from .models import CustomerSegment
+from .segmentation import refresh_metrics, rescore
+
+
+@handler('crm.segments', events=['OrderCompleted', 'OrderCancelled'])
+def update_segments(events):
+    """
+    Actualiza la segmentación RFM de los clientes con órdenes completadas o
+    canceladas: métricas de esos clientes y un solo recálculo de puntajes
+    por lote (no por orden)
+    """
+    customer_ids = {event['payload']['customer_id'] for event in events}
+    now = timezone.now()
+    refresh_metrics(customer_ids, now=now)
+    rescore(now=now)
+    bump_versions(CustomerSegment)
@@ -0,0 +1,330 @@
+"""
+Importación masiva de clientes y vehículos desde planillas de sistemas anteriores.
+
+Las filas se procesan en bloques: cada bloque se valida en memoria (incluida
+la longitud máxima de cada campo, que bulk_create no revisa), resuelve
+clientes y patentes existentes con unas pocas consultas IN y se inserta con
+bulk_create. Los vehículos se vinculan a sus clientes mediante un mapa en
+memoria (phone_key -> id de cliente), sin consultas por fila. Una fila cuyo
+teléfono ya pertenece a un cliente con otro nombre se rechaza como
+conflicto en lugar de asignarse a ese cliente.
+"""
+import csv
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from core.versioning import bump_versions
+
+from .dedup import clean_phone, normalize_name
+from .models import Customer, Vehicle
+
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Encabezados aceptados para cada campo (en minúsculas)
+COLUMN_ALIASES = {
+    'first_name': ['first_name', 'nombre'],
+    'last_name': ['last_name', 'apellido'],
+    'phone': ['phone', 'telefono', 'teléfono', 'celular'],
+    'email': ['email', 'correo', 'mail'],
+    'address': ['address', 'direccion', 'dirección', 'domicilio'],
+    'city': ['city', 'ciudad', 'localidad'],
+    'plate': ['plate', 'patente', 'dominio'],
+    'brand': ['brand', 'marca'],
+    'model': ['model', 'modelo'],
+    'year': ['year', 'anio', 'año'],
+    'color': ['color'],
+    'engine_type': ['engine_type', 'motor'],
+    'vin': ['vin', 'chasis'],
+    'current_mileage': ['current_mileage', 'kilometraje', 'km'],
+}
+
+CUSTOMER_FIELDS = ['first_name', 'last_name', 'phone', 'email', 'address', 'city']
+VEHICLE_FIELDS = ['plate', 'brand', 'model', 'year', 'color', 'engine_type', 'vin', 'current_mileage']
+
+
+def normalize_plate(value):
+    """
+    Normaliza la patente a mayúsculas, sin espacios ni guiones
+    """
+    return (value or '').upper().replace(' ', '').replace('-', '')
+
+
+def phone_key(phone):
+    """
+    Número nacional completo (código de área y abonado: los últimos 10
+    dígitos), sin prefijo internacional ni 0. A diferencia de
+    dedup.normalize_phone, que solo sugiere posibles duplicados, dos
+    teléfonos con la misma clave son el mismo número.
+    """
+    return ''.join(ch for ch in phone or '' if ch.isdigit())[-10:]
+
+
+def phone_lookup_variants(phone):
+    """
+    Formatos habituales en los que puede estar guardado un teléfono,
+    para resolverlo con una consulta IN
+    """
+    digits = phone_key(phone)
+    return {phone, digits, f'0{digits}', f'54{digits}', f'549{digits}', f'+54{digits}', f'+549{digits}'}
+
+
+def name_key(first_name, last_name):
+    """
+    Nombre comparable entre filas y clientes: sin acentos ni mayúsculas y
+    sin importar si viene como nombre-apellido o apellido-nombre
+    """
+    return tuple(sorted((normalize_name(first_name), normalize_name(last_name))))
+
+
+def validate_fields(model, data):
+    """
+    Valida cada valor con los validadores de su campo (longitud máxima, rango
+    de enteros de la base): bulk_create no lo hace y en PostgreSQL un valor
+    demasiado largo cortaría el bloque entero con DataError
+    """
+    errors = []
+    for name, value in data.items():
+        if value is None:
+            continue
+        field = model._meta.get_field(name)
+        try:
+            field.run_validators(value)
+        except ValidationError as e:
+            errors.extend(f'{field.verbose_name}: {message}' for message in e.messages)
+    if errors:
+        raise ValidationError(errors)
+
+
+def map_columns(fieldnames):
+    """
+    Retorna {campo: encabezado} para los encabezados reconocidos
+    """
+    normalized = {(name or '').strip().lower(): name for name in fieldnames or []}
+    mapping = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in normalized:
+                mapping[field] = normalized[alias]
+                break
+    return mapping
+
+
+def open_csv(stream, delimiter=None):
+    """
+    Crea un DictReader detectando el separador (',' o ';') si no se indica
+    """
+    if delimiter is None:
+        sample = stream.read(4096)
+        stream.seek(0)
+        try:
+            delimiter = csv.Sniffer().sniff(sample, delimiters=',;\t').delimiter
+        except csv.Error:
+            delimiter = ','
+    return csv.DictReader(stream, delimiter=delimiter)
+
+
+class ImportResult:
+    """
+    Acumula los totales y las filas rechazadas de una importación
+    """
+    def __init__(self):
+        self.rows = 0
+        self.customers_created = 0
+        self.customers_matched = 0
+        self.vehicles_created = 0
+        self.rejected = []
+
+    def reject(self, row_number, scope, reason, data):
+        self.rejected.append({'row': row_number, 'scope': scope, 'reason': reason, 'data': data})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'customers_created': self.customers_created,
+            'customers_matched': self.customers_matched,
+            'vehicles_created': self.vehicles_created,
+            'rejected_count': len(self.rejected),
+            'rejected': self.rejected,
+        }
+
+
+class CustomerImporter:
+    """
+    Importa filas (dicts) de clientes y vehículos en bloques
+    """
+    def __init__(self, created_by=None, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+        self.created_by = created_by
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.result = ImportResult()
+        # phone_key -> id de cliente y nombre, compartidos entre bloques
+        self.customer_ids = {}
+        self.customer_names = {}
+        self.seen_plates = set()
+        self.seen_vins = set()
+
+    def run(self, rows, columns, on_chunk=None):
+        """
+        Procesa un iterable de filas. `columns` es el resultado de map_columns().
+        `on_chunk(filas_procesadas)` se llama al terminar cada bloque.
+        """
+        self.columns = columns
+        numbered = enumerate(rows, start=2)  # la fila 1 es el encabezado
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            self.process_chunk(chunk)
+            if on_chunk is not None:
+                on_chunk(self.result.rows)
+        return self.result
+
+    def _value(self, row, field):
+        header = self.columns.get(field)
+        value = row.get(header) if header else None
+        return value.strip() if isinstance(value, str) else value
+
+    def _parse_customer(self, row):
+        data = {field: self._value(row, field) or None for field in CUSTOMER_FIELDS}
+        if not data['first_name'] or not data['last_name']:
+            raise ValidationError('Nombre y apellido son obligatorios')
+        data['phone'] = clean_phone(data['phone'])
+        Customer.phone_regex(data['phone'])
+        if data['email']:
+            validate_email(data['email'])
+        validate_fields(Customer, data)
+        return data
+
+    def _parse_vehicle(self, row):
+        data = {field: self._value(row, field) or None for field in VEHICLE_FIELDS}
+        if not data['plate']:
+            return None
+        data['plate'] = normalize_plate(data['plate'])
+        Vehicle.plate_regex(data['plate'])
+        if not data['brand'] or not data['model']:
+            raise ValidationError('Marca y modelo son obligatorios')
+        try:
+            data['year'] = int(data['year']) if data['year'] else None
+            data['current_mileage'] = int(float(data['current_mileage'])) if data['current_mileage'] else 0
+        except ValueError:
+            raise ValidationError('Año o kilometraje inválido')
+        if data['vin']:
+            data['vin'] = data['vin'].upper()
+        validate_fields(Vehicle, data)
+        return data
+
+    def process_chunk(self, chunk):
+        result = self.result
+        parsed = []
+
+        # 1. Validación en memoria
+        for row_number, row in chunk:
+            result.rows += 1
+            try:
+                customer = self._parse_customer(row)
+            except ValidationError as e:
+                result.reject(row_number, 'customer', '; '.join(e.messages), row)
+                continue
+            try:
+                vehicle = self._parse_vehicle(row)
+            except ValidationError as e:
+                result.reject(row_number, 'vehicle', '; '.join(e.messages), row)
+                vehicle = None
+            parsed.append((row_number, row, customer, vehicle))
+
+        if not parsed:
+            return
+
+        with transaction.atomic():
+            # 2. Resolver clientes existentes con una consulta IN
+            pending_phones = {
+                c['phone'] for _, _, c, _ in parsed
+                if phone_key(c['phone']) not in self.customer_ids
+            }
+            variants = set()
+            for phone in pending_phones:
+                variants |= phone_lookup_variants(phone)
+            if variants:
+                existing = (
+                    Customer.objects.filter(phone__in=variants).order_by('id')
+                    .values_list('id', 'phone', 'first_name', 'last_name')
+                )
+                for pk, phone, first_name, last_name in existing:
+                    key = phone_key(phone)
+                    if key not in self.customer_ids:
+                        self.customer_ids[key] = pk
+                        self.customer_names[key] = (first_name, last_name)
+
+            new_customers = {}
+            accepted = []
+            for row_number, row, customer, vehicle in parsed:
+                key = phone_key(customer['phone'])
+                if key in self.customer_names:
+                    names = self.customer_names[key]
+                    if name_key(*names) != name_key(customer['first_name'], customer['last_name']):
+                        result.reject(
+                            row_number, 'customer',
+                            f'El teléfono ya corresponde a otro cliente ({" ".join(names)})', row
+                        )
+                        continue
+                    if key in self.customer_ids:
+                        result.customers_matched += 1
+                else:
+                    new_customers[key] = Customer(created_by=self.created_by, **customer)
+                    self.customer_names[key] = (customer['first_name'], customer['last_name'])
+                accepted.append((row_number, row, customer, vehicle))
+
+            if new_customers and not self.dry_run:
+                Customer.objects.bulk_create(new_customers.values(), batch_size=self.chunk_size)
+                bump_versions(Customer)
+            for key, customer in new_customers.items():
+                # En modo de prueba se usa un id ficticio para vincular vehículos
+                self.customer_ids[key] = customer.pk or -1
+            result.customers_created += len(new_customers)
+
+            # 3. Resolver patentes y VIN existentes con consultas IN
+            vehicles = [(n, row, c, v) for n, row, c, v in accepted if v]
+            plates = {v['plate'] for _, _, _, v in vehicles}
+            vins = {v['vin'] for _, _, _, v in vehicles if v['vin']}
+            existing_plates = set(Vehicle.objects.filter(plate__in=plates).values_list('plate', flat=True)) if plates else set()
+            existing_vins = set(Vehicle.objects.filter(vin__in=vins).values_list('vin', flat=True)) if vins else set()
+
+            new_vehicles = []
+            for row_number, row, customer, vehicle in vehicles:
+                if vehicle['plate'] in existing_plates or vehicle['plate'] in self.seen_plates:
+                    result.reject(row_number, 'vehicle', 'La patente ya está registrada', row)
+                    continue
+                if vehicle['vin'] and (vehicle['vin'] in existing_vins or vehicle['vin'] in self.seen_vins):
+                    result.reject(row_number, 'vehicle', 'El VIN ya está registrado', row)
+                    continue
+                self.seen_plates.add(vehicle['plate'])
+                if vehicle['vin']:
+                    self.seen_vins.add(vehicle['vin'])
+                customer_id = self.customer_ids[phone_key(customer['phone'])]
+                new_vehicles.append(Vehicle(customer_id=customer_id, **vehicle))
+
+            if new_vehicles and not self.dry_run:
+                Vehicle.objects.bulk_create(new_vehicles, batch_size=self.chunk_size)
+                bump_versions(Vehicle)
+            result.vehicles_created += len(new_vehicles)
+
+
+def write_rejected_report(rejected, stream):
+    """
+    Escribe las filas rechazadas en formato CSV (fila, ámbito, motivo y datos originales)
+    """
+    headers = []
+    for entry in rejected:
+        for key in entry['data']:
+            if key not in headers:
+                headers.append(key)
+    writer = csv.writer(stream)
+    writer.writerow(['fila', 'ambito', 'motivo'] + headers)
+    for entry in rejected:
+        writer.writerow(
+            [entry['row'], entry['scope'], entry['reason']] + [entry['data'].get(h, '') for h in headers]
+        )
@@ -0,0 +1,32 @@
+"""
+Tareas en segundo plano del CRM
+"""
+import io
+
+from accounts.models import User
+from core.jobs import job
+from .importers import CustomerImporter, map_columns, open_csv
+from .segmentation import compute_segments
+
+
+@job('crm.compute_segments')
+def compute_segments_job(context, full=False):
+    context.progress(0, 'Recalculando segmentación')
+    return compute_segments(full=full)
+
+
+# Sin reintentos: los bloques ya importados quedan confirmados
+@job('crm.import_customers', max_attempts=1)
+def import_customers_job(context, content, created_by=None, dry_run=False):
+    """
+    Importación de un CSV (ya decodificado) con avance por bloque
+    """
+    total = max(content.count('\n') - 1, 1)
+    reader = open_csv(io.StringIO(content, newline=''))
+    columns = map_columns(reader.fieldnames)
+    importer = CustomerImporter(created_by=User.objects.filter(pk=created_by).first(), dry_run=dry_run)
+    result = importer.run(
+        reader, columns,
+        on_chunk=lambda rows: context.progress(100 * rows / total, f'{rows} filas procesadas')
+    )
+    return result.as_dict()
@@ -0,0 +1,27 @@
+"""
+Recalcula la segmentación RFM de clientes.
+
+Uso: python manage.py compute_customer_segments [--full]
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from crm.segmentation import compute_segments
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la segmentación RFM (recencia, frecuencia y monto) de clientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Recalcula todos los clientes')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        summary = compute_segments(full=options['full'])
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Segmentación {summary['mode']} completada en {elapsed:.2f}s: "
+            f"{summary['metrics_refreshed']} métricas recalculadas, "
+            f"{summary['scores_updated']} puntajes actualizados"
+        ))
@@ -0,0 +1,56 @@
+"""
+Importa clientes y vehículos desde una planilla CSV de un sistema anterior.
+
+Uso: python manage.py import_customers clientes.csv --report rechazados.csv
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from crm.importers import CustomerImporter, map_columns, open_csv, write_rejected_report, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = 'Importa clientes y vehículos en bloques desde un archivo CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo CSV a importar')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument('--delimiter', default=None, help='Separador (se detecta automáticamente)')
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument('--report', help='Archivo CSV donde guardar las filas rechazadas')
+        parser.add_argument('--created-by', help='Email del usuario registrado como creador')
+        parser.add_argument('--dry-run', action='store_true', help='Valida sin guardar cambios')
+
+    def handle(self, *args, **options):
+        created_by = None
+        if options['created_by']:
+            created_by = User.objects.filter(email=options['created_by']).first()
+            if not created_by:
+                raise CommandError(f"No existe el usuario {options['created_by']}")
+
+        with open(options['path'], encoding=options['encoding'], newline='') as stream:
+            reader = open_csv(stream, options['delimiter'])
+            columns = map_columns(reader.fieldnames)
+            missing = {'first_name', 'last_name', 'phone'} - set(columns)
+            if missing:
+                raise CommandError(f"Faltan columnas obligatorias: {', '.join(sorted(missing))}")
+
+            importer = CustomerImporter(
+                created_by=created_by,
+                chunk_size=options['chunk_size'],
+                dry_run=options['dry_run']
+            )
+            result = importer.run(reader, columns)
+
+        if options['report'] and result.rejected:
+            with open(options['report'], 'w', encoding='utf-8', newline='') as report:
+                write_rejected_report(result.rejected, report)
+
+        prefix = '[Prueba] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefix}{result.rows} filas procesadas: '
+            f'{result.customers_created} clientes creados, '
+            f'{result.customers_matched} filas asociadas a clientes existentes, '
+            f'{result.vehicles_created} vehículos creados, '
+            f'{len(result.rejected)} rechazos'
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 5.0 on 2026-10-19 13:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_order_at', models.DateTimeField(blank=True, null=True, verbose_name='Última orden')),
+                ('frequency', models.PositiveIntegerField(default=0, verbose_name='Órdenes completadas')),
+                ('monetary', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Monto total')),
+                ('recency_score', models.PositiveSmallIntegerField(default=0, verbose_name='Puntaje de recencia')),
+                ('frequency_score', models.PositiveSmallIntegerField(default=0, verbose_name='Puntaje de frecuencia')),
+                ('monetary_score', models.PositiveSmallIntegerField(default=0, verbose_name='Puntaje de monto')),
+                ('rfm_score', models.PositiveSmallIntegerField(default=0, verbose_name='Puntaje RFM')),
+                ('segment', models.CharField(choices=[('CHAMPION', 'Campeón'), ('LOYAL', 'Leal'), ('PROMISING', 'Prometedor'), ('AT_RISK', 'En riesgo'), ('LAPSED', 'Inactivo'), ('OCCASIONAL', 'Ocasional'), ('NO_ORDERS', 'Sin órdenes')], default='NO_ORDERS', max_length=20, verbose_name='Segmento')),
+                ('computed_at', models.DateTimeField(verbose_name='Fecha de cálculo')),
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='segment', to='crm.customer', verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Segmento de Cliente',
+                'verbose_name_plural': 'Segmentos de Clientes',
+                'ordering': ['-monetary'],
+                'indexes': [models.Index(fields=['segment', '-monetary'], name='crm_custome_segment_cafea1_idx'), models.Index(fields=['-monetary'], name='crm_custome_monetar_ac1c50_idx'), models.Index(fields=['last_order_at'], name='crm_custome_last_or_322372_idx'), models.Index(fields=['-rfm_score'], name='crm_custome_rfm_sco_b89e48_idx'), models.Index(fields=['computed_at'], name='crm_custome_compute_a72868_idx')],
+            },
+        ),
+    ]
@@ -36,6 +36,8 @@ class Customer(models.Model):
         indexes = [
             models.Index(fields=['phone']),
             models.Index(fields=['last_name', 'first_name']),
+            # Sincronización incremental (core.sync)
+            models.Index(fields=['updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -89,6 +91,8 @@ class Vehicle(models.Model):
         indexes = [
             models.Index(fields=['plate']),
             models.Index(fields=['customer']),
+            # Sincronización incremental (core.sync)
+            models.Index(fields=['updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -100,3 +104,50 @@ class Vehicle(models.Model):
         year_str = f"{self.year} " if self.year else ""
         return f"{year_str}{self.brand} {self.model}"
 
+
+
+class CustomerSegment(models.Model):
+    """
+    Segmentación RFM (recencia, frecuencia y monto) de cada cliente.
+    Se recalcula en lote con el comando compute_customer_segments.
+    """
+    SEGMENT_CHOICES = [
+        ('CHAMPION', 'Campeón'),
+        ('LOYAL', 'Leal'),
+        ('PROMISING', 'Prometedor'),
+        ('AT_RISK', 'En riesgo'),
+        ('LAPSED', 'Inactivo'),
+        ('OCCASIONAL', 'Ocasional'),
+        ('NO_ORDERS', 'Sin órdenes'),
+    ]
+
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, related_name='segment', verbose_name='Cliente')
+
+    # Métricas
+    last_order_at = models.DateTimeField('Última orden', null=True, blank=True)
+    frequency = models.PositiveIntegerField('Órdenes completadas', default=0)
+    monetary = models.DecimalField('Monto total', max_digits=12, decimal_places=2, default=0)
+
+    # Puntajes por quintil (1 a 5, 0 si no tiene órdenes)
+    recency_score = models.PositiveSmallIntegerField('Puntaje de recencia', default=0)
+    frequency_score = models.PositiveSmallIntegerField('Puntaje de frecuencia', default=0)
+    monetary_score = models.PositiveSmallIntegerField('Puntaje de monto', default=0)
+    rfm_score = models.PositiveSmallIntegerField('Puntaje RFM', default=0)
+    segment = models.CharField('Segmento', max_length=20, choices=SEGMENT_CHOICES, default='NO_ORDERS')
+
+    computed_at = models.DateTimeField('Fecha de cálculo')
+
+    class Meta:
+        verbose_name = 'Segmento de Cliente'
+        verbose_name_plural = 'Segmentos de Clientes'
+        ordering = ['-monetary']
+        indexes = [
+            models.Index(fields=['segment', '-monetary']),
+            models.Index(fields=['-monetary']),
+            models.Index(fields=['last_order_at']),
+            models.Index(fields=['-rfm_score']),
+            models.Index(fields=['computed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.customer_id} - {self.get_segment_display()}"
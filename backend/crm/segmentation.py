@@ -0,0 +1,203 @@
+"""
+Segmentación RFM de clientes (recencia, frecuencia y monto).
+
+Las métricas salen de una única consulta agrupada sobre las órdenes
+completadas; los puntajes por quintil se calculan con operaciones vectorizadas
+de numpy sobre toda la tabla de segmentos y solo se escriben las filas cuyo
+puntaje cambió.
+"""
+from itertools import islice
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from core.versioning import bump_versions
+from .models import Customer, CustomerSegment
+
+
+# Tamaño de lote para las consultas IN y las escrituras masivas
+BATCH_SIZE = 900
+METRIC_FIELDS = ['last_order_at', 'frequency', 'monetary', 'computed_at']
+SCORE_FIELDS = ['recency_score', 'frequency_score', 'monetary_score', 'rfm_score', 'segment']
+
+
+def _batches(iterable, size=BATCH_SIZE):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def touched_customer_ids(since):
+    """
+    Clientes con órdenes creadas o completadas desde `since`, más los que
+    todavía no tienen fila de segmento (nuevos o fusionados)
+    """
+    from services.models import ServiceOrder
+
+    touched = set(
+        ServiceOrder.objects.filter(Q(created_at__gte=since) | Q(completed_at__gte=since))
+        .order_by().values_list('customer_id', flat=True).distinct()
+    )
+    touched |= set(Customer.objects.filter(segment__isnull=True).values_list('id', flat=True))
+    return touched
+
+
+def _order_metrics(customer_ids=None):
+    """
+    Recencia, frecuencia y monto por cliente en una consulta agrupada
+    """
+    from services.models import ServiceOrder
+
+    queryset = ServiceOrder.objects.filter(status='COMPLETED')
+    if customer_ids is not None:
+        queryset = queryset.filter(customer_id__in=customer_ids)
+    return {
+        row['customer_id']: row
+        for row in queryset.order_by().values('customer_id').annotate(
+            last_order_at=Max('created_at'),
+            frequency=Count('id'),
+            monetary=Sum('total'),
+        )
+    }
+
+
+def refresh_metrics(customer_ids=None, now=None):
+    """
+    Recalcula y guarda las métricas de los clientes indicados (o de todos)
+    mediante upserts masivos. Retorna la cantidad de filas escritas.
+    """
+    now = now or timezone.now()
+    if customer_ids is None:
+        metrics = _order_metrics()
+        id_batches = _batches(Customer.objects.values_list('id', flat=True).iterator(chunk_size=BATCH_SIZE))
+    else:
+        metrics = None
+        id_batches = _batches(sorted(customer_ids))
+
+    written = 0
+    for ids in id_batches:
+        batch_metrics = metrics if metrics is not None else _order_metrics(ids)
+        rows = []
+        for pk in ids:
+            row = batch_metrics.get(pk, {})
+            rows.append(CustomerSegment(
+                customer_id=pk,
+                last_order_at=row.get('last_order_at'),
+                frequency=row.get('frequency', 0),
+                monetary=row.get('monetary') or 0,
+                computed_at=now,
+            ))
+        CustomerSegment.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['customer'],
+            update_fields=METRIC_FIELDS,
+        )
+        written += len(rows)
+    return written
+
+
+def quintile_scores(values):
+    """
+    Asigna a cada valor su quintil (1 a 5) dentro del arreglo
+    """
+    if values.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    edges = np.quantile(values, [0.2, 0.4, 0.6, 0.8])
+    return np.searchsorted(edges, values, side='right') + 1
+
+
+def classify(recency, frequency, monetary):
+    """
+    Asigna el segmento a partir de los puntajes (arreglos de numpy)
+    """
+    segments = np.full(recency.shape, 'OCCASIONAL', dtype=object)
+    segments[recency <= 2] = 'LAPSED'
+    segments[(recency <= 2) & (frequency >= 3)] = 'AT_RISK'
+    segments[(recency >= 4) & (frequency <= 2)] = 'PROMISING'
+    segments[(frequency >= 4) & (recency >= 3)] = 'LOYAL'
+    segments[(recency >= 4) & (frequency >= 4) & (monetary >= 4)] = 'CHAMPION'
+    segments[frequency == 0] = 'NO_ORDERS'
+    return segments
+
+
+def rescore(now=None):
+    """
+    Recalcula los puntajes de toda la tabla de segmentos en forma vectorizada
+    y actualiza solo las filas cuyo puntaje cambió. Retorna la cantidad de
+    filas actualizadas.
+    """
+    now = now or timezone.now()
+    rows = list(CustomerSegment.objects.order_by('pk').values_list(
+        'pk', 'last_order_at', 'frequency', 'monetary', *SCORE_FIELDS
+    ))
+    if not rows:
+        return 0
+
+    pks = np.array([r[0] for r in rows], dtype=np.int64)
+    has_orders = np.array([r[2] > 0 and r[1] is not None for r in rows])
+    recency_days = np.array(
+        [(now - r[1]).total_seconds() / 86400 if r[1] else 0.0 for r in rows]
+    )
+    frequency = np.array([r[2] for r in rows], dtype=np.float64)
+    monetary = np.array([float(r[3]) for r in rows])
+
+    r_score = np.zeros(len(rows), dtype=np.int64)
+    f_score = np.zeros(len(rows), dtype=np.int64)
+    m_score = np.zeros(len(rows), dtype=np.int64)
+    # Menos días desde la última orden es mejor: se invierte el quintil
+    r_score[has_orders] = 6 - quintile_scores(recency_days[has_orders])
+    f_score[has_orders] = quintile_scores(frequency[has_orders])
+    m_score[has_orders] = quintile_scores(monetary[has_orders])
+    total = r_score + f_score + m_score
+    segments = classify(r_score, f_score, m_score)
+
+    current = np.array([r[4:8] for r in rows], dtype=np.int64)
+    current_segments = np.array([r[8] for r in rows], dtype=object)
+    computed = np.column_stack([r_score, f_score, m_score, total])
+    changed = np.flatnonzero((current != computed).any(axis=1) | (current_segments != segments))
+
+    updates = [
+        CustomerSegment(
+            pk=int(pks[i]),
+            recency_score=int(r_score[i]),
+            frequency_score=int(f_score[i]),
+            monetary_score=int(m_score[i]),
+            rfm_score=int(total[i]),
+            segment=segments[i],
+        )
+        for i in changed
+    ]
+    CustomerSegment.objects.bulk_update(updates, SCORE_FIELDS, batch_size=BATCH_SIZE)
+    return len(updates)
+
+
+def compute_segments(full=False):
+    """
+    Recalcula la segmentación. En modo incremental solo se recalculan las
+    métricas de los clientes modificados desde la última ejecución; los
+    puntajes (que dependen de toda la distribución) siempre se recalculan.
+    """
+    started = timezone.now()
+    last_run = None
+    if not full:
+        last_run = CustomerSegment.objects.aggregate(last=Max('computed_at'))['last']
+
+    with transaction.atomic():
+        if last_run is None:
+            refreshed = refresh_metrics(now=started)
+        else:
+            refreshed = refresh_metrics(touched_customer_ids(last_run), now=started)
+        rescored = rescore(now=started)
+        bump_versions(CustomerSegment)
+
+    return {
+        'mode': 'full' if last_run is None else 'incremental',
+        'metrics_refreshed': refreshed,
+        'scores_updated': rescored,
+    }
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Customer, Vehicle
+from .models import Customer, Vehicle, CustomerSegment
+from .dedup import clean_phone
 
 
 class VehicleSerializer(serializers.ModelSerializer):
@@ -76,8 +77,8 @@ class CustomerSerializer(serializers.ModelSerializer):
         """
         Limpia el número de teléfono
         """
-        # Eliminar espacios y guiones
-        return value.replace(' ', '').replace('-', '')
+        # Eliminar espacios, guiones, paréntesis y puntos
+        return clean_phone(value)
 
 
 class CustomerListSerializer(serializers.ModelSerializer):
@@ -103,3 +104,31 @@ class VehicleDetailSerializer(VehicleSerializer):
     
     class Meta(VehicleSerializer.Meta):
         fields = VehicleSerializer.Meta.fields + ['customer_data']
+
+
+class CustomerSegmentSerializer(serializers.ModelSerializer):
+    """
+    Serializer para la segmentación RFM de un cliente
+    """
+    customer_name = serializers.CharField(source='customer.full_name', read_only=True)
+    customer_phone = serializers.CharField(source='customer.phone', read_only=True)
+    segment_display = serializers.CharField(source='get_segment_display', read_only=True)
+
+    class Meta:
+        model = CustomerSegment
+        fields = [
+            'customer', 'customer_name', 'customer_phone', 'last_order_at',
+            'frequency', 'monetary', 'recency_score', 'frequency_score',
+            'monetary_score', 'rfm_score', 'segment', 'segment_display',
+            'computed_at'
+        ]
+
+
+class MergeCustomersSerializer(serializers.Serializer):
+    """
+    Serializer para fusionar clientes duplicados en el cliente actual
+    """
+    duplicate_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False
+    )
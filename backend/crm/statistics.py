@@ -0,0 +1,37 @@
+"""
+Estadísticas de clientes, compartidas por el endpoint `statistics` y el
+dashboard. Cada función resuelve una sola consulta para poder ejecutarlas
+en paralelo.
+"""
+from django.db.models import Count, Q
+
+from .models import Customer, Vehicle
+
+
+def customer_counts():
+    return Customer.objects.aggregate(
+        total_customers=Count('id', filter=Q(is_active=True)),
+        total_inactive=Count('id', filter=Q(is_active=False)),
+    )
+
+
+def active_vehicle_count():
+    return {'total_vehicles': Vehicle.objects.filter(is_active=True).count()}
+
+
+def multiple_vehicle_customers():
+    return {
+        'customers_with_multiple_vehicles': Customer.objects.annotate(
+            vehicle_count=Count('vehicles')
+        ).filter(vehicle_count__gt=1).count()
+    }
+
+
+CUSTOMER_STATISTICS = [customer_counts, active_vehicle_count, multiple_vehicle_customers]
+
+
+def customer_statistics():
+    stats = {}
+    for part in CUSTOMER_STATISTICS:
+        stats.update(part())
+    return stats
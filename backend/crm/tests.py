@@ -1,3 +1,239 @@
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from core.jobs import Worker
+from core.models import Job
+from core.outbox import drain
+from services.models import ServiceOrder, Invoice
+from services.mutations import complete_order
+from .models import Customer, Vehicle, CustomerSegment
+from .segmentation import compute_segments
+from .importers import CustomerImporter, map_columns, open_csv
+from .dedup import (
+    normalize_phone, phonetic_key, find_duplicate_candidates,
+    detect_duplicates, merge_customers
+)
+
+
+class DedupNormalizationTests(TestCase):
+    def test_normalize_phone_ignores_format(self):
+        variants = ['+5491123456789', '011 15-2345-6789', '(11) 2345.6789', '+54 9 11 2345-6789']
+        self.assertEqual({normalize_phone(v) for v in variants}, {'23456789'})
+
+    def test_phonetic_key_unifies_spelling(self):
+        self.assertEqual(phonetic_key('Álvarez'), phonetic_key('Albares'))
+        self.assertEqual(phonetic_key('Llanos'), phonetic_key('Yanos'))
+        self.assertNotEqual(phonetic_key('Pérez'), phonetic_key('Gómez'))
+
+    def test_detects_reversed_name_with_same_phone(self):
+        rows = [
+            (1, 'Juan', 'Pérez', '+5491123456789', ''),
+            (2, 'Perez', 'Juan', '11 2345-6789', None),
+            (3, 'María', 'González', '+5491198765432', 'maria@mail.com'),
+        ]
+        suggestions = find_duplicate_candidates(rows)
+        self.assertEqual([s['ids'] for s in suggestions], [(1, 2)])
+        self.assertIn('reversed_name', suggestions[0]['reasons'])
+
+
+class MergeCustomersTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='admin@shalom.com', password='pass', first_name='Ad', last_name='Min', role='ADMIN'
+        )
+        self.survivor = Customer.objects.create(first_name='Juan', last_name='Pérez', phone='+5491123456789')
+        self.duplicate = Customer.objects.create(
+            first_name='Juan', last_name='Perez', phone='1123456789', email='juan@mail.com'
+        )
+        self.vehicle = Vehicle.objects.create(plate='ABC123', brand='Ford', model='Ka', customer=self.duplicate)
+        self.order = ServiceOrder.objects.create(vehicle=self.vehicle, status='COMPLETED', created_by=self.user)
+        self.invoice = Invoice.objects.create(
+            service_order=self.order, customer=self.duplicate, subtotal=100, created_by=self.user
+        )
+
+    def test_detect_duplicates_from_database(self):
+        suggestions = detect_duplicates()
+        self.assertEqual(suggestions[0]['ids'], (self.survivor.pk, self.duplicate.pk))
+
+    def test_duplicates_endpoint_reruns_only_when_customers_change(self):
+        cache.clear()
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with mock.patch('crm.dedup.detect_duplicates', wraps=detect_duplicates) as detect:
+            first = client.get('/api/crm/customers/duplicates/').json()
+            self.assertEqual(client.get('/api/crm/customers/duplicates/').json(), first)
+            self.assertEqual(detect.call_count, 1)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                Customer.objects.create(first_name='Juana', last_name='Pérez', phone='+5491123456789')
+            self.assertEqual(len(client.get('/api/crm/customers/duplicates/').json()), 3)
+            self.assertEqual(detect.call_count, 2)
+
+    def test_merge_moves_related_records(self):
+        summary = merge_customers(self.survivor, [self.duplicate.pk])
+
+        self.assertEqual(summary, {'vehicles': 1, 'service_orders': 1, 'invoices': 1, 'merged': 1})
+        self.assertFalse(Customer.objects.filter(pk=self.duplicate.pk).exists())
+        self.vehicle.refresh_from_db()
+        self.order.refresh_from_db()
+        self.invoice.refresh_from_db()
+        self.survivor.refresh_from_db()
+        self.assertEqual(self.vehicle.customer_id, self.survivor.pk)
+        self.assertEqual(self.order.customer_id, self.survivor.pk)
+        self.assertEqual(self.invoice.customer_id, self.survivor.pk)
+        self.assertEqual(self.survivor.email, 'juan@mail.com')
+
+
+class CustomerImporterTests(TestCase):
+    CSV = (
+        "Nombre;Apellido;Teléfono;Email;Patente;Marca;Modelo;Año\n"
+        "Juan;Pérez;011 2345-6789;;ab 123 cd;Ford;Ka;2015\n"
+        "Juan;Pérez;+5491123456789;;ABC123;Fiat;Uno;2010\n"
+        "Ana;Gómez;123;;XYZ999;VW;Gol;2012\n"
+        "Luis;Sosa;+5491155550000;;NOPLATE;Renault;Clio;2011\n"
+        "Carla;Ruiz;+5491144440000;;EXI001;Peugeot;208;2020\n"
+    )
+
+    def setUp(self):
+        self.existing = Customer.objects.create(first_name='Carla', last_name='Ruiz', phone='+5491144440000')
+        Vehicle.objects.create(plate='EXI001', brand='Peugeot', model='208', customer=self.existing)
+
+    def test_import_resolves_customers_and_reports_rejections(self):
+        reader = open_csv(io.StringIO(self.CSV))
+        importer = CustomerImporter(chunk_size=10)
+        result = importer.run(reader, map_columns(reader.fieldnames))
+
+        self.assertEqual(result.rows, 5)
+        self.assertEqual(result.customers_created, 2)  # Juan Pérez y Luis Sosa
+        self.assertEqual(result.vehicles_created, 2)
+        juan = Customer.objects.get(first_name='Juan')
+        self.assertEqual(
+            sorted(juan.vehicles.values_list('plate', flat=True)), ['AB123CD', 'ABC123']
+        )
+        self.assertEqual(
+            sorted((r['row'], r['scope']) for r in result.rejected),
+            [(4, 'customer'), (5, 'vehicle'), (6, 'vehicle')]
+        )
+
+    def test_phone_key_is_the_full_number_and_name_mismatches_are_conflicts(self):
+        csv_text = (
+            "Nombre;Apellido;Teléfono;Patente;Marca;Modelo\n"
+            "Pedro;Díaz;+54 9 351 444-0000;PED001;Ford;Ka\n"
+            "Pedro;Diaz;0351 444-0000;PED002;Fiat;Uno\n"
+            # Mismos últimos 8 dígitos que Pedro, otra característica: otro número
+            "Marta;Sosa;0221 444-0000;MAR001;Ford;Fiesta\n"
+            "Ruiz;Carla;1144440000;CAR001;VW;Gol\n"
+            "Luis;Gómez;011 4444-0000;LUI001;Ford;Focus\n"
+        )
+        reader = open_csv(io.StringIO(csv_text))
+        result = CustomerImporter(chunk_size=2).run(reader, map_columns(reader.fieldnames))
+
+        self.assertEqual(result.customers_created, 2)
+        self.assertEqual(result.customers_matched, 1)
+        pedro = Customer.objects.get(first_name='Pedro')
+        self.assertEqual(sorted(pedro.vehicles.values_list('plate', flat=True)), ['PED001', 'PED002'])
+        self.assertEqual(list(Customer.objects.get(first_name='Marta').vehicles.values_list('plate', flat=True)), ['MAR001'])
+        self.assertIn('CAR001', self.existing.vehicles.values_list('plate', flat=True))
+        # Mismo número que Carla con otro nombre: conflicto, no se fusiona
+        self.assertEqual(
+            [(r['row'], r['scope'], r['reason']) for r in result.rejected],
+            [(6, 'customer', 'El teléfono ya corresponde a otro cliente (Carla Ruiz)')]
+        )
+        self.assertFalse(Vehicle.objects.filter(plate='LUI001').exists())
+
+    def test_values_longer_than_the_columns_are_rejected_per_row(self):
+        csv_text = (
+            "Nombre;Apellido;Teléfono;Patente;Marca;Modelo;VIN;Km\n"
+            f"{'N' * 101};Díaz;+5491133330000;LON001;Ford;Ka;;\n"
+            "Pedro;Díaz;+5491133330001;LON002;Ford;Ka;1HGCM82633A00435299;\n"
+            "Luis;Paz;+5491133330003;LON004;Ford;Ka;1HGCM82633A004352;1000\n"
+        )
+        reader = open_csv(io.StringIO(csv_text))
+        result = CustomerImporter(chunk_size=10).run(reader, map_columns(reader.fieldnames))
+
+        self.assertEqual(
+            [(r['row'], r['scope'], r['reason'].split(':')[0]) for r in result.rejected],
+            [(2, 'customer', 'Nombre'), (3, 'vehicle', 'VIN/Nº Chasis')]
+        )
+        self.assertEqual(result.customers_created, 2)
+        self.assertEqual(list(Vehicle.objects.filter(plate__startswith='LON').values_list('plate', flat=True)), ['LON004'])
+
+    def test_background_import_runs_in_a_worker(self):
+        admin = User.objects.create_user(email='admin@shalom.com', password=None, first_name='A', last_name='D', role='ADMIN')
+        client = APIClient()
+        client.force_authenticate(admin)
+        upload = SimpleUploadedFile('clientes.csv', self.CSV.encode('utf-8'), content_type='text/csv')
+
+        response = client.post('/api/crm/customers/import/?background=true', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Customer.objects.count(), 1)
+
+        Worker(mode='inline').run(burst=True)
+        job = Job.objects.get(pk=response.json()['id'])
+        self.assertEqual(job.status, 'SUCCEEDED')
+        self.assertEqual(job.result['customers_created'], 2)
+        self.assertEqual(job.progress, 100)
+
+    def test_import_runs_fixed_queries_per_chunk(self):
+        reader = open_csv(io.StringIO(self.CSV))
+        columns = map_columns(reader.fieldnames)
+        # Consulta de clientes, bulk de clientes, patentes y bulk de vehículos y
+        # los savepoints de la transacción del bloque; las versiones se
+        # incrementan al confirmar
+        with self.assertNumQueries(6):
+            CustomerImporter(chunk_size=10).run(reader, columns)
+
+
+class CustomerSegmentationTests(TestCase):
+    def setUp(self):
+        self.customers = []
+        for i in range(5):
+            customer = Customer.objects.create(first_name=f'Cliente{i}', last_name='Test', phone=f'+54911000000{i}')
+            vehicle = Vehicle.objects.create(plate=f'AAA10{i}', brand='Ford', model='Ka', customer=customer)
+            # El cliente i tiene i órdenes completadas de $100
+            for _ in range(i):
+                ServiceOrder.objects.create(vehicle=vehicle, status='COMPLETED', total=100)
+            self.customers.append(customer)
+
+    def test_full_run_scores_every_customer(self):
+        summary = compute_segments(full=True)
+
+        self.assertEqual(summary['mode'], 'full')
+        self.assertEqual(CustomerSegment.objects.count(), 5)
+        top = CustomerSegment.objects.order_by('-monetary').first()
+        self.assertEqual(top.customer_id, self.customers[4].pk)
+        self.assertEqual(top.frequency, 4)
+        self.assertEqual(top.monetary_score, 5)
+        self.assertEqual(CustomerSegment.objects.get(customer=self.customers[0]).segment, 'NO_ORDERS')
+
+    def test_incremental_run_only_refreshes_touched_customers(self):
+        compute_segments(full=True)
+        vehicle = self.customers[0].vehicles.first()
+        ServiceOrder.objects.create(vehicle=vehicle, status='COMPLETED', total=1000)
+
+        summary = compute_segments()
+
+        self.assertEqual(summary['mode'], 'incremental')
+        self.assertEqual(summary['metrics_refreshed'], 1)
+        segment = CustomerSegment.objects.get(customer=self.customers[0])
+        self.assertEqual(segment.frequency, 1)
+        self.assertEqual(segment.monetary_score, 5)
+
+    def test_outbox_handler_updates_completed_order_customer(self):
+        compute_segments(full=True)
+        vehicle = self.customers[0].vehicles.first()
+        order = ServiceOrder.objects.create(vehicle=vehicle, total=1000)
+        complete_order(order, None)
 
-# Create your tests here.
+        self.assertEqual(drain(['crm.segments']), {'crm.segments': 1})
+        segment = CustomerSegment.objects.get(customer=self.customers[0])
+        self.assertEqual(segment.frequency, 1)
+        self.assertEqual(segment.monetary_score, 5)
+        # Ya procesado: no se vuelve a entregar
+        self.assertEqual(drain(['crm.segments']), {'crm.segments': 0})
@@ -1,21 +1,62 @@
+import io
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count
-from .models import Customer, Vehicle
+from rest_framework.parsers import MultiPartParser
+from datetime import timedelta
+from django.db.models import Q, Count, F
+from django.utils import timezone
+from core.conditional import ConditionalGetMixin
+from core.jobs import enqueue
+from core.serializers import JobSerializer
+from .models import Customer, Vehicle, CustomerSegment
 from .serializers import (
     CustomerSerializer, CustomerListSerializer,
-    VehicleSerializer, VehicleDetailSerializer
+    VehicleSerializer, VehicleDetailSerializer,
+    CustomerSegmentSerializer, MergeCustomersSerializer
 )
+from .dedup import cached_duplicates, merge_customers
+from .importers import CustomerImporter, map_columns, open_csv
+from .statistics import customer_statistics
 
 
-class CustomerViewSet(viewsets.ModelViewSet):
+# Campos de la segmentación RFM por los que se puede ordenar
+SEGMENT_ORDERING_FIELDS = ['monetary', 'frequency', 'last_order_at', 'rfm_score']
+
+
+def filter_by_segment(queryset, params, prefix=''):
+    """
+    Aplica los filtros y el orden de la segmentación RFM (segment,
+    lapsed_days y ordering) sobre clientes o sobre segmentos
+    """
+    segment = params.get('segment', None)
+    if segment:
+        queryset = queryset.filter(**{f'{prefix}segment': segment.upper()})
+
+    # Clientes sin órdenes completadas en los últimos N días
+    lapsed_days = params.get('lapsed_days', None)
+    if lapsed_days and lapsed_days.isdigit():
+        cutoff = timezone.now() - timedelta(days=int(lapsed_days))
+        queryset = queryset.filter(**{f'{prefix}last_order_at__lt': cutoff})
+
+    ordering = params.get('ordering', None)
+    if ordering and ordering.lstrip('-') in SEGMENT_ORDERING_FIELDS:
+        field = F(prefix + ordering.lstrip('-'))
+        queryset = queryset.order_by(
+            field.desc(nulls_last=True) if ordering.startswith('-') else field.asc(nulls_last=True)
+        )
+    return queryset
+
+
+class CustomerViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar clientes
     """
     permission_classes = [IsAuthenticated]
     queryset = Customer.objects.all()
+    etag_models = [Customer, Vehicle, CustomerSegment]
+    etag_exempt_params = ['lapsed_days']
     
     def get_serializer_class(self):
         """
@@ -47,6 +88,9 @@ class CustomerViewSet(viewsets.ModelViewSet):
         if is_active is not None:
             queryset = queryset.filter(is_active=is_active.lower() == 'true')
 
+        # Filtros y orden por segmentación RFM
+        queryset = filter_by_segment(queryset, self.request.query_params, prefix='segment__')
+
         return queryset
 
     def list(self, request, *args, **kwargs):
@@ -76,23 +120,130 @@ class CustomerViewSet(viewsets.ModelViewSet):
         """
         Endpoint para obtener estadísticas de clientes
         """
-        stats = {
-            'total_customers': Customer.objects.filter(is_active=True).count(),
-            'total_inactive': Customer.objects.filter(is_active=False).count(),
-            'total_vehicles': Vehicle.objects.filter(is_active=True).count(),
-            'customers_with_multiple_vehicles': Customer.objects.annotate(
-                vehicle_count=Count('vehicles')
-            ).filter(vehicle_count__gt=1).count()
-        }
-        return Response(stats)
+        return Response(customer_statistics())
+
+    @action(detail=False, methods=['get'])
+    def segments(self, request):
+        """
+        Ranking de clientes según la segmentación RFM.
+        Ej: ?ordering=-monetary&limit=100 o ?lapsed_days=180
+        """
+        queryset = filter_by_segment(
+            CustomerSegment.objects.select_related('customer'),
+            {'ordering': '-monetary', **request.query_params.dict()}
+        )
+        limit = request.query_params.get('limit', '100')
+        limit = min(int(limit), 1000) if limit.isdigit() else 100
+        serializer = CustomerSegmentSerializer(queryset[:limit], many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def duplicates(self, request):
+        """
+        Sugerencias de clientes posiblemente duplicados (en caché hasta que cambian los clientes)
+        """
+        try:
+            threshold = float(request.query_params.get('threshold', 0.6))
+            limit = int(request.query_params.get('limit', 50))
+        except ValueError:
+            return Response(
+                {'error': 'Los parámetros threshold y limit deben ser numéricos'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        suggestions = cached_duplicates(threshold=threshold)[:limit]
+        ids = {pk for suggestion in suggestions for pk in suggestion['ids']}
+        customers = Customer.objects.in_bulk(ids)
+
+        results = []
+        for suggestion in suggestions:
+            pair = [customers[pk] for pk in suggestion['ids'] if pk in customers]
+            if len(pair) < 2:
+                continue
+            results.append({
+                'score': suggestion['score'],
+                'reasons': suggestion['reasons'],
+                # Se sugiere conservar el cliente más antiguo
+                'suggested_survivor': min(pair, key=lambda c: c.created_at).id,
+                'customers': CustomerListSerializer(pair, many=True).data,
+            })
+        return Response(results)
+
+    @action(detail=True, methods=['post'])
+    def merge(self, request, pk=None):
+        """
+        Fusiona los clientes indicados en este cliente (solo administradores)
+        """
+        if not request.user.is_admin:
+            return Response(
+                {'detail': 'No tiene permisos para fusionar clientes.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        customer = self.get_object()
+        serializer = MergeCustomersSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        summary = merge_customers(customer, serializer.validated_data['duplicate_ids'])
+        customer = self.get_queryset().get(pk=customer.pk)
+        return Response({
+            'summary': summary,
+            'customer': CustomerSerializer(customer).data
+        })
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser], url_path='import')
+    def import_file(self, request):
+        """
+        Importa clientes y vehículos desde un archivo CSV (solo administradores).
+        Con ?background=true se encola y responde 202 con la tarea.
+        """
+        if not request.user.is_admin:
+            return Response(
+                {'detail': 'No tiene permisos para importar clientes.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response(
+                {'error': 'Debe adjuntar un archivo CSV en el campo "file"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        reader = open_csv(stream)
+        columns = map_columns(reader.fieldnames)
+        missing = {'first_name', 'last_name', 'phone'} - set(columns)
+        if missing:
+            return Response(
+                {'error': f"Faltan columnas obligatorias: {', '.join(sorted(missing))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        dry_run = request.query_params.get('dry_run', 'false').lower() == 'true'
+        if request.query_params.get('background', 'false').lower() == 'true':
+            # Se procesa en un worker; el avance se consulta en /api/jobs/<id>/
+            upload.file.seek(0)
+            job = enqueue('crm.import_customers', {
+                'content': upload.file.read().decode('utf-8-sig'),
+                'created_by': request.user.pk,
+                'dry_run': dry_run,
+            }, created_by=request.user)
+            return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+        importer = CustomerImporter(created_by=request.user, dry_run=dry_run)
+        result = importer.run(reader, columns)
+        return Response(result.as_dict())
 
 
-class VehicleViewSet(viewsets.ModelViewSet):
+class VehicleViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar vehículos
     """
     permission_classes = [IsAuthenticated]
     queryset = Vehicle.objects.all()
+    etag_models = [Vehicle, Customer]
     
     def get_serializer_class(self):
         """
@@ -0,0 +1,17 @@
+"""
+Columnas de la exportación de movimientos de stock
+"""
+from core.exports import Column, Export
+from core.fastlist import choice_labels
+from .models import StockMovement
+
+MOVEMENT_EXPORT = Export('movimientos', [
+    Column('Fecha', 'created_at', 'datetime'),
+    Column('Código', 'product__code'),
+    Column('Producto', 'product__name'),
+    Column('Tipo', 'movement_type', labels=choice_labels(StockMovement, 'movement_type')),
+    Column('Cantidad', 'quantity', 'number'),
+    Column('Referencia', 'reference'),
+    Column('Motivo', 'reason'),
+    Column('Usuario', 'performed_by__email'),
+])
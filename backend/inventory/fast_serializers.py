@@ -0,0 +1,42 @@
+"""
+Representación de productos desde filas values(), idéntica a ProductSerializer
+"""
+from core.fastlist import choice_labels, format_datetime, format_decimal
+from .models import Product
+
+
+PRODUCT_FIELDS = [
+    'id', 'code', 'name', 'category', 'brand', 'description', 'stock_quantity', 'min_stock',
+    'unit', 'purchase_price', 'sale_price', 'is_active', 'created_at', 'updated_at',
+]
+UNIT_LABELS = choice_labels(Product, 'unit')
+
+
+def product_representation(row, tz, prefix=''):
+    get = (lambda f: row[prefix + f]) if prefix else row.__getitem__
+    purchase_price = get('purchase_price')
+    sale_price = get('sale_price')
+    unit = get('unit')
+    brand = get('brand')
+    description = get('description')
+    return {
+        'id': get('id'),
+        'code': get('code'),
+        'name': get('name'),
+        'category': get('category'),
+        'category_display': get('category'),
+        'brand': brand,
+        'description': description,
+        'stock_quantity': get('stock_quantity'),
+        'min_stock': get('min_stock'),
+        'unit': unit,
+        'unit_display': UNIT_LABELS.get(unit, unit),
+        'purchase_price': format_decimal(purchase_price),
+        'sale_price': format_decimal(sale_price),
+        'is_active': get('is_active'),
+        'is_low_stock': get('stock_quantity') <= get('min_stock'),
+        # Mismo cálculo que Product.profit_margin (el renderer convierte el Decimal)
+        'profit_margin': ((sale_price - purchase_price) / purchase_price) * 100 if purchase_price > 0 else 0,
+        'created_at': format_datetime(get('created_at'), tz),
+        'updated_at': format_datetime(get('updated_at'), tz),
+    }
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-19 15:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0004_update_movement_type_values'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['updated_at', 'id'], name='inventory_p_updated_af11c4_idx'),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 
+from core.outbox import record
+
 
 class Product(models.Model):
     """
@@ -42,6 +44,8 @@ class Product(models.Model):
             models.Index(fields=['code']),
             models.Index(fields=['category']),
             models.Index(fields=['is_active']),
+            # Sincronización incremental (core.sync)
+            models.Index(fields=['updated_at', 'id']),
         ]
     
     def __str__(self):
@@ -95,6 +99,7 @@ class StockMovement(models.Model):
             with transaction.atomic():
                 # Bloquear el producto para evitar condiciones de carrera
                 product = Product.objects.select_for_update().get(pk=self.product.pk)
+                previous_stock = product.stock_quantity
                 
                 if self.movement_type == 'COMPRA':
                     product.stock_quantity += self.quantity
@@ -113,3 +118,16 @@ class StockMovement(models.Model):
                 
                 product.save()
                 super().save(*args, **kwargs)
+                
+                # Las salidas por orden de servicio ya descontaron el stock (y registran su evento)
+                if product.stock_quantity != previous_stock:
+                    record(
+                        'StockChanged', product.pk,
+                        code=product.code,
+                        product_name=product.name,
+                        delta=product.stock_quantity - previous_stock,
+                        stock_quantity=product.stock_quantity,
+                        min_stock=product.min_stock,
+                        movement_id=self.pk,
+                        movement_type=self.movement_type,
+                    )
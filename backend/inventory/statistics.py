@@ -0,0 +1,27 @@
+"""
+Estadísticas de inventario para el dashboard
+"""
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+
+from .models import Product
+from .serializers import ProductSerializer
+
+
+def inventory_statistics():
+    totals = Product.objects.aggregate(
+        total_products=Count('id'),
+        active_products=Count('id', filter=Q(is_active=True)),
+        low_stock=Count('id', filter=Q(stock_quantity__lte=F('min_stock'))),
+        out_of_stock=Count('id', filter=Q(stock_quantity=0)),
+        inventory_value=Sum(ExpressionWrapper(
+            F('sale_price') * F('stock_quantity'), output_field=DecimalField(max_digits=14, decimal_places=2)
+        )),
+    )
+    totals['inventory_value'] = float(totals['inventory_value'] or 0)
+    return totals
+
+
+def low_stock_products():
+    """Los mismos productos que el endpoint low_stock (Product.is_low_stock)"""
+    products = Product.objects.filter(stock_quantity__lte=F('min_stock')).order_by('-created_at')
+    return ProductSerializer(products, many=True).data
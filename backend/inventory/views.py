@@ -1,10 +1,13 @@
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django.db.models import Q
 from django.core.exceptions import ValidationError
+from core.conditional import ConditionalGetMixin
+from core.exports import ExportMixin
+from core.pagination import StandardResultsSetPagination
 from .models import Product, StockMovement
+from .exports import MOVEMENT_EXPORT
 from .serializers import (
     ProductSerializer,
     ProductCreateUpdateSerializer,
@@ -13,12 +16,6 @@ from .serializers import (
 )
 
 
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 20
-    page_size_query_param = 'page_size'
-    max_page_size = 100
-
-
 class IsAdminUser(permissions.BasePermission):
     """
     Permiso personalizado: solo administradores pueden modificar
@@ -29,11 +26,12 @@ class IsAdminUser(permissions.BasePermission):
         return request.user and request.user.is_authenticated and request.user.is_admin
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar productos del inventario
     """
     queryset = Product.objects.all()
+    etag_models = [Product]
     permission_classes = [IsAdminUser]
     pagination_class = StandardResultsSetPagination
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -133,11 +131,12 @@ class ProductViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
+class StockMovementViewSet(ExportMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet para consultar movimientos de stock (solo lectura)
     """
-    queryset = StockMovement.objects.all()
+    queryset = StockMovement.objects.select_related('product', 'performed_by')
+    export = MOVEMENT_EXPORT
     serializer_class = StockMovementSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.OrderingFilter]
@@ -156,4 +155,12 @@ class StockMovementViewSet(viewsets.ReadOnlyModelViewSet):
         if movement_type:
             queryset = queryset.filter(movement_type=movement_type)
         
+        # Filtrar por rango de fechas
+        date_from = self.request.query_params.get('date_from', None)
+        date_to = self.request.query_params.get('date_to', None)
+        if date_from:
+            queryset = queryset.filter(created_at__date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(created_at__date__lte=date_to)
+        
         return queryset
@@ -12,7 +12,5 @@ activate_this = '/home/ShalomCarService/Shalom-Car-Service/venv/bin/activate_thi
 with open(activate_this) as file_:
     exec(file_.read(), dict(__file__=activate_this))
 
-# Importa la aplicación WSGI
-def application(environ, start_response):
-    from django.core.wsgi import get_wsgi_application
-    return get_wsgi_application()(environ, start_response)
+# Importa la aplicación WSGI (se arma y precalienta una sola vez, al cargar el archivo)
+from shalom_backend.wsgi import application
@@ -0,0 +1,265 @@
+"""
+Impresión de facturas y órdenes de trabajo (services.pdf).
+
+- Los datos de cualquier cantidad de documentos se leen con dos consultas
+  (documentos con sus relaciones unidas e ítems) y quedan como diccionarios
+  de strings ya formateados.
+- Cada PDF se guarda en PDF_CACHE_DIR con el número del documento y un hash
+  de su contenido: una reimpresión sin cambios se sirve desde disco y
+  cualquier cambio (o de la plantilla) produce un archivo nuevo.
+- Los lotes grandes se renderizan en un pool de procesos y se entregan en un
+  ZIP o en un único PDF.
+"""
+import glob
+import hashlib
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import orjson
+from django.conf import settings
+from django.utils import timezone
+
+from core.fastlist import choice_labels, full_name
+from . import pdf
+from .models import ServiceOrder, ServiceItem
+
+# Por debajo de esta cantidad de documentos pendientes no conviene levantar el pool
+POOL_MIN_DOCUMENTS = 16
+
+ITEM_TYPE_LABELS = choice_labels(ServiceItem, 'item_type')
+ORDER_STATUS_LABELS = choice_labels(ServiceOrder, 'status')
+
+
+def money(value):
+    """$ 1.234,56"""
+    return '$ ' + f'{value:,.2f}'.replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def quantity(value):
+    return f'{value:.2f}'.rstrip('0').rstrip('.').replace('.', ',')
+
+
+def short_date(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'hour'):
+        value = timezone.localtime(value)
+    return value.strftime('%d/%m/%Y')
+
+
+def issuer():
+    """Datos del emisor como tupla (clave de caché de la plantilla)"""
+    return tuple(sorted(settings.PDF_ISSUER.items()))
+
+
+def _items_by_order(order_ids):
+    items = {}
+    rows = ServiceItem.objects.filter(service_order_id__in=order_ids).order_by('id').values_list(
+        'service_order_id', 'item_type', 'description', 'quantity', 'unit_price', 'subtotal'
+    )
+    for order_id, item_type, description, qty, unit_price, subtotal in rows:
+        items.setdefault(order_id, []).append({
+            'type': ITEM_TYPE_LABELS.get(item_type, item_type),
+            'description': description,
+            'quantity': quantity(qty),
+            'unit_price': money(unit_price),
+            'subtotal': money(subtotal),
+        })
+    return items
+
+
+def invoice_documents(queryset):
+    """
+    Documentos de las facturas de `queryset`, en el orden de la consulta
+    """
+    queryset = queryset.prefetch_related(None)
+    rows = queryset.order_by('invoice_number').values(
+        'pk', 'invoice_number', 'invoice_type', 'issue_date', 'due_date', 'status', 'subtotal',
+        'tax_rate', 'tax_amount', 'total', 'notes', 'service_order_id', 'service_order__order_number',
+        'customer__first_name', 'customer__last_name', 'customer__address', 'customer__city',
+        'customer__phone', 'service_order__vehicle__plate', 'service_order__vehicle__brand',
+        'service_order__vehicle__model',
+    )
+    rows = list(rows)
+    # Subconsulta en lugar de una lista de ids: sin límite de parámetros
+    items = _items_by_order(queryset.values('service_order_id'))
+    documents = []
+    for row in rows:
+        address = ', '.join(part for part in (row['customer__address'], row['customer__city']) if part)
+        documents.append({
+            'pk': row['pk'],
+            'number': row['invoice_number'],
+            'letter': row['invoice_type'],
+            'issue_date': short_date(row['issue_date']),
+            'due_date': short_date(row['due_date']),
+            'status': row['status'],
+            'customer': {
+                'name': full_name(row['customer__first_name'], row['customer__last_name']),
+                'address': address,
+                'phone': row['customer__phone'],
+            },
+            'order_number': row['service_order__order_number'],
+            'vehicle': (
+                f"{row['service_order__vehicle__plate']} - "
+                f"{row['service_order__vehicle__brand']} {row['service_order__vehicle__model']}"
+            ),
+            'items': items.get(row['service_order_id'], []),
+            'subtotal': money(row['subtotal']),
+            'tax_rate': quantity(row['tax_rate']),
+            'tax_amount': money(row['tax_amount']),
+            'total': money(row['total']),
+            'notes': row['notes'],
+        })
+    return documents
+
+
+def order_documents(queryset):
+    """
+    Copias para el taller de las órdenes de `queryset`
+    """
+    queryset = queryset.prefetch_related(None)
+    rows = list(queryset.order_by('order_number').values(
+        'pk', 'order_number', 'status', 'created_at', 'observations',
+        'customer__first_name', 'customer__last_name', 'customer__phone',
+        'vehicle__plate', 'vehicle__brand', 'vehicle__model', 'vehicle__year', 'vehicle__color',
+        'vehicle__engine_type', 'vehicle__vin', 'vehicle__current_mileage',
+    ))
+    items = _items_by_order(queryset.values('pk'))
+    documents = []
+    for row in rows:
+        details = [
+            str(row['vehicle__year'] or ''), row['vehicle__color'] or '', row['vehicle__engine_type'] or '',
+            f"VIN {row['vehicle__vin']}" if row['vehicle__vin'] else '',
+        ]
+        documents.append({
+            'pk': row['pk'],
+            'number': row['order_number'],
+            'date': short_date(row['created_at']),
+            'status_label': ORDER_STATUS_LABELS.get(row['status'], row['status']),
+            'observations': row['observations'],
+            'customer': {
+                'name': full_name(row['customer__first_name'], row['customer__last_name']),
+                'phone': row['customer__phone'],
+            },
+            'vehicle': {
+                'plate': row['vehicle__plate'],
+                'description': f"{row['vehicle__brand']} {row['vehicle__model']}",
+                'details': '  -  '.join(part for part in details if part),
+                'mileage': f"{row['vehicle__current_mileage']:,} km".replace(',', '.'),
+            },
+            'items': [
+                {key: item[key] for key in ('type', 'description', 'quantity')}
+                for item in items.get(row['pk'], [])
+            ],
+        })
+    return documents
+
+
+class PDFCache:
+    """
+    PDFs en disco por tipo, número de documento y hash del contenido
+    """
+    def __init__(self, directory=None):
+        self.directory = str(directory or settings.PDF_CACHE_DIR)
+        self.issuer = issuer()
+
+    def content_hash(self, kind, doc):
+        payload = orjson.dumps(
+            [pdf.TEMPLATE_VERSION, kind, self.issuer, doc], option=orjson.OPT_SORT_KEYS
+        )
+        return hashlib.sha256(payload).hexdigest()[:20]
+
+    def path(self, kind, doc):
+        return os.path.join(self.directory, kind, f"{doc['number']}-{self.content_hash(kind, doc)}.pdf")
+
+    def _discard_stale(self, kind, doc, keep):
+        for path in glob.glob(os.path.join(self.directory, kind, glob.escape(doc['number']) + '-*.pdf')):
+            if path != keep:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def get(self, kind, doc):
+        """
+        Ruta del PDF y si ya estaba en disco
+        """
+        path = self.path(kind, doc)
+        if os.path.exists(path):
+            return path, True
+        pdf.render_to_file(kind, doc, self.issuer, path)
+        self._discard_stale(kind, doc, path)
+        return path, False
+
+    def render_many(self, kind, documents, workers=None):
+        """
+        Renderiza los documentos que falten (en un pool de procesos si son
+        muchos). Retorna las rutas en el orden de `documents` y estadísticas.
+        """
+        started = time.perf_counter()
+        directory = os.path.join(self.directory, kind)
+        # Un solo listado del directorio para todo el lote
+        existing = {}
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                existing.setdefault(name.rsplit('-', 1)[0], set()).add(name)
+
+        paths = []
+        missing = []
+        for doc in documents:
+            path = self.path(kind, doc)
+            paths.append(path)
+            if os.path.basename(path) not in existing.get(doc['number'], ()):
+                missing.append((doc, path))
+        # Más procesos que núcleos no acelera el renderizado
+        workers = min(workers or settings.PDF_WORKERS, os.cpu_count() or 1)
+
+        if len(missing) >= POOL_MIN_DOCUMENTS and workers > 1:
+            # spawn: los procesos no heredan conexiones ni hilos; services.pdf no importa Django
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn')) as pool:
+                list(pool.map(
+                    pdf.render_to_file,
+                    *zip(*[(kind, doc, self.issuer, path) for doc, path in missing]),
+                    chunksize=max(len(missing) // (workers * 4), 1),
+                ))
+        else:
+            for doc, path in missing:
+                pdf.render_to_file(kind, doc, self.issuer, path)
+
+        # Versiones anteriores de los documentos regenerados
+        for doc, _ in missing:
+            for name in existing.get(doc['number'], ()):
+                try:
+                    os.remove(os.path.join(directory, name))
+                except FileNotFoundError:
+                    pass
+
+        return paths, {
+            'documents': len(documents),
+            'rendered': len(missing),
+            'cached': len(documents) - len(missing),
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+
+
+def bundle(paths, output, fmt='zip'):
+    """
+    Junta los PDFs en un ZIP (un archivo por documento) o en un único PDF
+    """
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    if fmt == 'pdf':
+        documents = []
+        for path in paths:
+            with open(path, 'rb') as handle:
+                documents.append(handle.read())
+        with open(output, 'wb') as handle:
+            handle.write(pdf.merge(documents))
+    else:
+        # Los PDFs ya vienen comprimidos
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for path in paths:
+                archive.write(path, arcname=os.path.basename(path).rsplit('-', 1)[0] + '.pdf')
+    return output
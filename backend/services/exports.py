@@ -0,0 +1,50 @@
+"""
+Columnas de las exportaciones de órdenes, ítems y facturas
+"""
+from core.exports import Column, Export
+from core.fastlist import choice_labels
+from .models import ServiceOrder, ServiceItem, Invoice
+
+ORDER_STATUS = choice_labels(ServiceOrder, 'status')
+
+ORDER_EXPORT = Export('ordenes', [
+    Column('Número', 'order_number'),
+    Column('Fecha', 'created_at', 'datetime'),
+    Column('Estado', 'status', labels=ORDER_STATUS),
+    Column('Finalizada', 'completed_at', 'datetime'),
+    Column('Patente', 'vehicle__plate'),
+    Column('Marca', 'vehicle__brand'),
+    Column('Modelo', 'vehicle__model'),
+    Column('Nombre cliente', 'customer__first_name'),
+    Column('Apellido cliente', 'customer__last_name'),
+    Column('Total', 'total', 'number'),
+    Column('Observaciones', 'observations'),
+])
+
+ITEM_EXPORT = Export('items', [
+    Column('Orden', 'service_order__order_number'),
+    Column('Fecha orden', 'service_order__created_at', 'datetime'),
+    Column('Estado orden', 'service_order__status', labels=ORDER_STATUS),
+    Column('Tipo', 'item_type', labels=choice_labels(ServiceItem, 'item_type')),
+    Column('Código producto', 'product__code'),
+    Column('Descripción', 'description'),
+    Column('Cantidad', 'quantity', 'number'),
+    Column('Precio unitario', 'unit_price', 'number'),
+    Column('Subtotal', 'subtotal', 'number'),
+])
+
+INVOICE_EXPORT = Export('facturas', [
+    Column('Número', 'invoice_number'),
+    Column('Tipo', 'invoice_type', labels=choice_labels(Invoice, 'invoice_type')),
+    Column('Emisión', 'issue_date', 'date'),
+    Column('Vencimiento', 'due_date', 'date'),
+    Column('Pago', 'paid_date', 'date'),
+    Column('Estado', 'status', labels=choice_labels(Invoice, 'status')),
+    Column('Orden', 'service_order__order_number'),
+    Column('Nombre cliente', 'customer__first_name'),
+    Column('Apellido cliente', 'customer__last_name'),
+    Column('Subtotal', 'subtotal', 'number'),
+    Column('Alícuota IVA', 'tax_rate', 'number'),
+    Column('IVA', 'tax_amount', 'number'),
+    Column('Total', 'total', 'number'),
+])
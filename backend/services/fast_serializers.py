@@ -0,0 +1,143 @@
+"""
+Representación de órdenes y facturas desde filas values(), idéntica a
+ServiceOrderSerializer e InvoiceSerializer. Se usa en los listados, donde
+construir instancias y serializers anidados por fila domina el tiempo.
+"""
+from django.utils import timezone
+
+from core.fastlist import choice_labels, format_date, format_datetime, format_decimal, subrow
+from crm.fast_serializers import CUSTOMER_FIELDS, VEHICLE_CUSTOMER_FIELDS, VEHICLE_FIELDS, CustomerGraph
+from inventory.fast_serializers import PRODUCT_FIELDS, product_representation
+from .models import ServiceOrder, ServiceItem, Invoice
+
+
+ORDER_FIELDS = [
+    'id', 'order_number', 'vehicle_id', 'customer_id', 'status', 'created_at', 'completed_at',
+    'observations', 'total', 'created_by_id',
+]
+ITEM_FIELDS = [
+    'id', 'service_order_id', 'item_type', 'product_id', 'description', 'quantity', 'unit_price',
+    'subtotal', 'created_at',
+]
+INVOICE_FIELDS = [
+    'id', 'invoice_number', 'invoice_type', 'service_order_id', 'service_order__order_number',
+    'customer_id', 'issue_date', 'due_date', 'paid_date', 'status', 'subtotal', 'tax_rate',
+    'tax_amount', 'total', 'notes', 'created_by_id', 'created_at',
+]
+
+# Columnas de la consulta paginada: las relaciones se leen en el mismo JOIN
+ORDER_LIST_FIELDS = (
+    ORDER_FIELDS
+    + [f'vehicle__{field}' for field in VEHICLE_FIELDS]
+    + [f'vehicle__customer__{field}' for field in VEHICLE_CUSTOMER_FIELDS]
+    + [f'customer__{field}' for field in CUSTOMER_FIELDS]
+)
+INVOICE_LIST_FIELDS = INVOICE_FIELDS + [f'customer__{field}' for field in CUSTOMER_FIELDS]
+ITEM_LIST_FIELDS = ITEM_FIELDS + [f'product__{field}' for field in PRODUCT_FIELDS]
+
+ORDER_STATUS_LABELS = choice_labels(ServiceOrder, 'status')
+INVOICE_STATUS_LABELS = choice_labels(Invoice, 'status')
+INVOICE_TYPE_LABELS = choice_labels(Invoice, 'invoice_type')
+
+
+def _customers(rows):
+    return {row['customer_id']: subrow(row, 'customer__', CUSTOMER_FIELDS) for row in rows}
+
+
+def _items_by_order(order_ids, tz):
+    items = {pk: [] for pk in order_ids}
+    products = {}
+    for row in ServiceItem.objects.filter(service_order_id__in=order_ids).order_by('id').values(*ITEM_LIST_FIELDS):
+        product_id = row['product_id']
+        if product_id is None:
+            product = None
+        else:
+            product = products.get(product_id)
+            if product is None:
+                product = products[product_id] = product_representation(row, tz, prefix='product__')
+        items[row['service_order_id']].append({
+            'id': row['id'],
+            'item_type': row['item_type'],
+            'product': product_id,
+            'product_details': product,
+            'description': row['description'],
+            'quantity': format_decimal(row['quantity']),
+            'unit_price': format_decimal(row['unit_price']),
+            'subtotal': format_decimal(row['subtotal']),
+            'created_at': format_datetime(row['created_at'], tz),
+        })
+    return items
+
+
+def serialize_orders(rows):
+    """
+    Filas de ORDER_LIST_FIELDS; suma dos consultas: vehículos de los clientes e items
+    """
+    tz = timezone.get_current_timezone()
+    graph = CustomerGraph(_customers(rows), tz)
+    items = _items_by_order([row['id'] for row in rows], tz)
+
+    data = []
+    for row in rows:
+        order = {
+            'id': row['id'],
+            'order_number': row['order_number'],
+            'vehicle': row['vehicle_id'],
+            'vehicle_details': graph.vehicle(
+                subrow(row, 'vehicle__', VEHICLE_FIELDS),
+                subrow(row, 'vehicle__customer__', VEHICLE_CUSTOMER_FIELDS)
+            ),
+            'customer': row['customer_id'],
+            'customer_details': graph.customer(row['customer_id']),
+            'status': row['status'],
+            'status_display': ORDER_STATUS_LABELS.get(row['status'], row['status']),
+            'created_at': format_datetime(row['created_at'], tz),
+            'completed_at': format_datetime(row['completed_at'], tz),
+            'observations': row['observations'],
+            'total': format_decimal(row['total']),
+            'created_by': row['created_by_id'],
+        }
+        # El usuario no tiene username: DRF lo muestra como null, y lo
+        # omite cuando la orden no tiene creador
+        if row['created_by_id'] is not None:
+            order['created_by_username'] = None
+        order['items'] = items[row['id']]
+        data.append(order)
+    return data
+
+
+def serialize_invoices(rows):
+    """
+    Filas de INVOICE_LIST_FIELDS; suma una consulta: vehículos de los clientes
+    """
+    tz = timezone.get_current_timezone()
+    graph = CustomerGraph(_customers(rows), tz)
+
+    data = []
+    for row in rows:
+        invoice = {
+            'id': row['id'],
+            'invoice_number': row['invoice_number'],
+            'invoice_type': row['invoice_type'],
+            'invoice_type_display': INVOICE_TYPE_LABELS.get(row['invoice_type'], row['invoice_type']),
+            'service_order': row['service_order_id'],
+            'service_order_number': row['service_order__order_number'],
+            'customer': row['customer_id'],
+            'customer_details': graph.customer(row['customer_id']),
+            'issue_date': format_date(row['issue_date']),
+            'due_date': format_date(row['due_date']),
+            'paid_date': format_date(row['paid_date']),
+            'status': row['status'],
+            'status_display': INVOICE_STATUS_LABELS.get(row['status'], row['status']),
+            'subtotal': format_decimal(row['subtotal']),
+            'tax_rate': format_decimal(row['tax_rate']),
+            'tax_amount': format_decimal(row['tax_amount']),
+            'total': format_decimal(row['total']),
+            'notes': row['notes'],
+            'created_by': row['created_by_id'],
+        }
+        if row['created_by_id'] is not None:
+            invoice['created_by_username'] = None
+        invoice['created_at'] = format_datetime(row['created_at'], tz)
+        data.append(invoice)
+    return data
@@ -0,0 +1,358 @@
+"""
+Libro IVA Ventas del mes.
+
+El libro se arma en streaming a partir de una sola consulta ordenada por
+fecha, tipo y número de comprobante. Los subtotales por día y tipo, por día
+y por tipo en el mes salen de funciones de ventana de la misma consulta. El
+generador los intercala al pasar por la última factura de cada grupo, sin
+acumular el mes en memoria.
+
+Salidas (?output= / --output):
+
+- csv: el libro con una línea por factura y sus subtotales. Usa el mismo
+  formato que las exportaciones (UTF-8 con BOM, separador ';').
+- cbte y alicuotas: los archivos VENTAS_CBTE y VENTAS_ALICUOTAS del
+  Régimen de Información de Compras y Ventas (RG 3685). Son de ancho fijo
+  (266 y 62 caracteres), en ASCII, con fin de línea CRLF.
+
+Las facturas en borrador no integran el libro. Las anuladas se informan
+con importes en cero. Los clientes no tienen CUIT/DNI cargado, por eso se
+informan como comprador sin identificar (código 99).
+
+Un período cerrado (terminó hace más de FISCAL_CLOSE_DAYS días) se guarda
+en FISCAL_BOOK_DIR al terminar de generarse. Las siguientes descargas leen
+ese archivo sin consultar la base. Guardar o borrar una factura de un mes
+descarta sus archivos (services.signals). Las escrituras con update() deben
+llamar a invalidate() explícitamente.
+"""
+import calendar
+import glob
+import hashlib
+import os
+import unicodedata
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Case, Count, DecimalField, F, Sum, Value, When, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from core.exports import FLUSH_ROWS, csv_stream
+from core.fastlist import choice_labels, full_name
+from .models import Invoice
+
+# Cambiarlo descarta los libros guardados con el formato anterior
+BOOK_VERSION = 1
+
+OUTPUTS = {
+    'csv': ('text/csv; charset=utf-8', 'libro-iva-ventas-{period}.csv'),
+    'cbte': ('text/plain; charset=ascii', 'VENTAS_CBTE_{period}.txt'),
+    'alicuotas': ('text/plain; charset=ascii', 'VENTAS_ALICUOTAS_{period}.txt'),
+}
+
+# Códigos de comprobante y de alícuota de AFIP
+VOUCHER_CODES = {'A': 1, 'B': 6, 'C': 11}
+RATE_CODES = {
+    Decimal('0'): 3, Decimal('10.5'): 4, Decimal('21'): 5,
+    Decimal('27'): 6, Decimal('5'): 8, Decimal('2.5'): 9,
+}
+UNIDENTIFIED_BUYER = 99
+
+TYPE_LABELS = choice_labels(Invoice, 'invoice_type')
+STATUS_LABELS = choice_labels(Invoice, 'status')
+
+HEADERS = [
+    'Fecha', 'Tipo', 'Punto de venta', 'Número', 'Cliente', 'Estado',
+    'Neto gravado', 'Alícuota IVA', 'IVA', 'Total',
+]
+
+_AMOUNTS = ('net', 'tax', 'gross')
+_AMOUNT_KEYS = [*_AMOUNTS] + [f'{prefix}_{amount}' for prefix in ('group', 'day', 'type') for amount in _AMOUNTS]
+_CENT = Decimal('0.01')
+
+
+class FiscalError(ValueError):
+    pass
+
+
+def parse_period(value):
+    """'YYYY-MM' -> (año, mes)"""
+    try:
+        year, month = (int(part) for part in value.split('-'))
+        date(year, month, 1)
+    except (AttributeError, TypeError, ValueError):
+        raise FiscalError('El período debe tener el formato YYYY-MM')
+    return year, month
+
+
+def period_bounds(year, month):
+    return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+
+def is_closed(year, month, today=None):
+    today = today or timezone.localdate()
+    return today > period_bounds(year, month)[1] + timedelta(days=settings.FISCAL_CLOSE_DAYS)
+
+
+def _amount(field):
+    """Importe de la factura; cero si está anulada"""
+    return Case(
+        When(status='CANCELLED', then=Value(Decimal('0'))),
+        default=F(field),
+        output_field=DecimalField(max_digits=12, decimal_places=2),
+    )
+
+
+def _window(function, partition, order=None):
+    return Window(function, partition_by=[F(field) for field in partition], order_by=order)
+
+
+def book_rows(year, month):
+    """
+    Facturas del mes en orden, cada una con los importes y la cantidad de
+    su día y tipo (group_*), de su día (day_*) y de su tipo en el mes
+    (type_*), y su posición en el grupo y en el día
+    """
+    first, last = period_bounds(year, month)
+    order = ['issue_date', 'invoice_type', 'invoice_number']
+    groups = {
+        'group': ['issue_date', 'invoice_type'],
+        'day': ['issue_date'],
+        'type': ['invoice_type'],
+    }
+    annotations = {'net': _amount('subtotal'), 'tax': _amount('tax_amount'), 'gross': _amount('total')}
+    windows = {}
+    for prefix, partition in groups.items():
+        for amount in _AMOUNTS:
+            windows[f'{prefix}_{amount}'] = _window(Sum(amount), partition)
+        windows[f'{prefix}_count'] = _window(Count('id'), partition)
+    windows['group_row'] = _window(RowNumber(), groups['group'], [F(field).asc() for field in order[2:]])
+    windows['day_row'] = _window(RowNumber(), groups['day'], [F(field).asc() for field in order[1:]])
+
+    return (
+        Invoice.objects.filter(issue_date__range=(first, last)).exclude(status='DRAFT')
+        .annotate(**annotations).annotate(**windows)
+        .order_by(*order)
+        .values(
+            'invoice_number', 'invoice_type', 'issue_date', 'status', 'tax_rate',
+            'customer__first_name', 'customer__last_name', *annotations, *windows,
+        )
+        .iterator(chunk_size=2000)
+    )
+
+
+def voucher_number(invoice_number):
+    """FA-00012 -> 12"""
+    try:
+        return int(invoice_number.rsplit('-', 1)[-1])
+    except ValueError:
+        raise FiscalError(f'Número de factura sin formato válido: {invoice_number}')
+
+
+def book_lines(rows):
+    """
+    Líneas del libro: ('invoice', fila), ('group', fila) al cerrar cada día
+    y tipo, ('day', fila) al cerrar cada día y al final ('type', {tipo: fila})
+    """
+    types = {}
+    for row in rows:
+        # SQLite devuelve las sumas con decimales de más
+        for key in _AMOUNT_KEYS:
+            row[key] = row[key].quantize(_CENT)
+        yield 'invoice', row
+        types[row['invoice_type']] = row
+        if row['group_row'] == row['group_count']:
+            yield 'group', row
+        if row['day_row'] == row['day_count']:
+            yield 'day', row
+    yield 'type', dict(sorted(types.items()))
+
+
+def _totals(row, prefix):
+    return [row[f'{prefix}_{amount}'] for amount in _AMOUNTS]
+
+
+def csv_rows(lines):
+    point_of_sale = settings.FISCAL_POINT_OF_SALE
+    for kind, row in lines:
+        if kind == 'invoice':
+            yield [
+                row['issue_date'], TYPE_LABELS[row['invoice_type']], point_of_sale,
+                voucher_number(row['invoice_number']),
+                full_name(row['customer__first_name'], row['customer__last_name']),
+                STATUS_LABELS.get(row['status'], row['status']),
+                row['net'], row['tax_rate'], row['tax'], row['gross'],
+            ]
+        elif kind == 'group':
+            net, tax, gross = _totals(row, 'group')
+            label = f"Subtotal {TYPE_LABELS[row['invoice_type']]} ({row['group_count']} comprobantes)"
+            yield [row['issue_date'], TYPE_LABELS[row['invoice_type']], '', '', label, '', net, '', tax, gross]
+        elif kind == 'day':
+            net, tax, gross = _totals(row, 'day')
+            yield [row['issue_date'], '', '', '', f"Total del día ({row['day_count']} comprobantes)", '', net, '', tax, gross]
+        else:
+            month = [Decimal('0')] * len(_AMOUNTS)
+            count = 0
+            for invoice_type, type_row in row.items():
+                totals = _totals(type_row, 'type')
+                month = [total + amount for total, amount in zip(month, totals)]
+                count += type_row['type_count']
+                label = f"Total del mes {TYPE_LABELS[invoice_type]} ({type_row['type_count']} comprobantes)"
+                yield ['', TYPE_LABELS[invoice_type], '', '', label, '', totals[0], '', totals[1], totals[2]]
+            yield ['', '', '', '', f'Total del mes ({count} comprobantes)', '', month[0], '', month[1], month[2]]
+
+
+def _text(value, width):
+    """Texto en ASCII, alineado a la izquierda y recortado a `width`"""
+    value = unicodedata.normalize('NFKD', value).encode('ascii', 'ignore').decode()
+    return value[:width].ljust(width)
+
+
+def _number(value, width):
+    return f'{value:0{width}d}'
+
+
+def _money(value, width=15):
+    """Importe sin separador con 2 decimales"""
+    return _number(int((value * 100).to_integral_value()), width)
+
+
+def check_rates(year, month):
+    """Valida antes de generar que todas las alícuotas del mes tengan código"""
+    first, last = period_bounds(year, month)
+    rates = Invoice.objects.filter(issue_date__range=(first, last)).exclude(status='DRAFT')
+    for rate in rates.values_list('tax_rate', flat=True).distinct():
+        _rate_code(rate)
+
+
+def _rate_code(rate):
+    code = RATE_CODES.get(rate)
+    if code is None:
+        raise FiscalError(f'Alícuota sin código de AFIP: {rate}%')
+    return code
+
+
+def cbte_line(row, point_of_sale):
+    discriminated = row['invoice_type'] != 'C'
+    zero_rate = not row['tax_rate'] or row['status'] == 'CANCELLED'
+    number = _number(voucher_number(row['invoice_number']), 20)
+    buyer = full_name(row['customer__first_name'], row['customer__last_name'])
+    return ''.join([
+        row['issue_date'].strftime('%Y%m%d'),
+        _number(VOUCHER_CODES[row['invoice_type']], 3),
+        _number(point_of_sale, 5),
+        number,
+        number,
+        _number(UNIDENTIFIED_BUYER, 2),
+        _number(0, 20),
+        _text(buyer, 30),
+        _money(row['gross']),
+        # No gravado, percepción a no categorizados, exento, percepciones
+        # nacionales, de ingresos brutos y municipales, impuestos internos
+        _money(Decimal('0')) * 7,
+        'PES',
+        '0001000000',
+        str(1 if discriminated else 0),
+        'N' if discriminated and zero_rate else '0',
+        # Otros tributos y vencimiento del pago
+        _money(Decimal('0')),
+        '00000000',
+    ])
+
+
+def alicuota_line(row, point_of_sale):
+    return ''.join([
+        _number(VOUCHER_CODES[row['invoice_type']], 3),
+        _number(point_of_sale, 5),
+        _number(voucher_number(row['invoice_number']), 20),
+        _money(row['net']),
+        _number(_rate_code(row['tax_rate']), 4),
+        _money(row['tax']),
+    ])
+
+
+def fixed_width_stream(lines, output):
+    """VENTAS_CBTE o VENTAS_ALICUOTAS (las facturas C no llevan alícuotas)"""
+    point_of_sale = settings.FISCAL_POINT_OF_SALE
+    parts = []
+    for kind, row in lines:
+        if kind != 'invoice':
+            continue
+        if output == 'cbte':
+            parts.append(cbte_line(row, point_of_sale))
+        elif row['invoice_type'] != 'C':
+            parts.append(alicuota_line(row, point_of_sale))
+        if len(parts) == FLUSH_ROWS:
+            yield ('\r\n'.join(parts) + '\r\n').encode('ascii')
+            parts = []
+    if parts:
+        yield ('\r\n'.join(parts) + '\r\n').encode('ascii')
+
+
+def book_stream(year, month, output):
+    lines = book_lines(book_rows(year, month))
+    if output == 'csv':
+        return csv_stream(HEADERS, csv_rows(lines))
+    return fixed_width_stream(lines, output)
+
+
+def filename(year, month, output):
+    return OUTPUTS[output][1].format(period=f'{year}{month:02d}')
+
+
+# Libros de períodos cerrados en disco
+
+def _settings_hash():
+    payload = f'{BOOK_VERSION}:{settings.FISCAL_POINT_OF_SALE}'.encode()
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+
+def cached_path(year, month, output):
+    directory = str(settings.FISCAL_BOOK_DIR)
+    return os.path.join(directory, f'{year}{month:02d}-{output}-{_settings_hash()}')
+
+
+def invalidate(year, month):
+    """Descarta los libros guardados del período"""
+    pattern = os.path.join(glob.escape(str(settings.FISCAL_BOOK_DIR)), f'{year}{month:02d}-*')
+    for path in glob.glob(pattern):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _store(stream, path):
+    """Reenvía `stream` y lo guarda en `path` si se llega al final"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    completed = False
+    try:
+        with open(temporary, 'wb') as target:
+            for chunk in stream:
+                target.write(chunk)
+                yield chunk
+        os.replace(temporary, path)
+        completed = True
+    finally:
+        if not completed and os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def open_book(year, month, output):
+    """
+    Retorna (archivo abierto o generador de bytes, si venía de disco). Los
+    períodos cerrados se leen de FISCAL_BOOK_DIR o se guardan al generarse.
+    """
+    if output not in OUTPUTS:
+        raise FiscalError(f'El formato debe ser {", ".join(OUTPUTS)}')
+    if output == 'alicuotas':
+        check_rates(year, month)
+    if not is_closed(year, month):
+        return book_stream(year, month, output), False
+    path = cached_path(year, month, output)
+    try:
+        return open(path, 'rb'), True
+    except FileNotFoundError:
+        return _store(book_stream(year, month, output), path), False
@@ -0,0 +1,25 @@
+"""
+Tareas en segundo plano de servicios
+"""
+import os
+
+from django.conf import settings
+
+from core.jobs import job
+from .documents import PDFCache, bundle, invoice_documents
+from .models import Invoice
+
+
+@job('services.render_invoices', max_attempts=2)
+def render_invoices_job(context, ids, output='zip', name='facturas'):
+    """
+    Lote de facturas en un ZIP o un único PDF, en MEDIA_ROOT/exports
+    """
+    context.progress(0, 'Leyendo facturas')
+    documents = invoice_documents(Invoice.objects.filter(pk__in=ids))
+    context.progress(10, f'Generando {len(documents)} facturas')
+    paths, stats = PDFCache().render_many('invoice', documents)
+    context.progress(90, 'Empaquetando')
+    relative = os.path.join('exports', f'{name}-{context.job.pk}.{output}')
+    bundle(paths, os.path.join(settings.MEDIA_ROOT, relative), output)
+    return {'file': relative, **stats}
@@ -0,0 +1,49 @@
+"""
+Genera el Libro IVA Ventas de un mes (ver services.fiscal).
+
+Uso: python manage.py iva_book --month 2026-09 [--output csv|cbte|alicuotas] [--path archivo]
+
+Los meses cerrados quedan guardados en FISCAL_BOOK_DIR: volver a generarlos
+solo copia ese archivo.
+"""
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from services import fiscal
+
+
+class Command(BaseCommand):
+    help = 'Genera el Libro IVA Ventas de un mes en CSV o en los formatos de AFIP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', required=True, help='Mes en formato YYYY-MM')
+        parser.add_argument('--output', choices=list(fiscal.OUTPUTS), default='csv')
+        parser.add_argument('--path', help='Archivo de salida (por defecto MEDIA_ROOT/exports)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            year, month = fiscal.parse_period(options['month'])
+            content, cached = fiscal.open_book(year, month, options['output'])
+        except fiscal.FiscalError as exc:
+            raise CommandError(str(exc))
+
+        path = options['path'] or os.path.join(
+            settings.MEDIA_ROOT, 'exports', fiscal.filename(year, month, options['output'])
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'wb') as target:
+            if cached:
+                with content:
+                    shutil.copyfileobj(content, target)
+            else:
+                for chunk in content:
+                    target.write(chunk)
+        source = 'desde disco' if cached else ('guardado' if fiscal.is_closed(year, month) else 'período abierto')
+        self.stdout.write(self.style.SUCCESS(
+            f'Libro IVA Ventas {year}-{month:02d} ({source}) en {time.perf_counter() - start:.2f}s: {path}'
+        ))
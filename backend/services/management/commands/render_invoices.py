@@ -0,0 +1,79 @@
+"""
+Imprime las facturas de un mes en un ZIP o en un único PDF.
+
+Uso: python manage.py render_invoices --month 2026-09 [--output pdf] [--workers 4] [--path facturas.zip]
+     python manage.py render_invoices --month 2026-09 --compare
+
+--compare mide, con una caché vacía en un directorio temporal, la
+generación en serie, con el pool de procesos y la reimpresión desde caché.
+"""
+import json
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from services.documents import PDFCache, bundle, invoice_documents
+from services.models import Invoice
+
+
+class Command(BaseCommand):
+    help = 'Genera los PDF de las facturas de un mes en un ZIP o un único PDF'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--month', required=True, help='Mes en formato YYYY-MM')
+        parser.add_argument('--output', choices=['zip', 'pdf'], default='zip')
+        parser.add_argument('--workers', type=int, default=settings.PDF_WORKERS)
+        parser.add_argument('--path', help='Archivo de salida (por defecto MEDIA_ROOT/exports)')
+        parser.add_argument('--compare', action='store_true', help='Compara serie, pool y caché')
+
+    def handle(self, *args, **options):
+        try:
+            year, month = (int(part) for part in options['month'].split('-'))
+        except ValueError:
+            raise CommandError('El mes debe tener el formato YYYY-MM')
+        queryset = Invoice.objects.filter(issue_date__year=year, issue_date__month=month)
+
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            documents = invoice_documents(queryset)
+        gathered = time.perf_counter() - start
+        if not documents:
+            raise CommandError(f'No hay facturas en {options["month"]}')
+
+        if options['compare']:
+            self.compare(documents, options['workers'], gathered, len(queries))
+            return
+
+        paths, stats = PDFCache().render_many('invoice', documents, workers=options['workers'])
+        output = options['path'] or os.path.join(
+            settings.MEDIA_ROOT, 'exports', f'facturas-{year}-{month:02d}.{options["output"]}'
+        )
+        bundle(paths, output, options['output'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['documents']} facturas ({stats['rendered']} generadas, {stats['cached']} desde caché) "
+            f"en {gathered + stats['seconds']:.2f}s ({len(queries)} consultas): {output}"
+        ))
+
+    def compare(self, documents, workers, gathered, queries):
+        results = {'documents': len(documents), 'queries': queries, 'gather_seconds': round(gathered, 3)}
+        with tempfile.TemporaryDirectory() as serial_dir, tempfile.TemporaryDirectory() as pool_dir:
+            results['serial'] = PDFCache(serial_dir).render_many('invoice', documents, workers=1)[1]
+            cache = PDFCache(pool_dir)
+            paths, results['pool'] = cache.render_many('invoice', documents, workers=workers)
+            results['cached'] = cache.render_many('invoice', documents, workers=workers)[1]
+
+            for output in ('zip', 'pdf'):
+                start = time.perf_counter()
+                path = bundle(paths, os.path.join(pool_dir, 'out', f'lote.{output}'), output)
+                results[f'bundle_{output}'] = {
+                    'seconds': round(time.perf_counter() - start, 3),
+                    'kb': round(os.path.getsize(path) / 1024, 1),
+                }
+        results['workers'] = workers
+        results['pool_speedup'] = round(results['serial']['seconds'] / max(results['pool']['seconds'], 1e-6), 1)
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,39 @@
+# Generated by Django 5.0 on 2026-10-19 15:12
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0002_invoice'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Mutation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, verbose_name='Clave de idempotencia')),
+                ('operation', models.CharField(max_length=30, verbose_name='Operación')),
+                ('client_id', models.CharField(blank=True, max_length=64, verbose_name='Id del cliente')),
+                ('object_id', models.BigIntegerField(blank=True, null=True, verbose_name='Id en el servidor')),
+                ('result', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Resultado')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de aplicación')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mutations', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Operación sincronizada',
+                'verbose_name_plural': 'Operaciones sincronizadas',
+                'indexes': [models.Index(fields=['user', 'client_id'], name='services_mu_user_id_db7f8f_idx'), models.Index(fields=['created_at'], name='services_mu_created_1e069d_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='mutation',
+            constraint=models.UniqueConstraint(fields=('user', 'key'), name='unique_mutation_key'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-19 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0003_mutation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['issue_date', 'invoice_type', 'invoice_number'], name='services_in_issue_d_05c523_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.0 on 2026-10-19 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0004_invoice_book_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='serviceorder',
+            index=models.Index(fields=['-created_at', 'id'], name='services_se_created_66d02e_idx'),
+        ),
+    ]
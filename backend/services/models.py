@@ -1,9 +1,49 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from decimal import Decimal
+from core.outbox import record
 
 
-class ServiceOrder(models.Model):
+class StatusEventsMixin:
+    """
+    Registra en el outbox (core.outbox) los cambios de `status` desde el
+    save() del modelo, así los emite cualquier escritura (vistas,
+    serializers, admin, comandos). `status_event(adding, previous)` retorna
+    (evento, datos) o None. Las escrituras con update() no pasan por acá.
+    """
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_status = instance.__dict__.get('status')
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._saved_status = self.__dict__.get('status')
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        adding = self._state.adding
+        event = None
+        if update_fields is None or 'status' in update_fields:
+            previous = None
+            if not adding:
+                previous = getattr(self, '_saved_status', None)
+                if previous is None:
+                    previous = type(self)._default_manager.filter(pk=self.pk).values_list('status', flat=True).first()
+            event = self.status_event(adding, previous)
+        if event is None:
+            super().save(*args, **kwargs)
+        else:
+            # El evento se confirma o se revierte junto con el cambio
+            with transaction.atomic():
+                super().save(*args, **kwargs)
+                record(event[0], self.pk, **event[1])
+        self._saved_status = self.status
+
+
+class ServiceOrder(StatusEventsMixin, models.Model):
     """
     Orden de servicio - Registro de trabajos realizados en vehículos
     """
@@ -43,6 +83,8 @@ class ServiceOrder(models.Model):
             models.Index(fields=['vehicle']),
             models.Index(fields=['customer']),
             models.Index(fields=['status', 'created_at']),
+            # Listado y exportación: ORDER BY -created_at sin recorrer la tabla
+            models.Index(fields=['-created_at', 'id']),
         ]
     
     def __str__(self):
@@ -68,6 +110,19 @@ class ServiceOrder(models.Model):
         
         super().save(*args, **kwargs)
     
+    def status_event(self, adding, previous):
+        if adding:
+            name = 'OrderCreated'
+        elif previous == self.status:
+            return None
+        else:
+            name = {'COMPLETED': 'OrderCompleted', 'CANCELLED': 'OrderCancelled'}.get(self.status, 'OrderStatusChanged')
+        return name, {
+            'order_number': self.order_number, 'customer_id': self.customer_id, 'vehicle_id': self.vehicle_id,
+            'status': self.status, 'previous_status': previous, 'total': self.total,
+            'completed_at': self.completed_at,
+        }
+
     def calculate_total(self):
         """Calcula el total de la orden sumando todos los items"""
         total = sum(item.subtotal for item in self.items.all())
@@ -131,7 +186,7 @@ class ServiceItem(models.Model):
         self.service_order.calculate_total()
 
 
-class Invoice(models.Model):
+class Invoice(StatusEventsMixin, models.Model):
     """
     Factura - Documento fiscal generado a partir de una orden completada
     """
@@ -189,6 +244,8 @@ class Invoice(models.Model):
             models.Index(fields=['invoice_number']),
             models.Index(fields=['customer']),
             models.Index(fields=['status', 'issue_date']),
+            # Libro IVA: recorrido del mes en el orden del libro
+            models.Index(fields=['issue_date', 'invoice_type', 'invoice_number']),
         ]
     
     def __str__(self):
@@ -218,3 +275,41 @@ class Invoice(models.Model):
         self.total = self.subtotal + self.tax_amount
         
         super().save(*args, **kwargs)
+
+    def status_event(self, adding, previous):
+        if self.status != 'PAID' or previous == 'PAID':
+            return None
+        return 'InvoicePaid', {
+            'invoice_number': self.invoice_number, 'customer_id': self.customer_id,
+            'service_order_id': self.service_order_id, 'total': self.total, 'paid_date': self.paid_date,
+        }
+
+
+class Mutation(models.Model):
+    """
+    Operación aplicada desde /api/services/mutations/ con la clave de
+    idempotencia del cliente: un reintento devuelve el resultado guardado en
+    lugar de aplicarla de nuevo.
+    """
+    user = models.ForeignKey('accounts.User', on_delete=models.CASCADE, related_name='mutations', verbose_name='Usuario')
+    key = models.CharField('Clave de idempotencia', max_length=64)
+    operation = models.CharField('Operación', max_length=30)
+    # Id temporal que el cliente asignó al objeto creado (para referenciarlo después)
+    client_id = models.CharField('Id del cliente', max_length=64, blank=True)
+    object_id = models.BigIntegerField('Id en el servidor', null=True, blank=True)
+    result = models.JSONField('Resultado', default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField('Fecha de aplicación', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Operación sincronizada'
+        verbose_name_plural = 'Operaciones sincronizadas'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_mutation_key'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'client_id']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.operation} {self.key}"
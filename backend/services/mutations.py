@@ -0,0 +1,252 @@
+"""
+Operaciones en lote para las tablets del taller (/api/services/mutations/).
+
+La tablet encola localmente las operaciones que no pudo enviar y las manda
+juntas:
+
+    {"operations": [
+        {"op": "create_order", "key": "<uuid>", "client_id": "tmp-1",
+         "data": {"vehicle": 5, "observations": "...", "items": [...]}},
+        {"op": "update_order", "key": "<uuid>", "order": "tmp-1", "data": {"observations": "..."}},
+        {"op": "update_mileage", "key": "<uuid>", "vehicle": 5, "data": {"current_mileage": 85000}},
+        {"op": "complete", "key": "<uuid>", "order": "tmp-1"}
+    ]}
+
+- Se aplican en orden dentro de una transacción: si una falla no queda
+  aplicada ninguna (las anteriores vuelven como rolled_back y las
+  siguientes como skipped).
+- `key` es la clave de idempotencia de cada operación. Si ya se aplicó
+  (por ejemplo, la respuesta anterior se perdió) se devuelve el resultado
+  guardado con status duplicate y no se vuelve a ejecutar.
+- Las órdenes se referencian por id del servidor (número) o por el
+  `client_id` con el que se crearon, en este lote o en uno anterior.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from core.outbox import record
+from crm.models import Vehicle
+from inventory.models import Product, StockMovement
+from .models import Mutation, ServiceOrder
+from .serializers import ServiceOrderCreateSerializer, ServiceOrderUpdateSerializer
+
+MAX_KEY_LENGTH = 64
+
+
+class OperationError(Exception):
+    """Error de una operación; `detail` se devuelve al cliente"""
+    def __init__(self, detail):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class BatchConflict(Exception):
+    """Otra petición aplicó las mismas claves al mismo tiempo"""
+
+
+class _Rollback(Exception):
+    pass
+
+
+def complete_order(service_order, user):
+    """
+    Marca la orden como completada y descuenta el stock de los productos.
+    Lanza ValueError si no se puede completar.
+    """
+    if service_order.status == 'COMPLETED':
+        raise ValueError('La orden ya está completada.')
+    if service_order.status == 'CANCELLED':
+        raise ValueError('No se puede completar una orden cancelada.')
+
+    with transaction.atomic():
+        # Descontar stock de productos
+        for item in service_order.items.filter(item_type='PRODUCT', product__isnull=False):
+            product = Product.objects.select_for_update().get(pk=item.product_id)
+
+            if product.stock_quantity < item.quantity:
+                raise ValueError(
+                    f'Stock insuficiente para {product.name}. '
+                    f'Disponible: {product.stock_quantity}, Requerido: {item.quantity}'
+                )
+
+            product.stock_quantity -= item.quantity
+            product.save()
+
+            movement = StockMovement.objects.create(
+                product=product,
+                movement_type='OUT',
+                quantity=item.quantity,
+                reason=f'Orden de servicio #{service_order.order_number}',
+                performed_by=user
+            )
+            record(
+                'StockChanged', product.pk, code=product.code, product_name=product.name, delta=-item.quantity,
+                stock_quantity=product.stock_quantity, min_stock=product.min_stock, movement_id=movement.pk,
+                movement_type='OUT', service_order_id=service_order.pk,
+            )
+
+        # OrderCompleted lo registra ServiceOrder.save (ver StatusEventsMixin)
+        service_order.status = 'COMPLETED'
+        service_order.completed_at = timezone.now()
+        service_order.save()
+    return service_order
+
+
+def _order_result(order):
+    return {'id': order.pk, 'order_number': order.order_number, 'status': order.status, 'total': f'{order.total:.2f}'}
+
+
+class Batch:
+    def __init__(self, user):
+        self.user = user
+        # client_id -> id del servidor de las órdenes creadas (en este lote o antes)
+        self.client_ids = {}
+
+    def order(self, operation):
+        reference = operation.get('order')
+        if isinstance(reference, str):
+            if reference not in self.client_ids:
+                raise OperationError(f'Orden desconocida: {reference}')
+            reference = self.client_ids[reference]
+        if not isinstance(reference, int) or isinstance(reference, bool):
+            raise OperationError('Debe indicar la orden (id o client_id)')
+        try:
+            return ServiceOrder.objects.select_related('vehicle').get(pk=reference)
+        except ServiceOrder.DoesNotExist:
+            raise OperationError(f'No existe la orden {reference}')
+
+    def create_order(self, operation):
+        serializer = ServiceOrderCreateSerializer(data=operation.get('data') or {})
+        if not serializer.is_valid():
+            raise OperationError(serializer.errors)
+        order = serializer.save(created_by=self.user)
+        order.refresh_from_db(fields=['total'])
+        return order.pk, _order_result(order)
+
+    def update_order(self, operation):
+        """Observaciones y/o ítems (reemplaza todos) de una orden pendiente"""
+        order = self.order(operation)
+        serializer = ServiceOrderUpdateSerializer(order, data=operation.get('data') or {}, partial=True)
+        if not serializer.is_valid():
+            raise OperationError(serializer.errors)
+        try:
+            order = serializer.save()
+        except serializers.ValidationError as exc:
+            raise OperationError(exc.detail)
+        return order.pk, _order_result(order)
+
+    def complete(self, operation):
+        order = self.order(operation)
+        try:
+            complete_order(order, self.user)
+        except ValueError as exc:
+            raise OperationError(str(exc))
+        return order.pk, _order_result(order)
+
+    def update_mileage(self, operation):
+        mileage = (operation.get('data') or {}).get('current_mileage')
+        try:
+            mileage = int(mileage)
+        except (TypeError, ValueError):
+            raise OperationError('El kilometraje debe ser un número válido')
+        if mileage < 0:
+            raise OperationError('El kilometraje no puede ser negativo')
+        try:
+            vehicle = Vehicle.objects.get(pk=operation.get('vehicle'))
+        except (Vehicle.DoesNotExist, TypeError, ValueError):
+            raise OperationError(f"No existe el vehículo {operation.get('vehicle')}")
+        vehicle.current_mileage = mileage
+        vehicle.save()
+        return vehicle.pk, {'id': vehicle.pk, 'current_mileage': vehicle.current_mileage}
+
+    OPERATIONS = {
+        'create_order': create_order,
+        'update_order': update_order,
+        'complete': complete,
+        'update_mileage': update_mileage,
+    }
+
+    def apply(self, operations):
+        """
+        Aplica las operaciones. Retorna (aplicado, resultados por operación).
+        """
+        keys = [op.get('key') for op in operations if isinstance(op, dict)]
+        previous = {
+            mutation.key: mutation
+            for mutation in Mutation.objects.filter(user=self.user, key__in=[k for k in keys if isinstance(k, str)])
+        }
+        references = {op.get('order') for op in operations if isinstance(op, dict) and isinstance(op.get('order'), str)}
+        self.client_ids.update(
+            Mutation.objects.filter(user=self.user, operation='create_order', client_id__in=references)
+            .values_list('client_id', 'object_id')
+        )
+
+        results = []
+        pending = []
+        try:
+            with transaction.atomic():
+                for operation in operations:
+                    result = self.apply_one(operation, previous, pending)
+                    results.append(result)
+                    if result['status'] == 'error':
+                        raise _Rollback
+                # Una sola inserción para todas las claves del lote
+                Mutation.objects.bulk_create(pending)
+        except _Rollback:
+            for result in results[:-1]:
+                if result['status'] == 'ok':
+                    result['status'] = 'rolled_back'
+                    result.pop('id', None)
+                    result.pop('result', None)
+            results += [
+                {'key': op.get('key') if isinstance(op, dict) else None, 'status': 'skipped'}
+                for op in operations[len(results):]
+            ]
+            return False, results
+        except IntegrityError:
+            raise BatchConflict('El lote se está aplicando en otra petición; reintente')
+        return True, results
+
+    def apply_one(self, operation, previous, pending):
+        if not isinstance(operation, dict):
+            return {'key': None, 'status': 'error', 'error': 'Cada operación debe ser un objeto'}
+        key, name = operation.get('key'), operation.get('op')
+        response = {'key': key, 'op': name, 'status': 'ok'}
+        if not isinstance(key, str) or not key or len(key) > MAX_KEY_LENGTH:
+            return dict(response, status='error', error=f'La clave debe ser un texto de hasta {MAX_KEY_LENGTH} caracteres')
+        if name not in self.OPERATIONS:
+            return dict(response, status='error', error=f'Operación desconocida: {name}')
+
+        if key in previous:
+            mutation = previous[key]
+            if mutation.operation != name:
+                return dict(response, status='error', error='La clave ya se usó para otra operación')
+            if mutation.client_id:
+                self.client_ids[mutation.client_id] = mutation.object_id
+            return dict(response, status='duplicate', id=mutation.object_id, result=mutation.result)
+
+        client_id = operation.get('client_id') or ''
+        if client_id and (not isinstance(client_id, str) or len(client_id) > MAX_KEY_LENGTH):
+            return dict(response, status='error', error='client_id inválido')
+        try:
+            object_id, result = self.OPERATIONS[name](self, operation)
+        except OperationError as exc:
+            return dict(response, status='error', error=exc.detail)
+
+        if name == 'create_order' and client_id:
+            self.client_ids[client_id] = object_id
+        mutation = Mutation(
+            user=self.user, key=key, operation=name, client_id=client_id if name == 'create_order' else '',
+            object_id=object_id, result=result,
+        )
+        previous[key] = mutation
+        pending.append(mutation)
+        if client_id:
+            response['client_id'] = client_id
+        return dict(response, id=object_id, result=result)
+
+
+def apply_batch(operations, user):
+    return Batch(user).apply(operations)
+
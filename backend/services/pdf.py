@@ -0,0 +1,410 @@
+"""
+Generador de PDF mínimo para facturas y órdenes de trabajo.
+
+No depende de Django ni de librerías externas: usa las fuentes estándar de
+PDF (Helvetica y Helvetica-Bold, codificación WinAnsi) que todo visor trae
+incorporadas, así que no hay fuentes que embeber. Cada plantilla arma una
+sola vez por proceso la parte fija de la página (marcos, títulos de
+columnas, datos del emisor) y para cada documento solo agrega los textos
+variables.
+
+Los documentos llegan como diccionarios de strings ya formateados
+(services.documents), de modo que se pueden enviar a otro proceso.
+"""
+import os
+import re
+import tempfile
+import unicodedata
+import zlib
+from functools import lru_cache
+
+# Cambiar al modificar el diseño: invalida los PDFs cacheados
+TEMPLATE_VERSION = 1
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 40
+
+# Anchos (milésimas del tamaño de fuente) de los caracteres ASCII 32-126
+_HELVETICA = [
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584,
+]
+_HELVETICA_BOLD = [
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584,
+]
+FONTS = {
+    'F1': ('Helvetica', _HELVETICA),
+    'F2': ('Helvetica-Bold', _HELVETICA_BOLD),
+}
+
+
+@lru_cache(maxsize=512)
+def _char_width(font, char):
+    widths = FONTS[font][1]
+    code = ord(char)
+    if 32 <= code <= 126:
+        return widths[code - 32]
+    # Letras acentuadas: mismo ancho que la letra base
+    base = unicodedata.normalize('NFD', char)[0]
+    if base != char and 32 <= ord(base) <= 126:
+        return widths[ord(base) - 32]
+    return 556
+
+
+def text_width(text, font, size):
+    return sum(_char_width(font, c) for c in text) * size / 1000
+
+
+def fit(text, font, size, width):
+    """
+    Recorta `text` con '...' para que entre en `width` puntos
+    """
+    if text_width(text, font, size) <= width:
+        return text
+    while text and text_width(text + '...', font, size) > width:
+        text = text[:-1]
+    return text.rstrip() + '...'
+
+
+def wrap(text, font, size, width, max_lines):
+    """
+    Parte `text` en líneas de hasta `width` puntos (a lo sumo `max_lines`)
+    """
+    lines = []
+    for paragraph in (text or '').splitlines():
+        line = ''
+        for word in paragraph.split():
+            candidate = f'{line} {word}'.strip()
+            if line and text_width(candidate, font, size) > width:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines[-1] = fit(lines[-1] + ' ...', font, size, width)
+    return [fit(line, font, size, width) for line in lines]
+
+
+def _escape(text):
+    data = text.encode('cp1252', errors='replace')
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+class Canvas:
+    """
+    Operadores de contenido de una página (coordenadas desde abajo a la izquierda)
+    """
+    def __init__(self):
+        self.parts = []
+
+    def text(self, x, y, text, size=9, font='F1', align='left'):
+        if not text:
+            return
+        if align == 'right':
+            x -= text_width(text, font, size)
+        elif align == 'center':
+            x -= text_width(text, font, size) / 2
+        self.parts.append(b'BT /%s %g Tf %.2f %.2f Td (%s) Tj ET' % (
+            font.encode(), size, x, y, _escape(text)
+        ))
+
+    def line(self, x1, y1, x2, y2, width=0.5):
+        self.parts.append(b'%g w %.2f %.2f m %.2f %.2f l S' % (width, x1, y1, x2, y2))
+
+    def rect(self, x, y, w, h, fill=None, width=0.5):
+        if fill is None:
+            self.parts.append(b'%g w %.2f %.2f %.2f %.2f re S' % (width, x, y, w, h))
+        else:
+            self.parts.append(b'%g g %.2f %.2f %.2f %.2f re f 0 g' % (fill, x, y, w, h))
+
+    def getvalue(self):
+        return b'\n'.join(self.parts)
+
+
+class Column:
+    def __init__(self, key, title, x, width, align='left'):
+        self.key = key
+        self.title = title
+        self.x = x
+        self.width = width
+        self.align = align
+
+    @property
+    def anchor(self):
+        return self.x + self.width if self.align == 'right' else self.x
+
+
+class DocumentTemplate:
+    """
+    Página con encabezado, tabla de ítems paginada y pie. Las subclases
+    definen las columnas y los bloques variables.
+    """
+    title = ''
+    columns = []
+    header_bottom = 600  # donde empieza la tabla
+    table_bottom = 150   # espacio reservado para totales/firmas
+    row_height = 14
+
+    def __init__(self, issuer):
+        self.issuer = dict(issuer)
+        self.rows_per_page = int((self.header_bottom - 20 - self.table_bottom) // self.row_height)
+        self.static = self.compile()
+
+    def compile(self):
+        """
+        Parte fija de cada página, armada una sola vez
+        """
+        canvas = Canvas()
+        canvas.text(MARGIN, 790, self.issuer.get('name', ''), size=16, font='F2')
+        canvas.text(MARGIN, 774, self.issuer.get('address', ''), size=9)
+        if self.issuer.get('tax_id'):
+            canvas.text(MARGIN, 762, f"CUIT: {self.issuer['tax_id']}", size=9)
+        canvas.text(PAGE_WIDTH - MARGIN, 790, self.title, size=14, font='F2', align='right')
+        canvas.line(MARGIN, 740, PAGE_WIDTH - MARGIN, 740, width=1)
+
+        top = self.header_bottom
+        canvas.rect(MARGIN, top - 4, PAGE_WIDTH - 2 * MARGIN, 16, fill=0.9)
+        for column in self.columns:
+            canvas.text(column.anchor, top, column.title, size=9, font='F2', align=column.align)
+        canvas.line(MARGIN, 40, PAGE_WIDTH - MARGIN, 40)
+        return canvas.getvalue()
+
+    def header(self, canvas, doc):
+        raise NotImplementedError
+
+    def cell(self, column, item):
+        return item.get(column.key, '')
+
+    def closing(self, canvas, doc):
+        """Bloque final (totales, firmas) de la última página"""
+
+    def render(self, doc):
+        """
+        Contenido (sin comprimir) de cada página del documento
+        """
+        items = doc.get('items') or []
+        chunks = [items[i:i + self.rows_per_page] for i in range(0, len(items), self.rows_per_page)] or [[]]
+        pages = []
+        for number, chunk in enumerate(chunks, start=1):
+            canvas = Canvas()
+            canvas.parts.append(self.static)
+            self.header(canvas, doc)
+            y = self.header_bottom - 18
+            for item in chunk:
+                for column in self.columns:
+                    value = fit(str(self.cell(column, item)), 'F1', 9, column.width)
+                    canvas.text(column.anchor, y, value, size=9, align=column.align)
+                y -= self.row_height
+            if number == len(chunks):
+                self.closing(canvas, doc)
+            canvas.text(PAGE_WIDTH / 2, 28, f'{doc["number"]} - Página {number} de {len(chunks)}', size=8, align='center')
+            pages.append(canvas.getvalue())
+        return pages
+
+
+class InvoiceTemplate(DocumentTemplate):
+    title = 'FACTURA'
+    header_bottom = 652
+    columns = [
+        Column('description', 'Descripción', MARGIN + 4, 300),
+        Column('quantity', 'Cant.', 350, 45, align='right'),
+        Column('unit_price', 'P. Unitario', 400, 70, align='right'),
+        Column('subtotal', 'Subtotal', 475, 76, align='right'),
+    ]
+
+    def compile(self):
+        static = super().compile()
+        canvas = Canvas()
+        # Recuadro de la letra del comprobante
+        canvas.rect(PAGE_WIDTH / 2 - 18, 752, 36, 40, width=1)
+        return static + b'\n' + canvas.getvalue()
+
+    def header(self, canvas, doc):
+        right = PAGE_WIDTH - MARGIN
+        canvas.text(PAGE_WIDTH / 2, 762, doc['letter'], size=24, font='F2', align='center')
+        canvas.text(right, 774, f"N° {doc['number']}", size=10, font='F2', align='right')
+        canvas.text(right, 762, f"Fecha de emisión: {doc['issue_date']}", size=9, align='right')
+        if doc.get('due_date'):
+            canvas.text(right, 750, f"Vencimiento: {doc['due_date']}", size=9, align='right')
+        if doc.get('status') == 'CANCELLED':
+            canvas.text(PAGE_WIDTH / 2, 745, 'ANULADA', size=12, font='F2', align='center')
+
+        customer = doc['customer']
+        canvas.text(MARGIN, 720, 'Cliente:', size=9, font='F2')
+        canvas.text(MARGIN + 50, 720, customer['name'], size=9)
+        canvas.text(MARGIN, 706, 'Dirección:', size=9, font='F2')
+        canvas.text(MARGIN + 50, 706, customer['address'], size=9)
+        canvas.text(MARGIN, 692, 'Teléfono:', size=9, font='F2')
+        canvas.text(MARGIN + 50, 692, customer['phone'], size=9)
+        canvas.text(330, 720, 'Orden:', size=9, font='F2')
+        canvas.text(375, 720, doc['order_number'], size=9)
+        canvas.text(330, 706, 'Vehículo:', size=9, font='F2')
+        canvas.text(375, 706, fit(doc['vehicle'], 'F1', 9, 180), size=9)
+        canvas.line(MARGIN, 676, PAGE_WIDTH - MARGIN, 676)
+
+    def closing(self, canvas, doc):
+        right = PAGE_WIDTH - MARGIN
+        top = self.table_bottom - 10
+        canvas.line(350, top + 6, right, top + 6)
+        canvas.text(460, top - 8, 'Subtotal', size=9, align='right')
+        canvas.text(right, top - 8, doc['subtotal'], size=9, align='right')
+        canvas.text(460, top - 22, f"IVA {doc['tax_rate']}%", size=9, align='right')
+        canvas.text(right, top - 22, doc['tax_amount'], size=9, align='right')
+        canvas.text(460, top - 40, 'TOTAL', size=11, font='F2', align='right')
+        canvas.text(right, top - 40, doc['total'], size=11, font='F2', align='right')
+        for i, line in enumerate(wrap(doc.get('notes'), 'F1', 8, 280, 4)):
+            canvas.text(MARGIN, top - 8 - i * 11, line, size=8)
+
+
+class WorkOrderTemplate(DocumentTemplate):
+    """
+    Copia para el taller: datos del vehículo, trabajo a realizar e ítems
+    sin precios, con casillero de control y firmas
+    """
+    title = 'ORDEN DE TRABAJO'
+    header_bottom = 560
+    columns = [
+        Column('type', 'Tipo', MARGIN + 4, 70),
+        Column('description', 'Descripción', 120, 330),
+        Column('quantity', 'Cant.', 455, 45, align='right'),
+        Column('check', 'OK', 515, 30),
+    ]
+
+    def compile(self):
+        static = super().compile()
+        canvas = Canvas()
+        for y in range(self.header_bottom - 18, self.table_bottom - 1, -self.row_height):
+            canvas.rect(517, y - 2, 9, 9)
+        canvas.line(MARGIN, 80, 250, 80)
+        canvas.line(345, 80, PAGE_WIDTH - MARGIN, 80)
+        canvas.text(MARGIN, 68, 'Firma del mecánico', size=8)
+        canvas.text(345, 68, 'Firma del cliente', size=8)
+        return static + b'\n' + canvas.getvalue()
+
+    def cell(self, column, item):
+        if column.key == 'check':
+            return ''
+        return item.get(column.key, '')
+
+    def header(self, canvas, doc):
+        right = PAGE_WIDTH - MARGIN
+        canvas.text(right, 774, f"N° {doc['number']}", size=10, font='F2', align='right')
+        canvas.text(right, 762, f"Fecha: {doc['date']}", size=9, align='right')
+        canvas.text(right, 750, f"Estado: {doc['status_label']}", size=9, align='right')
+
+        vehicle = doc['vehicle']
+        canvas.text(MARGIN, 718, vehicle['plate'], size=18, font='F2')
+        canvas.text(MARGIN + 120, 724, vehicle['description'], size=10, font='F2')
+        canvas.text(MARGIN + 120, 711, vehicle['details'], size=9)
+        canvas.text(right, 724, 'Kilometraje', size=8, align='right')
+        canvas.text(right, 711, vehicle['mileage'], size=10, font='F2', align='right')
+        canvas.text(MARGIN, 694, 'Cliente:', size=9, font='F2')
+        canvas.text(MARGIN + 50, 694, f"{doc['customer']['name']}  -  {doc['customer']['phone']}", size=9)
+
+        canvas.text(MARGIN, 676, 'Trabajo a realizar:', size=9, font='F2')
+        for i, line in enumerate(wrap(doc.get('observations'), 'F1', 9, PAGE_WIDTH - 2 * MARGIN, 6)):
+            canvas.text(MARGIN, 662 - i * 12, line, size=9)
+        canvas.line(MARGIN, self.header_bottom + 20, PAGE_WIDTH - MARGIN, self.header_bottom + 20)
+
+
+TEMPLATES = {
+    'invoice': InvoiceTemplate,
+    'order': WorkOrderTemplate,
+}
+
+
+@lru_cache(maxsize=None)
+def get_template(kind, issuer):
+    """
+    Plantilla compilada; `issuer` es una tupla de pares (clave, valor)
+    """
+    return TEMPLATES[kind](issuer)
+
+
+def build_pdf(pages):
+    """
+    Arma el archivo a partir del contenido comprimido de cada página
+    """
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        None,  # árbol de páginas, se completa al final
+    ]
+    font_refs = []
+    for key, (name, _) in FONTS.items():
+        objects.append(b'<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>' % name.encode())
+        font_refs.append(b'/%s %d 0 R' % (key.encode(), len(objects)))
+    resources = b'<< /Font << %s >> >>' % b' '.join(font_refs)
+
+    kids = []
+    for stream in pages:
+        objects.append(b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream))
+        objects.append(b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources %s /Contents %d 0 R >>' % (
+            PAGE_WIDTH, PAGE_HEIGHT, resources, len(objects)
+        ))
+        kids.append(b'%d 0 R' % len(objects))
+    objects[1] = b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(kids), len(kids))
+
+    output = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(output)
+    output += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    output += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    output += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+def render(kind, doc, issuer):
+    pages = get_template(kind, issuer).render(doc)
+    return build_pdf([zlib.compress(page, 6) for page in pages])
+
+
+_STREAM = re.compile(rb'<< /Length (\d+) /Filter /FlateDecode >>\nstream\n')
+
+
+def page_streams(data):
+    """
+    Contenido comprimido de las páginas de un PDF generado por build_pdf
+    (no sirve para PDFs de otro origen)
+    """
+    streams = []
+    for match in _STREAM.finditer(data):
+        start = match.end()
+        streams.append(data[start:start + int(match.group(1))])
+    return streams
+
+
+def merge(documents):
+    """
+    Une varios PDFs generados por este módulo en uno solo
+    """
+    return build_pdf([stream for data in documents for stream in page_streams(data)])
+
+
+def render_to_file(kind, doc, issuer, path):
+    """
+    Renderiza y escribe `path` de forma atómica (punto de entrada de los
+    procesos del pool)
+    """
+    data = render(kind, doc, issuer)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as handle:
+        handle.write(data)
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,170 @@
+"""
+Ficha rápida de recepción: vehículo, dueño, últimas órdenes, órdenes
+pendientes, facturas impagas y estimación del próximo servicio.
+
+La ficha se arma con tres consultas y se guarda en caché por vehículo. Las
+señales de services/signals.py la invalidan cuando cambian el vehículo, sus
+órdenes, las facturas o los datos del cliente; con la caché local de cada
+proceso eso solo alcanza al worker que escribió, por eso
+QUICK_CARD_CACHE_SECONDS es corto salvo con una caché compartida. Lo que
+depende de la fecha (is_due, generated_at) se calcula al leer.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Min, Q, Subquery
+from django.utils import timezone
+
+from crm.models import Vehicle
+from .models import ServiceOrder, Invoice
+
+
+RECENT_ORDERS = 3
+# Intervalo por defecto entre servicios cuando no hay historial suficiente
+DEFAULT_SERVICE_INTERVAL_DAYS = 180
+
+
+def _vehicle_key(vehicle_id):
+    return f'quickcard:vehicle:{vehicle_id}'
+
+
+def _plate_key(plate):
+    return f'quickcard:plate:{plate}'
+
+
+def normalize_plate(plate):
+    return (plate or '').upper().replace(' ', '').replace('-', '')
+
+
+def _compact_order(order):
+    return {
+        'id': order['id'],
+        'order_number': order['order_number'],
+        'status': order['status'],
+        'created_at': order['created_at'],
+        'completed_at': order['completed_at'],
+        'total': order['total'],
+        'observations': order['observations'],
+    }
+
+
+def estimate_next_service(completed_count, first_completed, last_completed):
+    """
+    Estima la fecha del próximo servicio a partir del intervalo promedio
+    entre las órdenes completadas del vehículo
+    """
+    if not last_completed:
+        return None
+    if completed_count >= 2 and last_completed > first_completed:
+        interval = (last_completed - first_completed).days / (completed_count - 1)
+        based_on = 'history'
+    else:
+        interval = DEFAULT_SERVICE_INTERVAL_DAYS
+        based_on = 'default'
+    next_date = (last_completed + timedelta(days=round(interval))).date()
+    return {
+        'date': next_date,
+        'interval_days': round(interval),
+        'based_on': based_on,
+    }
+
+
+def _at_read_time(card):
+    """Completa lo que depende del momento de la consulta, sin tocar la copia en caché"""
+    card = {**card, 'generated_at': timezone.now()}
+    if card['next_service']:
+        card['next_service'] = {
+            **card['next_service'], 'is_due': card['next_service']['date'] <= timezone.localdate()
+        }
+    return card
+
+
+def build_quick_card(plate):
+    """
+    Arma la ficha con tres consultas. Retorna None si la patente no existe.
+    """
+    completed = Q(service_orders__status='COMPLETED')
+    vehicle = Vehicle.objects.select_related('customer').annotate(
+        completed_count=Count('service_orders', filter=completed),
+        first_completed=Min('service_orders__created_at', filter=completed),
+        last_completed=Max('service_orders__created_at', filter=completed),
+    ).filter(plate=plate).first()
+    if vehicle is None:
+        return None
+
+    recent_ids = ServiceOrder.objects.filter(vehicle_id=vehicle.pk).order_by('-created_at').values('pk')[:RECENT_ORDERS]
+    orders = list(
+        ServiceOrder.objects.filter(vehicle_id=vehicle.pk)
+        .filter(Q(status='PENDING') | Q(pk__in=Subquery(recent_ids)))
+        .order_by('-created_at')
+        .values('id', 'order_number', 'status', 'created_at', 'completed_at', 'total', 'observations')
+    )
+
+    customer = vehicle.customer
+    unpaid_invoices = list(
+        Invoice.objects.filter(customer_id=customer.pk, status='ISSUED')
+        .order_by('issue_date')
+        .values('id', 'invoice_number', 'invoice_type', 'issue_date', 'due_date', 'total', 'service_order_id')
+    )
+
+    return {
+        'vehicle': {
+            'id': vehicle.pk,
+            'plate': vehicle.plate,
+            'display_name': vehicle.display_name,
+            'color': vehicle.color,
+            'engine_type': vehicle.engine_type,
+            'current_mileage': vehicle.current_mileage,
+            'notes': vehicle.notes,
+        },
+        'owner': {
+            'id': customer.pk,
+            'full_name': customer.full_name,
+            'phone': customer.phone,
+            'email': customer.email,
+            'notes': customer.notes,
+        },
+        'recent_orders': [_compact_order(o) for o in orders[:RECENT_ORDERS]],
+        'pending_orders': [_compact_order(o) for o in orders if o['status'] == 'PENDING'],
+        'unpaid_invoices': unpaid_invoices,
+        'unpaid_total': sum((i['total'] for i in unpaid_invoices), 0),
+        'completed_orders': vehicle.completed_count,
+        'next_service': estimate_next_service(
+            vehicle.completed_count, vehicle.first_completed, vehicle.last_completed
+        ),
+    }
+
+
+def get_quick_card(plate):
+    """
+    Retorna (ficha, desde_cache). La patente se resuelve a un id de vehículo
+    mediante un puntero en caché para no consultar la base en los aciertos.
+    """
+    plate = normalize_plate(plate)
+    vehicle_id = cache.get(_plate_key(plate))
+    if vehicle_id is not None:
+        card = cache.get(_vehicle_key(vehicle_id))
+        # Si la patente del vehículo cambió, el puntero quedó desactualizado
+        if card is not None and card['vehicle']['plate'] == plate:
+            return _at_read_time(card), True
+
+    card = build_quick_card(plate)
+    if card is not None:
+        timeout = getattr(settings, 'QUICK_CARD_CACHE_SECONDS', 30)
+        vehicle_id = card['vehicle']['id']
+        cache.set_many({_plate_key(plate): vehicle_id, _vehicle_key(vehicle_id): card}, timeout)
+        card = _at_read_time(card)
+    return card, False
+
+
+def invalidate_vehicle_cards(vehicle_ids):
+    cache.delete_many([_vehicle_key(pk) for pk in vehicle_ids if pk])
+
+
+def invalidate_customer_cards(customer_ids):
+    """
+    Invalida las fichas de todos los vehículos de los clientes indicados
+    """
+    vehicle_ids = Vehicle.objects.filter(customer_id__in=customer_ids).values_list('id', flat=True)
+    invalidate_vehicle_cards(list(vehicle_ids))
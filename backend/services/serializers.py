@@ -1,4 +1,6 @@
+from django.db import transaction
 from rest_framework import serializers
+
 from .models import ServiceOrder, ServiceItem, Invoice
 from crm.serializers import VehicleSerializer, CustomerSerializer
 from inventory.serializers import ProductSerializer
@@ -66,12 +68,13 @@ class ServiceOrderCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         items_data = validated_data.pop('items')
         
-        # Crear la orden
-        service_order = ServiceOrder.objects.create(**validated_data)
-        
-        # Crear los items
-        for item_data in items_data:
-            ServiceItem.objects.create(service_order=service_order, **item_data)
+        with transaction.atomic():
+            # Crear la orden
+            service_order = ServiceOrder.objects.create(**validated_data)
+            
+            # Crear los items
+            for item_data in items_data:
+                ServiceItem.objects.create(service_order=service_order, **item_data)
         
         return service_order
 
@@ -0,0 +1,41 @@
+"""
+Invalidación de la ficha rápida de recepción (ver quickcard.py) y de los
+libros IVA guardados (ver fiscal.py)
+"""
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from crm.models import Customer, Vehicle
+from . import fiscal
+from .models import ServiceOrder, Invoice
+from .quickcard import invalidate_vehicle_cards, invalidate_customer_cards
+
+
+@receiver([post_save, post_delete], sender=Vehicle)
+def vehicle_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_vehicle_cards([instance.pk]))
+
+
+@receiver([post_save, post_delete], sender=ServiceOrder)
+def service_order_changed(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidate_vehicle_cards([instance.vehicle_id]))
+
+
+@receiver([post_save, post_delete], sender=Invoice)
+def invoice_changed(sender, instance, **kwargs):
+    # Las facturas impagas se muestran en las fichas de todos los vehículos del cliente
+    transaction.on_commit(lambda: invalidate_customer_cards([instance.customer_id]))
+
+
+@receiver([post_save, post_delete], sender=Invoice)
+def invoice_book_changed(sender, instance, **kwargs):
+    if instance.issue_date:
+        period = (instance.issue_date.year, instance.issue_date.month)
+        transaction.on_commit(lambda: fiscal.invalidate(*period))
+
+
+@receiver(post_save, sender=Customer)
+def customer_changed(sender, instance, created, **kwargs):
+    if not created:
+        transaction.on_commit(lambda: invalidate_customer_cards([instance.pk]))
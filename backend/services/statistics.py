@@ -0,0 +1,33 @@
+"""
+Estadísticas de órdenes y facturas, compartidas por los endpoints
+`statistics` y el dashboard. Cada función resuelve una sola consulta.
+"""
+from django.db.models import Count, Q, Sum
+
+from .models import ServiceOrder, Invoice
+
+
+def order_statistics():
+    totals = ServiceOrder.objects.aggregate(
+        total_orders=Count('id'),
+        pending=Count('id', filter=Q(status='PENDING')),
+        completed=Count('id', filter=Q(status='COMPLETED')),
+        cancelled=Count('id', filter=Q(status='CANCELLED')),
+        total_revenue=Sum('total', filter=Q(status='COMPLETED')),
+    )
+    totals['total_revenue'] = float(totals['total_revenue'] or 0)
+    return totals
+
+
+def invoice_statistics():
+    totals = Invoice.objects.aggregate(
+        total_invoices=Count('id'),
+        issued=Count('id', filter=Q(status='ISSUED')),
+        paid=Count('id', filter=Q(status='PAID')),
+        cancelled=Count('id', filter=Q(status='CANCELLED')),
+        total_revenue=Sum('total', filter=Q(status__in=['ISSUED', 'PAID'])),
+        pending_amount=Sum('total', filter=Q(status='ISSUED')),
+    )
+    totals['total_revenue'] = float(totals['total_revenue'] or 0)
+    totals['pending_amount'] = float(totals['pending_amount'] or 0)
+    return totals
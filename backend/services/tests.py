@@ -1,3 +1,548 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+import tracemalloc
+import zipfile
+from xml.etree import ElementTree
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncClient, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.serializers import CustomTokenObtainPairSerializer
+from core.jobs import Worker
+from core.renderers import FastJSONRenderer
+from crm.models import Customer, Vehicle
+from inventory.models import Product, StockMovement
+from .models import ServiceOrder, ServiceItem, Invoice
+from . import fiscal, pdf
+from .documents import PDFCache, bundle, invoice_documents
+from .quickcard import build_quick_card
+from .serializers import ServiceOrderSerializer, InvoiceSerializer
+
+
+class QuickCardTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='emp@shalom.com', password='pass', first_name='E', last_name='M')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.customer = Customer.objects.create(first_name='Juan', last_name='Pérez', phone='+5491123456789')
+        self.vehicle = Vehicle.objects.create(plate='ABC123', brand='Ford', model='Ka', customer=self.customer)
+        self.orders = [ServiceOrder.objects.create(vehicle=self.vehicle, status='COMPLETED') for _ in range(4)]
+        self.pending = ServiceOrder.objects.create(vehicle=self.vehicle)
+        Invoice.objects.create(service_order=self.orders[0], customer=self.customer, subtotal=100)
+
+    def test_card_is_built_with_three_queries(self):
+        with self.assertNumQueries(3):
+            card = build_quick_card('ABC123')
+
+        self.assertEqual(card['owner']['id'], self.customer.pk)
+        self.assertEqual(len(card['recent_orders']), 3)
+        self.assertEqual(card['recent_orders'][0]['id'], self.pending.pk)
+        self.assertEqual([o['id'] for o in card['pending_orders']], [self.pending.pk])
+        self.assertEqual(len(card['unpaid_invoices']), 1)
+        self.assertEqual(card['completed_orders'], 4)
+
+    def test_second_lookup_is_a_cache_hit(self):
+        first = self.client.get('/api/services/quick-card/abc123/')
+        with self.assertNumQueries(0):
+            second = self.client.get('/api/services/quick-card/ABC123/')
+
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        first, second = first.json(), second.json()
+        self.assertLessEqual(first.pop('generated_at'), second.pop('generated_at'))
+        self.assertEqual(first, second)
+
+    def test_due_date_is_evaluated_when_read(self):
+        ServiceOrder.objects.filter(vehicle=self.vehicle).update(created_at=timezone.now() - timedelta(days=10))
+        response = self.client.get('/api/services/quick-card/ABC123/').json()
+        self.assertIs(response['next_service']['is_due'], False)
+
+        # La ficha sigue en caché, pero la fecha del próximo servicio ya pasó
+        later = timezone.now() + timedelta(days=200)
+        with mock.patch('django.utils.timezone.now', return_value=later):
+            response = self.client.get('/api/services/quick-card/ABC123/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertIs(response.json()['next_service']['is_due'], True)
+        self.assertTrue(response.json()['generated_at'].startswith(later.date().isoformat()))
+
+    def test_card_is_invalidated_on_mileage_and_orders(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get('/api/services/quick-card/ABC123/')
+            self.client.patch(f'/api/crm/vehicles/{self.vehicle.pk}/update_mileage/', {'current_mileage': 50000})
+        response = self.client.get('/api/services/quick-card/ABC123/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()['vehicle']['current_mileage'], 50000)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ServiceOrder.objects.create(vehicle=self.vehicle)
+        response = self.client.get('/api/services/quick-card/ABC123/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()['pending_orders']), 2)
+
+    def test_unknown_plate_returns_404(self):
+        self.assertEqual(self.client.get('/api/services/quick-card/ZZZ999/').status_code, 404)
+
+
+class FastListParityTests(TestCase):
+    """
+    Los listados armados con values() deben producir el mismo JSON que los serializers
+    """
+    def setUp(self):
+        self.user = User.objects.create_user(email='emp@shalom.com', password='pass', first_name='E', last_name='M')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        # Cliente sin creador ni email, con un vehículo sin año
+        anonymous = Customer.objects.create(first_name='Ana', last_name='Gómez', phone='+5491100000001')
+        old = Vehicle.objects.create(plate='AAA111', brand='Fiat', model='Uno', customer=anonymous)
+        owner = Customer.objects.create(
+            first_name='Juan', last_name='Pérez', phone='+5491100000002', email='juan@mail.com',
+            city='Rosario', created_by=self.user
+        )
+        ka = Vehicle.objects.create(plate='BBB222', brand='Ford', model='Ka', year=2015, customer=owner)
+        Vehicle.objects.create(plate='CCC333', brand='VW', model='Gol', year=2010, customer=owner)
+        gift = Product.objects.create(
+            code='P-1', name='Llavero', category='ACCESORIO', unit='UNIDAD',
+            purchase_price=Decimal('0'), sale_price=Decimal('10.5')
+        )
+        oil = Product.objects.create(
+            code='P-2', name='Aceite 10W40', category='ACEITE', unit='LITRO', stock_quantity=3, min_stock=5,
+            purchase_price=Decimal('1234.56'), sale_price=Decimal('1999.99')
+        )
+
+        pending = ServiceOrder.objects.create(vehicle=old, observations='Ruido en el tren delantero')
+        ServiceItem.objects.create(service_order=pending, item_type='SERVICE', description='Revisión', unit_price=500)
+        completed = ServiceOrder.objects.create(
+            vehicle=ka, status='COMPLETED', completed_at=timezone.now(), created_by=self.user
+        )
+        for product in (oil, gift, oil):
+            ServiceItem.objects.create(
+                service_order=completed, item_type='PRODUCT', product=product,
+                description=product.name, quantity=Decimal('2.5'), unit_price=product.sale_price
+            )
+        completed.calculate_total()
+
+        Invoice.objects.create(
+            service_order=completed, customer=owner, subtotal=completed.total, due_date=date(2025, 1, 31),
+            created_by=self.user
+        )
+        Invoice.objects.create(
+            service_order=ServiceOrder.objects.create(vehicle=old, status='COMPLETED'),
+            customer=anonymous, subtotal=Decimal('99.99'), invoice_type='A'
+        )
+
+    def assertParity(self, path, serializer_class, queryset):
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        expected = serializer_class(queryset, many=True).data
+        for renderer in (FastJSONRenderer(), JSONRenderer()):
+            self.assertEqual(renderer.render(response.data['results']), renderer.render(expected))
+
+    def test_orders_list_matches_serializer(self):
+        queryset = ServiceOrder.objects.order_by('-created_at')
+        self.assertParity('/api/services/orders/', ServiceOrderSerializer, queryset)
+        self.assertParity('/api/services/orders/?ordering=total&status=COMPLETED', ServiceOrderSerializer,
+                          queryset.filter(status='COMPLETED').order_by('total'))
+
+    def test_invoices_list_matches_serializer(self):
+        queryset = Invoice.objects.order_by('-issue_date')
+        self.assertParity('/api/services/invoices/', InvoiceSerializer, queryset)
+
+
+class PDFTemplateTests(TestCase):
+    def test_text_is_fitted_and_escaped(self):
+        self.assertEqual(pdf.fit('Corto', 'F1', 9, 100), 'Corto')
+        long_text = pdf.fit('Cambio de pastillas de freno delanteras y traseras', 'F1', 9, 80)
+        self.assertTrue(long_text.endswith('...'))
+        self.assertLessEqual(pdf.text_width(long_text, 'F1', 9), 80)
+        self.assertEqual(pdf._escape('Filtro (ñ)'), b'Filtro \\(\xf1\\)')
+
+    def test_merge_keeps_every_page(self):
+        document = {
+            'number': 'FC-00001', 'letter': 'C', 'issue_date': '01/09/2026', 'status': 'ISSUED',
+            'customer': {'name': 'Juan Pérez', 'address': '', 'phone': ''}, 'order_number': 'OS-00001',
+            'vehicle': 'ABC123 - Ford Ka', 'subtotal': '$ 1,00', 'tax_rate': '21', 'tax_amount': '$ 0,21',
+            'total': '$ 1,21', 'notes': '',
+            'items': [{'description': f'Item {i}', 'quantity': '1', 'unit_price': '$ 1,00', 'subtotal': '$ 1,00'}
+                      for i in range(50)],
+        }
+        data = pdf.render('invoice', document, ())
+        self.assertTrue(data.startswith(b'%PDF-1.4'))
+        self.assertEqual(len(pdf.page_streams(data)), 2)
+        self.assertEqual(pdf.merge([data, data]).count(b'/Type /Page '), 4)
+
+
+class InvoicePrintingTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(MEDIA_ROOT=self.directory, PDF_CACHE_DIR=os.path.join(self.directory, 'pdf'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='emp@shalom.com', password='pass', first_name='E', last_name='M')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        customer = Customer.objects.create(first_name='Juan', last_name='Pérez', phone='+5491100000002')
+        self.invoices = []
+        for i in range(3):
+            vehicle = Vehicle.objects.create(plate=f'ABC12{i}', brand='Ford', model='Ka', customer=customer)
+            order = ServiceOrder.objects.create(vehicle=vehicle, status='COMPLETED', observations='Service de 10.000 km')
+            for _ in range(i + 1):
+                ServiceItem.objects.create(service_order=order, description='Cambio de aceite', unit_price=Decimal('1234.5'))
+            self.invoices.append(Invoice.objects.create(service_order=order, customer=customer, subtotal=order.total))
+
+    def test_documents_are_gathered_with_two_queries(self):
+        with self.assertNumQueries(2):
+            documents = invoice_documents(Invoice.objects.all())
+        self.assertEqual([len(d['items']) for d in documents], [1, 2, 3])
+        self.assertEqual(documents[2]['subtotal'], '$ 3.703,50')
+
+    def test_reprints_are_served_from_disk(self):
+        invoice = self.invoices[0]
+        first = self.client.get(f'/api/services/invoices/{invoice.pk}/pdf/')
+        self.assertEqual((first.status_code, first['Content-Type'], first['X-Cache']), (200, 'application/pdf', 'MISS'))
+        self.assertTrue(b''.join(first.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(self.client.get(f'/api/services/invoices/{invoice.pk}/pdf/')['X-Cache'], 'HIT')
+
+        # Un cambio en la factura genera otro archivo y descarta el anterior
+        Invoice.objects.filter(pk=invoice.pk).update(notes='Pagada en efectivo')
+        self.assertEqual(self.client.get(f'/api/services/invoices/{invoice.pk}/pdf/')['X-Cache'], 'MISS')
+        self.assertEqual(len(os.listdir(os.path.join(self.directory, 'pdf', 'invoice'))), 1)
+
+    def test_workshop_copy(self):
+        response = self.client.get(f'/api/services/orders/{self.invoices[0].service_order_id}/pdf/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="OS-00001.pdf"')
+
+    def test_batch_reuses_cache_and_bundles(self):
+        cache = PDFCache()
+        documents = invoice_documents(Invoice.objects.all())
+        paths, stats = cache.render_many('invoice', documents, workers=1)
+        self.assertEqual((stats['rendered'], stats['cached']), (3, 0))
+        self.assertEqual(cache.render_many('invoice', documents)[1]['cached'], 3)
+
+        archive = zipfile.ZipFile(bundle(paths, os.path.join(self.directory, 'lote.zip')))
+        self.assertEqual(archive.namelist(), ['FC-00001.pdf', 'FC-00002.pdf', 'FC-00003.pdf'])
+        with open(bundle(paths, os.path.join(self.directory, 'lote.pdf'), 'pdf'), 'rb') as merged:
+            self.assertEqual(merged.read().count(b'/Type /Page '), 3)
+
+    def test_batch_endpoint_runs_as_job(self):
+        month = self.invoices[0].issue_date.strftime('%Y-%m')
+        response = self.client.post(f'/api/services/invoices/pdf-batch/?month={month}&output=zip')
+        self.assertEqual(response.status_code, 202)
+        Worker(mode='inline').run(burst=True)
+
+        download = self.client.get(f"/api/jobs/{response.json()['id']}/download/")
+        self.assertEqual(download.status_code, 200)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(download.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 3)
+        self.assertEqual(self.client.post('/api/services/invoices/pdf-batch/?month=1999-01').status_code, 400)
+
+
+class ExportTests(TestCase):
+    # Techo de memoria de una exportación, independiente de la cantidad de filas
+    MEMORY_CEILING = 4 * 1024 * 1024
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email='emp@shalom.com', password='pass', first_name='E', last_name='M')
+        self.client.force_authenticate(self.user)
+        customer = Customer.objects.create(first_name='Juan', last_name='Pérez', phone='+5491100000002')
+        self.vehicle = Vehicle.objects.create(plate='ABC123', brand='Ford', model='Ka', customer=customer)
+        self.order = ServiceOrder.objects.create(vehicle=self.vehicle, status='COMPLETED')
+
+    def add_items(self, total):
+        ServiceItem.objects.bulk_create([
+            ServiceItem(
+                service_order=self.order, description=f'Cambio de aceite; filtro "{i}"',
+                quantity=Decimal('1.5'), unit_price=Decimal('100'), subtotal=Decimal('150')
+            )
+            for i in range(total - ServiceItem.objects.count())
+        ], batch_size=1000)
+
+    def export_peak(self, path):
+        tracemalloc.start()
+        try:
+            response = self.client.get(path)
+            size = sum(len(chunk) for chunk in response.streaming_content)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return response, size, peak
+
+    def async_export_peak(self, path):
+        """Como export_peak, pero por ASGI"""
+        token = CustomTokenObtainPairSerializer.get_token(self.user).access_token
+
+        async def download():
+            response = await AsyncClient().get(path, headers={'Authorization': f'Bearer {token}'})
+            # Con un iterador sincrónico Django lo leería completo antes de enviarlo
+            self.assertTrue(response.is_async)
+            return response, sum([len(chunk) async for chunk in response.streaming_content])
+
+        tracemalloc.start()
+        try:
+            response, size = async_to_sync(download)()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return response, size, peak
+
+    def test_csv_rows_and_filters(self):
+        ServiceItem.objects.create(service_order=self.order, description='Revisión', unit_price=Decimal('500'))
+        ServiceOrder.objects.create(vehicle=self.vehicle, status='PENDING')
+
+        response = self.client.get('/api/services/orders/export/?status=COMPLETED')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith('OS-00001;'))
+        self.assertIn(';Completada;', lines[1])
+
+        items = b''.join(self.client.get('/api/services/orders/export-items/').streaming_content).decode('utf-8-sig')
+        self.assertIn('OS-00001;', items.splitlines()[1])
+        # Coma decimal y sin separador de miles
+        self.assertIn(';1,00;500,00;500,00', items.splitlines()[1])
+        self.assertEqual(self.client.get('/api/services/orders/export/?output=pdf').status_code, 400)
+
+    def test_xlsx_is_a_valid_workbook(self):
+        self.add_items(3)
+        response = self.client.get('/api/services/orders/export-items/?output=xlsx')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertIsNone(archive.testzip())
+        sheet = ElementTree.fromstring(archive.read('xl/worksheets/sheet1.xml'))
+        namespace = {'x': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        rows = sheet.findall('.//x:row', namespace)
+        self.assertEqual(len(rows), 4)
+        texts = {cell.text for cell in sheet.iterfind('.//x:is/x:t', namespace)}
+        self.assertIn('Cambio de aceite; filtro "2"', texts)
+        # Los importes van como números, no como texto
+        numbers = [cell.findtext('x:v', namespaces=namespace) for cell in rows[1] if cell.get('t') is None]
+        self.assertEqual(numbers[1:], ['1.50', '100.00', '150.00'])
+
+    def test_movements_export_filters_by_date(self):
+        product = Product.objects.create(
+            code='P-1', name='Aceite', category='ACEITE', purchase_price=Decimal('1'), sale_price=Decimal('2')
+        )
+        old = StockMovement.objects.create(product=product, movement_type='COMPRA', quantity=5)
+        StockMovement.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=40))
+        StockMovement.objects.create(product=product, movement_type='VENTA', quantity=2)
+        since = (timezone.localdate() - timedelta(days=7)).isoformat()
+
+        self.assertEqual(self.client.get(f'/api/inventory/movements/?date_from={since}').json()['count'], 1)
+        response = self.client.get(f'/api/inventory/movements/export/?date_from={since}')
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertIn(';P-1;Aceite;', lines[1])
+
+    # Bloques de lectura chicos: ambas mediciones recorren varios bloques
+    @mock.patch('core.exports.CHUNK_SIZE', 250)
+    def test_memory_does_not_grow_with_rows(self):
+        for output in ('csv', 'xlsx'):
+            path = f'/api/services/orders/export-items/?output={output}'
+            self.add_items(2000)
+            _, small_size, small_peak = self.export_peak(path)
+            self.add_items(8000)
+            _, large_size, large_peak = self.export_peak(path)
+
+            self.assertGreater(large_size, small_size * 3)
+            self.assertLess(large_peak, self.MEMORY_CEILING, output)
+            self.assertLess(large_peak, small_peak * 1.2, output)
+            ServiceItem.objects.all().delete()
+
+    @mock.patch('core.exports.CHUNK_SIZE', 250)
+    def test_memory_does_not_grow_with_rows_under_asgi(self):
+        path = '/api/services/orders/export-items/?output=csv'
+        self.add_items(2000)
+        _, small_size, small_peak = self.async_export_peak(path)
+        self.add_items(10000)
+        _, large_size, large_peak = self.async_export_peak(path)
+
+        self.assertGreater(large_size, small_size * 4)
+        self.assertLess(large_peak, self.MEMORY_CEILING)
+        self.assertLess(large_peak, small_peak * 1.2)
+
+
+class MutationBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='tablet@shalom.com', password='pass', first_name='T', last_name='B')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        customer = Customer.objects.create(first_name='Ana', last_name='Gómez', phone='+5491100000001')
+        self.vehicle = Vehicle.objects.create(plate='TAB123', brand='Fiat', model='Uno', customer=customer)
+        self.product = Product.objects.create(
+            code='FIL-1', name='Filtro', category='Filtros', stock_quantity=5,
+            purchase_price=Decimal('10'), sale_price=Decimal('20'),
+        )
+
+    def batch(self):
+        return [
+            {'op': 'create_order', 'key': 'k1', 'client_id': 'tmp-1', 'data': {
+                'vehicle': self.vehicle.pk, 'observations': 'Service',
+                'items': [{'item_type': 'PRODUCT', 'product': self.product.pk, 'description': 'Filtro',
+                           'quantity': '2', 'unit_price': '20'}],
+            }},
+            {'op': 'update_order', 'key': 'k2', 'order': 'tmp-1', 'data': {'observations': 'Service y filtro'}},
+            {'op': 'update_mileage', 'key': 'k3', 'vehicle': self.vehicle.pk, 'data': {'current_mileage': 85000}},
+            {'op': 'complete', 'key': 'k4', 'order': 'tmp-1'},
+        ]
+
+    def post(self, operations):
+        return self.client.post('/api/services/mutations/', {'operations': operations}, format='json')
+
+    def test_batch_is_applied_in_order(self):
+        response = self.post(self.batch())
+        self.assertEqual(response.status_code, 200, response.content)
+        results = response.json()['results']
+        self.assertEqual([r['status'] for r in results], ['ok'] * 4)
+
+        order = ServiceOrder.objects.get()
+        self.assertEqual(results[0]['id'], order.pk)
+        self.assertEqual(results[0]['client_id'], 'tmp-1')
+        self.assertEqual((order.status, order.observations, order.created_by), ('COMPLETED', 'Service y filtro', self.user))
+        self.assertEqual(results[3]['result']['total'], '40.00')
+        self.product.refresh_from_db()
+        self.vehicle.refresh_from_db()
+        self.assertEqual((self.product.stock_quantity, self.vehicle.current_mileage), (3, 85000))
+
+    def test_retry_returns_stored_results(self):
+        first = self.post(self.batch()).json()['results']
+        # Claves y client_ids previos más el savepoint de la transacción: nada se reaplica
+        with self.assertNumQueries(4):
+            retry = self.post(self.batch())
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual([r['status'] for r in retry.json()['results']], ['duplicate'] * 4)
+        self.assertEqual([r['id'] for r in retry.json()['results']], [r['id'] for r in first])
+        self.assertEqual(ServiceOrder.objects.count(), 1)
+        self.assertEqual(StockMovement.objects.count(), 1)
+
+        # Un lote posterior puede referenciar la orden por su client_id
+        later = self.post([{'op': 'update_order', 'key': 'k6', 'order': 'tmp-1', 'data': {'observations': 'x'}}])
+        self.assertEqual(later.json()['results'][0]['error']['detail'], 'Solo se pueden editar órdenes pendientes')
+
+    def test_failure_rolls_back_the_whole_batch(self):
+        operations = self.batch()
+        operations[2]['data']['current_mileage'] = -1
+        response = self.post(operations)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['applied'])
+        self.assertEqual(
+            [r['status'] for r in response.json()['results']], ['rolled_back', 'rolled_back', 'error', 'skipped']
+        )
+        self.assertFalse(ServiceOrder.objects.exists())
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.current_mileage, 0)
+
+        # Corregida la operación, el mismo lote se aplica completo
+        operations[2]['data']['current_mileage'] = 85000
+        self.assertEqual(self.post(operations).status_code, 200)
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.post([]).status_code, 400)
+        with override_settings(MUTATION_BATCH_MAX=2):
+            self.assertEqual(self.post(self.batch()).status_code, 400)
+        response = self.post([{'op': 'borrar_todo', 'key': 'k9'}])
+        self.assertEqual(response.json()['results'][0]['status'], 'error')
+
+
+class IvaBookTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.directory, FISCAL_BOOK_DIR=os.path.join(self.directory, 'fiscal')
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='iva@shalom.com', password='pass', first_name='I', last_name='V')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        customer = Customer.objects.create(first_name='José', last_name='Núñez', phone='+5491100000003')
+        vehicle = Vehicle.objects.create(plate='IVA123', brand='Ford', model='Ka', customer=customer)
+        # (día, tipo, subtotal, estado)
+        invoices = [
+            (1, 'A', '1000', 'ISSUED'), (1, 'A', '500', 'PAID'), (1, 'B', '200', 'ISSUED'),
+            (2, 'C', '300', 'ISSUED'), (2, 'A', '100', 'CANCELLED'), (2, 'B', '50', 'DRAFT'),
+        ]
+        for day, invoice_type, subtotal, invoice_status in invoices:
+            order = ServiceOrder.objects.create(vehicle=vehicle, status='COMPLETED')
+            invoice = Invoice.objects.create(
+                service_order=order, customer=customer, invoice_type=invoice_type,
+                subtotal=Decimal(subtotal), status=invoice_status,
+            )
+            Invoice.objects.filter(pk=invoice.pk).update(issue_date=date(2026, 9, day))
+
+    def test_book_has_window_subtotals_from_one_query(self):
+        with self.assertNumQueries(1):
+            rows = list(fiscal.csv_rows(fiscal.book_lines(fiscal.book_rows(2026, 9))))
+        labels = [row[4] for row in rows]
+        self.assertEqual(labels, [
+            'José Núñez', 'José Núñez', 'Subtotal Factura A (2 comprobantes)',
+            'José Núñez', 'Subtotal Factura B (1 comprobantes)', 'Total del día (3 comprobantes)',
+            'José Núñez', 'Subtotal Factura A (1 comprobantes)',
+            'José Núñez', 'Subtotal Factura C (1 comprobantes)', 'Total del día (2 comprobantes)',
+            'Total del mes Factura A (3 comprobantes)', 'Total del mes Factura B (1 comprobantes)',
+            'Total del mes Factura C (1 comprobantes)', 'Total del mes (5 comprobantes)',
+        ])
+        # Neto, IVA y total; la factura anulada suma cero
+        amounts = {row[4]: (row[6], row[8], row[9]) for row in rows if not row[4].startswith('José')}
+        self.assertEqual(amounts['Subtotal Factura A (2 comprobantes)'], (Decimal('1500'), Decimal('315'), Decimal('1815')))
+        self.assertEqual(amounts['Total del día (2 comprobantes)'], (Decimal('300'), Decimal('63'), Decimal('363')))
+        self.assertEqual(amounts['Total del mes (5 comprobantes)'], (Decimal('2000'), Decimal('420'), Decimal('2420')))
+
+    def test_fixed_width_formats(self):
+        cbte = b''.join(fiscal.book_stream(2026, 9, 'cbte')).decode('ascii').split('\r\n')[:-1]
+        self.assertEqual([len(line) for line in cbte], [266] * 5)
+        first = cbte[0]
+        self.assertEqual(first[:16], '20260901' + '001' + '00001')
+        self.assertEqual(first[16:36], f'{1:020d}')
+        self.assertEqual(first[56:108], '99' + '0' * 20 + 'Jose Nunez'.ljust(30))
+        self.assertEqual(first[108:123], '000000000121000')
+        self.assertEqual(first[228:243], 'PES' + '0001000000' + '10')
+
+        alicuotas = b''.join(fiscal.book_stream(2026, 9, 'alicuotas')).decode('ascii').split('\r\n')[:-1]
+        # La factura C no discrimina IVA
+        self.assertEqual([len(line) for line in alicuotas], [62] * 4)
+        self.assertEqual(alicuotas[0][28:], '000000000100000' + '0005' + '000000000021000')
+
+    def test_closed_period_is_served_from_disk_until_an_invoice_changes(self):
+        url = '/api/services/invoices/iva-book/?month=2026-09&output=cbte'
+        first = self.client.get(url)
+        self.assertEqual((first.status_code, first['X-Cache']), (200, 'MISS'))
+        content = b''.join(first.streaming_content)
+
+        with self.assertNumQueries(0):
+            book, cached = fiscal.open_book(2026, 9, 'cbte')
+            with book:
+                self.assertEqual(book.read(), content)
+        self.assertTrue(cached)
+        second = self.client.get(url)
+        self.assertEqual((second['X-Cache'], b''.join(second.streaming_content)), ('HIT', content))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Invoice.objects.filter(status='DRAFT').get().save()
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+    def test_open_period_and_invalid_requests(self):
+        today = timezone.localdate()
+        response = self.client.get(f'/api/services/invoices/iva-book/?month={today:%Y-%m}')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        b''.join(response.streaming_content)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'fiscal')))
+
+        self.assertEqual(self.client.get('/api/services/invoices/iva-book/?month=2026-13').status_code, 400)
+        self.assertEqual(self.client.get('/api/services/invoices/iva-book/?month=2026-09&output=pdf').status_code, 400)
@@ -1,11 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ServiceOrderViewSet, InvoiceViewSet
+from .views import ServiceOrderViewSet, InvoiceViewSet, quick_card, mutations
 
 router = DefaultRouter()
 router.register(r'orders', ServiceOrderViewSet, basename='serviceorder')
 router.register(r'invoices', InvoiceViewSet, basename='invoice')
 
 urlpatterns = [
+    path('quick-card/<str:plate>/', quick_card, name='quick_card'),
+    path('mutations/', mutations, name='mutations'),
     path('', include(router.urls)),
 ]
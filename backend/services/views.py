@@ -1,8 +1,10 @@
 from rest_framework import viewsets, status, filters
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
 from django.db import transaction
+from django.http import FileResponse
 from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import ServiceOrder, ServiceItem, Invoice
@@ -13,18 +15,45 @@ from .serializers import (
     InvoiceSerializer,
     InvoiceCreateSerializer
 )
-from inventory.models import Product, StockMovement
+from core.conditional import ConditionalGetMixin
+from core.exports import ExportMixin, streaming_response
+from core.jobs import enqueue
+from core.serializers import JobSerializer
+from core.fastlist import FastListMixin
+from crm.models import Customer, Vehicle
+from inventory.models import Product
+from . import fiscal
+from .quickcard import get_quick_card
+from .documents import PDFCache, invoice_documents, order_documents
+from .mutations import BatchConflict, apply_batch, complete_order
+from .exports import ORDER_EXPORT, ITEM_EXPORT, INVOICE_EXPORT
+from .statistics import order_statistics, invoice_statistics
+from .fast_serializers import ORDER_LIST_FIELDS, INVOICE_LIST_FIELDS, serialize_orders, serialize_invoices
 
 
-class ServiceOrderViewSet(viewsets.ModelViewSet):
+def pdf_response(kind, document):
+    """
+    PDF del documento desde la caché en disco (se genera si no está)
+    """
+    path, cached = PDFCache().get(kind, document)
+    response = FileResponse(open(path, 'rb'), content_type='application/pdf', filename=f"{document['number']}.pdf")
+    response['X-Cache'] = 'HIT' if cached else 'MISS'
+    return response
+
+
+class ServiceOrderViewSet(ConditionalGetMixin, FastListMixin, ExportMixin, viewsets.ModelViewSet):
     """
     API endpoint para órdenes de servicio.
     """
     queryset = ServiceOrder.objects.select_related(
-        'vehicle',
-        'customer',
+        'vehicle__customer',
+        'customer__created_by',
         'created_by'
-    ).prefetch_related('items__product').all()
+    ).prefetch_related('items__product', 'customer__vehicles').all()
+    etag_models = [ServiceOrder, ServiceItem, Customer, Vehicle, Product]
+    fast_list_fields = ORDER_LIST_FIELDS
+    fast_list_builder = staticmethod(serialize_orders)
+    export = ORDER_EXPORT
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'customer', 'vehicle']
@@ -76,47 +105,8 @@ class ServiceOrderViewSet(viewsets.ModelViewSet):
         """
         service_order = self.get_object()
         
-        if service_order.status == 'COMPLETED':
-            return Response(
-                {'detail': 'La orden ya está completada.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        if service_order.status == 'CANCELLED':
-            return Response(
-                {'detail': 'No se puede completar una orden cancelada.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
         try:
-            with transaction.atomic():
-                # Descontar stock de productos
-                for item in service_order.items.filter(item_type='PRODUCT', product__isnull=False):
-                    product = Product.objects.select_for_update().get(pk=item.product.id)
-                    
-                    if product.stock_quantity < item.quantity:
-                        raise ValueError(
-                            f'Stock insuficiente para {product.name}. '
-                            f'Disponible: {product.stock_quantity}, Requerido: {item.quantity}'
-                        )
-                    
-                    # Actualizar stock
-                    product.stock_quantity -= item.quantity
-                    product.save()
-                    
-                    # Registrar movimiento de stock
-                    StockMovement.objects.create(
-                        product=product,
-                        movement_type='OUT',
-                        quantity=item.quantity,
-                        reason=f'Orden de servicio #{service_order.order_number}',
-                        performed_by=request.user
-                    )
-                
-                # Marcar orden como completada
-                service_order.status = 'COMPLETED'
-                service_order.completed_at = timezone.now()
-                service_order.save()
+            complete_order(service_order, request.user)
             
             return Response(
                 ServiceOrderSerializer(service_order).data,
@@ -161,36 +151,35 @@ class ServiceOrderViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
     
+    @action(detail=False, methods=['get'], url_path='export-items')
+    def export_items(self, request):
+        """
+        Ítems de las órdenes filtradas (mismos filtros que el listado) en CSV o XLSX.
+        """
+        orders = self.filter_queryset(self.get_queryset())
+        return self.export_response(ITEM_EXPORT, ServiceItem.objects.filter(service_order__in=orders.values('pk')))
+    
+    @action(detail=True, methods=['get'])
+    def pdf(self, request, pk=None):
+        """
+        Copia de la orden para el taller en PDF.
+        """
+        [document] = order_documents(ServiceOrder.objects.filter(pk=self.get_object().pk))
+        return pdf_response('order', document)
+    
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """
         Estadísticas de órdenes de servicio.
         """
-        from django.db.models import Count, Sum
-        
-        total_orders = ServiceOrder.objects.count()
-        pending = ServiceOrder.objects.filter(status='PENDING').count()
-        completed = ServiceOrder.objects.filter(status='COMPLETED').count()
-        cancelled = ServiceOrder.objects.filter(status='CANCELLED').count()
-        
-        total_revenue = ServiceOrder.objects.filter(
-            status='COMPLETED'
-        ).aggregate(total=Sum('total'))['total'] or 0
-        
-        return Response({
-            'total_orders': total_orders,
-            'pending': pending,
-            'completed': completed,
-            'cancelled': cancelled,
-            'total_revenue': float(total_revenue)
-        })
+        return Response(order_statistics())
     
     @action(detail=False, methods=['get'])
     def by_vehicle(self, request):
         """
         Obtiene el historial completo de órdenes de un vehículo.
         """
-        from django.db.models import Sum, Count
+        from django.db.models import Sum, Count, Max, Q
         
         vehicle_id = request.query_params.get('vehicle_id', None)
         
@@ -201,19 +190,22 @@ class ServiceOrderViewSet(viewsets.ModelViewSet):
             )
         
         # Obtener todas las órdenes del vehículo
-        orders = ServiceOrder.objects.filter(
-            vehicle_id=vehicle_id
-        ).select_related('vehicle', 'customer', 'created_by').prefetch_related('items__product').order_by('-created_at')
-        
-        # Calcular estadísticas
+        orders = self.queryset.filter(vehicle_id=vehicle_id).order_by('-created_at')
+        
+        # Calcular estadísticas en una sola consulta
+        totals = ServiceOrder.objects.filter(vehicle_id=vehicle_id).aggregate(
+            total_orders=Count('id'),
+            completed_orders=Count('id', filter=Q(status='COMPLETED')),
+            pending_orders=Count('id', filter=Q(status='PENDING')),
+            total_spent=Sum('total', filter=Q(status='COMPLETED')),
+            last_visit=Max('created_at'),
+        )
         stats = {
-            'total_orders': orders.count(),
-            'completed_orders': orders.filter(status='COMPLETED').count(),
-            'pending_orders': orders.filter(status='PENDING').count(),
-            'total_spent': float(orders.filter(status='COMPLETED').aggregate(
-                total=Sum('total')
-            )['total'] or 0),
-            'last_visit': orders.first().created_at if orders.exists() else None,
+            'total_orders': totals['total_orders'],
+            'completed_orders': totals['completed_orders'],
+            'pending_orders': totals['pending_orders'],
+            'total_spent': float(totals['total_spent'] or 0),
+            'last_visit': totals['last_visit'],
         }
         
         # Serializar órdenes
@@ -225,15 +217,19 @@ class ServiceOrderViewSet(viewsets.ModelViewSet):
         })
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(ConditionalGetMixin, FastListMixin, ExportMixin, viewsets.ModelViewSet):
     """
     API endpoint para facturas.
     """
     queryset = Invoice.objects.select_related(
-        'customer',
+        'customer__created_by',
         'service_order',
         'created_by'
-    ).all()
+    ).prefetch_related('customer__vehicles').all()
+    etag_models = [Invoice, ServiceOrder, Customer, Vehicle]
+    fast_list_fields = INVOICE_LIST_FIELDS
+    fast_list_builder = staticmethod(serialize_invoices)
+    export = INVOICE_EXPORT
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status', 'invoice_type', 'customer']
@@ -318,31 +314,123 @@ class InvoiceViewSet(viewsets.ModelViewSet):
             status=status.HTTP_200_OK
         )
     
+    @action(detail=True, methods=['get'])
+    def pdf(self, request, pk=None):
+        """
+        Factura en PDF.
+        """
+        [document] = invoice_documents(Invoice.objects.filter(pk=self.get_object().pk))
+        return pdf_response('invoice', document)
+    
+    @action(detail=False, methods=['post'], url_path='pdf-batch')
+    def pdf_batch(self, request):
+        """
+        Encola la impresión de las facturas filtradas (mismos filtros que el
+        listado, más ?month=YYYY-MM) en un ZIP (?output=zip) o un único PDF
+        (?output=pdf). Responde 202 con la tarea; el archivo se descarga
+        desde /api/jobs/<id>/download/.
+        """
+        fmt = request.query_params.get('output', 'zip')
+        if fmt not in ('zip', 'pdf'):
+            return Response(
+                {'error': 'El formato debe ser zip o pdf'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = self.filter_queryset(self.get_queryset())
+        month = request.query_params.get('month')
+        name = 'facturas'
+        if month:
+            try:
+                year, month_number = (int(part) for part in month.split('-'))
+            except ValueError:
+                return Response(
+                    {'error': 'El mes debe tener el formato YYYY-MM'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(issue_date__year=year, issue_date__month=month_number)
+            name = f'facturas-{year}-{month_number:02d}'
+        ids = list(queryset.values_list('pk', flat=True))
+        if not ids:
+            return Response(
+                {'error': 'No hay facturas para imprimir con esos filtros'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        job = enqueue('services.render_invoices', {'ids': ids, 'output': fmt, 'name': name}, created_by=request.user)
+        return Response(JobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'], url_path='iva-book')
+    def iva_book(self, request):
+        """
+        Libro IVA Ventas del mes (?month=YYYY-MM) como libro en CSV
+        (?output=csv) o archivos VENTAS_CBTE / VENTAS_ALICUOTAS de AFIP
+        (?output=cbte|alicuotas). Los meses cerrados se sirven desde disco.
+        """
+        output = request.query_params.get('output', 'csv')
+        try:
+            year, month = fiscal.parse_period(request.query_params.get('month'))
+            content, cached = fiscal.open_book(year, month, output)
+        except fiscal.FiscalError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        content_type, filename = fiscal.OUTPUTS[output][0], fiscal.filename(year, month, output)
+        if cached:
+            response = FileResponse(content, content_type=content_type, as_attachment=True, filename=filename)
+        else:
+            response = streaming_response(content, content_type, request)
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['X-Cache'] = 'HIT' if cached else 'MISS'
+        return response
+    
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """
         Estadísticas de facturación.
         """
-        from django.db.models import Sum, Count
-        
-        total_invoices = Invoice.objects.count()
-        issued = Invoice.objects.filter(status='ISSUED').count()
-        paid = Invoice.objects.filter(status='PAID').count()
-        cancelled = Invoice.objects.filter(status='CANCELLED').count()
-        
-        total_revenue = Invoice.objects.filter(
-            status__in=['ISSUED', 'PAID']
-        ).aggregate(total=Sum('total'))['total'] or 0
-        
-        pending_amount = Invoice.objects.filter(
-            status='ISSUED'
-        ).aggregate(total=Sum('total'))['total'] or 0
-        
-        return Response({
-            'total_invoices': total_invoices,
-            'issued': issued,
-            'paid': paid,
-            'cancelled': cancelled,
-            'total_revenue': float(total_revenue),
-            'pending_amount': float(pending_amount)
-        })
+        return Response(invoice_statistics())
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def quick_card(request, plate):
+    """
+    Ficha rápida de recepción por patente: vehículo, dueño, últimas órdenes,
+    órdenes pendientes, facturas impagas y próximo servicio estimado.
+    """
+    card, cached = get_quick_card(plate)
+    if card is None:
+        return Response(
+            {'error': 'No se encontró ningún vehículo con esa patente'},
+            status=status.HTTP_404_NOT_FOUND
+        )
+    response = Response(card)
+    response['X-Cache'] = 'HIT' if cached else 'MISS'
+    return response
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mutations(request):
+    """
+    Aplica en una transacción las operaciones encoladas por una tablet
+    (ver services.mutations). Responde 200 si se aplicaron todas y 400 con
+    el detalle por operación si alguna falló (no se aplica ninguna).
+    """
+    operations = request.data.get('operations') if isinstance(request.data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return Response(
+            {'error': 'Debe enviar una lista de operaciones'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(operations) > settings.MUTATION_BATCH_MAX:
+        return Response(
+            {'error': f'El lote no puede tener más de {settings.MUTATION_BATCH_MAX} operaciones'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    try:
+        applied, results = apply_batch(operations, request.user)
+    except BatchConflict as exc:
+        return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+    return Response(
+        {'applied': applied, 'results': results},
+        status=status.HTTP_200_OK if applied else status.HTTP_400_BAD_REQUEST
+    )
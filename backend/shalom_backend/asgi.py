@@ -1,5 +1,12 @@
 """
 ASGI config for shalom_backend project.
+
+Solo atiende los eventos en tiempo real (/api/events/), que mantienen
+conexiones abiertas; la API corre por WSGI (shalom_backend.wsgi). Bajo ASGI
+Django 5.0 arma en memoria las respuestas en streaming con iteradores
+sincrónicos (exportaciones, libros IVA, PDF) y cada request sincrónico
+corre en un hilo nuevo, así que las conexiones persistentes no se
+reutilizarían: acá se desactivan.
 """
 
 import os
@@ -7,5 +14,29 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shalom_backend.settings')
+os.environ.setdefault('DATABASE_CONN_MAX_AGE', '0')
+
+ASGI_PATHS = ('/api/events/',)
+
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and not scope['path'].startswith(ASGI_PATHS):
+        await send({
+            'type': 'http.response.start', 'status': 404,
+            'headers': [(b'content-type', b'text/plain; charset=utf-8')],
+        })
+        await send({'type': 'http.response.body', 'body': 'La API se sirve por WSGI'.encode()})
+        return
+    await django_application(scope, receive, send)
+
 
-application = get_asgi_application()
+# La aplicación se arma una sola vez al importar; luego se precalienta.
+# El servidor importa este módulo dentro del event loop, donde Django no
+# permite abrir conexiones (SynchronousOnlyOperation), y las vistas
+# sincrónicas corren en otro hilo con su propia conexión: la fase de la
+# base no aplica.
+if os.environ.get('DJANGO_WARMUP', '1') != '0':
+    from .warmup import warmup
+    warmup(skip=('database',))
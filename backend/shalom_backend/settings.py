@@ -3,6 +3,7 @@ Django settings for shalom_backend project.
 """
 
 from pathlib import Path
+import django
 from datetime import timedelta
 from decouple import config
 
@@ -48,9 +49,11 @@ INSTALLED_APPS = [
     'inventory',
     'crm',
     'services',
+    'core',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -94,9 +97,63 @@ DATABASES = {
         'PASSWORD': config('DATABASE_PASSWORD', default=''),
         'HOST': config('DATABASE_HOST', default=''),
         'PORT': config('DATABASE_PORT', default=''),
+        # Conexiones persistentes entre requests (segundos); se verifican antes de reutilizarlas
+        'CONN_MAX_AGE': config('DATABASE_CONN_MAX_AGE', default=600, cast=int),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
     }
 }
 
+# SQLite: espera hasta SQLITE_BUSY_TIMEOUT segundos ante un bloqueo de escritura
+# en lugar de fallar con "database is locked". Los PRAGMAs se aplican al crear
+# cada conexión (core.database.configure_connection)
+SQLITE_BUSY_TIMEOUT = config('SQLITE_BUSY_TIMEOUT', default=20, cast=int)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+    'cache_size': -config('SQLITE_CACHE_KB', default=64 * 1024, cast=int),
+    'busy_timeout': SQLITE_BUSY_TIMEOUT * 1000,
+    'temp_store': 'MEMORY',
+}
+
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default']['OPTIONS']['timeout'] = SQLITE_BUSY_TIMEOUT
+elif (
+    DATABASES['default']['ENGINE'] == 'django.db.backends.postgresql'
+    and config('DATABASE_POOL', default=True, cast=bool)
+    and django.VERSION >= (5, 1)
+):
+    # Pool nativo (Django 5.1+ con psycopg 3); no admite conexiones persistentes.
+    # Con Django 5.0 y psycopg2 cada worker mantiene su conexión persistente
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': config('DATABASE_POOL_MIN', default=2, cast=int),
+        'max_size': config('DATABASE_POOL_MAX', default=10, cast=int),
+    }
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+
+# Cache
+# Por defecto en memoria del proceso; en producción con varios workers
+# conviene un backend compartido (ej: CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache)
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='shalom-cache'),
+    }
+}
+
+# Caché propia de cada proceso: lo que se invalida en un worker sigue
+# vigente en los demás (y en runworker/process_outbox) hasta que expira
+CACHE_IS_LOCAL = CACHES['default']['BACKEND'].endswith(('LocMemCache', 'DummyCache'))
+
+# Ficha rápida de recepción: se invalida al cambiar el vehículo, sus órdenes o
+# facturas. Con caché local dura poco para acotar lo que otro worker sirve viejo.
+QUICK_CARD_CACHE_SECONDS = config(
+    'QUICK_CARD_CACHE_SECONDS', default=30 if CACHE_IS_LOCAL else 86400, cast=int
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -153,15 +210,97 @@ AUTH_USER_MODEL = 'accounts.User'
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # Renderer y parser JSON con orjson (misma salida que los de DRF)
+    'DEFAULT_RENDERER_CLASSES': (
+        config('JSON_RENDERER', default='core.renderers.FastJSONRenderer'),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        config('JSON_PARSER', default='core.renderers.FastJSONParser'),
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StandardResultsSetPagination',
     'PAGE_SIZE': 20,
 }
 
+# Instrumentación de requests (consultas, tiempos y métricas en /api/_metrics/)
+INSTRUMENTATION_ENABLED = config('INSTRUMENTATION_ENABLED', default=True, cast=bool)
+SLOW_REQUEST_MS = config('SLOW_REQUEST_MS', default=500, cast=int)
+
+# Búsqueda global: presupuesto de tiempo total para las consultas por entidad
+SEARCH_TIMEOUT_MS = config('SEARCH_TIMEOUT_MS', default=300, cast=int)
+
+# Dashboard: límite de tiempo de cada consulta (se ejecutan en paralelo salvo en SQLite)
+DASHBOARD_TIMEOUT_MS = config('DASHBOARD_TIMEOUT_MS', default=2000, cast=int)
+
+# Tareas en segundo plano: segundos sin latido tras los que una tarea RUNNING vuelve a la cola
+JOB_STALE_SECONDS = config('JOB_STALE_SECONDS', default=300, cast=int)
+
+# Sincronización incremental (/api/sync/): filas por modelo y página, segundos
+# que se reenvían para cubrir transacciones confirmadas tarde y días que se
+# conservan las bajas
+SYNC_PAGE_SIZE = config('SYNC_PAGE_SIZE', default=500, cast=int)
+SYNC_MAX_PAGE_SIZE = 2000
+SYNC_OVERLAP_SECONDS = config('SYNC_OVERLAP_SECONDS', default=5, cast=int)
+SYNC_TOMBSTONE_DAYS = config('SYNC_TOMBSTONE_DAYS', default=90, cast=int)
+
+# Lotes de GET (/api/batch/): requests por lote y tiempo máximo total
+BATCH_MAX_REQUESTS = config('BATCH_MAX_REQUESTS', default=20, cast=int)
+BATCH_TIMEOUT_MS = config('BATCH_TIMEOUT_MS', default=10000, cast=int)
+
+# Consultas de lectura (/api/query/): filas por defecto y máximo de las
+# listas, límites de profundidad y complejidad (filas estimadas) y duración
+# de las consultas persistidas en la caché
+QUERY_DEFAULT_LIMIT = 50
+QUERY_MAX_LIMIT = config('QUERY_MAX_LIMIT', default=500, cast=int)
+QUERY_MAX_DEPTH = config('QUERY_MAX_DEPTH', default=6, cast=int)
+QUERY_MAX_COMPLEXITY = config('QUERY_MAX_COMPLEXITY', default=20000, cast=int)
+QUERY_RELATION_ESTIMATE = 10
+QUERY_MAX_LENGTH = 10000
+QUERY_PERSISTED_SECONDS = config('QUERY_PERSISTED_SECONDS', default=7 * 24 * 3600, cast=int)
+
+# Eventos en tiempo real (/api/events/, SSE, leídos del outbox): intervalo
+# de consulta de cada proceso y duración de cada conexión
+EVENTS_POLL_SECONDS = config('EVENTS_POLL_SECONDS', default=2, cast=float)
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_MAX_SECONDS = config('EVENTS_MAX_SECONDS', default=300, cast=int)
+EVENTS_RETRY_MS = 3000
+EVENTS_REPLAY_MAX = 500
+EVENTS_REORDER_WINDOW = 50
+EVENTS_QUEUE_SIZE = 200
+
+# Outbox de eventos de dominio (core.outbox, comando process_outbox): espera
+# del consumidor, antigüedad a partir de la cual un hueco en los ids se da por
+# revertido y días que se conservan los eventos procesados (para replay)
+OUTBOX_POLL_SECONDS = config('OUTBOX_POLL_SECONDS', default=1, cast=float)
+OUTBOX_GAP_SECONDS = config('OUTBOX_GAP_SECONDS', default=60, cast=int)
+OUTBOX_RETENTION_DAYS = config('OUTBOX_RETENTION_DAYS', default=30, cast=int)
+
+# Operaciones en lote de las tablets (/api/services/mutations/)
+MUTATION_BATCH_MAX = config('MUTATION_BATCH_MAX', default=200, cast=int)
+
+# Impresión de facturas y órdenes (services.documents)
+PDF_ISSUER = {
+    'name': config('BUSINESS_NAME', default='Shalom Car Service'),
+    'address': config('BUSINESS_ADDRESS', default=''),
+    'tax_id': config('BUSINESS_CUIT', default=''),
+}
+PDF_CACHE_DIR = config('PDF_CACHE_DIR', default=str(MEDIA_ROOT / 'pdf'))
+PDF_WORKERS = config('PDF_WORKERS', default=4, cast=int)
+
+# Libro IVA Ventas (services.fiscal): punto de venta informado, días desde el
+# fin de mes para considerar cerrado el período y directorio de los libros
+# de períodos cerrados
+FISCAL_POINT_OF_SALE = config('FISCAL_POINT_OF_SALE', default=1, cast=int)
+FISCAL_CLOSE_DAYS = config('FISCAL_CLOSE_DAYS', default=0, cast=int)
+FISCAL_BOOK_DIR = config('FISCAL_BOOK_DIR', default=str(MEDIA_ROOT / 'fiscal'))
+
 # Simple JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=8),
@@ -176,6 +315,11 @@ SIMPLE_JWT = {
     'AUTH_TOKEN_CLASSES': ('rest_framework_simplejwt.tokens.AccessToken',),
 }
 
+# Segundos que CachedJWTAuthentication conserva cada usuario sin releerlo de la
+# base. Con caché local es lo que tarda una baja o revocación en llegar a los
+# demás workers (ver accounts/authentication.py)
+USER_CACHE_SECONDS = config('USER_CACHE_SECONDS', default=5 if CACHE_IS_LOCAL else 60, cast=int)
+
 # CORS Configuration
 CORS_ALLOWED_ORIGINS = [
     "https://ShalomCarService.pythonanywhere.com",
@@ -12,6 +12,7 @@ urlpatterns = [
     path('api/inventory/', include('inventory.urls')),
     path('api/crm/', include('crm.urls')),
     path('api/services/', include('services.urls')),
+    path('api/', include('core.urls')),
 ]
 
 if settings.DEBUG:
@@ -0,0 +1,105 @@
+"""
+Precalentamiento del proceso al arrancar (WSGI/ASGI).
+
+Lo que Django y DRF resuelven de forma perezosa en el primer request se
+hace al importar el entry point: compilación de las URLs (e importación de
+todas las vistas), conexión a la base, catálogos de traducción y los
+caches de _meta de los modelos que usan los serializers al armar sus campos.
+Se desactiva con DJANGO_WARMUP=0. Bajo ASGI se omite la conexión a la base.
+"""
+import logging
+import time
+
+logger = logging.getLogger('shalom.startup')
+
+
+def warm_urls():
+    from django.urls import get_resolver
+
+    def walk(resolver):
+        for pattern in resolver.url_patterns:
+            pattern.pattern.regex
+            if hasattr(pattern, 'url_patterns'):
+                walk(pattern)
+
+    resolver = get_resolver()
+    walk(resolver)
+    resolver.reverse_dict
+
+
+def warm_database():
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.ensure_connection()
+        # Con CONN_MAX_AGE=0 la conexión no se reutilizaría: se cierra
+        connection.close_if_unusable_or_obsolete()
+
+
+def warm_translations():
+    from django.conf import settings
+    from django.utils import translation
+
+    with translation.override(settings.LANGUAGE_CODE):
+        translation.gettext('This field is required.')
+
+
+def project_serializers():
+    """Serializers definidos en los módulos serializers de las apps del proyecto"""
+    from django.apps import apps
+    from django.conf import settings
+    from django.utils.module_loading import autodiscover_modules
+    from rest_framework import serializers
+
+    autodiscover_modules('serializers')
+    modules = {
+        f'{config.name}.serializers' for config in apps.get_app_configs()
+        if config.path.startswith(str(settings.BASE_DIR))
+    }
+    found, pending = [], [serializers.BaseSerializer]
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        if cls.__module__ in modules:
+            found.append(cls)
+    return found
+
+
+def warm_serializers():
+    count = 0
+    for serializer_class in project_serializers():
+        try:
+            serializer_class().fields
+        except Exception:
+            # Serializers que requieren contexto o argumentos: se arman en el request
+            continue
+        count += 1
+    return count
+
+
+PHASES = [
+    ('urls', warm_urls),
+    ('database', warm_database),
+    ('translations', warm_translations),
+    ('serializers', warm_serializers),
+]
+
+
+def warmup(skip=()):
+    """
+    Ejecuta las fases (salvo las de `skip`) y retorna la duración de cada
+    una en milisegundos
+    """
+    timings = {}
+    for name, phase in PHASES:
+        if name in skip:
+            continue
+        start = time.perf_counter()
+        try:
+            phase()
+        except Exception:
+            # El precalentamiento nunca debe impedir el arranque
+            logger.exception('Falló el precalentamiento (%s)', name)
+        timings[name] = round((time.perf_counter() - start) * 1000, 2)
+    logger.info('Precalentamiento: %s', timings)
+    return timings
@@ -9,3 +9,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'shalom_backend.settings')
 
 application = get_wsgi_application()
+
+# La aplicación se arma una sola vez al importar; luego se precalienta
+if os.environ.get('DJANGO_WARMUP', '1') != '0':
+    from .warmup import warmup
+    warmup()
@@ -75,6 +75,55 @@ export const getCustomerStatistics = async () => {
     return response.data;
 };
 
+/**
+ * Obtiene el ranking de clientes por segmentación RFM
+ * @param {Object} params - ordering, limit, segment, lapsed_days
+ * @returns {Promise} Lista de segmentos de clientes
+ */
+export const getCustomerSegments = async (params = {}) => {
+    const response = await api.get('/crm/customers/segments/', { params });
+    return response.data;
+};
+
+/**
+ * Obtiene sugerencias de clientes duplicados
+ * @param {Object} params - threshold y limit opcionales
+ * @returns {Promise} Lista de pares sugeridos
+ */
+export const getDuplicateCustomers = async (params = {}) => {
+    const response = await api.get('/crm/customers/duplicates/', { params });
+    return response.data;
+};
+
+/**
+ * Fusiona clientes duplicados en el cliente indicado
+ * @param {number} survivorId - ID del cliente que se conserva
+ * @param {number[]} duplicateIds - IDs de los clientes duplicados
+ * @returns {Promise} Resumen de la fusión y cliente resultante
+ */
+export const mergeCustomers = async (survivorId, duplicateIds) => {
+    const response = await api.post(`/crm/customers/${survivorId}/merge/`, {
+        duplicate_ids: duplicateIds,
+    });
+    return response.data;
+};
+
+/**
+ * Importa clientes y vehículos desde un archivo CSV
+ * @param {File} file - Planilla CSV del sistema anterior
+ * @param {boolean} dryRun - Solo validar, sin guardar
+ * @returns {Promise} Resumen de la importación con filas rechazadas
+ */
+export const importCustomers = async (file, dryRun = false) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    const response = await api.post('/crm/customers/import/', formData, {
+        params: { dry_run: dryRun },
+        headers: { 'Content-Type': 'multipart/form-data' },
+    });
+    return response.data;
+};
+
 // ==================== VEHÍCULOS ====================
 
 /**
@@ -161,6 +210,10 @@ export default {
     deleteCustomer,
     getCustomerVehicles,
     getCustomerStatistics,
+    getCustomerSegments,
+    getDuplicateCustomers,
+    mergeCustomers,
+    importCustomers,
     
     // Vehículos
     getVehicles,
@@ -0,0 +1,16 @@
+import api from './api';
+
+/**
+ * Búsqueda global de vehículos, clientes, productos y órdenes
+ * @param {string} query - Término de búsqueda (mínimo 2 caracteres)
+ * @param {Object} params - limit (máximo por tipo) y types (ej: 'vehicle,customer')
+ * @returns {Promise} { results, partial, timed_out, took_ms }
+ */
+export const globalSearch = async (query, params = {}) => {
+    const response = await api.get('/search/', { params: { q: query, ...params } });
+    return response.data;
+};
+
+export default {
+    globalSearch,
+};
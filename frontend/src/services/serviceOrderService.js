@@ -49,3 +49,8 @@ export const getVehicleOrderHistory = (vehicleId) => {
 export const updatePendingOrder = (id, data) => {
   return api.patch(`/services/orders/${id}/`, data);
 };
+
+// Ficha rápida de recepción por patente (vehículo, dueño, órdenes y facturas impagas)
+export const getQuickCard = (plate) => {
+  return api.get(`/services/quick-card/${encodeURIComponent(plate)}/`);
+};